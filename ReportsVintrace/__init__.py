@@ -8,7 +8,7 @@ Created: 2025-01-19
 Usage:
     from ReportsVintrace.old_ui.analysis_report import AnalysisReport
     
-    async with AnalysisReport(headless=False) as report:
+    async with AnalysisReport() as report:
         await report.login()
         await report.download()
 """
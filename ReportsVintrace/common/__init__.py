@@ -13,6 +13,7 @@ from .helpers import (
     navigate_to_reports_old_ui,
     find_report_strip_by_title,
     save_debug_screenshot,
+    track_selector_attempt,
 )
 
 __all__ = [
@@ -23,4 +24,5 @@ __all__ = [
     'navigate_to_reports_old_ui',
     'find_report_strip_by_title',
     'save_debug_screenshot',
+    'track_selector_attempt',
 ]
@@ -6,7 +6,6 @@ Author: GlipGlops-glitch
 Created: 2025-01-19
 """
 
-import asyncio
 import os
 from typing import Optional
 from abc import ABC, abstractmethod
@@ -14,6 +13,11 @@ from playwright.async_api import async_playwright, Page, Browser, BrowserContext
 from dotenv import load_dotenv
 
 from ReportsVintrace.config import OLD_URL, LOGIN_URL
+from tools.vintrace_browser import PROFILE as BROWSER_PROFILE
+from tools.vintrace_browser import launch_browser, new_context as new_browser_context, resolve_headless, track_page_loads
+from tools.vintrace_session import get_vintrace_session
+from tools.vintrace_trace import traced
+from tools.vintrace_waits import wait_for_loaders_hidden
 
 
 class BaseReport(ABC):
@@ -22,16 +26,19 @@ class BaseReport(ABC):
     Provides common functionality for browser management and login.
     """
     
-    def __init__(self, headless: bool = False, download_dir: Optional[str] = None):
+    def __init__(self, headless: Optional[bool] = None, download_dir: Optional[str] = None,
+                 profile: str = BROWSER_PROFILE):
         """
         Initialize the base report.
         
         Args:
-            headless: Whether to run browser in headless mode
+            headless: Whether to run browser in headless mode (default: VINTRACE_HEADLESS, on)
             download_dir: Directory for downloads (default: subclass specific)
+            profile: Browser profile, "lean" or "full" (see tools/vintrace_browser.py)
         """
-        self.headless = headless
+        self.headless = resolve_headless(headless)
         self.download_dir = download_dir
+        self.profile = profile
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
@@ -46,29 +53,32 @@ class BaseReport(ABC):
         """Context manager exit - cleanup browser"""
         await self.close()
         
+    @traced(none_is_failure=False)
     async def initialize_browser(self):
         """Initialize Playwright browser and context"""
         print("🌐 Initializing browser...")
         self.playwright = await async_playwright().start()
         
-        # Launch browser
-        self.browser = await self.playwright.chromium.launch(
+        # Launch browser (or connect to the shared one, see VINTRACE_BROWSER_CDP)
+        self.browser = await launch_browser(
+            self.playwright,
             headless=self.headless,
-            args=['--start-maximized']
+            profile=self.profile,
+            args=['--start-maximized'] if not self.headless else None
         )
         
         # Create context with download directory if specified
-        context_options = {
-            'viewport': None,
-            'no_viewport': True,
-        }
+        context_options = {}
+        if not self.headless and self.profile == "full":
+            context_options['no_viewport'] = True
         
         if self.download_dir:
             os.makedirs(self.download_dir, exist_ok=True)
             context_options['accept_downloads'] = True
         
-        self.context = await self.browser.new_context(**context_options)
+        self.context, blocker = await new_browser_context(self.browser, profile=self.profile, **context_options)
         self.page = await self.context.new_page()
+        track_page_loads(self.page, blocker)
         
         print("✓ Browser initialized")
         
@@ -113,9 +123,11 @@ class OldUIReport(BaseReport):
     Provides login functionality for old UI.
     """
     
+    @traced()
     async def login(self):
         """
         Login to Vintrace and navigate to old UI.
+        Reuses a saved session (tools/vintrace_session.py) when it is still valid.
         
         Returns:
             bool: True if login successful, False otherwise
@@ -133,6 +145,12 @@ class OldUIReport(BaseReport):
         
         print(f"📧 Using credentials for: {username}")
         
+        session = get_vintrace_session()
+        if await session.restore(self.page, OLD_URL):
+            print("✓ Successfully logged in to Old Vintrace UI")
+            print("=" * 60)
+            return True
+        
         # Navigate to login page
         print(f"🌐 Navigating to login page...")
         await self.page.goto(LOGIN_URL, wait_until="domcontentloaded")
@@ -162,16 +180,20 @@ class OldUIReport(BaseReport):
         
         # Wait for navigation and then go to old UI
         print("⏳ Waiting for authentication...")
-        await asyncio.sleep(3)
+        try:
+            await self.page.wait_for_url(lambda url: "/sign-in" not in url, timeout=60000)
+        except Exception as e:
+            print(f"⚠ Still on the sign-in page: {e}")
         
         # Navigate to old Vintrace URL
         print(f"🔄 Navigating to Old Vintrace UI...")
         await self.page.goto(OLD_URL, wait_until="domcontentloaded")
-        await asyncio.sleep(3)
+        await wait_for_loaders_hidden(self.page, timeout=60000)
         
         # Verify we're on the old UI
         current_url = self.page.url
         if "oldVintrace=true" in current_url:
+            await session.save(self.context)
             print("✓ Successfully logged in to Old Vintrace UI")
             print("=" * 60)
             return True
@@ -7,7 +7,6 @@ Created: 2025-01-19
 Refactored from: tools/vintrace_helpers.py
 """
 
-import asyncio
 import os
 import time
 import datetime
@@ -17,7 +16,9 @@ from playwright.async_api import Page, Frame
 from Selectors.old_ui.common import IframeSelectors, LoaderSelectors
 from Selectors.old_ui.navigation import NavigationSelectors
 from Selectors.old_ui.reports import ReportsSelectors
-from Selectors.tracking import track_selector_attempt
+from Selectors.tracking import track_selector_attempt as track_selector_performance
+from tools.vintrace_trace import record_selector, traced
+from tools.vintrace_waits import wait_for_dom_quiet, wait_for_loaders_hidden
 from ReportsVintrace.config import (
     LARGE_TIMEOUT,
     MEDIUM_TIMEOUT,
@@ -27,6 +28,15 @@ from ReportsVintrace.config import (
 )
 
 
+def track_selector_attempt(category: str, selector: str, success: bool, time_ms: float, context: Optional[str] = None):
+    """
+    Record a selector attempt in the selector performance stats and in the current
+    trace span (tools/vintrace_trace.py).
+    """
+    track_selector_performance(category=category, selector=selector, success=success, time_ms=time_ms, context=context)
+    record_selector(selector, success, time_ms)
+
+
 async def wait_for_all_vintrace_loaders(page_or_frame, timeout=LARGE_TIMEOUT):
     """
     Wait for all Vintrace loading indicators to disappear.
@@ -36,42 +46,14 @@ async def wait_for_all_vintrace_loaders(page_or_frame, timeout=LARGE_TIMEOUT):
         page_or_frame: Playwright Page or Frame object
         timeout: Maximum wait time in milliseconds
     """
-    try:
-        print("⏳ Waiting for Vintrace loaders to disappear...")
-        await page_or_frame.wait_for_function(
-            """
-            () => {
-                // Function to check if loader is hidden in a document
-                function allLoadersHidden(doc) {
-                    // Check for loader in iframe with specific ID pattern (new UI)
-                    const loaderDivs = doc.querySelectorAll('[id^="loader_Iframe_"]');
-                    for (let loader of loaderDivs) {
-                        const style = window.getComputedStyle(loader);
-                        // If any loader is visible, return false
-                        if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
-                            return false;
-                        }
-                    }
-
-                    // Check for the old-style loaders (classic vintrace)
-                    const long = doc.getElementById('serverDelayMessageLong');
-                    const main = doc.getElementById('serverDelayMessage');
-                    const longHidden = !long || getComputedStyle(long).visibility === 'hidden';
-                    const mainHidden = !main || getComputedStyle(main).visibility === 'hidden';
-
-                    return longHidden && mainHidden;
-                }
-
-                return allLoadersHidden(document);
-            }
-            """,
-            timeout=timeout
-        )
+    print("⏳ Waiting for Vintrace loaders to disappear...")
+    if await wait_for_loaders_hidden(page_or_frame, timeout=timeout):
         print("✓ All Vintrace loaders hidden")
-    except Exception as e:
-        print(f"⚠ Timeout waiting for loaders to hide (may be okay): {e}")
+    else:
+        print("⚠ Timeout waiting for loaders to hide (may be okay)")
 
 
+@traced()
 async def get_main_iframe(page: Page):
     """
     Get the main iframe that contains the Vintrace application.
@@ -85,8 +67,6 @@ async def get_main_iframe(page: Page):
     """
     print("🔍 Looking for main Vintrace iframe...")
     
-    await asyncio.sleep(2)
-    
     # Use selectors from the Selectors system
     iframe_selectors = IframeSelectors.IFRAME_MAIN.copy()
     
@@ -134,6 +114,7 @@ async def get_main_iframe(page: Page):
     return page
 
 
+@traced()
 async def navigate_to_reports_old_ui(page_or_frame):
     """
     Navigate to Reports section in old Vintrace UI.
@@ -158,7 +139,6 @@ async def navigate_to_reports_old_ui(page_or_frame):
                 is_visible = await element.is_visible()
                 if is_visible:
                     await element.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.5)
                     await element.click()
                     time_ms = (time.time() - start_time) * 1000
                     print(f"  ✓ Clicked Reports icon using selector: {selector}")
@@ -170,7 +150,7 @@ async def navigate_to_reports_old_ui(page_or_frame):
                         context="old_ui_reports"
                     )
                     await wait_for_all_vintrace_loaders(page_or_frame)
-                    await asyncio.sleep(2)
+                    await wait_for_dom_quiet(page_or_frame)
                     print("✓ Successfully navigated to Reports section")
                     return True
         except Exception as e:
@@ -189,6 +169,7 @@ async def navigate_to_reports_old_ui(page_or_frame):
     return False
 
 
+@traced()
 async def find_report_strip_by_title(page_or_frame, report_title: str):
     """
     Find a specific report strip section by its title.
@@ -6,7 +6,6 @@ Author: GlipGlops-glitch
 Created: 2025-01-19 (refactored from tools/vintrace_playwright_analysis_report.py)
 """
 
-import asyncio
 import os
 import shutil
 import time
@@ -21,16 +20,18 @@ from ReportsVintrace.common.helpers import (
     navigate_to_reports_old_ui,
     find_report_strip_by_title,
     save_debug_screenshot,
+    track_selector_attempt,
 )
 from ReportsVintrace.config import DOWNLOAD_TIMEOUT, SELECTOR_TIMEOUT
 from Selectors.old_ui.reports import ReportsSelectors
-from Selectors.tracking import track_selector_attempt
+from tools.vintrace_trace import traced
+from tools.vintrace_waits import wait_for_dom_quiet, wait_for_element_settled
 
 
 class AnalysisReport(OldUIReport):
     """Download Product Analysis data export from old Vintrace UI"""
     
-    def __init__(self, headless: bool = False, download_dir: Optional[str] = None):
+    def __init__(self, headless: Optional[bool] = None, download_dir: Optional[str] = None):
         super().__init__(headless=headless, download_dir=download_dir)
         self.default_download_dir = download_dir or "Main/data/vintrace_reports/analysis/"
         if not self.download_dir:
@@ -38,6 +39,7 @@ class AnalysisReport(OldUIReport):
         # Ensure download directory exists
         os.makedirs(self.download_dir, exist_ok=True)
     
+    @traced()
     async def download(
         self,
         start_date: str = "08/01/2025",
@@ -75,7 +77,7 @@ class AnalysisReport(OldUIReport):
         # Wait for page to be ready
         print("⏳ Ensuring page is ready before starting...")
         await wait_for_all_vintrace_loaders(iframe)
-        await asyncio.sleep(3)
+        await wait_for_dom_quiet(iframe)
         
         # Step 1: Navigate to Reports section
         success = await navigate_to_reports_old_ui(iframe)
@@ -100,7 +102,6 @@ class AnalysisReport(OldUIReport):
                     text = await element.inner_text()
                     if text.strip() == "Product analysis":
                         await element.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.5)
                         await element.click()
                         time_ms = (time.time() - start_time) * 1000
                         print(f"✓ Clicked 'Product analysis' using selector: {selector}")
@@ -113,7 +114,7 @@ class AnalysisReport(OldUIReport):
                         )
                         clicked_product_analysis = True
                         await wait_for_all_vintrace_loaders(iframe)
-                        await asyncio.sleep(2)
+                        await wait_for_dom_quiet(iframe)
                         break
             except Exception as e:
                 time_ms = (time.time() - start_time) * 1000
@@ -155,13 +156,9 @@ class AnalysisReport(OldUIReport):
                 
                 # Clear and fill
                 await date_input.click()
-                await asyncio.sleep(0.3)
-                await date_input.fill("")
-                await asyncio.sleep(0.3)
                 await date_input.fill(start_date)
-                await asyncio.sleep(0.5)
                 await date_input.press("Tab")
-                await asyncio.sleep(0.5)
+                await wait_for_element_settled(report_strip)
                 
                 time_ms = (time.time() - start_time) * 1000
                 print(f"✓ Set 'From' date to {start_date}")
@@ -199,13 +196,9 @@ class AnalysisReport(OldUIReport):
                 date_input = date_inputs[1]  # Second date input is "To"
                 
                 await date_input.click()
-                await asyncio.sleep(0.3)
-                await date_input.fill("")
-                await asyncio.sleep(0.3)
                 await date_input.fill(end_date)
-                await asyncio.sleep(0.5)
                 await date_input.press("Tab")
-                await asyncio.sleep(0.5)
+                await wait_for_element_settled(report_strip)
                 
                 time_ms = (time.time() - start_time) * 1000
                 print(f"✓ Set 'To' date to {end_date}")
@@ -239,7 +232,8 @@ class AnalysisReport(OldUIReport):
                 print("⚠ WARNING: Could not check 'Show active only', continuing anyway...")
         
         # Wait for form to update
-        await asyncio.sleep(1)
+        await wait_for_all_vintrace_loaders(iframe)
+        await wait_for_dom_quiet(iframe)
         
         # Step 7: Click the "Generate..." button
         print("\n📊 Clicking 'Generate...' button...")
@@ -254,6 +248,7 @@ class AnalysisReport(OldUIReport):
             print("=" * 60)
             return False
     
+    @traced()
     async def _check_active_only_checkbox(self, report_strip) -> bool:
         """
         Helper method to check the "Show active only" checkbox.
@@ -292,9 +287,8 @@ class AnalysisReport(OldUIReport):
                                 checkbox_parent = await checkbox_img.evaluate_handle("el => el.closest('div.checkbox-text') || el.parentElement")
                                 if checkbox_parent:
                                     await checkbox_parent.scroll_into_view_if_needed()
-                                    await asyncio.sleep(0.3)
                                     await checkbox_parent.click()
-                                    await asyncio.sleep(0.5)
+                                    await wait_for_element_settled(report_strip)
                                     time_ms = (time.time() - start_time) * 1000
                                     print(f"✓ Checked 'Show active only'")
                                     track_selector_attempt(
@@ -342,6 +336,7 @@ class AnalysisReport(OldUIReport):
         
         return False
     
+    @traced()
     async def _click_generate_button(self, report_strip, output_filename: str) -> bool:
         """
         Helper method to click the Generate button and handle download.
@@ -362,7 +357,6 @@ class AnalysisReport(OldUIReport):
                 
                 if button:
                     await button.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.5)
                     
                     # Set up download listener on the PAGE (not iframe)
                     async with self.page.expect_download(timeout=DOWNLOAD_TIMEOUT) as download_info:
@@ -12,7 +12,7 @@ from analysis_report import AnalysisReport
 
 async def main():
     """Main function to download analysis report"""
-    async with AnalysisReport(headless=False) as report:
+    async with AnalysisReport() as report:
         print("🔐 Logging in to Vintrace (Old UI)...")
         login_success = await report.login()
         
@@ -12,11 +12,10 @@ building upon the existing selector_tracker.py functionality.
 Features:
 - Track selector attempts (success/failure)
 - Performance metrics (time to find, success rate)
-- JSON storage with thread-safe writes
+- JSON storage with batched, append-only writes (app/utils/write_behind_log.py)
 - Performance analytics and reporting
 """
 
-import json
 import os
 import datetime
 import threading
@@ -24,6 +23,8 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass, asdict
 
+from app.utils.write_behind_log import WriteBehindJsonLog
+
 
 @dataclass
 class SelectorAttempt:
@@ -78,20 +79,12 @@ class SelectorPerformanceTracker:
                 stats_file = stats_dir / "selector_stats.json"
             
             self.stats_file = Path(stats_file)
-            self.data = self._load_stats()
-            self.write_lock = threading.Lock()
+            self.store = WriteBehindJsonLog(self.stats_file, self._init_stats_structure, self._apply_attempt)
             self.initialized = True
     
-    def _load_stats(self) -> Dict:
-        """Load existing stats from JSON file"""
-        if self.stats_file.exists():
-            try:
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"⚠ Could not load stats: {e}")
-                return self._init_stats_structure()
-        return self._init_stats_structure()
+    @property
+    def data(self) -> Dict:
+        return self.store.data
     
     def _init_stats_structure(self) -> Dict:
         """Initialize the stats data structure"""
@@ -105,45 +98,20 @@ class SelectorPerformanceTracker:
         }
     
     def _save_stats(self):
-        """Thread-safe save to JSON file"""
-        with self.write_lock:
-            try:
-                self.data["metadata"]["last_updated"] = datetime.datetime.now().isoformat()
-                
-                # Ensure directory exists
-                self.stats_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Write with UTF-8 encoding
-                with open(self.stats_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.data, f, indent=2, ensure_ascii=False)
-            except Exception as e:
-                print(f"⚠ Could not save stats: {e}")
+        """Write buffered attempts now (normally done on an interval and at exit)"""
+        self.store.flush()
     
-    def track_selector_attempt(
-        self,
-        category: str,
-        selector: str,
-        success: bool,
-        time_ms: float,
-        context: Optional[str] = None
-    ):
-        """
-        Track a selector attempt with timing information.
+    @staticmethod
+    def _apply_attempt(data: Dict, attempt: Dict):
+        """Fold one logged attempt into the stats"""
+        key = f"{attempt['category']}::{attempt['selector']}"
+        timestamp = attempt["timestamp"]
+        data["metadata"]["last_updated"] = timestamp
         
-        Args:
-            category: Category of selector (e.g., 'export_button', 'iframe')
-            selector: The actual selector string
-            success: Whether the selector successfully found the element
-            time_ms: Time taken to find element in milliseconds
-            context: Additional context (e.g., 'new_ui', 'vessels_page')
-        """
-        key = f"{category}::{selector}"
-        timestamp = datetime.datetime.now().isoformat()
-        
-        if key not in self.data["selectors"]:
-            self.data["selectors"][key] = {
-                "category": category,
-                "selector": selector,
+        if key not in data["selectors"]:
+            data["selectors"][key] = {
+                "category": attempt["category"],
+                "selector": attempt["selector"],
                 "total_attempts": 0,
                 "successful_attempts": 0,
                 "failed_attempts": 0,
@@ -155,31 +123,55 @@ class SelectorPerformanceTracker:
                 "attempts": []
             }
         
-        entry = self.data["selectors"][key]
+        entry = data["selectors"][key]
         entry["total_attempts"] += 1
         entry["last_seen"] = timestamp
         
-        if success:
+        if attempt["success"]:
             entry["successful_attempts"] += 1
             entry["last_success"] = timestamp
         else:
             entry["failed_attempts"] += 1
             entry["last_failure"] = timestamp
         
-        entry["times_ms"].append(time_ms)
+        entry["times_ms"].append(attempt["time_ms"])
         
         # Store attempt details (keep last 50 to avoid bloat)
-        attempt = {
+        entry["attempts"].append({
             "timestamp": timestamp,
-            "success": success,
-            "time_ms": time_ms,
-            "context": context
-        }
-        entry["attempts"].append(attempt)
+            "success": attempt["success"],
+            "time_ms": attempt["time_ms"],
+            "context": attempt.get("context")
+        })
         if len(entry["attempts"]) > 50:
             entry["attempts"] = entry["attempts"][-50:]
+    
+    def track_selector_attempt(
+        self,
+        category: str,
+        selector: str,
+        success: bool,
+        time_ms: float,
+        context: Optional[str] = None
+    ):
+        """
+        Track a selector attempt with timing information.
         
-        self._save_stats()
+        Args:
+            category: Category of selector (e.g., 'export_button', 'iframe')
+            selector: The actual selector string
+            success: Whether the selector successfully found the element
+            time_ms: Time taken to find element in milliseconds
+            context: Additional context (e.g., 'new_ui', 'vessels_page')
+        """
+        self.store.record({
+            "category": category,
+            "selector": selector,
+            "success": success,
+            "time_ms": time_ms,
+            "context": context,
+            "timestamp": datetime.datetime.now().isoformat(),
+        })
     
     def get_best_selectors(self, category: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
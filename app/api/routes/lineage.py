@@ -0,0 +1,154 @@
+# vintrick-backend/app/api/routes/lineage.py
+
+import hashlib
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.utils.lineage_cache import LineageSnapshot, get_lineage_cache
+
+router = APIRouter()
+
+
+def _current_snapshot() -> LineageSnapshot:
+    snapshot = get_lineage_cache().snapshot()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Lineage index has not been built yet.")
+    return snapshot
+
+
+def _lookup(batch: str) -> LineageSnapshot:
+    snapshot = _current_snapshot()
+    if batch not in snapshot:
+        raise HTTPException(status_code=404, detail=f"Batch '{batch}' not found in lineage graph.")
+    return snapshot
+
+
+def _etag(request: Request, snapshot: LineageSnapshot) -> str:
+    # Same graph version + same URL -> same body
+    key = f"{snapshot.version}|{request.url.path}|{request.url.query}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _cached_response(request: Request, snapshot: LineageSnapshot, build):
+    """304 when the client's ETag matches the current graph version, otherwise build the body."""
+    etag = _etag(request, snapshot)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=build(), headers=headers)
+
+
+@router.get("/lineage/{batch}/ancestors")
+def get_ancestors(
+    batch: str,
+    request: Request,
+    max_depth: Optional[int] = Query(None, ge=1),
+):
+    """Every upstream batch with its hop count and the gallons it contributed (split through intermediates)."""
+    snapshot = _lookup(batch)
+
+    def build():
+        depths = snapshot.ancestors(batch, max_depth)
+        gallons = snapshot.engine.attribution(batch, max_depth)
+        items = [
+            {"batch_name": name, "depth": depth, "gallons_attributed": gallons.get(name, 0.0)}
+            for name, depth in sorted(depths.items(), key=lambda item: (item[1], item[0]))
+        ]
+        return {"batch": batch, "max_depth": max_depth, "items": items, "total": len(items)}
+
+    return _cached_response(request, snapshot, build)
+
+
+@router.get("/lineage/{batch}/descendants")
+def get_descendants(
+    batch: str,
+    request: Request,
+    max_depth: Optional[int] = Query(None, ge=1),
+):
+    """Every downstream batch the given batch flowed into, with hop counts."""
+    snapshot = _lookup(batch)
+
+    def build():
+        depths = snapshot.descendants(batch, max_depth)
+        items = [
+            {"batch_name": name, "depth": depth}
+            for name, depth in sorted(depths.items(), key=lambda item: (item[1], item[0]))
+        ]
+        return {"batch": batch, "max_depth": max_depth, "items": items, "total": len(items)}
+
+    return _cached_response(request, snapshot, build)
+
+
+@router.get("/lineage/{batch}/composition")
+def get_composition(
+    batch: str,
+    request: Request,
+    max_depth: Optional[int] = Query(None, ge=1),
+):
+    """
+    What the batch is made of: the gallons and share of each source batch (ancestors with no
+    contributors of their own, or the cut-off level when max_depth is given).
+    """
+    snapshot = _lookup(batch)
+
+    def build():
+        engine = snapshot.engine
+        direct = engine.acyclic_parents(batch)
+        total = sum(direct.values())
+        gallons = engine.attribution(batch, max_depth)
+        depths = snapshot.ancestors(batch, max_depth)
+        sources = [
+            name for name in gallons
+            if not engine.acyclic_parents(name) or (max_depth is not None and depths.get(name) == max_depth)
+        ]
+        items = [
+            {
+                "batch_name": name,
+                "depth": depths.get(name),
+                "gallons": gallons[name],
+                "percent": round(100.0 * gallons[name] / total, 4) if total else None,
+            }
+            for name in sorted(sources, key=lambda name: -gallons[name])
+        ]
+        return {
+            "batch": batch,
+            "max_depth": max_depth,
+            "direct_gallons": total,
+            "direct_contributors": len(direct),
+            "items": items,
+            "total": len(items),
+        }
+
+    return _cached_response(request, snapshot, build)
+
+
+@router.get("/lineage/status")
+def get_lineage_status():
+    cache = get_lineage_cache()
+    snapshot = cache.snapshot()
+    return {
+        "index_dir": cache.index_dir,
+        "transactions_dir": cache.transactions_dir,
+        "loaded": snapshot is not None,
+        "version": snapshot.version if snapshot else None,
+        "last_error": cache.last_error,
+    }
+
+
+@router.post("/lineage/refresh")
+def refresh_lineage():
+    """Ingest new transaction files and reload the graph now instead of waiting for the next poll."""
+    cache = get_lineage_cache()
+    swapped = cache.refresh()
+    snapshot = cache.snapshot()
+    return {"reloaded": swapped, "version": snapshot.version if snapshot else None, "last_error": cache.last_error}
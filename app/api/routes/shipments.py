@@ -1,10 +1,14 @@
 # vintrick-backend/app/api/routes/shipments.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.schemas.shipment import ShipmentCreate, ShipmentOut
 from app.crud.shipment import (
     create_shipment,
+    create_shipments,
+    DEFAULT_BULK_BATCH_SIZE,
     get_shipment,
     get_shipment_by_number,
     get_all_shipments,
@@ -42,6 +46,25 @@ def create_shipment_route(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/shipments/bulk", response_model=dict)
+def create_shipments_route(
+    shipments: List[ShipmentCreate] = Body(..., embed=True),
+    batch_size: int = Body(DEFAULT_BULK_BATCH_SIZE, embed=True),
+    db: Session = Depends(get_db)
+):
+    # Shipments already stored (by shipmentNumber) are skipped rather than rejected
+    try:
+        created = create_shipments(db, shipments, batch_size=batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "created": len(created),
+        "skipped": len(shipments) - len(created),
+        "ids": [obj.id for obj in created],
+    }
+
 @router.get("/shipments/{shipment_id}", response_model=ShipmentOut)
 def read_shipment(shipment_id: int, db: Session = Depends(get_db)):
     db_obj = get_shipment(db, shipment_id)
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from app.utils.vintrace_client import VintraceSmartClient
 from app.crud import trans_sum  # You will need to implement this CRUD file
 from app.schemas.trans_sum import TransSumCreate, TransSumOut  # You will need to implement this schema
+from app.utils.transaction_sync import SyncState, DB_SYNC_KEY, last_modified
 
 router = APIRouter()
 
@@ -18,8 +19,16 @@ router = APIRouter()
 def pull_transactions(
     start_date: str = Body(..., embed=True),
     end_date: str = Body(..., embed=True),
+    incremental: bool = Body(False, embed=True),
+    batch_size: int = Body(trans_sum.DEFAULT_BULK_BATCH_SIZE, embed=True),
     db: Session = Depends(get_db)
 ):
+    """
+    Pull transactions day by day and merge them into trans_sum, keyed on subOperationId
+    (existing rows are updated in place, new ones inserted).
+    With incremental=true the window starts a few days before the DB sink's watermark and
+    transactions whose lastModified is not newer than the last DB sync are skipped.
+    """
     # Initialize Vintrace client
     client = VintraceSmartClient(
         api_key=os.getenv("VINTRACE_API_TOKEN"),
@@ -27,22 +36,47 @@ def pull_transactions(
     )
 
     endpoint_key = "GET:/transaction/search"
+    # Watermark of what reached the DB; the file fetchers keep their own (FILES_SYNC_KEY)
+    sync_key = DB_SYNC_KEY
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
     transactions_saved = []
 
+    sync_state = None
+    watermark_last_modified = None
+    max_seen_last_modified = None
+    if incremental:
+        sync_state = SyncState()
+        watermark_last_modified = sync_state.max_last_modified(sync_key)
+        window_start, window_end = sync_state.sync_window(sync_key, default_start=start.date(), end=end.date())
+        start = datetime.combine(window_start, datetime.min.time())
+        end = datetime.combine(window_end, datetime.min.time())
+
     for i in range((end - start).days + 1):
         day = (start + timedelta(days=i)).strftime("%Y-%m-%d")
         params = {"startDate": day}
         try:
             transactions = client.call_endpoint(endpoint_key, params=params)
+            day_payloads = []
             for tx in transactions.get("transactionSummaries", []):
+                tx_last_modified = last_modified(tx)
+                if tx_last_modified is not None:
+                    max_seen_last_modified = max(max_seen_last_modified or tx_last_modified, tx_last_modified)
+                    # Already synced and not modified since
+                    if watermark_last_modified is not None and tx_last_modified <= watermark_last_modified:
+                        continue
                 # Map fields from Vintrace to TransSumCreate here
                 tx_payload = map_vintrace_to_trans_sum(tx)
-                db_obj = trans_sum.create_trans_sum(db, TransSumCreate(**tx_payload))
-                transactions_saved.append(TransSumOut.model_validate(db_obj))
+                day_payloads.append(TransSumCreate(**tx_payload))
+            # One flush/commit per batch instead of per row
+            db_objs = trans_sum.bulk_upsert_trans_sums(db, day_payloads, batch_size=batch_size)
+            transactions_saved.extend(TransSumOut.model_validate(db_obj) for db_obj in db_objs)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error on {day}: {e}")
+
+    if sync_state is not None:
+        sync_state.advance(sync_key, end.date(), max_seen_last_modified)
+        sync_state.save()
     return transactions_saved
 
 def map_vintrace_to_trans_sum(tx: dict) -> dict:
@@ -51,6 +85,7 @@ def map_vintrace_to_trans_sum(tx: dict) -> dict:
         "formattedDate": tx.get("formattedDate"),
         "date": tx.get("date"),
         "operationId": tx.get("operationId"),
+        "subOperationId": tx.get("subOperationId"),
         "operationTypeId": tx.get("operationTypeId"),
         "operationTypeName": tx.get("operationTypeName"),
         "subOperationTypeId": tx.get("subOperationTypeId"),
@@ -66,10 +66,12 @@ def run_trans_fetch(
 def pull_transactions_from_vintrace(
     start_date: str = Body(...),
     end_date: str = Body(...),
+    batch_size: int = Body(trans_sum_crud.DEFAULT_BULK_BATCH_SIZE),
     db: Session = Depends(get_db)
 ):
     """
     Fetches transactions from Vintrace using the REST API and uploads them to SQL DB.
+    Records are validated one by one, then inserted in batches (one commit per batch).
     """
     vintrace_api = get_vintrace_api()
     try:
@@ -78,13 +80,24 @@ def pull_transactions_from_vintrace(
         results = vintrace_data.get("results", [])
         uploaded = []
         errors = []
+        valid_records = []
+        payloads = []
         for rec in results:
             try:
-                payload = TransSumCreate(**rec)
-                db_obj = trans_sum_crud.create_trans_sum(db, payload)
-                uploaded.append(str(getattr(db_obj, "operation_id", getattr(db_obj, "id", None))) or "unknown")
+                payloads.append(TransSumCreate(**rec))
+                valid_records.append(rec)
             except Exception as e:
                 errors.append({"record": rec, "error": str(e)})
+        for start in range(0, len(payloads), batch_size):
+            try:
+                db_objs = trans_sum_crud.bulk_create_trans_sums(db, payloads[start:start + batch_size], batch_size=batch_size)
+                uploaded.extend(
+                    str(getattr(db_obj, "operation_id", getattr(db_obj, "id", None))) or "unknown"
+                    for db_obj in db_objs
+                )
+            except Exception as e:
+                # The failed batch was rolled back as a whole
+                errors.extend({"record": rec, "error": str(e)} for rec in valid_records[start:start + batch_size])
         return {
             "start_date": start_date,
             "end_date": end_date,
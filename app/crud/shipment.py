@@ -1,5 +1,12 @@
 # vintrick-backend/app/crud/shipment.py
 
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
 from sqlalchemy.orm import Session
 from app.models.shipment import (
     Shipment, ShipmentParty, ShipmentDestination, ShipmentDispatchType,
@@ -7,28 +14,130 @@ from app.models.shipment import (
     DesignatedProduct, ProductCategory, Grading, WineryBuilding, WineCost
 )
 from app.schemas.shipment import ShipmentCreate
-from typing import Optional
 
-import json
+logger = logging.getLogger("app.crud.shipment")
+
+DEFAULT_DIMENSION_CACHE_SIZE = int(os.getenv("SHIPMENT_DIMENSION_CACHE_SIZE", "10000"))
+DEFAULT_BULK_BATCH_SIZE = 200
+
+
+class DimensionCache:
+    """
+    LRU map of (model, natural key) -> primary key for the shipment lookup tables
+    (parties, carriers, regions, wine batches, ...). A hit is resolved with
+    Session.get(), which is answered from the session's identity map without a query
+    when the row was already loaded in this unit of work.
+
+    Use one per request/upload run, or the process-level instance from
+    get_dimension_cache(). Call discard_pending() after a rollback so ids of rows that
+    were never committed are forgotten.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_DIMENSION_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids: "OrderedDict[tuple, int]" = OrderedDict()
+        self._pending: Dict[int, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            pk = self._ids.get(key)
+            if pk is None:
+                self.misses += 1
+                return None
+            self._ids.move_to_end(key)
+            self.hits += 1
+            return pk
+
+    def put(self, key: tuple, pk: int, pending_for: Optional[Session] = None) -> None:
+        """Remember `pk` for `key`; `pending_for` marks it as created but not yet committed by that session."""
+        with self._lock:
+            self._ids[key] = pk
+            self._ids.move_to_end(key)
+            if pending_for is not None:
+                self._pending.setdefault(id(pending_for), set()).add(key)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def invalidate(self, key: tuple) -> None:
+        with self._lock:
+            self._ids.pop(key, None)
+
+    def mark_committed(self, db: Session) -> None:
+        with self._lock:
+            self._pending.pop(id(db), None)
+
+    def discard_pending(self, db: Session) -> None:
+        """Forget rows `db` created since its last commit (their ids were rolled back)."""
+        with self._lock:
+            for key in self._pending.pop(id(db), ()):
+                self._ids.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+_dimension_cache = DimensionCache()
+
 
-def get_or_create(db: Session, model, defaults=None, **kwargs):
+def get_dimension_cache() -> DimensionCache:
+    """Process-level cache shared by create_shipment/create_shipments when none is passed."""
+    return _dimension_cache
+
+
+def _natural_key(model, kwargs: dict) -> tuple:
+    parts = []
+    for k in sorted(kwargs):
+        v = kwargs[k]
+        # Related dimension rows (WineBatch.grading, ShipmentDestination.party) key on their id
+        if hasattr(v, "__table__"):
+            v = ("fk", v.id)
+        parts.append((k, v))
+    return (model.__name__, tuple(parts))
+
+
+def get_or_create(db: Session, model, defaults=None, cache: Optional[DimensionCache] = None, **kwargs):
     # Flatten dicts to their 'name' field if present
     for k, v in list(kwargs.items()):
         if isinstance(v, dict):
             kwargs[k] = v.get("name") if "name" in v else None
+    # An unset id (e.g. WineCost.model_dump()) is not part of the natural key
+    if kwargs.get("id", False) is None:
+        kwargs.pop("id")
+
+    key = _natural_key(model, kwargs) if cache is not None else None
+    if key is not None:
+        pk = cache.get(key)
+        if pk is not None:
+            instance = db.get(model, pk)
+            if instance is not None:
+                return instance
+            cache.invalidate(key)
+
     instance = db.query(model).filter_by(**kwargs).first()
-    if instance:
-        return instance
-    params = dict((k, v) for k, v in kwargs.items())
-    if defaults:
-        params.update(defaults)
-    instance = model(**params)
-    db.add(instance)
-    db.commit()
-    db.refresh(instance)
+    if instance is None:
+        params = dict((k, v) for k, v in kwargs.items())
+        if defaults:
+            params.update(defaults)
+        instance = model(**params)
+        db.add(instance)
+        # Flush (not commit) so the id is known; the caller commits the whole unit of work
+        db.flush()
+        if key is not None:
+            cache.put(key, instance.id, pending_for=db)
+    elif key is not None:
+        cache.put(key, instance.id)
     return instance
 
-def create_wine_detail(db: Session, wd: dict):
+def create_wine_detail(db: Session, wd: dict, cache: Optional[DimensionCache] = None):
     wine_batch_data = wd.get("wineBatch", {})
     designated_region = None
     designated_variety = None
@@ -40,21 +149,21 @@ def create_wine_detail(db: Session, wd: dict):
     if wine_batch_data:
         if wine_batch_data.get("designatedRegion"):
             dr = wine_batch_data["designatedRegion"]
-            designated_region = get_or_create(db, DesignatedRegion, name=dr.get("name"))
+            designated_region = get_or_create(db, DesignatedRegion, cache=cache, name=dr.get("name"))
         if wine_batch_data.get("designatedVariety"):
             dv = wine_batch_data["designatedVariety"]
-            designated_variety = get_or_create(db, DesignatedVariety, name=dv.get("name"))
+            designated_variety = get_or_create(db, DesignatedVariety, cache=cache, name=dv.get("name"))
         if wine_batch_data.get("designatedProduct"):
             dp = wine_batch_data["designatedProduct"]
-            designated_product = get_or_create(db, DesignatedProduct, name=dp.get("name"))
+            designated_product = get_or_create(db, DesignatedProduct, cache=cache, name=dp.get("name"))
         if wine_batch_data.get("productCategory"):
             pc = wine_batch_data["productCategory"]
-            product_category = get_or_create(db, ProductCategory, name=pc.get("name"))
+            product_category = get_or_create(db, ProductCategory, cache=cache, name=pc.get("name"))
         if wine_batch_data.get("grading"):
             g = wine_batch_data["grading"]
-            grading = get_or_create(db, Grading, scaleId=g.get("scaleId"), scaleName=g.get("scaleName"),
+            grading = get_or_create(db, Grading, cache=cache, scaleId=g.get("scaleId"), scaleName=g.get("scaleName"),
                                    valueId=g.get("valueId"), valueName=g.get("valueName"))
-        wine_batch = get_or_create(db, WineBatch,
+        wine_batch = get_or_create(db, WineBatch, cache=cache,
                                    name=wine_batch_data.get("name"),
                                    description=wine_batch_data.get("description"),
                                    vintage=wine_batch_data.get("vintage"),
@@ -68,11 +177,11 @@ def create_wine_detail(db: Session, wd: dict):
     winery_building = None
     if wd.get("wineryBuilding"):
         wb = wd["wineryBuilding"]
-        winery_building = get_or_create(db, WineryBuilding, name=wb.get("name"))
+        winery_building = get_or_create(db, WineryBuilding, cache=cache, name=wb.get("name"))
 
     cost = None
     if wd.get("cost"):
-        cost = get_or_create(db, WineCost, **wd["cost"])
+        cost = get_or_create(db, WineCost, cache=cache, **wd["cost"])
 
     # Handle 'loss' field: use volume.value if dict, else float or None
     loss_val = None
@@ -103,18 +212,19 @@ def create_wine_detail(db: Session, wd: dict):
         weight=wd.get("weight"),
     )
     db.add(wine_detail)
-    db.commit()
-    db.refresh(wine_detail)
     return wine_detail
 
-def create_shipment(db: Session, shipment: ShipmentCreate) -> Shipment:
-    s = shipment.model_dump()
-
+def build_shipment(db: Session, s: dict, cache: Optional[DimensionCache] = None) -> Shipment:
+    """
+    Resolve the lookup rows for one shipment payload and return the (uncommitted) Shipment
+    with its wine details attached. Dimension rows are flushed as they are created so
+    later lookups in the same unit of work find them.
+    """
     # Nested objects
     source_obj = None
     if s.get("source"):
         src = s["source"]
-        source_obj = get_or_create(db, ShipmentParty, name=src.get("name"), businessUnit=src.get("businessUnit"))
+        source_obj = get_or_create(db, ShipmentParty, cache=cache, name=src.get("name"), businessUnit=src.get("businessUnit"))
 
     destination_obj = None
     if s.get("destination"):
@@ -123,24 +233,24 @@ def create_shipment(db: Session, shipment: ShipmentCreate) -> Shipment:
         winery_val = None
         if dest.get("party"):
             party = dest["party"]
-            party_obj = get_or_create(db, ShipmentParty, name=party.get("name"), businessUnit=party.get("businessUnit"))
+            party_obj = get_or_create(db, ShipmentParty, cache=cache, name=party.get("name"), businessUnit=party.get("businessUnit"))
         if dest.get("winery"):
             winery = dest["winery"]
             if isinstance(winery, dict):
                 winery_val = winery.get("name")
             else:
                 winery_val = winery
-        destination_obj = get_or_create(db, ShipmentDestination, winery=winery_val, party=party_obj)
+        destination_obj = get_or_create(db, ShipmentDestination, cache=cache, winery=winery_val, party=party_obj)
 
     dispatch_type_obj = None
     if s.get("dispatchType"):
         dt = s["dispatchType"]
-        dispatch_type_obj = get_or_create(db, ShipmentDispatchType, name=dt.get("name"))
+        dispatch_type_obj = get_or_create(db, ShipmentDispatchType, cache=cache, name=dt.get("name"))
 
     carrier_obj = None
     if s.get("carrier"):
         cr = s["carrier"]
-        carrier_obj = get_or_create(db, ShipmentCarrier, name=cr.get("name"))
+        carrier_obj = get_or_create(db, ShipmentCarrier, cache=cache, name=cr.get("name"))
 
     shipment_obj = Shipment(
         workOrderNumber=s.get("workOrderNumber"),
@@ -158,20 +268,82 @@ def create_shipment(db: Session, shipment: ShipmentCreate) -> Shipment:
         carrier=carrier_obj
     )
     db.add(shipment_obj)
-    db.commit()
-    db.refresh(shipment_obj)
 
-    wine_details = s.get("wineDetails", [])
-    wine_details_objs = []
-    for wd in wine_details:
-        wd_obj = create_wine_detail(db, wd)
-        wd_obj.shipment = shipment_obj
-        db.add(wd_obj)
-        wine_details_objs.append(wd_obj)
-    db.commit()
+    for wd in s.get("wineDetails") or []:
+        shipment_obj.wineDetails.append(create_wine_detail(db, wd, cache=cache))
+
+    return shipment_obj
 
+def create_shipment(db: Session, shipment: ShipmentCreate, cache: Optional[DimensionCache] = None) -> Shipment:
+    """Create a shipment, its wine details and any new lookup rows in a single commit."""
+    cache = cache if cache is not None else get_dimension_cache()
+    try:
+        shipment_obj = build_shipment(db, shipment.model_dump(), cache=cache)
+        db.commit()
+    except Exception:
+        db.rollback()
+        cache.discard_pending(db)
+        raise
+    cache.mark_committed(db)
+    db.refresh(shipment_obj)
     return shipment_obj
 
+def create_shipments(
+    db: Session,
+    shipments: List[ShipmentCreate],
+    batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    cache: Optional[DimensionCache] = None,
+    skip_existing: bool = True,
+) -> List[Shipment]:
+    """
+    Bulk version of create_shipment for the upload scripts: one commit per batch and one
+    dimension cache for the whole run, so repeated parties/carriers/batches are looked up
+    once. With skip_existing, shipments whose shipmentNumber is already in the database
+    (or earlier in the input) are skipped instead of duplicated.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    cache = cache if cache is not None else get_dimension_cache()
+    created: List[Shipment] = []
+    seen_numbers = set()
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        for start in range(0, len(shipments), batch_size):
+            payloads = [sh.model_dump() for sh in shipments[start:start + batch_size]]
+            if skip_existing:
+                numbers = {p["shipmentNumber"] for p in payloads if p.get("shipmentNumber")}
+                if numbers:
+                    seen_numbers.update(
+                        n for (n,) in db.query(Shipment.shipmentNumber)
+                        .filter(Shipment.shipmentNumber.in_(numbers - seen_numbers))
+                    )
+                fresh = []
+                for p in payloads:
+                    number = p.get("shipmentNumber")
+                    if number and number in seen_numbers:
+                        continue
+                    if number:
+                        seen_numbers.add(number)
+                    fresh.append(p)
+                payloads = fresh
+            try:
+                batch = [build_shipment(db, p, cache=cache) for p in payloads]
+                db.commit()
+            except Exception:
+                db.rollback()
+                cache.discard_pending(db)
+                raise
+            cache.mark_committed(db)
+            created.extend(batch)
+            logger.info(
+                f"Committed shipment batch of {len(batch)} ({len(created)} created, "
+                f"{min(start + batch_size, len(shipments))}/{len(shipments)} processed, cache {cache.stats()})"
+            )
+    finally:
+        db.expire_on_commit = expire_on_commit
+    return created
+
 def get_shipment(db: Session, shipment_id: int) -> Optional[Shipment]:
     return db.query(Shipment).filter(Shipment.id == shipment_id).first()
 
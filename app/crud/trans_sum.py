@@ -1,12 +1,13 @@
 # vintrick-backend/app/crud/trans_sum.py
 
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from app.models.trans_sum import (
     VesselDetails, Vessels, LossDetails,
     Additives, AdditionOps, MetricAnalysis, AnalysisOps, TransSum
 )
 from app.schemas.trans_sum import TransSumCreate
-from typing import Optional
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger("app.crud.trans_sum")
@@ -33,145 +34,114 @@ def safe_get(val):
         return val if len(val) > 0 else None
     return val
 
-def insert_trans_sum_transaction(db: Session, tx: dict):
-    def insert_vessel_details(d):
-        d = safe_get(d)
-        if not d:
-            logger.info(f"No vessel details provided or vessel details are empty: {d}, skipping VesselDetails insert.")
-            return None
-        vd = VesselDetails(
-            contentsId=d.get("contentsId"),
-            batch=d.get("batch"),
-            batchId=d.get("batchId"),
-            volume=d.get("volume"),
-            volumeUnit=d.get("volumeUnit"),
-            dip=d.get("dip"),
-            state=d.get("state"),
-            rawTaxClass=d.get("rawTaxClass"),
-            federalTaxClass=d.get("federalTaxClass"),
-            stateTaxClass=d.get("stateTaxClass"),
-            program=d.get("program"),
-        )
-        db.add(vd)
-        db.flush()
-        return vd.id
-
-    def insert_vessel(vessel, is_from=True):
-        vessel = safe_get(vessel)
-        if not vessel:
-            logger.info(f"No vessel provided or vessel is empty: {vessel}, skipping Vessels insert.")
-            return None
-        before_id = insert_vessel_details(vessel.get("beforeDetails"))
-        after_id = insert_vessel_details(vessel.get("afterDetails"))
-        v = Vessels(
-            name=vessel.get("name"),
-            beforeDetailsId=before_id,
-            afterDetailsId=after_id,
-            volOut=vessel.get("volOut") if is_from else None,
-            volOutUnit=vessel.get("volOutUnit") if is_from else None,
-            volIn=vessel.get("volIn") if not is_from else None,
-            volInUnit=vessel.get("volInUnit") if not is_from else None
-        )
-        db.add(v)
-        db.flush()
-        return v.id
-
-    # Insert vessels only if present and not empty
-    from_vessel_id = insert_vessel(tx.get("fromVessel"), is_from=True)
-    to_vessel_id = insert_vessel(tx.get("toVessel"), is_from=False)
+def _build_vessel_details(d) -> Optional[VesselDetails]:
+    d = safe_get(d)
+    if not d:
+        logger.info(f"No vessel details provided or vessel details are empty: {d}, skipping VesselDetails insert.")
+        return None
+    return VesselDetails(
+        contentsId=d.get("contentsId"),
+        batch=d.get("batch"),
+        batchId=d.get("batchId"),
+        volume=d.get("volume"),
+        volumeUnit=d.get("volumeUnit"),
+        dip=d.get("dip"),
+        state=d.get("state"),
+        rawTaxClass=d.get("rawTaxClass"),
+        federalTaxClass=d.get("federalTaxClass"),
+        stateTaxClass=d.get("stateTaxClass"),
+        program=d.get("program"),
+    )
 
-    loss_details = safe_get(tx.get("lossDetails"))
-    loss_details_id = None
-    if loss_details:
-        ld = LossDetails(
-            volume=loss_details.get("volume"),
-            volumeUnit=loss_details.get("volumeUnit"),
-            reason=loss_details.get("reason"),
-        )
-        db.add(ld)
-        db.flush()
-        loss_details_id = ld.id
+def _build_vessel(vessel, is_from=True) -> Optional[Vessels]:
+    vessel = safe_get(vessel)
+    if not vessel:
+        logger.info(f"No vessel provided or vessel is empty: {vessel}, skipping Vessels insert.")
+        return None
+    return Vessels(
+        name=vessel.get("name"),
+        beforeDetails=_build_vessel_details(vessel.get("beforeDetails")),
+        afterDetails=_build_vessel_details(vessel.get("afterDetails")),
+        volOut=vessel.get("volOut") if is_from else None,
+        volOutUnit=vessel.get("volOutUnit") if is_from else None,
+        volIn=vessel.get("volIn") if not is_from else None,
+        volInUnit=vessel.get("volInUnit") if not is_from else None
+    )
 
+def _build_addition_ops(tx: dict) -> Optional[AdditionOps]:
     # Handle Additives as part of AdditionOps
     additive = None
     if tx.get("additionOps"):
         additive = safe_get(tx["additionOps"].get("additive"))
-    additive_id = None
-    if additive:
-        ad = Additives(
-            name=additive.get("name"),
-            description=additive.get("description"),
-        )
-        db.add(ad)
-        db.flush()
-        additive_id = ad.id
 
     addition_ops = safe_get(tx.get("additionOps"))
-    addition_ops_id = None
-    if addition_ops:
-        # Handle lotNumbers: Vintrace sends as a list; DB expects a string
-        lot_numbers = addition_ops.get("lotNumbers")
-        if isinstance(lot_numbers, list):
-            lot_numbers = ", ".join(str(x) for x in lot_numbers)
-        elif lot_numbers is None:
-            lot_numbers = None
-        else:
-            lot_numbers = str(lot_numbers)
-        ao = AdditionOps(
-            vesselId=addition_ops.get("vesselId"),
-            vesselName=addition_ops.get("vesselName"),
-            batchId=addition_ops.get("batchId"),
-            batchName=addition_ops.get("batchName"),
-            templateId=addition_ops.get("templateId"),
-            templateName=addition_ops.get("templateName"),
-            changeToState=addition_ops.get("changeToState"),
-            volume=addition_ops.get("volume"),
-            amount=addition_ops.get("amount"),
-            unit=addition_ops.get("unit"),
-            lotNumbers=lot_numbers,
-            additiveId=additive_id,
-        )
-        db.add(ao)
-        db.flush()
-        addition_ops_id = ao.id
+    if not addition_ops:
+        return None
+    # Handle lotNumbers: Vintrace sends as a list; DB expects a string
+    lot_numbers = addition_ops.get("lotNumbers")
+    if isinstance(lot_numbers, list):
+        lot_numbers = ", ".join(str(x) for x in lot_numbers)
+    elif lot_numbers is not None:
+        lot_numbers = str(lot_numbers)
+    return AdditionOps(
+        vesselId=addition_ops.get("vesselId"),
+        vesselName=addition_ops.get("vesselName"),
+        batchId=addition_ops.get("batchId"),
+        batchName=addition_ops.get("batchName"),
+        templateId=addition_ops.get("templateId"),
+        templateName=addition_ops.get("templateName"),
+        changeToState=addition_ops.get("changeToState"),
+        volume=addition_ops.get("volume"),
+        amount=addition_ops.get("amount"),
+        unit=addition_ops.get("unit"),
+        lotNumbers=lot_numbers,
+        additive=Additives(
+            name=additive.get("name"),
+            description=additive.get("description"),
+        ) if additive else None,
+    )
 
+def _build_analysis_ops(tx: dict) -> Optional[AnalysisOps]:
     analysis_ops = safe_get(tx.get("analysisOps"))
-    analysis_ops_id = None
-    if analysis_ops:
-        ao = AnalysisOps(
-            vesselId=analysis_ops.get("vesselId"),
-            vesselName=analysis_ops.get("vesselName"),
-            batchId=analysis_ops.get("batchId"),
-            batchName=analysis_ops.get("batchName"),
-            templateId=analysis_ops.get("templateId"),
-            templateName=analysis_ops.get("templateName"),
-        )
-        db.add(ao)
-        db.flush()
-        analysis_ops_id = ao.id
-        metrics = analysis_ops.get("metrics", [])
-        if metrics:
-            for metric in metrics:
-                metric = safe_get(metric)
-                if metric:
-                    m = MetricAnalysis(
-                        analysisOpsId=analysis_ops_id,
-                        name=metric.get("name"),
-                        value=metric.get("value"),
-                        txtValue=metric.get("txtValue"),
-                        unit=metric.get("unit"),
-                    )
-                    db.add(m)
+    if not analysis_ops:
+        return None
+    metrics = []
+    for metric in analysis_ops.get("metrics", []) or []:
+        metric = safe_get(metric)
+        if metric:
+            metrics.append(MetricAnalysis(
+                name=metric.get("name"),
+                value=metric.get("value"),
+                txtValue=metric.get("txtValue"),
+                unit=metric.get("unit"),
+            ))
+    return AnalysisOps(
+        vesselId=analysis_ops.get("vesselId"),
+        vesselName=analysis_ops.get("vesselName"),
+        batchId=analysis_ops.get("batchId"),
+        batchName=analysis_ops.get("batchName"),
+        templateId=analysis_ops.get("templateId"),
+        templateName=analysis_ops.get("templateName"),
+        metrics=metrics,
+    )
+
+def build_trans_sum(tx: dict) -> TransSum:
+    """
+    Build the full TransSum object graph through relationships, without touching the DB.
+    Child rows get their ids (and the parent FKs) when the session flushes.
+    """
+    loss_details = safe_get(tx.get("lossDetails"))
 
     # Handle additionalDetails: skip empty dicts
     additional_details = tx.get("additionalDetails")
     if isinstance(additional_details, dict) and not additional_details:
         additional_details = None
 
-    trans_sum = TransSum(
+    return TransSum(
         formattedDate=tx.get("formattedDate"),
         date=tx.get("date"),
         operationId=tx.get("operationId"),
+        subOperationId=tx.get("subOperationId"),
         operationTypeId=tx.get("operationTypeId"),
         operationTypeName=tx.get("operationTypeName"),
         subOperationTypeId=tx.get("subOperationTypeId"),
@@ -182,18 +152,149 @@ def insert_trans_sum_transaction(db: Session, tx: dict):
         assignedBy=tx.get("assignedBy"),
         completedBy=tx.get("completedBy"),
         winery=tx.get("winery"),
-        fromVesselId=from_vessel_id,
-        toVesselId=to_vessel_id,
-        lossDetailsId=loss_details_id,
-        additionOpsId=addition_ops_id,
-        analysisOpsId=analysis_ops_id,
+        fromVessel=_build_vessel(tx.get("fromVessel"), is_from=True),
+        toVessel=_build_vessel(tx.get("toVessel"), is_from=False),
+        lossDetails=LossDetails(
+            volume=loss_details.get("volume"),
+            volumeUnit=loss_details.get("volumeUnit"),
+            reason=loss_details.get("reason"),
+        ) if loss_details else None,
+        additionOps=_build_addition_ops(tx),
+        analysisOps=_build_analysis_ops(tx),
         additionalDetails=additional_details,
     )
+
+def insert_trans_sum_transaction(db: Session, tx: dict):
+    trans_sum = build_trans_sum(tx)
     db.add(trans_sum)
     db.commit()
     db.refresh(trans_sum)
     return trans_sum
 
+DEFAULT_BULK_BATCH_SIZE = 500
+
+def bulk_create_trans_sums(
+    db: Session,
+    trans_sums: List[TransSumCreate],
+    batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+) -> List[TransSum]:
+    """
+    Insert many transactions with one flush/commit per batch.
+    The unit of work inserts each table (vessel_details, vessels, loss_details, ...) as a
+    batched executemany instead of one flush per row. Returned objects stay loaded after
+    commit so they can be serialized without re-querying.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    created: List[TransSum] = []
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        for start in range(0, len(trans_sums), batch_size):
+            batch = [build_trans_sum(ts.model_dump()) for ts in trans_sums[start:start + batch_size]]
+            db.add_all(batch)
+            try:
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            created.extend(batch)
+            logger.info(f"Committed trans_sum batch of {len(batch)} ({len(created)}/{len(trans_sums)})")
+    finally:
+        db.expire_on_commit = expire_on_commit
+    return created
+
+_TRANS_SUM_FIELDS = [
+    c.key for c in TransSum.__table__.columns
+    if c.key != "id" and not c.foreign_keys
+]
+_TRANS_SUM_CHILDREN = ("fromVessel", "toVessel", "lossDetails", "additionOps", "analysisOps")
+
+def _discard(db: Session, obj) -> None:
+    # Rows replaced twice in one batch were never flushed; drop them from the session instead
+    if inspect(obj).persistent:
+        db.delete(obj)
+    elif obj in db:
+        db.expunge(obj)
+
+def _delete_child_graph(db: Session, child) -> None:
+    """Delete a replaced child row together with the rows only it points at."""
+    if isinstance(child, Vessels):
+        for details in (child.beforeDetails, child.afterDetails):
+            if details is not None:
+                _discard(db, details)
+    elif isinstance(child, AdditionOps) and child.additive is not None:
+        _discard(db, child.additive)
+    elif isinstance(child, AnalysisOps) and not inspect(child).persistent:
+        for metric in child.metrics:
+            _discard(db, metric)
+    # Persisted AnalysisOps.metrics cascade (delete-orphan) with their parent
+    _discard(db, child)
+
+def _replace_trans_sum(db: Session, existing: TransSum, tx: dict) -> TransSum:
+    """Overwrite an existing TransSum (and its child rows) in place, keeping its id."""
+    fresh = build_trans_sum(tx)
+    for field in _TRANS_SUM_FIELDS:
+        setattr(existing, field, getattr(fresh, field))
+    for rel in _TRANS_SUM_CHILDREN:
+        old_child = getattr(existing, rel)
+        setattr(existing, rel, getattr(fresh, rel))
+        if old_child is not None:
+            _delete_child_graph(db, old_child)
+    return existing
+
+def bulk_upsert_trans_sums(
+    db: Session,
+    trans_sums: List[TransSumCreate],
+    batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+) -> List[TransSum]:
+    """
+    Merge many transactions keyed on subOperationId, with one flush/commit per batch.
+    Rows whose subOperationId already exists are updated in place (children replaced);
+    the rest, including rows without a subOperationId, are inserted.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    merged: List[TransSum] = []
+    inserted = updated = 0
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        for start in range(0, len(trans_sums), batch_size):
+            rows = [ts.model_dump() for ts in trans_sums[start:start + batch_size]]
+            sub_op_ids = {tx["subOperationId"] for tx in rows if tx.get("subOperationId") is not None}
+            by_sub_op = {}
+            if sub_op_ids:
+                by_sub_op = {
+                    obj.subOperationId: obj
+                    for obj in db.query(TransSum).filter(TransSum.subOperationId.in_(sub_op_ids))
+                }
+            batch = []
+            for tx in rows:
+                sub_op_id = tx.get("subOperationId")
+                existing = by_sub_op.get(sub_op_id) if sub_op_id is not None else None
+                if existing is not None:
+                    obj = _replace_trans_sum(db, existing, tx)
+                    updated += 1
+                else:
+                    obj = build_trans_sum(tx)
+                    db.add(obj)
+                    inserted += 1
+                    if sub_op_id is not None:
+                        by_sub_op[sub_op_id] = obj
+                batch.append(obj)
+            try:
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            merged.extend(batch)
+            logger.info(f"Committed trans_sum upsert batch of {len(batch)} ({len(merged)}/{len(trans_sums)})")
+    finally:
+        db.expire_on_commit = expire_on_commit
+    logger.info(f"trans_sum upsert: {inserted} inserted, {updated} updated")
+    return merged
+
 def get_all_trans_sums(db: Session, skip: int = 0, limit: int = 50):
     query = db.query(TransSum).order_by(TransSum.id.desc())
     total = query.count()
@@ -1,5 +1,7 @@
 # vintrick-backend/app/main.py
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -15,6 +17,8 @@ from app.api.routes.meta import router as meta_router
 from app.api.routes.trans_sum_sync import router as trans_sum_sync_router
 from app.api.routes.shipments import router as shipments_router  # <--- NEW ROUTE
 from app.api.routes.harvestload_agcode import router as harvestload_agcode_router
+from app.api.routes.lineage import router as lineage_router
+from app.utils.lineage_cache import get_lineage_cache
 
 # Import improved error handlers from utils
 from tools.utils.error_utils import (
@@ -23,7 +27,16 @@ from tools.utils.error_utils import (
     generic_exception_handler
 )
 
-app = FastAPI(debug=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the in-memory lineage graph in step with new transaction exports
+    lineage_cache = get_lineage_cache()
+    lineage_cache.start()
+    yield
+    lineage_cache.stop()
+
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 # Add CORS middleware - for dev, '*' is OK, but restrict for prod!
 app.add_middleware(
@@ -46,6 +59,7 @@ app.include_router(vintrace_pull_router,    prefix="/api",      tags=["vintrace"
 app.include_router(trans_sum_sync_router,   prefix="/api",      tags=["trans_sum"])
 app.include_router(meta_router,             prefix="/api/meta", tags=["meta"])
 app.include_router(shipments_router,        prefix="/api",      tags=["shipments"]) # <--- NEW ROUTE
+app.include_router(lineage_router,          prefix="/api",      tags=["lineage"])
 app.include_router(harvestload_agcode_router, prefix="/api", tags=["harvestload_agcode"])
 
 # --- IMPROVED ERROR HANDLING VIA UTILS ---
@@ -89,6 +89,7 @@ class TransSum(Base):
     formattedDate = Column(String, nullable=True)
     date = Column(Integer, nullable=True)
     operationId = Column(Integer, nullable=True)
+    subOperationId = Column(Integer, nullable=True, index=True)
     operationTypeId = Column(Integer, nullable=True)
     operationTypeName = Column(String, nullable=True)
     subOperationTypeId = Column(Integer, nullable=True)
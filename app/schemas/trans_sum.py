@@ -79,6 +79,7 @@ class TransSumOut(BaseModel):
     formattedDate: Optional[str] = None
     date: Optional[int] = None
     operationId: Optional[int] = None
+    subOperationId: Optional[int] = None
     operationTypeId: Optional[int] = None
     operationTypeName: Optional[str] = None
     subOperationTypeId: Optional[int] = None
@@ -103,6 +104,7 @@ class TransSumCreate(BaseModel):
     formattedDate: Optional[str] = None
     date: Optional[int] = None
     operationId: Optional[int] = None
+    subOperationId: Optional[int] = None
     operationTypeId: Optional[int] = None
     operationTypeName: Optional[str] = None
     subOperationTypeId: Optional[int] = None
@@ -0,0 +1,204 @@
+# vintrick-backend/app/utils/lineage_cache.py
+
+"""
+In-process lineage graph for the /api/lineage routes.
+
+The graph is read once from the persisted LineageGraphIndex (app/utils/lineage_index.py)
+into plain dicts plus a memoized LineageEngine, so a lookup is a dict walk instead of a
+script run. A daemon thread polls the transaction export directory; when a CSV is added
+or rewritten its new rows are appended to the index and a fresh snapshot is swapped in.
+Requests keep reading the previous snapshot while the next one is built.
+
+Ingest is the only writer of the index directory. It runs under a thread lock (poll thread
+vs POST /lineage/refresh) and an inter-process lock on <index_dir>/.ingest.lock, since every
+uvicorn worker runs its own refresh thread against the same directory.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.lineage_index import LineageGraphIndex
+from app.utils.write_behind_log import FileLock
+from tools.BI.lineage_engine import LineageEngine
+
+logger = logging.getLogger("app.utils.lineage_cache")
+
+DEFAULT_INDEX_DIR = os.getenv("LINEAGE_INDEX_DIR", "Main/data/lineage_index/transactions")
+DEFAULT_TRANSACTIONS_DIR = os.getenv("LINEAGE_TRANSACTIONS_DIR", "Main/data/GET--transaction-search")
+DEFAULT_REFRESH_SECONDS = float(os.getenv("LINEAGE_REFRESH_SECONDS", "60"))
+
+
+class LineageSnapshot:
+    """Immutable view of the lineage graph at one index version."""
+
+    def __init__(self, version: str, parents: Dict[str, Dict[str, float]]):
+        self.version = version
+        self.engine = LineageEngine(parents)
+        self.children: Dict[str, List[str]] = defaultdict(list)
+        for child, contributions in parents.items():
+            for parent in contributions:
+                if parent != child:
+                    self.children[parent].append(child)
+
+    def __contains__(self, batch_name: str) -> bool:
+        return self.engine.has_batch(batch_name) or batch_name in self.children
+
+    def ancestors(self, batch_name: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        depths = self.engine.depths(batch_name, max_depth)
+        depths.pop(batch_name, None)
+        return depths
+
+    def descendants(self, batch_name: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        depths = {batch_name: 0}
+        queue = deque([batch_name])
+        while queue:
+            node = queue.popleft()
+            depth = depths[node]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for child in self.children.get(node, ()):
+                if child not in depths:
+                    depths[child] = depth + 1
+                    queue.append(child)
+        del depths[batch_name]
+        return depths
+
+
+def index_version(meta: Dict) -> str:
+    """Short identifier of an index state; changes whenever edges, batches or rows are added."""
+    key = "|".join(str(meta.get(k)) for k in ("generation", "batch_count", "base_edges", "tail_edges", "ledger_rows", "updated"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class LineageGraphCache:
+    """
+    Holds the current LineageSnapshot and keeps it fresh.
+
+    Usage:
+        cache = get_lineage_cache()
+        cache.start()                    # background refresh (app lifespan)
+        snapshot = cache.snapshot()      # loads synchronously on first use
+    """
+
+    def __init__(
+        self,
+        index_dir: str = DEFAULT_INDEX_DIR,
+        transactions_dir: Optional[str] = DEFAULT_TRANSACTIONS_DIR,
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+    ):
+        self.index_dir = index_dir
+        self.transactions_dir = transactions_dir
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[LineageSnapshot] = None
+        self._file_signatures: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    def snapshot(self) -> Optional[LineageSnapshot]:
+        """Current snapshot, loading the index on first call. None while no index exists."""
+        if self._snapshot is None:
+            self.reload()
+        return self._snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """Swap in a new snapshot if the index changed on disk. Returns True when swapped."""
+        with self._lock:
+            if not os.path.exists(os.path.join(self.index_dir, "meta.json")):
+                return False
+            index = LineageGraphIndex(self.index_dir)
+            version = index_version(index.meta)
+            if not force and self._snapshot is not None and self._snapshot.version == version:
+                return False
+            # Copy the graph out of the memory-mapped arrays so the index files stay free for compaction
+            parents = index.parent_map()
+            del index
+            self._snapshot = LineageSnapshot(version, parents)
+            logger.info(f"🔄 Lineage graph loaded from {self.index_dir} (version {version}, {len(parents)} batches)")
+            return True
+
+    def _changed_files(self) -> List[str]:
+        if not self.transactions_dir or not os.path.isdir(self.transactions_dir):
+            return []
+        changed = []
+        for path in sorted(glob.glob(os.path.join(self.transactions_dir, "*.csv"))):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._file_signatures.get(path) != signature:
+                changed.append(path)
+                self._file_signatures[path] = signature
+        return changed
+
+    def ingest_new_files(self) -> int:
+        """Append rows from new or rewritten transaction CSVs to the index. Returns rows ingested."""
+        from tools.BI.transaction_lineage_analyzer import TransactionLineageAnalyzer
+
+        ingested = 0
+        # Rows are keyed on Tx Id and compared by content hash inside the index, so a file
+        # another worker already ingested only costs a re-read; the locks keep two writers
+        # off the CSR files.
+        with self._ingest_lock, FileLock(os.path.join(self.index_dir, ".ingest.lock")):
+            for path in self._changed_files():
+                try:
+                    analyzer = TransactionLineageAnalyzer(path, columnar=True)
+                    ingested += analyzer.update_lineage_index(self.index_dir)
+                except Exception as e:
+                    # Retry the file on the next poll (it may still be being written)
+                    self._file_signatures.pop(path, None)
+                    logger.warning(f"⚠️ Could not ingest {path} into lineage index: {e}")
+        return ingested
+
+    def refresh(self) -> bool:
+        """One poll: ingest new transaction files, then reload if the index moved."""
+        try:
+            ingested = self.ingest_new_files()
+            if ingested:
+                logger.info(f"📥 Ingested {ingested} new transactions into {self.index_dir}")
+            swapped = self.reload()
+            self.last_error = None
+            return swapped
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"❌ Lineage refresh failed: {e}")
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lineage-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_shared_cache: Optional[LineageGraphCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_lineage_cache() -> LineageGraphCache:
+    """Process-wide cache configured from LINEAGE_INDEX_DIR / LINEAGE_TRANSACTIONS_DIR / LINEAGE_REFRESH_SECONDS."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LineageGraphCache()
+        return _shared_cache
@@ -0,0 +1,498 @@
+# vintrick-backend/app/utils/lineage_index.py
+
+"""
+Persisted batch-lineage graph index.
+
+The lineage scripts used to rebuild the whole batch graph from the multi-year transaction
+export on every run. The index keeps that graph on disk instead:
+
+    <dir>/batches.txt        batch-name dictionary, one name per line (line number = batch id)
+    <dir>/parents_*.<g>.npy  CSR adjacency child -> parents (indptr, ids, gallons, rows), generation g
+    <dir>/children_*.<g>.npy CSR adjacency parent -> children (indptr, ids, rows)
+    <dir>/edges_tail.bin     edges appended since the last compaction (src, dst, gallons, rows records)
+    <dir>/ledger_*.<s>.npy   row ledger: sorted row keys, their content hashes and the edges each
+                             key contributed (ledger_keys / ledger_hashes / ledger_edges)
+    <dir>/meta.json          counts and current file generations; rewriting it is the commit point
+
+The CSR arrays are memory-mapped on load, so opening the index and answering ancestor or
+descendant queries costs a few page reads rather than a CSV parse. Transactions are keyed
+(Tx Id); replace_rows() only touches keys that are new or whose content hash changed, and
+for a changed key it appends the negation of the edges it contributed before (rows = -1)
+ahead of its new edges. Every edge therefore carries a row count, and a (parent, child)
+pair exists while its count is positive. compact() merges the tail into the CSR arrays once
+it grows, dropping pairs whose count reached zero.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.transaction_sync import atomic_write_json
+
+logger = logging.getLogger("app.utils.lineage_index")
+
+INDEX_VERSION = 2
+EDGE_DTYPE = np.dtype([("src", "<i4"), ("dst", "<i4"), ("gallons", "<f8"), ("rows", "<i4")])
+LEDGER_EDGE_DTYPE = np.dtype([("key", "<u8"), ("src", "<i4"), ("dst", "<i4"), ("gallons", "<f8")])
+DEFAULT_KEY_COLUMNS = ("Tx Id",)
+# Compact when the tail holds more than this many edges, or more than 10% of the base
+DEFAULT_COMPACT_THRESHOLD = int(os.getenv("LINEAGE_INDEX_COMPACT_EDGES", "50000"))
+
+
+def _canonical_text(column: pd.Series) -> np.ndarray:
+    """
+    Column -> text, independent of the dtype pandas inferred: NaN/None become '', integral
+    floats are written without '.0' (so 10 and 10.0 agree), everything else via str().
+    """
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        values = column.to_numpy(dtype=np.float64)
+        text = np.full(len(values), "", dtype=object)
+        finite = np.isfinite(values)
+        integral = finite & (values == np.round(values)) & (np.abs(values) < 2 ** 53)
+        text[integral] = values[integral].astype(np.int64).astype(str)
+        other = finite & ~integral
+        text[other] = values[other].astype(str)
+        infinite = np.isinf(values)
+        text[infinite] = values[infinite].astype(str)
+        return text
+    values = column.astype(object).to_numpy()
+    missing = pd.isna(values)
+    text = values.astype(str).astype(object)
+    text[missing] = ""
+    return text
+
+
+def hash_rows(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Stable uint64 hash per DataFrame row (content-based, index ignored).
+
+    Cells are hashed as canonical text, so the same CSV row hashes the same whether pandas
+    read a column as int, float (one blank cell elsewhere), or str.
+    """
+    if frame.empty:
+        return np.zeros(0, dtype=np.uint64)
+    text = pd.DataFrame({col: _canonical_text(frame[col]) for col in frame.columns}, index=frame.index)
+    return pd.util.hash_pandas_object(text, index=False).to_numpy(dtype=np.uint64)
+
+
+def row_keys(frame: pd.DataFrame, row_hashes: np.ndarray, key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS) -> np.ndarray:
+    """
+    Identity of each row for replace_rows(): a hash of its key columns (Tx Id), so an edited
+    or reversed transaction replaces its earlier version. Rows with a blank key (or frames
+    without the key columns) fall back to their content hash and are never replaced.
+    All rows of one key must arrive in the same replace_rows() call (one export file).
+    """
+    columns = [c for c in key_columns if c in frame.columns]
+    if frame.empty or not columns:
+        return np.asarray(row_hashes, dtype=np.uint64)
+    key_text = pd.DataFrame({c: _canonical_text(frame[c]) for c in columns}, index=frame.index)
+    blank = (key_text == "").all(axis=1).to_numpy()
+    # Salted so a key hash cannot equal a content-hash fallback of the same text
+    keys = pd.util.hash_pandas_object(key_text, index=False, hash_key="lineage-row-key-").to_numpy(dtype=np.uint64)
+    return np.where(blank, np.asarray(row_hashes, dtype=np.uint64), keys)
+
+
+def _save_npy(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path}.tmp.{os.getpid()}.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class LineageGraphIndex:
+    """
+    Compact on-disk batch graph: edges parent -> child weighted by gallons.
+
+    Usage:
+        index = LineageGraphIndex("Main/data/lineage_index/transactions")
+        hashes = hash_rows(df)
+        index.replace_rows(row_keys(df, hashes), hashes, edge_rows, src_names, dst_names, gallons)
+        index.save()
+        index.ancestors("24BLEND001-FINAL")
+    """
+
+    def __init__(self, path: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._new_names: List[str] = []
+        self._parents_indptr = np.zeros(1, dtype=np.int64)
+        self._parents_ids = np.zeros(0, dtype=np.int32)
+        self._parents_gallons = np.zeros(0, dtype=np.float64)
+        self._parents_rows = np.zeros(0, dtype=np.int32)
+        self._children_indptr = np.zeros(1, dtype=np.int64)
+        self._children_ids = np.zeros(0, dtype=np.int32)
+        self._children_rows = np.zeros(0, dtype=np.int32)
+        self._tail = np.zeros(0, dtype=EDGE_DTYPE)
+        self._new_tail: List[np.ndarray] = []
+        self._ledger_keys = np.zeros(0, dtype=np.uint64)
+        self._ledger_hashes = np.zeros(0, dtype=np.uint64)
+        self._ledger_edges = np.zeros(0, dtype=LEDGER_EDGE_DTYPE)
+        self._ledger_dirty = False
+        # child -> parent -> [gallons, rows] and parent -> child -> rows for tail edges
+        self._tail_parents: Dict[int, Dict[int, List[float]]] = {}
+        self._tail_children: Dict[int, Dict[int, int]] = {}
+        self.meta: Dict = {}
+        if os.path.exists(os.path.join(path, "meta.json")):
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _csr_file(self, name: str, generation: int) -> str:
+        return self._file(f"{name}.{generation}.npy")
+
+    def _load(self) -> None:
+        with open(self._file("meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            # Version 1 indexes have no row ledger, so edited rows could never be retracted
+            raise ValueError(
+                f"Unsupported lineage index version {self.meta.get('version')} in {self.path}; "
+                f"delete the directory and re-run the ingest to rebuild it"
+            )
+
+        with open(self._file("batches.txt"), "r", encoding="utf-8") as f:
+            # Names written by a save that never reached meta.json are ignored
+            self.names = f.read().split("\n")[: self.meta["batch_count"]]
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+        if self.meta.get("base_edges", 0):
+            generation = self.meta["generation"]
+            self._parents_indptr = np.load(self._csr_file("parents_indptr", generation), mmap_mode="r")
+            self._parents_ids = np.load(self._csr_file("parents_ids", generation), mmap_mode="r")
+            self._parents_gallons = np.load(self._csr_file("parents_gallons", generation), mmap_mode="r")
+            self._parents_rows = np.load(self._csr_file("parents_rows", generation), mmap_mode="r")
+            self._children_indptr = np.load(self._csr_file("children_indptr", generation), mmap_mode="r")
+            self._children_ids = np.load(self._csr_file("children_ids", generation), mmap_mode="r")
+            self._children_rows = np.load(self._csr_file("children_rows", generation), mmap_mode="r")
+
+        tail_edges = self.meta.get("tail_edges", 0)
+        if tail_edges:
+            self._tail = np.fromfile(self._file("edges_tail.bin"), dtype=EDGE_DTYPE, count=tail_edges)
+            self._index_tail(self._tail)
+
+        if self.meta.get("ledger_rows", 0):
+            ledger_generation = self.meta["ledger_generation"]
+            self._ledger_keys = np.load(self._file(f"ledger_keys.{ledger_generation}.npy"), mmap_mode="r")
+            self._ledger_hashes = np.load(self._file(f"ledger_hashes.{ledger_generation}.npy"), mmap_mode="r")
+            self._ledger_edges = np.load(self._file(f"ledger_edges.{ledger_generation}.npy"), mmap_mode="r")
+
+    def save(self, compact: Optional[bool] = None) -> None:
+        """
+        Persist appended names/edges and the row ledger.
+        compact=None merges the tail into the CSR arrays once it has grown large; True forces it.
+        """
+        os.makedirs(self.path, exist_ok=True)
+
+        if self._new_names or not os.path.exists(self._file("batches.txt")):
+            tmp_path = f"{self._file('batches.txt')}.tmp.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(self.names))
+            os.replace(tmp_path, self._file("batches.txt"))
+            self._new_names = []
+
+        if self._new_tail:
+            new_edges = np.concatenate(self._new_tail)
+            with open(self._file("edges_tail.bin"), "r+b" if os.path.exists(self._file("edges_tail.bin")) else "wb") as f:
+                # Overwrite anything past the committed tail (left by an interrupted save)
+                f.seek(len(self._tail) * EDGE_DTYPE.itemsize)
+                new_edges.tofile(f)
+                f.truncate()
+            self._tail = np.concatenate([self._tail, new_edges])
+            self._new_tail = []
+
+        old_ledger_generation = self.meta.get("ledger_generation", 0)
+        if self._ledger_dirty:
+            ledger_generation = old_ledger_generation + 1
+            _save_npy(self._file(f"ledger_keys.{ledger_generation}.npy"), self._ledger_keys)
+            _save_npy(self._file(f"ledger_hashes.{ledger_generation}.npy"), self._ledger_hashes)
+            _save_npy(self._file(f"ledger_edges.{ledger_generation}.npy"), self._ledger_edges)
+            self.meta["ledger_generation"] = ledger_generation
+            self._ledger_dirty = False
+
+        base_edges = len(self._parents_ids)
+        if compact is None:
+            compact = len(self._tail) > self.compact_threshold or len(self._tail) > base_edges // 10
+        if compact:
+            self._compact()
+        else:
+            self._write_meta()
+        if self.meta.get("ledger_generation", 0) != old_ledger_generation:
+            for name in ("ledger_keys", "ledger_hashes", "ledger_edges"):
+                stale = self._file(f"{name}.{old_ledger_generation}.npy")
+                if os.path.exists(stale):
+                    os.remove(stale)
+
+    def _write_meta(self, generation: Optional[int] = None) -> None:
+        self.meta = {
+            "version": INDEX_VERSION,
+            "generation": self.meta.get("generation", 0) if generation is None else generation,
+            "ledger_generation": self.meta.get("ledger_generation", 0),
+            "batch_count": len(self.names),
+            "base_edges": int(len(self._parents_ids)),
+            "tail_edges": int(len(self._tail)),
+            "ledger_rows": int(len(self._ledger_keys)),
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        atomic_write_json(self._file("meta.json"), self.meta)
+
+    def compact(self) -> None:
+        """Save and merge the tail into the CSR arrays (duplicate edges have gallons and rows summed)."""
+        self.save(compact=True)
+
+    def _compact(self) -> None:
+        edges = self._all_edges()
+        n = len(self.names)
+        if len(edges):
+            # Collapse duplicate (child, parent) pairs; pairs whose rows were all retracted go away
+            frame = pd.DataFrame({"dst": edges["dst"], "src": edges["src"],
+                                  "gallons": edges["gallons"], "rows": edges["rows"]})
+            merged = frame.groupby(["dst", "src"], sort=True)[["gallons", "rows"]].sum().reset_index()
+            merged = merged[merged["rows"] > 0]
+            dst = merged["dst"].to_numpy(dtype=np.int32)
+            src = merged["src"].to_numpy(dtype=np.int32)
+            gallons = merged["gallons"].to_numpy(dtype=np.float64)
+            rows = merged["rows"].to_numpy(dtype=np.int32)
+        else:
+            dst = src = rows = np.zeros(0, dtype=np.int32)
+            gallons = np.zeros(0, dtype=np.float64)
+
+        parents_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=n), out=parents_indptr[1:])
+        order = np.argsort(src, kind="stable")
+        children_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=children_indptr[1:])
+
+        # Write a new generation of CSR files; meta.json switches to it atomically
+        old_generation = self.meta.get("generation", 0)
+        generation = old_generation + 1
+        arrays = {
+            "parents_indptr": parents_indptr,
+            "parents_ids": src,
+            "parents_gallons": gallons,
+            "parents_rows": rows,
+            "children_indptr": children_indptr,
+            "children_ids": dst[order],
+            "children_rows": rows[order],
+        }
+        for name, array in arrays.items():
+            _save_npy(self._csr_file(name, generation), array)
+
+        self._parents_indptr, self._parents_ids = parents_indptr, src
+        self._parents_gallons, self._parents_rows = gallons, rows
+        self._children_indptr, self._children_ids, self._children_rows = children_indptr, dst[order], rows[order]
+        self._tail = np.zeros(0, dtype=EDGE_DTYPE)
+        self._tail_parents, self._tail_children = {}, {}
+        # meta is written before the tail file is emptied: a crash in between only
+        # leaves unreferenced bytes, which the next save overwrites
+        self._write_meta(generation)
+        open(self._file("edges_tail.bin"), "wb").close()
+        for name in arrays:
+            if os.path.exists(self._csr_file(name, old_generation)):
+                os.remove(self._csr_file(name, old_generation))
+        logger.info(f"📦 Compacted lineage index {self.path}: {len(self.names)} batches, {len(src)} edges")
+
+    def _all_edges(self) -> np.ndarray:
+        counts = np.diff(np.asarray(self._parents_indptr))
+        base = np.zeros(len(self._parents_ids), dtype=EDGE_DTYPE)
+        base["dst"] = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        base["src"] = self._parents_ids
+        base["gallons"] = self._parents_gallons
+        base["rows"] = self._parents_rows
+        pending = [np.asarray(self._tail)] + self._new_tail
+        return np.concatenate([base] + pending)
+
+    # ------------------------------------------------------------------
+    # Appends
+    # ------------------------------------------------------------------
+
+    def batch_id(self, name: str, create: bool = False) -> Optional[int]:
+        batch_id = self._ids.get(name)
+        if batch_id is None and create:
+            batch_id = len(self.names)
+            self.names.append(name)
+            self._new_names.append(name)
+            self._ids[name] = batch_id
+        return batch_id
+
+    def _append(self, src: np.ndarray, dst: np.ndarray, gallons: np.ndarray, rows: int) -> int:
+        if not len(src):
+            return 0
+        edges = np.zeros(len(src), dtype=EDGE_DTYPE)
+        edges["src"], edges["dst"], edges["gallons"], edges["rows"] = src, dst, gallons, rows
+        self._new_tail.append(edges)
+        self._index_tail(edges)
+        return len(edges)
+
+    def replace_rows(
+        self,
+        keys: np.ndarray,
+        hashes: np.ndarray,
+        edge_rows: Iterable[int],
+        parents: Iterable[str],
+        children: Iterable[str],
+        gallons: Optional[Iterable[float]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Ingest a batch of transaction rows.
+
+        keys/hashes hold one row key (see row_keys) and content hash (hash_rows) per row;
+        edge_rows gives, for each parent -> child edge, the row that produced it. Rows sharing
+        a key form one unit whose content hash is the sum of theirs. Units whose key is new are
+        added; units whose content changed first retract the edges their key contributed
+        before; unchanged units are skipped.
+
+        Returns (rows ingested, keys replaced).
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(keys):
+            return 0, 0
+        unit_keys, unit_of_row = np.unique(keys, return_inverse=True)
+        unit_hashes = np.zeros(len(unit_keys), dtype=np.uint64)
+        np.add.at(unit_hashes, unit_of_row, hashes)  # wraps modulo 2**64; order-independent
+
+        ledger_keys = np.asarray(self._ledger_keys)
+        pos = np.searchsorted(ledger_keys, unit_keys)
+        known = pos < len(ledger_keys)
+        known[known] = ledger_keys[pos[known]] == unit_keys[known]
+        changed = ~known
+        changed[known] = np.asarray(self._ledger_hashes)[pos[known]] != unit_hashes[known]
+        if not changed.any():
+            return 0, 0
+        changed_keys = unit_keys[changed]
+        replaced = int((changed & known).sum())
+
+        # Retract what replaced keys contributed before
+        ledger_edges = np.asarray(self._ledger_edges)
+        retract = np.isin(ledger_edges["key"], unit_keys[changed & known])
+        old = ledger_edges[retract]
+        self._append(old["src"], old["dst"], -old["gallons"], -1)
+
+        # Add the edges of every changed key
+        parents, children = list(parents), list(children)
+        edge_rows = np.asarray(list(edge_rows), dtype=np.int64)
+        gallons = np.zeros(len(parents)) if gallons is None else np.asarray(list(gallons), dtype=np.float64)
+        take = changed[unit_of_row[edge_rows]] if len(edge_rows) else np.zeros(0, dtype=bool)
+        new_edges = np.zeros(int(take.sum()), dtype=LEDGER_EDGE_DTYPE)
+        new_edges["key"] = keys[edge_rows[take]]
+        new_edges["src"] = [self.batch_id(name, create=True) for name, t in zip(parents, take) if t]
+        new_edges["dst"] = [self.batch_id(name, create=True) for name, t in zip(children, take) if t]
+        new_edges["gallons"] = gallons[take]
+        self._append(new_edges["src"], new_edges["dst"], new_edges["gallons"], 1)
+
+        # Ledger: drop the old entries of changed keys, add their new ones (kept sorted by key)
+        keep = ~np.isin(ledger_keys, changed_keys)
+        merged_keys = np.concatenate([ledger_keys[keep], changed_keys])
+        merged_hashes = np.concatenate([np.asarray(self._ledger_hashes)[keep], unit_hashes[changed]])
+        order = np.argsort(merged_keys, kind="stable")
+        self._ledger_keys, self._ledger_hashes = merged_keys[order], merged_hashes[order]
+        merged_edges = np.concatenate([ledger_edges[~retract], new_edges])
+        self._ledger_edges = merged_edges[np.argsort(merged_edges["key"], kind="stable")]
+        self._ledger_dirty = True
+
+        return int(changed[unit_of_row].sum()), replaced
+
+    def _index_tail(self, edges: np.ndarray) -> None:
+        for src, dst, gallons, rows in edges.tolist():
+            parent = self._tail_parents.setdefault(dst, {}).setdefault(src, [0.0, 0])
+            parent[0] += gallons
+            parent[1] += rows
+            children = self._tail_children.setdefault(src, {})
+            children[dst] = children.get(dst, 0) + rows
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def _parent_ids(self, batch_id: int) -> Dict[int, float]:
+        totals: Dict[int, List[float]] = {}
+        if batch_id + 1 < len(self._parents_indptr):
+            start, end = self._parents_indptr[batch_id], self._parents_indptr[batch_id + 1]
+            for pid, gallons, rows in zip(self._parents_ids[start:end].tolist(),
+                                          self._parents_gallons[start:end].tolist(),
+                                          self._parents_rows[start:end].tolist()):
+                total = totals.setdefault(pid, [0.0, 0])
+                total[0] += gallons
+                total[1] += rows
+        for pid, (gallons, rows) in self._tail_parents.get(batch_id, {}).items():
+            total = totals.setdefault(pid, [0.0, 0])
+            total[0] += gallons
+            total[1] += rows
+        return {pid: gallons for pid, (gallons, rows) in totals.items() if rows > 0 and pid != batch_id}
+
+    def _child_ids(self, batch_id: int) -> List[int]:
+        counts: Dict[int, int] = {}
+        if batch_id + 1 < len(self._children_indptr):
+            start, end = self._children_indptr[batch_id], self._children_indptr[batch_id + 1]
+            for cid, rows in zip(self._children_ids[start:end].tolist(), self._children_rows[start:end].tolist()):
+                counts[cid] = counts.get(cid, 0) + rows
+        for cid, rows in self._tail_children.get(batch_id, {}).items():
+            counts[cid] = counts.get(cid, 0) + rows
+        return [cid for cid, rows in counts.items() if rows > 0 and cid != batch_id]
+
+    def parents(self, name: str) -> Dict[str, float]:
+        """Direct contributors of a batch with the gallons they sent."""
+        batch_id = self._ids.get(name)
+        if batch_id is None:
+            return {}
+        return {self.names[pid]: gallons for pid, gallons in self._parent_ids(batch_id).items()}
+
+    def children(self, name: str) -> List[str]:
+        batch_id = self._ids.get(name)
+        if batch_id is None:
+            return []
+        return [self.names[cid] for cid in self._child_ids(batch_id)]
+
+    def _walk(self, name: str, step, max_depth: Optional[int]) -> Dict[str, int]:
+        start = self._ids.get(name)
+        if start is None:
+            return {}
+        depths = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            depth = depths[node]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for nxt in step(node):
+                if nxt not in depths:
+                    depths[nxt] = depth + 1
+                    queue.append(nxt)
+        del depths[start]
+        return {self.names[i]: d for i, d in depths.items()}
+
+    def ancestors(self, name: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """Every batch upstream of `name` -> shortest hop count."""
+        return self._walk(name, lambda node: self._parent_ids(node).keys(), max_depth)
+
+    def descendants(self, name: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """Every batch downstream of `name` -> shortest hop count."""
+        return self._walk(name, self._child_ids, max_depth)
+
+    def parent_map(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """batch -> {parent: gallons} for the given batches (default: all), e.g. for LineageEngine."""
+        names = self.names if names is None else names
+        return {name: self.parents(name) for name in names}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": len(self.names),
+            "base_edges": int(len(self._parents_ids)),
+            "tail_edges": int(len(self._tail)) + sum(len(e) for e in self._new_tail),
+            "ledger_rows": int(len(self._ledger_keys)),
+        }
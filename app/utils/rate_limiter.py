@@ -0,0 +1,177 @@
+# vintrick-backend/app/utils/rate_limiter.py
+
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """
+    Parse a Retry-After header value into seconds.
+    Accepts either delta-seconds ("30") or an HTTP-date. Returns None if missing/unparseable.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket rate limiter that adapts to the API's throttling at runtime.
+
+    - acquire() / acquire_async() reserve a slot and wait until it is due, so one
+      instance can be shared by threads (ThreadPoolExecutor) and asyncio tasks.
+    - on_rate_limited() halves the rate (down to min_rate) and pauses all callers
+      for Retry-After seconds when the server sends one.
+    - on_success() grows the rate back additively (up to max_rate).
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: Optional[float] = None,
+        min_rate: float = 0.2,
+        max_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.05,
+        default_retry_after: float = 10.0,
+    ):
+        """
+        Args:
+            rate: Starting rate in requests per second
+            burst: Bucket size, i.e. how many requests may go out back to back (default: rate, at least 1)
+            min_rate: Floor the rate never shrinks below
+            max_rate: Ceiling the rate never grows above (default: the starting rate)
+            decrease_factor: Multiplier applied to the rate once per throttle event
+            increase_step: Requests/sec added back on every successful response
+            default_retry_after: Pause (seconds) applied on a 429 without a usable Retry-After
+        """
+        if rate <= 0 or min_rate <= 0:
+            raise ValueError("rate and min_rate must be positive")
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.default_retry_after = default_retry_after
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+
+        self.total_requests = 0
+        self.total_throttled = 0
+
+    def _refill(self, now: float) -> None:
+        """Credit tokens earned since the last refill. Caller must hold the lock."""
+        # Nothing is earned while paused by a Retry-After; the bucket resumes filling when it ends
+        earning_since = max(self._last_refill, self._blocked_until)
+        if now > earning_since:
+            self._tokens = min(self.burst, self._tokens + (now - earning_since) * self.rate)
+        self._last_refill = now
+
+    def _reserve(self) -> float:
+        """Take one token (going into debt if needed) and return how long the caller must wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            self.total_requests += 1
+
+            # Token debt is paid off from the end of any pause, so callers queued during a
+            # Retry-After are spread out at `rate` instead of all waking when it expires
+            start = max(now, self._blocked_until)
+            return (start - now) + max(0.0, -self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Block the calling thread until a request may be sent. Returns the time waited."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Asyncio counterpart of acquire(); does not block the event loop."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def on_success(self) -> None:
+        """Record a successful response and grow the rate back towards max_rate."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> float:
+        """
+        Record a 429: shrink the rate, drain the bucket and pause every caller.
+        429s arriving while a pause is already in effect belong to the same burst: they may
+        extend the pause but do not shrink the rate again.
+        Returns the pause (seconds) that was applied.
+        """
+        pause = retry_after if retry_after is not None else self.default_retry_after
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._blocked_until:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self.total_throttled += 1
+        return pause
+
+    def record_response(self, status_code: int, headers=None) -> None:
+        """Feed an HTTP response status (and headers, for Retry-After) back into the limiter."""
+        if status_code == 429:
+            retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+            self.on_rate_limited(retry_after)
+        elif status_code < 400:
+            self.on_success()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "total_requests": self.total_requests,
+                "total_throttled": self.total_throttled,
+            }
+
+
+_shared_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter(name: str = "vintrace") -> AdaptiveRateLimiter:
+    """
+    Return the process-wide limiter for `name`, creating it on first use.
+    Every Vintrace fetcher in the process shares the same quota through this.
+    Starting rate / ceiling come from VINTRACE_RATE_LIMIT_RPS / VINTRACE_RATE_LIMIT_MAX_RPS.
+    """
+    with _shared_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            rate = float(os.getenv("VINTRACE_RATE_LIMIT_RPS", "2"))
+            max_rate = float(os.getenv("VINTRACE_RATE_LIMIT_MAX_RPS", str(rate)))
+            limiter = AdaptiveRateLimiter(rate=rate, max_rate=max_rate)
+            _shared_limiters[name] = limiter
+        return limiter
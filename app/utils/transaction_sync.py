@@ -0,0 +1,195 @@
+# vintrick-backend/app/utils/transaction_sync.py
+
+"""
+Watermark state for incremental transaction syncs.
+
+The Vintrace transaction search only filters by completion date, so an incremental
+run re-fetches a short window (watermark - lookback .. today) instead of the whole
+history, and only rewrites day files whose transactions actually changed
+(compared by subOperationId / lastModified).
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("app.utils.transaction_sync")
+
+DEFAULT_STATE_PATH = os.getenv("TRANSACTION_SYNC_STATE", "Main/data/sync_state/transactions_sync_state.json")
+DEFAULT_LOOKBACK_DAYS = int(os.getenv("TRANSACTION_SYNC_LOOKBACK_DAYS", "3"))
+
+# One watermark per sink: the day-file fetchers and the DB route advance independently,
+# so a file fetch never makes the DB sync skip transactions it has not stored yet.
+FILES_SYNC_KEY = "files:GET:/transaction/search"
+DB_SYNC_KEY = "db:GET:/transaction/search"
+
+
+def sink_key(sink: str, endpoint_key: str) -> str:
+    """State key for `endpoint_key` as synced into `sink` ("files" or "db")."""
+    return f"{sink}:{endpoint_key}"
+
+
+def atomic_write_json(path: str, payload: Any, indent: Optional[int] = 2) -> None:
+    """Write JSON to a temp file next to `path`, then rename it into place."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def extract_transactions(payload: Any) -> List[Dict[str, Any]]:
+    """Return the transaction list from a day file/response (dict with transactionSummaries, or a bare list)."""
+    if isinstance(payload, dict):
+        payload = payload.get("transactionSummaries", [])
+    if not isinstance(payload, list):
+        return []
+    return [tx for tx in payload if isinstance(tx, dict)]
+
+
+def transaction_key(tx: Dict[str, Any]) -> Any:
+    """Stable identity for a transaction: subOperationId, falling back to operation/type/date."""
+    sub_op_id = tx.get("subOperationId")
+    if sub_op_id is not None:
+        return sub_op_id
+    return (tx.get("operationId"), tx.get("subOperationTypeId"), tx.get("date"))
+
+
+def last_modified(tx: Dict[str, Any]) -> Optional[int]:
+    value = tx.get("lastModified")
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def diff_transactions(existing: Iterable[Dict[str, Any]], fetched: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Compare a stored day against a freshly fetched one.
+    A transaction counts as changed when its lastModified moved forward, or (without
+    lastModified) when its content differs.
+    """
+    existing_by_key = {transaction_key(tx): tx for tx in existing}
+    stats = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+    seen = set()
+    for tx in fetched:
+        key = transaction_key(tx)
+        seen.add(key)
+        old = existing_by_key.get(key)
+        if old is None:
+            stats["new"] += 1
+            continue
+        old_lm, new_lm = last_modified(old), last_modified(tx)
+        if old_lm is not None and new_lm is not None:
+            changed = new_lm > old_lm or (new_lm == old_lm and tx != old)
+        else:
+            changed = tx != old
+        stats["changed" if changed else "unchanged"] += 1
+    stats["removed"] = sum(1 for key in existing_by_key if key not in seen)
+    return stats
+
+
+def write_day_file_if_changed(path: str, payload: Any, indent: Optional[int] = 2) -> Dict[str, int]:
+    """
+    Merge a fetched day into its day file. The fetched day is authoritative (it is the full
+    list Vintrace has for that date), so the file is only rewritten when something was
+    added, changed or removed. Returns the diff stats plus a `written` flag.
+    """
+    existing: List[Dict[str, Any]] = []
+    file_exists = os.path.exists(path)
+    if file_exists:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                existing = extract_transactions(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read existing day file {path} ({e}); rewriting it.")
+            file_exists = False
+
+    stats = diff_transactions(existing, extract_transactions(payload))
+    dirty = not file_exists or stats["new"] or stats["changed"] or stats["removed"]
+    if dirty:
+        atomic_write_json(path, payload, indent=indent)
+    stats["written"] = 1 if dirty else 0
+    return stats
+
+
+class SyncState:
+    """
+    Small JSON state file holding one watermark per sink and endpoint:
+        {"files:GET:/transaction/search": {"watermark_date": "2025-11-10",
+                                           "max_last_modified": 1762819200000,
+                                           "last_run": "2025-11-11T06:30:00"}}
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self.data: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable sync state {path}: {e}")
+        # Older state files keyed watermarks by endpoint only; those were written by the
+        # day-file fetchers, so they carry over to the files sink and never to the DB sink.
+        for key in [k for k in self.data if not k.startswith(("files:", "db:"))]:
+            self.data.setdefault(sink_key("files", key), self.data.pop(key))
+
+    def get(self, endpoint_key: str) -> Dict[str, Any]:
+        return self.data.get(endpoint_key, {})
+
+    def watermark_date(self, endpoint_key: str) -> Optional[date]:
+        value = self.get(endpoint_key).get("watermark_date")
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+    def max_last_modified(self, endpoint_key: str) -> Optional[int]:
+        return self.get(endpoint_key).get("max_last_modified")
+
+    def sync_window(
+        self,
+        endpoint_key: str,
+        default_start: date,
+        end: Optional[date] = None,
+        lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    ) -> Tuple[date, date]:
+        """
+        Days to fetch this run: from `lookback_days` before the watermark (late edits and
+        reversals land on recent days) through `end` (default: today). Without a
+        watermark the full default_start..end window is used.
+        """
+        end = end or date.today()
+        watermark = self.watermark_date(endpoint_key)
+        if watermark is None:
+            return default_start, end
+        start = max(default_start, watermark - timedelta(days=lookback_days))
+        return min(start, end), end
+
+    def advance(self, endpoint_key: str, synced_through: date, max_last_modified: Optional[int] = None) -> None:
+        entry = dict(self.get(endpoint_key))
+        entry["watermark_date"] = synced_through.strftime("%Y-%m-%d")
+        previous = entry.get("max_last_modified")
+        if max_last_modified is not None and (previous is None or max_last_modified > previous):
+            entry["max_last_modified"] = max_last_modified
+        entry["last_run"] = datetime.now().isoformat(timespec="seconds")
+        self.data[endpoint_key] = entry
+
+    def save(self) -> None:
+        atomic_write_json(self.path, self.data)
+
+
+def contiguous_synced_through(days: List[date], succeeded: Iterable[date]) -> Optional[date]:
+    """Last day of `days` such that it and every earlier day in the window synced successfully."""
+    succeeded = set(succeeded)
+    synced_through = None
+    for day in sorted(days):
+        if day not in succeeded:
+            break
+        synced_through = day
+    return synced_through
+
+
+def max_last_modified_of(transactions: Iterable[Dict[str, Any]]) -> Optional[int]:
+    values = [lm for lm in (last_modified(tx) for tx in transactions) if lm is not None]
+    return max(values) if values else None
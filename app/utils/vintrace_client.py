@@ -2,15 +2,20 @@
 
 import os
 import json
+import time
 import requests
 
+from app.utils.rate_limiter import get_shared_limiter, parse_retry_after
+
 class VintraceSmartClient:
     BASE_URLS = {
         "v6": "https://us61.vintrace.net/smwe/api/v6",
         "v7": "https://us61.vintrace.net/smwe/api/v7",
     }
 
-    def __init__(self, api_key=None, endpoint_map_path=None):
+    def __init__(self, api_key=None, endpoint_map_path=None, rate_limiter=None, max_retries=5):
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.max_retries = max_retries
         self.api_key = api_key or os.getenv("VINTRACE_API_TOKEN")
         endpoint_map_path = endpoint_map_path or os.getenv("ENDPOINT_MAP_PATH")
         if not self.api_key:
@@ -33,12 +38,22 @@ class VintraceSmartClient:
             "Accept": "application/json",
             "Content-Type": "application/json"
         })
-        resp = requests.request(
-            method=method,
-            url=url,
-            params=params,
-            json=data,
-            headers=hdrs,
-        )
-        resp.raise_for_status()
-        return resp.json()
\ No newline at end of file
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
+            resp = requests.request(
+                method=method,
+                url=url,
+                params=params,
+                json=data,
+                headers=hdrs,
+            )
+            self.rate_limiter.record_response(resp.status_code, resp.headers)
+            if attempt < self.max_retries - 1:
+                # 429: the limiter has already paused and slowed down; just retry
+                if resp.status_code == 429:
+                    continue
+                if resp.status_code >= 500:
+                    time.sleep(parse_retry_after(resp.headers.get("Retry-After")) or 2 ** attempt)
+                    continue
+            resp.raise_for_status()
+            return resp.json()
\ No newline at end of file
@@ -0,0 +1,213 @@
+# vintrick-backend/app/utils/write_behind_log.py
+
+"""
+Write-behind JSON state backed by an append-only event log.
+
+Small stats files (selector tracking, selector performance) used to be rewritten in full,
+pretty-printed, on every update. WriteBehindJsonLog keeps the state in memory instead:
+
+    <path>          compacted snapshot (the same JSON document readers already expect)
+    <path>.log      one JSON event per line, appended since the last compaction
+    <path>.lock     inter-process lock taken around appends and compaction
+
+record() applies an event to the in-memory state and buffers it. Buffered events are
+appended in one write once flush_interval seconds have passed, and at interpreter exit.
+When the log grows past compact_every lines it is folded into the snapshot (temp file +
+os.replace) and truncated. Several processes can share one file: each appends only its
+own events under the lock, so no process overwrites another's updates.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger("app.utils.write_behind_log")
+
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "5"))
+DEFAULT_COMPACT_EVERY = int(os.getenv("WRITE_BEHIND_COMPACT_EVERY", "2000"))
+
+
+class FileLock:
+    """Blocking exclusive lock on a side file (fcntl.flock, or msvcrt.locking on Windows)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10s; keep waiting
+                    continue
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class WriteBehindJsonLog:
+    """
+    In-memory JSON state with batched, append-only persistence.
+
+    Args:
+        path: Snapshot file path
+        init_state: Returns an empty state document
+        apply_event: Mutates the state in place for one event dict
+        flush_interval: Seconds between appends of buffered events (0 = append on every record)
+        compact_every: Fold the log into the snapshot once it holds this many events
+    """
+
+    def __init__(
+        self,
+        path: str,
+        init_state: Callable[[], Dict[str, Any]],
+        apply_event: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+    ):
+        self.path = str(path)
+        self.log_path = self.path + ".log"
+        self.init_state = init_state
+        self.apply_event = apply_event
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.path + ".lock")
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        self.data = self._read_state()
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠ Could not load {self.path}: {e}")
+        return self.init_state()
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        events = []
+        if not os.path.exists(self.log_path):
+            return events
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a killed process; everything before it is intact
+                    logger.warning(f"⚠ Skipping unreadable line in {self.log_path}")
+        return events
+
+    def _read_state(self) -> Dict[str, Any]:
+        state = self._read_snapshot()
+        for event in self._read_log():
+            self.apply_event(state, event)
+        return state
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """Apply `event` now; persist it with the next flush."""
+        with self._lock:
+            self.apply_event(self.data, event)
+            self._pending.append(json.dumps(event, ensure_ascii=False, separators=(",", ":")))
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+            elif self._timer is None:
+                # Make sure a quiet period after a burst still gets written
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Append buffered events to the log; compact when it has grown large."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            with self._file_lock:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                except Exception as e:
+                    # Keep the events for the next attempt rather than dropping them
+                    self._pending = lines + self._pending
+                    logger.warning(f"⚠ Could not write {self.log_path}: {e}")
+                    return
+                # The events are on disk now; a failed compaction is retried on a later flush
+                if self._log_line_count() >= self.compact_every:
+                    try:
+                        self._compact_locked()
+                    except Exception as e:
+                        logger.warning(f"⚠ Could not compact {self.log_path}: {e}")
+
+    def _log_line_count(self) -> int:
+        try:
+            with open(self.log_path, "rb") as f:
+                return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 16), b""))
+        except OSError:
+            return 0
+
+    def compact(self) -> None:
+        """Flush, then fold the log into the snapshot now."""
+        with self._lock:
+            self.flush()
+            with self._file_lock:
+                self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        # Rebuild from disk (not self.data) so other processes' events are kept too
+        state = self._read_state()
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        open(self.log_path, "w").close()
+        logger.info(f"📦 Compacted {self.log_path} into {self.path}")
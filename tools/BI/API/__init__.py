@@ -8,4 +8,10 @@ from .vintrace_api_client import VintraceAPIClient
 from .vintrace_api_utils import VintraceDataFetcher, create_client_from_env
 from .vintrace_models import *
 
-__all__ = ['VintraceAPIClient', 'VintraceDataFetcher', 'create_client_from_env']
+try:
+    from .vintrace_api_client_async import AsyncVintraceAPIClient
+except ImportError:
+    # aiohttp is optional - only needed for the async client
+    AsyncVintraceAPIClient = None
+
+__all__ = ['VintraceAPIClient', 'AsyncVintraceAPIClient', 'VintraceDataFetcher', 'create_client_from_env']
@@ -145,8 +145,9 @@ def get_endpoint_params(parameters: List[Dict[str, Any]]) -> List[Dict[str, Any]
     return params
 
 
-def generate_api_method(path: str, method: str, operation: Dict[str, Any]) -> str:
-    """Generate a method for an API endpoint"""
+def generate_api_method(path: str, method: str, operation: Dict[str, Any],
+                        is_async: bool = False) -> str:
+    """Generate a method for an API endpoint (a coroutine when is_async is set)"""
     operation_id = operation.get('operationId', '')
     summary = operation.get('summary', '')
     description = operation.get('description', '')
@@ -190,12 +191,13 @@ def generate_api_method(path: str, method: str, operation: Dict[str, Any]) -> st
         params_list.append(f"data: Optional[Dict[str, Any]] = None")
     
     # Format method signature (with line wrapping if needed)
-    method_signature = f"    def {method_name}("
+    def_keyword = "async def" if is_async else "def"
+    method_signature = f"    {def_keyword} {method_name}("
     if len(params_list) <= 3 or len(', '.join(params_list)) < 80:
         method_signature += ', '.join(params_list) + ") -> Dict[str, Any]:"
         lines.append(method_signature)
     else:
-        lines.append(f"    def {method_name}(")
+        lines.append(f"    {def_keyword} {method_name}(")
         for i, param in enumerate(params_list):
             if i < len(params_list) - 1:
                 lines.append(f"        {param},")
@@ -244,10 +246,11 @@ def generate_api_method(path: str, method: str, operation: Dict[str, Any]) -> st
         lines.append("        params = None")
     
     # Make request
+    call_prefix = "await " if is_async else ""
     if method in ['post', 'put', 'patch']:
-        lines.append(f"        return self._request('{method.upper()}', url, params=params, json=data)")
+        lines.append(f"        return {call_prefix}self._request('{method.upper()}', url, params=params, json=data)")
     else:
-        lines.append(f"        return self._request('{method.upper()}', url, params=params)")
+        lines.append(f"        return {call_prefix}self._request('{method.upper()}', url, params=params)")
     
     lines.append("")
     return '\n'.join(lines)
@@ -264,11 +267,17 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('Auto-generated from vintrace-v6-apis.yaml')
     lines.append('"""')
     lines.append('')
+    lines.append('import os')
+    lines.append('import sys')
     lines.append('import requests')
     lines.append('from typing import Optional, Dict, Any, List')
     lines.append('from datetime import datetime')
     lines.append('import time')
     lines.append('')
+    lines.append('# Make the repo root importable so the shared app.utils rate limiter can be used')
+    lines.append('sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))')
+    lines.append('from app.utils.rate_limiter import get_shared_limiter')
+    lines.append('')
     lines.append('')
     lines.append('class VintraceAPIClient:')
     lines.append('    """Client for Vintrace V6 API')
@@ -285,7 +294,7 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('')
     lines.append('    def __init__(self, base_url: str, api_key: Optional[str] = None,')
     lines.append('                 username: Optional[str] = None, password: Optional[str] = None,')
-    lines.append('                 timeout: int = 30, max_retries: int = 3):')
+    lines.append('                 timeout: int = 30, max_retries: int = 3, rate_limiter=None):')
     lines.append('        """')
     lines.append('        Initialize the Vintrace API client')
     lines.append('        ')
@@ -296,6 +305,8 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('            password: Password for basic auth (optional)')
     lines.append('            timeout: Request timeout in seconds (default: 30)')
     lines.append('            max_retries: Maximum number of retries for failed requests (default: 3)')
+    lines.append('            rate_limiter: Limiter with acquire()/record_response() (default: the process-wide')
+    lines.append('                app.utils.rate_limiter.get_shared_limiter())')
     lines.append('        """')
     lines.append('        self.base_url = base_url.rstrip("/")')
     lines.append('        self.api_key = api_key')
@@ -303,6 +314,7 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('        self.password = password')
     lines.append('        self.timeout = timeout')
     lines.append('        self.max_retries = max_retries')
+    lines.append('        self.rate_limiter = rate_limiter if rate_limiter is not None else get_shared_limiter()')
     lines.append('        self.session = requests.Session()')
     lines.append('        ')
     lines.append('        # Set up authentication headers')
@@ -319,8 +331,12 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('        kwargs.setdefault("timeout", self.timeout)')
     lines.append('        ')
     lines.append('        for attempt in range(self.max_retries):')
+    lines.append('            if self.rate_limiter is not None:')
+    lines.append('                self.rate_limiter.acquire()')
     lines.append('            try:')
     lines.append('                response = self.session.request(method, url, **kwargs)')
+    lines.append('                if self.rate_limiter is not None:')
+    lines.append('                    self.rate_limiter.record_response(response.status_code, response.headers)')
     lines.append('                response.raise_for_status()')
     lines.append('                ')
     lines.append('                # Handle empty responses')
@@ -331,9 +347,9 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('            except requests.exceptions.HTTPError as e:')
     lines.append('                if attempt == self.max_retries - 1:')
     lines.append('                    raise')
-    lines.append('                # Retry on 5xx errors')
-    lines.append('                if e.response.status_code >= 500:')
-    lines.append('                    time.sleep(2 ** attempt)')
+    lines.append('                # Retry on 429 (honouring Retry-After) and 5xx errors')
+    lines.append('                if e.response.status_code == 429 or e.response.status_code >= 500:')
+    lines.append('                    time.sleep(self._retry_delay(e.response.status_code, e.response.headers, attempt))')
     lines.append('                    continue')
     lines.append('                raise')
     lines.append('            except requests.exceptions.RequestException as e:')
@@ -343,6 +359,15 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     lines.append('        ')
     lines.append('        raise Exception(f"Failed to {method} {url} after {self.max_retries} attempts")')
     lines.append('')
+    lines.append('    def _retry_delay(self, status_code: int, headers, attempt: int) -> float:')
+    lines.append('        """Seconds to wait before retrying a 429/5xx response"""')
+    lines.append('        if status_code == 429 and self.rate_limiter is not None:')
+    lines.append('            return 0  # the shared limiter already pauses every caller')
+    lines.append('        try:')
+    lines.append('            return max(0.0, float(headers.get("Retry-After")))')
+    lines.append('        except (TypeError, ValueError):')
+    lines.append('            return 2 ** attempt')
+    lines.append('')
     lines.append('    def get_all_pages(self, method_func, **kwargs) -> List[Dict[str, Any]]:')
     lines.append('        """')
     lines.append('        Fetch all pages from a paginated endpoint')
@@ -397,6 +422,227 @@ def generate_api_client_file(spec: Dict[str, Any]) -> str:
     return '\n'.join(lines)
 
 
+def generate_async_api_client_file(spec: Dict[str, Any]) -> str:
+    """Generate the asyncio sibling of api_client.py"""
+    paths = spec.get('paths', {})
+    
+    header = '''"""
+Vintrace V6 Async API Client
+
+Auto-generated from vintrace-v6-apis.yaml
+"""
+
+import asyncio
+import json
+import os
+import sys
+import aiohttp
+from typing import Optional, Dict, Any, List, Tuple
+
+# Make the repo root importable so the shared app.utils rate limiter can be used
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from app.utils.rate_limiter import get_shared_limiter
+
+
+class AsyncVintraceAPIClient:
+    """Asyncio client for Vintrace V6 API
+    
+    Mirrors VintraceAPIClient method-for-method, but every endpoint is a
+    coroutine and get_all_pages fetches the remaining pages concurrently,
+    with at most max_concurrency requests in flight at once.
+    
+    Example:
+        async with AsyncVintraceAPIClient(
+            base_url="https://your-instance.vintrace.net/vinx2/api/v6",
+            api_key="your-api-key",
+            max_concurrency=8
+        ) as client:
+            work_orders = await client.get_all_pages(client.list_available_work_orders)
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 timeout: int = 30, max_retries: int = 3, max_concurrency: int = 5,
+                 rate_limiter=None):
+        """
+        Initialize the async Vintrace API client
+        
+        Args:
+            base_url: Base URL for the Vintrace API (e.g., "https://your-instance.vintrace.net/vinx2/api/v6")
+            api_key: API key for authentication (optional)
+            username: Username for basic auth (optional)
+            password: Password for basic auth (optional)
+            timeout: Request timeout in seconds (default: 30)
+            max_retries: Maximum number of retries for failed requests (default: 3)
+            max_concurrency: Maximum number of requests in flight at once (default: 5)
+            rate_limiter: Limiter with acquire_async()/record_response() (default: the
+                process-wide app.utils.rate_limiter.get_shared_limiter())
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_shared_limiter()
+        self.headers = {"Accept": "application/json"}
+        self.auth = None
+        
+        # Set up authentication (same precedence as the sync client)
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+        elif username and password:
+            self.auth = aiohttp.BasicAuth(username, password)
+        
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncVintraceAPIClient":
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the HTTP session lazily, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                auth=self.auth,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @staticmethod
+    def _encode_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """Stringify query params the way requests does (aiohttp rejects bools)"""
+        if not params:
+            return params
+        return {key: str(value) for key, value in params.items()}
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Make an HTTP request with the same retry logic as VintraceAPIClient"""
+        url = f"{self.base_url}{path}"
+        kwargs["params"] = self._encode_params(kwargs.get("params"))
+        session = self._get_session()
+        
+        for attempt in range(self.max_retries):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            try:
+                # Only hold a concurrency slot while the request is in flight,
+                # not while backing off
+                async with self._semaphore:
+                    async with session.request(method, url, **kwargs) as response:
+                        if self.rate_limiter is not None:
+                            self.rate_limiter.record_response(response.status, response.headers)
+                        response.raise_for_status()
+                        content = await response.read()
+                
+                # Handle empty responses
+                if not content:
+                    return {}
+                
+                return json.loads(content)
+            except aiohttp.ClientResponseError as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                # Retry on 429 (honouring Retry-After) and 5xx errors
+                if e.status == 429 or e.status >= 500:
+                    await asyncio.sleep(self._retry_delay(e.status, e.headers or {}, attempt))
+                    continue
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+        
+        raise Exception(f"Failed to {method} {url} after {self.max_retries} attempts")
+
+    def _retry_delay(self, status_code: int, headers, attempt: int) -> float:
+        """Seconds to wait before retrying a 429/5xx response"""
+        if status_code == 429 and self.rate_limiter is not None:
+            return 0  # the shared limiter already pauses every caller
+        try:
+            return max(0.0, float(headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return 2 ** attempt
+
+    @staticmethod
+    def _page_results(response: Any) -> Tuple[List[Dict[str, Any]], int]:
+        """Split a page response into (results, totalResultCount)"""
+        if isinstance(response, dict):
+            return response.get("results", []), response.get("totalResultCount", 0)
+        results = response if isinstance(response, list) else []
+        return results, len(results)
+
+    async def get_all_pages(self, method_func, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Fetch all pages from a paginated endpoint
+        
+        Page 0 is fetched first to learn totalResultCount, then the remaining
+        pages are requested concurrently (bounded by max_concurrency). Results
+        are returned in page order, exactly as VintraceAPIClient.get_all_pages
+        would return them.
+        
+        Args:
+            method_func: The API coroutine to call (e.g., client.list_available_work_orders)
+            **kwargs: Arguments to pass to the method
+        
+        Returns:
+            List of all results from all pages
+        """
+        max_result = int(kwargs.get("max", 100))
+        
+        first_page = await method_func(**{**kwargs, "first": "0", "max": str(max_result)})
+        all_results, total = self._page_results(first_page)
+        
+        if not all_results or len(all_results) >= total:
+            return list(all_results)
+        
+        async def fetch_page(first_result: int) -> List[Dict[str, Any]]:
+            response = await method_func(**{**kwargs, "first": str(first_result), "max": str(max_result)})
+            return self._page_results(response)[0]
+        
+        pages = await asyncio.gather(*(
+            fetch_page(first_result)
+            for first_result in range(len(all_results), total, max_result)
+        ))
+        
+        all_results = list(all_results)
+        for results in pages:
+            all_results.extend(results)
+        
+        return all_results
+
+    # =================================================================
+    # API ENDPOINTS
+    # =================================================================
+'''
+    
+    lines = [header]
+    
+    # Generate coroutine methods for each endpoint
+    for path, methods in sorted(paths.items()):
+        for method, operation in methods.items():
+            if method.lower() in ['get', 'post', 'put', 'delete', 'patch']:
+                method_code = generate_api_method(path, method.lower(), operation, is_async=True)
+                lines.append(method_code)
+    
+    return '\n'.join(lines)
+
+
 def generate_utilities_file() -> str:
     """Generate utilities.py with helper functions"""
     return '''"""
@@ -648,6 +894,13 @@ def main():
         f.write(client_code)
     print(f"✓ Generated {client_path}")
     
+    print("\nGenerating async API client...")
+    async_client_code = generate_async_api_client_file(spec)
+    async_client_path = Path(__file__).parent / 'vintrace_api_client_async.py'
+    with open(async_client_path, 'w') as f:
+        f.write(async_client_code)
+    print(f"✓ Generated {async_client_path}")
+    
     print("\nGenerating utilities...")
     utils_code = generate_utilities_file()
     utils_path = Path(__file__).parent / 'vintrace_api_utils.py'
@@ -666,7 +919,13 @@ from .vintrace_api_client import VintraceAPIClient
 from .vintrace_api_utils import VintraceDataFetcher, create_client_from_env
 from .vintrace_models import *
 
-__all__ = ['VintraceAPIClient', 'VintraceDataFetcher', 'create_client_from_env']
+try:
+    from .vintrace_api_client_async import AsyncVintraceAPIClient
+except ImportError:
+    # aiohttp is optional - only needed for the async client
+    AsyncVintraceAPIClient = None
+
+__all__ = ['VintraceAPIClient', 'AsyncVintraceAPIClient', 'VintraceDataFetcher', 'create_client_from_env']
 '''
     init_path = Path(__file__).parent / '__init__.py'
     with open(init_path, 'w') as f:
@@ -681,6 +940,7 @@ __all__ = ['VintraceAPIClient', 'VintraceDataFetcher', 'create_client_from_env']
     print("\nFiles created:")
     print(f"  - {models_path}")
     print(f"  - {client_path}")
+    print(f"  - {async_client_path}")
     print(f"  - {utils_path}")
     print(f"  - {init_path}")
 
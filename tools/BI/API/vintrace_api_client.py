@@ -4,11 +4,17 @@ Vintrace V6 API Client
 Auto-generated from vintrace-v6-apis.yaml
 """
 
+import os
+import sys
 import requests
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import time
 
+# Make the repo root importable so the shared app.utils rate limiter can be used
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from app.utils.rate_limiter import get_shared_limiter
+
 
 class VintraceAPIClient:
     """Client for Vintrace V6 API
@@ -25,7 +31,7 @@ class VintraceAPIClient:
 
     def __init__(self, base_url: str, api_key: Optional[str] = None,
                  username: Optional[str] = None, password: Optional[str] = None,
-                 timeout: int = 30, max_retries: int = 3):
+                 timeout: int = 30, max_retries: int = 3, rate_limiter=None):
         """
         Initialize the Vintrace API client
         
@@ -36,6 +42,8 @@ class VintraceAPIClient:
             password: Password for basic auth (optional)
             timeout: Request timeout in seconds (default: 30)
             max_retries: Maximum number of retries for failed requests (default: 3)
+            rate_limiter: Limiter with acquire()/record_response() (default: the process-wide
+                app.utils.rate_limiter.get_shared_limiter())
         """
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
@@ -43,6 +51,7 @@ class VintraceAPIClient:
         self.password = password
         self.timeout = timeout
         self.max_retries = max_retries
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_shared_limiter()
         self.session = requests.Session()
         
         # Set up authentication headers
@@ -59,8 +68,12 @@ class VintraceAPIClient:
         kwargs.setdefault("timeout", self.timeout)
         
         for attempt in range(self.max_retries):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
             try:
                 response = self.session.request(method, url, **kwargs)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_response(response.status_code, response.headers)
                 response.raise_for_status()
                 
                 # Handle empty responses
@@ -71,9 +84,9 @@ class VintraceAPIClient:
             except requests.exceptions.HTTPError as e:
                 if attempt == self.max_retries - 1:
                     raise
-                # Retry on 5xx errors
-                if e.response.status_code >= 500:
-                    time.sleep(2 ** attempt)
+                # Retry on 429 (honouring Retry-After) and 5xx errors
+                if e.response.status_code == 429 or e.response.status_code >= 500:
+                    time.sleep(self._retry_delay(e.response.status_code, e.response.headers, attempt))
                     continue
                 raise
             except requests.exceptions.RequestException as e:
@@ -83,6 +96,15 @@ class VintraceAPIClient:
         
         raise Exception(f"Failed to {method} {url} after {self.max_retries} attempts")
 
+    def _retry_delay(self, status_code: int, headers, attempt: int) -> float:
+        """Seconds to wait before retrying a 429/5xx response"""
+        if status_code == 429 and self.rate_limiter is not None:
+            return 0  # the shared limiter already pauses every caller
+        try:
+            return max(0.0, float(headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return 2 ** attempt
+
     def get_all_pages(self, method_func, **kwargs) -> List[Dict[str, Any]]:
         """
         Fetch all pages from a paginated endpoint
@@ -21,6 +21,12 @@ Usage:
     
     # Export to specific directory
     python analyze_all_inventory_lots.py --output-dir inventory_analysis_reports
+    
+    # Large transaction exports: columnar loading
+    python analyze_all_inventory_lots.py --columnar
+    
+    # Limit full-ancestry tracing to 10 hops
+    python analyze_all_inventory_lots.py --max-depth 10
 
 Steps to get vessel data:
     1. Fetch vessels from API: python fetch_Vessels.py
@@ -495,6 +501,57 @@ def export_analysis_data(
     logger.info(f"Exported analysis data to {output_dir}")
 
 
+def export_full_ancestry(
+    analyzer: TransactionLineageAnalyzer,
+    batch_names,
+    output_dir: Path,
+    max_depth: Optional[int] = None
+):
+    """
+    Export every ancestor of each batch with proportionally attributed gallons
+    
+    Uses the analyzer's memoized lineage engine, so shared ancestors of blend-heavy
+    wines are computed once instead of once per path.
+    
+    Args:
+        analyzer: TransactionLineageAnalyzer instance
+        batch_names: Batches to trace (typically all on-hand batches)
+        output_dir: Directory to save exports
+        max_depth: Optional number of hops to follow (None = full ancestry)
+    """
+    rows = []
+    dags = {}
+    for batch_name in sorted(batch_names):
+        dag = analyzer.get_lineage_dag(batch_name, max_depth=max_depth)
+        if dag.get('not_found'):
+            continue
+        dags[batch_name] = dag
+        for ancestor, node in dag['nodes'].items():
+            if ancestor == batch_name:
+                continue
+            rows.append({
+                'Batch_Name': batch_name,
+                'Ancestor_Batch': ancestor,
+                'Depth': node['depth'],
+                'Gallons_Attributed': round(node['gallons_attributed'], 4),
+                'Ancestor_Is_On_Hand': node.get('is_on_hand', False),
+                'Lineage_Truncated': dag['truncated']
+            })
+    
+    if rows:
+        ancestry_file = output_dir / 'on_hand_full_ancestry.csv'
+        with open(ancestry_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+        logger.info(f"Exported {len(rows)} ancestry rows for {len(dags)} batches to {ancestry_file}")
+    
+    dag_file = output_dir / 'on_hand_lineage_dags.json'
+    with open(dag_file, 'w', encoding='utf-8') as f:
+        json.dump(dags, f, indent=2, ensure_ascii=False)
+    logger.info(f"Exported lineage DAGs to {dag_file}")
+
+
 def export_vessel_batch_data(
     vessel_details: Dict[str, Dict],
     analyzer: TransactionLineageAnalyzer,
@@ -653,6 +710,19 @@ def main():
         help='Generate detailed lineage reports for each batch'
     )
     
+    parser.add_argument(
+        '--columnar',
+        action='store_true',
+        help='Load transactions with pandas (typed columns, far less memory on full-vintage exports)'
+    )
+    
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        default=None,
+        help='Maximum number of hops to trace for full ancestry (default: unlimited)'
+    )
+    
     parser.add_argument(
         '--convert-only',
         action='store_true',
@@ -678,7 +748,7 @@ def main():
     logger.info("Loading transaction lineage analyzer...")
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    analyzer = TransactionLineageAnalyzer(args.transaction_file)
+    analyzer = TransactionLineageAnalyzer(args.transaction_file, columnar=args.columnar)
     
     # Load vessel data if provided
     vessel_batches = None
@@ -705,12 +775,15 @@ def main():
     # Export analysis data
     export_analysis_data(analyzer, output_dir, vessel_details)
     
+    on_hand_batches = analyzer.get_all_on_hand_batches()
+    if vessel_batches:
+        on_hand_batches = set(on_hand_batches) | vessel_batches
+    
+    # Full ancestry (all depths) for every on-hand batch
+    export_full_ancestry(analyzer, on_hand_batches, output_dir, max_depth=args.max_depth)
+    
     # Generate detailed reports if requested
     if args.detailed_reports:
-        on_hand_batches = analyzer.get_all_on_hand_batches()
-        if vessel_batches:
-            on_hand_batches = set(on_hand_batches) | vessel_batches
-        
         detailed_dir = output_dir / 'detailed_batch_reports'
         generate_detailed_batch_reports(analyzer, on_hand_batches, detailed_dir)
     
@@ -725,6 +798,8 @@ def main():
     print("  ✓ on_hand_batch_lineage.csv - Only on-hand batches (Power BI compatible)")
     print("  ✓ all_transactions.csv - All transaction data")
     print("  ✓ complete_lineage_data.json - Complete data in JSON format")
+    print("  ✓ on_hand_full_ancestry.csv - Every ancestor of each on-hand batch with attributed gallons")
+    print("  ✓ on_hand_lineage_dags.json - Shared-node lineage DAG per on-hand batch")
     if vessel_details:
         print("  ✓ vessel_batch_lineage_report.txt - Detailed report for each vessel-batch")
         print("  ✓ vessel_batch_losses.csv - Losses/gains for each vessel-batch (Power BI)")
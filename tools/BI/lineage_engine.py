@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Lineage Engine
+
+Memoized batch-lineage computations over the batch graph built by
+TransactionLineageAnalyzer (parent batch -> child batch, weighted by the gallons
+the parent contributed).
+
+Instead of re-walking shared ancestors along every path, the engine:
+- orders the graph topologically once; cycles are broken by dropping their smallest-gallon
+  edge (recorded in cycle_edges and logged)
+- computes each batch's ancestor closure once and reuses it on later queries
+- attributes gallons to every ancestor proportionally in a single reverse-topological pass
+- returns a shared-node DAG (each batch appears once); the nested tree is an optional view
+
+Gallon attribution:
+    A direct parent is credited with the gallons it sent. A deeper ancestor is credited
+    with its share of what each intermediate batch passed on, i.e. if X received 600 gal
+    from A and 400 gal from B and then sent 100 gal to the target, A is credited 60 gal
+    and B 40 gal through X.
+
+Usage:
+    from lineage_engine import LineageEngine
+    engine = LineageEngine.from_analyzer(analyzer)
+    dag = engine.lineage_dag('24BLEND001-FINAL', max_depth=5)
+    tree = engine.to_tree(dag)
+"""
+
+import logging
+from collections import defaultdict, deque
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LineageEngine:
+    """Topologically-ordered, memoized ancestor/attribution engine for a batch graph"""
+
+    def __init__(self, parents: Dict[str, Dict[str, float]], node_info: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            parents: batch -> {contributing batch: gallons contributed}
+            node_info: Optional batch -> attributes copied onto DAG nodes
+                       (current_volume, is_on_hand, has_left_inventory, ...)
+        """
+        self.parents = parents
+        self.node_info = node_info or {}
+        self._topo_index: Optional[Dict[str, int]] = None
+        self._cycle_edges: Set[Tuple[str, str]] = set()
+        self._ancestors_memo: Dict[str, FrozenSet[str]] = {}
+        self._attribution_memo: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_analyzer(cls, analyzer) -> "LineageEngine":
+        """Build an engine from a loaded TransactionLineageAnalyzer"""
+        parents = {}
+        node_info = {}
+        for batch_name, lineage in analyzer.batch_lineages.items():
+            parents[batch_name] = lineage.contributing_batches
+            node_info[batch_name] = {
+                'current_volume': lineage.current_volume,
+                'is_on_hand': lineage.is_on_hand,
+                'has_left_inventory': lineage.has_left_inventory,
+            }
+        return cls(parents, node_info)
+
+    @classmethod
+    def from_index(cls, index) -> "LineageEngine":
+        """Build an engine from a persisted LineageGraphIndex (app/utils/lineage_index.py)"""
+        return cls(index.parent_map())
+
+    def has_batch(self, batch_name: str) -> bool:
+        return batch_name in self.parents or batch_name in self.node_info
+
+    # ------------------------------------------------------------------
+    # Graph ordering
+    # ------------------------------------------------------------------
+
+    def _all_nodes(self) -> List[str]:
+        nodes = set(self.parents) | set(self.node_info)
+        for contributions in self.parents.values():
+            nodes.update(contributions)
+        return sorted(nodes)
+
+    def topological_order(self) -> List[str]:
+        """
+        Batches ordered so every parent comes before its children.
+        Cycles (e.g. wine blended back into one of its sources) are broken by dropping the
+        edge that carried the fewest gallons; dropped edges are recorded in cycle_edges and
+        ignored for ordering and attribution.
+        """
+        if self._topo_index is None:
+            self._build_order()
+        return sorted(self._topo_index, key=self._topo_index.get)
+
+    @property
+    def cycle_edges(self) -> Set[Tuple[str, str]]:
+        if self._topo_index is None:
+            self._build_order()
+        return self._cycle_edges
+
+    def _live_parents(self, node: str, dropped: Set[Tuple[str, str]]) -> List[str]:
+        return sorted(p for p in self.parents.get(node, {}) if p != node and (p, node) not in dropped)
+
+    def _cyclic_components(self, nodes: List[str], dropped: Set[Tuple[str, str]]) -> List[List[str]]:
+        """Strongly connected components with more than one batch (iterative Tarjan over parent links)"""
+        members = set(nodes)
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        scc_stack: List[str] = []
+        components: List[List[str]] = []
+        counter = 0
+        for root in nodes:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            scc_stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._live_parents(root, dropped)))]
+            while work:
+                node, parent_iter = work[-1]
+                advanced = False
+                for parent in parent_iter:
+                    if parent not in members:
+                        continue
+                    if parent not in index:
+                        index[parent] = lowlink[parent] = counter
+                        counter += 1
+                        scc_stack.append(parent)
+                        on_stack.add(parent)
+                        work.append((parent, iter(self._live_parents(parent, dropped))))
+                        advanced = True
+                        break
+                    if parent in on_stack:
+                        lowlink[node] = min(lowlink[node], index[parent])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    lowlink[work[-1][0]] = min(lowlink[work[-1][0]], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = scc_stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        components.append(sorted(component))
+        return components
+
+    def _break_cycles(self, nodes: List[str]) -> Set[Tuple[str, str]]:
+        """
+        Drop edges until the graph is acyclic: in each cyclic component, the edge with the
+        fewest gallons goes first (ties broken by parent, then child name), so the result
+        depends on the data rather than on traversal order.
+        """
+        dropped: Set[Tuple[str, str]] = set()
+        work = self._cyclic_components(nodes, dropped)
+        while work:
+            component = work.pop()
+            members = set(component)
+            gallons, parent, child = min(
+                (self.parents[child][parent], parent, child)
+                for child in component
+                for parent in self._live_parents(child, dropped)
+                if parent in members
+            )
+            dropped.add((parent, child))
+            logger.warning(f"Lineage cycle among {len(component)} batches: dropped {parent} -> {child} ({gallons} gal)")
+            work.extend(self._cyclic_components(component, dropped))
+        return dropped
+
+    def _build_order(self):
+        nodes = self._all_nodes()
+        cycle_edges = self._break_cycles(nodes)
+
+        # Iterative DFS post-order over the remaining (acyclic) parent links: a node is
+        # emitted after all its parents
+        visited: Set[str] = set()
+        order: List[str] = []
+        for root in nodes:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(self._live_parents(root, cycle_edges)))]
+            while stack:
+                node, parent_iter = stack[-1]
+                advanced = False
+                for parent in parent_iter:
+                    if parent not in visited:
+                        visited.add(parent)
+                        stack.append((parent, iter(self._live_parents(parent, cycle_edges))))
+                        advanced = True
+                        break
+                if not advanced:
+                    order.append(node)
+                    stack.pop()
+
+        self._topo_index = {name: i for i, name in enumerate(order)}
+        self._cycle_edges = cycle_edges
+        if cycle_edges:
+            logger.warning(f"Lineage graph has {len(cycle_edges)} cycle-closing edges; they are excluded from attribution")
+
+    def acyclic_parents(self, batch_name: str) -> Dict[str, float]:
+        """Parents of a batch, minus self-references and cycle-closing edges"""
+        cycle_edges = self.cycle_edges
+        return {
+            parent: gallons for parent, gallons in self.parents.get(batch_name, {}).items()
+            if parent != batch_name and (parent, batch_name) not in cycle_edges
+        }
+
+    # ------------------------------------------------------------------
+    # Ancestors and attribution
+    # ------------------------------------------------------------------
+
+    def ancestors(self, batch_name: str) -> FrozenSet[str]:
+        """All batches that contributed to batch_name at any depth (memoized per batch)"""
+        memo = self._ancestors_memo
+        if batch_name in memo:
+            return memo[batch_name]
+
+        # One O(V+E) walk; reuse closures already memoized for batches on the way.
+        # Intermediate closures are not stored - on long chains that would be O(V^2) memory.
+        closure: Set[str] = set()
+        stack = [batch_name]
+        while stack:
+            node = stack.pop()
+            for parent in self.acyclic_parents(node):
+                if parent in closure:
+                    continue
+                closure.add(parent)
+                if parent in memo:
+                    closure |= memo[parent]
+                else:
+                    stack.append(parent)
+        memo[batch_name] = frozenset(closure)
+        return memo[batch_name]
+
+    def attribution(self, batch_name: str, max_depth: Optional[int] = None) -> Dict[str, float]:
+        """
+        Gallons each ancestor contributed to batch_name, split proportionally through
+        intermediate batches.
+
+        Args:
+            batch_name: Batch to attribute
+            max_depth: Only follow contribution paths up to this many hops (None = unlimited)
+
+        Returns:
+            Dict of ancestor batch -> attributed gallons
+        """
+        if max_depth is not None:
+            return self._attribution_bounded(batch_name, max_depth)
+        if batch_name in self._attribution_memo:
+            return self._attribution_memo[batch_name]
+
+        ancestry = self.ancestors(batch_name)
+        topo_index = self._topo_index
+        # Children before parents, so each batch's total is final before it is split
+        order = sorted(ancestry, key=topo_index.get, reverse=True)
+
+        flow: Dict[str, float] = defaultdict(float)
+        attributed: Dict[str, float] = defaultdict(float)
+        for parent, gallons in self.acyclic_parents(batch_name).items():
+            attributed[parent] += gallons
+            flow[parent] += gallons
+        for node in order:
+            amount = flow.get(node, 0.0)
+            if not amount:
+                continue
+            parents = self.acyclic_parents(node)
+            incoming = sum(parents.values())
+            if incoming <= 0:
+                continue
+            for parent, gallons in parents.items():
+                share = amount * gallons / incoming
+                attributed[parent] += share
+                flow[parent] += share
+
+        result = {name: attributed.get(name, 0.0) for name in ancestry}
+        self._attribution_memo[batch_name] = result
+        return result
+
+    def _attribution_bounded(self, batch_name: str, max_depth: int) -> Dict[str, float]:
+        # Propagate one hop per level; cost is O(max_depth * edges in the bounded ancestry)
+        attributed: Dict[str, float] = defaultdict(float)
+        frontier: Dict[str, float] = {}
+        for parent, gallons in self.acyclic_parents(batch_name).items():
+            frontier[parent] = frontier.get(parent, 0.0) + gallons
+        depth = 1
+        while frontier and depth <= max_depth:
+            next_frontier: Dict[str, float] = defaultdict(float)
+            for node, amount in frontier.items():
+                attributed[node] += amount
+                if depth == max_depth or not amount:
+                    continue
+                parents = self.acyclic_parents(node)
+                incoming = sum(parents.values())
+                if incoming <= 0:
+                    continue
+                for parent, gallons in parents.items():
+                    next_frontier[parent] += amount * gallons / incoming
+            frontier = next_frontier
+            depth += 1
+        return dict(attributed)
+
+    def depths(self, batch_name: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """
+        Shortest hop count from batch_name to every batch upstream of it (the batch itself is
+        depth 0). Follows cycle-closing edges too, so the DAG view shows the whole upstream graph.
+        """
+        depths = {batch_name: 0}
+        queue = deque([batch_name])
+        while queue:
+            node = queue.popleft()
+            depth = depths[node]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for parent in self.parents.get(node, {}):
+                if parent not in depths:
+                    depths[parent] = depth + 1
+                    queue.append(parent)
+        return depths
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def lineage_dag(self, batch_name: str, max_depth: Optional[int] = None) -> Dict:
+        """
+        Shared-node lineage DAG for a batch
+
+        Args:
+            batch_name: Batch to trace
+            max_depth: Stop after this many hops (None = full ancestry)
+
+        Returns:
+            {'root', 'max_depth', 'truncated', 'nodes': {batch: {..., 'depth', 'gallons_attributed'}},
+             'edges': [{'source', 'target', 'gallons', 'cycle'}]}
+            Edges flagged 'cycle' are shown but carry no attributed gallons.
+        """
+        if not self.has_batch(batch_name):
+            return {'root': batch_name, 'not_found': True, 'nodes': {}, 'edges': []}
+
+        depths = self.depths(batch_name, max_depth)
+        gallons = self.attribution(batch_name, max_depth)
+        cycle_edges = self.cycle_edges
+
+        nodes = {}
+        for name, depth in sorted(depths.items(), key=lambda item: (item[1], item[0])):
+            node = {'batch_name': name}
+            node.update(self.node_info.get(name, {}))
+            node['depth'] = depth
+            node['gallons_attributed'] = gallons.get(name, 0.0) if name != batch_name else None
+            nodes[name] = node
+
+        edges = []
+        truncated = False
+        for name, depth in depths.items():
+            for parent, gal in self.parents.get(name, {}).items():
+                if parent == name:
+                    continue
+                if parent not in depths:
+                    truncated = True
+                    continue
+                edges.append({
+                    'source': parent,
+                    'target': name,
+                    'gallons': gal,
+                    'cycle': (parent, name) in cycle_edges,
+                })
+
+        return {
+            'root': batch_name,
+            'max_depth': max_depth,
+            'truncated': truncated,
+            'nodes': nodes,
+            'edges': edges,
+        }
+
+    def to_tree(self, dag: Dict) -> Dict:
+        """
+        Nested-tree rendering of a lineage DAG (the legacy get_full_lineage_tree shape).
+        Shared ancestors are repeated under every path, so use this for display only.
+        """
+        root = dag['root']
+        if dag.get('not_found'):
+            return {'batch_name': root, 'not_found': True}
+
+        parents_in_dag: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for edge in dag['edges']:
+            parents_in_dag[edge['target']].append((edge['source'], edge['gallons']))
+
+        def make_node(name: str) -> Dict:
+            info = dag['nodes'].get(name, {})
+            return {
+                'batch_name': name,
+                'current_volume': info.get('current_volume', 0.0),
+                'is_on_hand': info.get('is_on_hand', False),
+                'has_left_inventory': info.get('has_left_inventory', False),
+                'contributing_batches': [],
+            }
+
+        tree = make_node(root)
+        # (node dict, batch name, batches on the current path)
+        stack = [(tree, root, frozenset([root]))]
+        while stack:
+            node, name, path = stack.pop()
+            for parent, gallons in parents_in_dag.get(name, []):
+                if parent in path:
+                    child = {'batch_name': parent, 'cycle_detected': True}
+                else:
+                    child = make_node(parent)
+                    stack.append((child, parent, path | {parent}))
+                child['gallons_contributed'] = gallons
+                node['contributing_batches'].append(child)
+        return tree
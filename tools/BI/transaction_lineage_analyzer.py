@@ -26,6 +26,9 @@ Usage:
     from transaction_lineage_analyzer import TransactionLineageAnalyzer
     analyzer = TransactionLineageAnalyzer('Transaction_to_analysise.csv')
     lineage = analyzer.get_batch_lineage('24BLEND001-FINAL')
+
+    # Large exports: columnar (pandas) ingestion, Transaction objects built on demand
+    analyzer = TransactionLineageAnalyzer('Transaction_to_analysise.csv', columnar=True)
 """
 
 import csv
@@ -36,6 +39,18 @@ from datetime import datetime
 from collections import defaultdict
 import logging
 
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+try:
+    from lineage_engine import LineageEngine
+except ImportError:
+    from .lineage_engine import LineageEngine
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -234,6 +249,28 @@ class Transaction:
         }
 
 
+# Columns parsed with Transaction._safe_float semantics (blank/invalid -> 0.0)
+NUMERIC_COLUMNS = [
+    'Src Vol Pre', 'Src Vol Post', 'Src Vol Change',
+    'Src Alcohol Pre', 'Src Proof Pre', 'Src Proof Gallons Pre',
+    'Src Alcohol Post', 'Src Proof Post', 'Src Proof Gallons Post', 'Src Vol Proof Gal Change',
+    'Dest Vol Pre', 'Dest Vol Post', 'Dest Vol Change',
+    'Dest Alcohol Pre', 'Dest Proof Pre', 'Dest Proof Gallons Pre',
+    'Dest Alcohol Post', 'Dest Proof Post', 'Dest Proof Gallons Post', 'Dest Vol Proof Gal Change',
+    'Loss/Gain Amount (gal)', 'Loss/Gain Amount (proof gal)', 'NET',
+]
+
+# Low-cardinality text columns kept as pandas categoricals in columnar mode
+CATEGORICAL_COLUMNS = [
+    'Src Batch Pre', 'Src Batch Post', 'Dest Batch Pre', 'Dest Batch Post',
+    'From Batch', 'To Batch', 'Op Type', 'Txn Type', 'Src Vessel', 'Dest Vessel',
+    'Loss/Gain Reason', 'Winery',
+]
+
+MOVEMENT_OP_TYPES = ['Transfer', 'Blend', 'Receipt']
+ADJUSTMENT_OP_TYPES = ['Adjustment', 'Measurement', 'Treatment', 'Analysis']
+
+
 class BatchLineage:
     """Represents the complete lineage of a vessel-batch"""
     
@@ -291,22 +328,94 @@ class BatchLineage:
         }
 
 
+class ColumnarBatchLineage(BatchLineage):
+    """BatchLineage built by the columnar loader
+
+    Incoming/outgoing transactions are kept as row numbers into the analyzer's
+    DataFrame and only turned into Transaction objects when first accessed.
+    """
+    
+    def __init__(self, batch_name: str, analyzer: 'TransactionLineageAnalyzer'):
+        self._analyzer = analyzer
+        self.incoming_rows = []
+        self.outgoing_rows = []
+        super().__init__(batch_name)
+        self._contributing_transactions = None
+        self._outgoing_transactions = None
+        
+    @property
+    def contributing_transactions(self) -> List[Transaction]:
+        if self._contributing_transactions is None:
+            self._contributing_transactions = self._analyzer.get_transactions(self.incoming_rows)
+        return self._contributing_transactions
+    
+    @contributing_transactions.setter
+    def contributing_transactions(self, value):
+        self._contributing_transactions = value
+        
+    @property
+    def outgoing_transactions(self) -> List[Transaction]:
+        if self._outgoing_transactions is None:
+            self._outgoing_transactions = self._analyzer.get_transactions(self.outgoing_rows)
+        return self._outgoing_transactions
+    
+    @outgoing_transactions.setter
+    def outgoing_transactions(self, value):
+        self._outgoing_transactions = value
+        
+    def to_dict(self) -> Dict:
+        """Convert lineage to dictionary without materializing transactions"""
+        return {
+            'batch_name': self.batch_name,
+            'current_volume': self.current_volume,
+            'is_on_hand': self.is_on_hand,
+            'has_left_inventory': self.has_left_inventory,
+            'contributing_batches': self.contributing_batches,
+            'losses': self.losses,
+            'total_contributing_batches': len(self.contributing_batches),
+            'incoming_transaction_count': len(self.incoming_rows),
+            'outgoing_transaction_count': len(self.outgoing_rows)
+        }
+
+
 class TransactionLineageAnalyzer:
     """Main analyzer class for transaction lineage tracking"""
     
-    def __init__(self, csv_file_path: Optional[str] = None):
+    def __init__(self, csv_file_path: Optional[str] = None, columnar: bool = False):
         """
         Initialize the analyzer
         
         Args:
             csv_file_path: Path to CSV file with transaction data
+            columnar: Load with pandas into typed columns and build lineage with
+                      vectorized group-bys; Transaction objects are created on demand
         """
-        self.transactions: List[Transaction] = []
+        self._transactions: Optional[List[Transaction]] = []
         self.batch_lineages: Dict[str, BatchLineage] = {}
+        self._lineage_engine: Optional[LineageEngine] = None
+        self._frame = None
+        self.columnar = columnar
         
         if csv_file_path:
             self.load_from_csv(csv_file_path)
             
+    @property
+    def transactions(self) -> List[Transaction]:
+        """All transactions (materialized from the DataFrame on first access in columnar mode)"""
+        if self._transactions is None:
+            self._transactions = self.get_transactions(range(len(self._frame)))
+        return self._transactions
+    
+    @transactions.setter
+    def transactions(self, value: List[Transaction]):
+        self._transactions = value
+        
+    @property
+    def transaction_count(self) -> int:
+        if self._frame is not None:
+            return len(self._frame)
+        return len(self._transactions or [])
+            
     def load_from_csv(self, csv_file_path: str):
         """
         Load transaction data from CSV file
@@ -314,6 +423,10 @@ class TransactionLineageAnalyzer:
         Args:
             csv_file_path: Path to CSV file
         """
+        if self.columnar:
+            self._load_columnar(csv_file_path)
+            return
+            
         logger.info(f"Loading transactions from {csv_file_path}")
         
         try:
@@ -333,6 +446,205 @@ class TransactionLineageAnalyzer:
             logger.error(f"Error loading CSV: {e}")
             raise
             
+    def _load_columnar(self, csv_file_path: str):
+        """
+        Load transaction data into a typed DataFrame
+        
+        Text is read as-is (blank -> ''), batch names and other repeated labels become
+        categoricals, and volume columns are parsed to float64 with blanks/invalid
+        values as 0.0 (same rules as Transaction._safe_float).
+        
+        Args:
+            csv_file_path: Path to CSV file
+        """
+        if pd is None:
+            raise ImportError("Columnar mode requires pandas and numpy")
+        logger.info(f"Loading transactions (columnar) from {csv_file_path}")
+        
+        try:
+            frame = pd.read_csv(csv_file_path, dtype=str, keep_default_na=False, encoding='utf-8')
+        except FileNotFoundError:
+            logger.error(f"File not found: {csv_file_path}")
+            raise
+        
+        for col in NUMERIC_COLUMNS:
+            if col in frame.columns:
+                frame[col] = self._parse_float_column(frame[col])
+        
+        if self._frame is not None:
+            frame = pd.concat([self._frame.astype({c: str for c in CATEGORICAL_COLUMNS if c in self._frame.columns}), frame],
+                              ignore_index=True)
+            for col in NUMERIC_COLUMNS:
+                if col in frame.columns:
+                    frame[col] = frame[col].fillna(0.0)
+            frame = frame.fillna('')
+            
+        for col in CATEGORICAL_COLUMNS:
+            if col in frame.columns:
+                frame[col] = frame[col].astype('category')
+                
+        self._frame = frame
+        self._transactions = None
+        logger.info(f"Loaded {len(frame)} transactions")
+        self._build_lineage_columnar()
+        
+    @staticmethod
+    def _parse_float_column(values):
+        """Strings -> float64 with blank/invalid as 0.0, parsed exactly like float()"""
+        valid = pd.to_numeric(values, errors='coerce').notna().to_numpy()
+        parsed = np.zeros(len(values), dtype='float64')
+        # astype round-trips exactly; to_numeric is only used to find the parseable cells
+        parsed[valid] = values[valid].astype('float64').to_numpy()
+        return parsed
+        
+    def _text_column(self, name: str):
+        """Column as a string array ('' when the column is missing)"""
+        if name in self._frame.columns:
+            return self._frame[name].astype(object).to_numpy(dtype=object)
+        return np.full(len(self._frame), '', dtype=object)
+    
+    def _float_column(self, name: str):
+        if name in self._frame.columns:
+            return self._frame[name].to_numpy(dtype='float64')
+        return np.zeros(len(self._frame), dtype='float64')
+        
+    def get_transactions(self, rows) -> List[Transaction]:
+        """
+        Materialize Transaction objects for the given DataFrame row numbers (columnar mode)
+        
+        Args:
+            rows: Iterable of row positions
+            
+        Returns:
+            List of Transaction objects in the same order
+        """
+        if self._frame is None:
+            return [self._transactions[i] for i in rows]
+        rows = list(rows)
+        if not rows:
+            return []
+        subset = self._frame.iloc[rows]
+        return [Transaction(record) for record in subset.astype(object).to_dict('records')]
+            
+    def _build_lineage_columnar(self):
+        """Build the lineage relationships from the DataFrame
+        
+        Same rules as _build_lineage, expressed as array operations: batch names are
+        coded against one categorical dictionary, edge lists and gallon sums come from
+        group-bys over (destination code, source code), and each BatchLineage only keeps
+        the row numbers of its transactions.
+        """
+        logger.info("Building lineage relationships (columnar)...")
+        n = len(self._frame)
+        
+        src_pre = self._text_column('Src Batch Pre')
+        src_post_raw = self._text_column('Src Batch Post')
+        dest_pre_raw = self._text_column('Dest Batch Pre')
+        dest_post = self._text_column('Dest Batch Post')
+        from_raw = self._text_column('From Batch')
+        to_raw = self._text_column('To Batch')
+        op_type = self._text_column('Op Type')
+        
+        # Legacy fields fall back to the pre/post columns (see Transaction.__init__)
+        from_batch = np.where(from_raw != '', from_raw, src_pre)
+        to_batch = np.where(to_raw != '', to_raw, dest_post)
+        src = np.where(src_pre != '', src_pre, from_batch)
+        dest = np.where(dest_post != '', dest_post, to_batch)
+        src_post = np.where(src_post_raw != '', src_post_raw, from_batch)
+        dest_pre = np.where(dest_pre_raw != '', dest_pre_raw, to_batch)
+        
+        # One dictionary of batch names; code -1 means "no batch"
+        names = pd.unique(np.concatenate([src_pre, src_post_raw, dest_pre_raw, dest_post, from_batch, to_batch]))
+        names = np.array(sorted(name for name in names if name != ''), dtype=object)
+        categories = pd.Index(names)
+        
+        def codes(values):
+            return categories.get_indexer(values).astype('int64')
+        
+        src_c, dest_c = codes(src), codes(dest)
+        src_post_c, dest_pre_c = codes(src_post), codes(dest_pre)
+        
+        self.batch_lineages = {name: ColumnarBatchLineage(name, self) for name in names}
+        lineages = [self.batch_lineages[name] for name in names]
+        
+        rows = np.arange(n, dtype='int64')
+        dest_change = np.abs(self._float_column('Dest Vol Change'))
+        src_change = np.abs(self._float_column('Src Vol Change'))
+        
+        is_on_hand = op_type == 'On-Hand'
+        is_move = np.isin(op_type, MOVEMENT_OP_TYPES)
+        is_adjust = np.isin(op_type, ADJUSTMENT_OP_TYPES)
+        
+        # On-Hand: last row per batch sets the current volume
+        current = np.where(dest_c >= 0, dest_c, dest_pre_c)
+        mask = is_on_hand & (current >= 0)
+        if mask.any():
+            on_hand = pd.DataFrame({'batch': current[mask], 'vol': self._float_column('Dest Vol Post')[mask]})
+            for code, vol in on_hand.groupby('batch', sort=False)['vol'].last().items():
+                lineages[code].is_on_hand = True
+                lineages[code].current_volume = float(vol)
+        
+        # Incoming (batch, row, source, gallons) from movements and adjustments
+        adjust_target = np.where(dest_c >= 0, dest_c,
+                                 np.where(dest_pre_c >= 0, dest_pre_c,
+                                          np.where(src_post_c >= 0, src_post_c, src_c)))
+        adjust_gallons = np.where(dest_change != 0, dest_change, src_change)
+        m_dest = is_move & (dest_c >= 0)
+        m_dest_pre = is_move & (dest_pre_c >= 0) & (dest_pre != dest)
+        m_adjust = is_adjust & (adjust_target >= 0)
+        incoming = pd.DataFrame({
+            'batch': np.concatenate([dest_c[m_dest], dest_pre_c[m_dest_pre], adjust_target[m_adjust]]),
+            'row': np.concatenate([rows[m_dest], rows[m_dest_pre], rows[m_adjust]]),
+            'src': np.concatenate([src_c[m_dest], src_c[m_dest_pre], src_c[m_adjust]]),
+            'gallons': np.concatenate([dest_change[m_dest], dest_change[m_dest_pre], adjust_gallons[m_adjust]]),
+        }).sort_values(['batch', 'row'], kind='stable')
+        
+        for code, group_rows in incoming.groupby('batch', sort=False)['row']:
+            lineages[code].incoming_rows = group_rows.tolist()
+        self._incoming_edges = incoming
+        self._batch_names = names
+        
+        # Edge list: gallons summed per (destination, source), in first-seen row order
+        edges = incoming[(incoming['src'] >= 0) & (incoming['src'] != incoming['batch'])].sort_values('row', kind='stable')
+        pair_ids, pairs = pd.factorize(pd.MultiIndex.from_arrays([edges['batch'], edges['src']]))
+        edge_sums = np.zeros(len(pairs), dtype='float64')
+        # Unbuffered in-order accumulation, so sums match the row-by-row loop bit for bit
+        np.add.at(edge_sums, pair_ids, edges['gallons'].to_numpy())
+        for (code, src_code), gallons in zip(pairs, edge_sums):
+            lineages[code].contributing_batches[names[src_code]] = float(gallons)
+        
+        # Losses/gains recorded against each incoming transaction
+        loss_amount = self._float_column('Loss/Gain Amount (gal)')
+        loss_rows = incoming[loss_amount[incoming['row'].to_numpy()] != 0]
+        if len(loss_rows):
+            reason = self._text_column('Loss/Gain Reason')
+            op_date = self._text_column('Op Date')
+            op_id = self._text_column('Op Id')
+            for code, row in zip(loss_rows['batch'].to_numpy(), loss_rows['row'].to_numpy()):
+                lineages[code].losses.append({
+                    'amount': float(loss_amount[row]),
+                    'reason': reason[row],
+                    'op_date': op_date[row],
+                    'op_id': op_id[row],
+                    'op_type': op_type[row]
+                })
+        
+        # Outgoing: source batch, plus the post-transaction source name when it changed
+        m_src = is_move & (src_c >= 0)
+        m_src_post = is_move & (src_post_c >= 0) & (src_post != src)
+        outgoing = pd.DataFrame({
+            'batch': np.concatenate([src_c[m_src], src_post_c[m_src_post]]),
+            'row': np.concatenate([rows[m_src], rows[m_src_post]]),
+        }).sort_values(['batch', 'row'], kind='stable')
+        for code, group_rows in outgoing.groupby('batch', sort=False)['row']:
+            lineages[code].outgoing_rows = group_rows.tolist()
+        
+        for code in np.unique(src_c[m_src & (op_type != 'Receipt')]):
+            lineages[code].has_left_inventory = True
+        
+        self._lineage_engine = None
+        logger.info(f"Built lineage for {len(self.batch_lineages)} batches")
+            
     def _build_lineage(self):
         """Build the lineage relationships from transactions
         
@@ -428,8 +740,48 @@ class TransactionLineageAnalyzer:
                     volume_change = abs(trans.dest_vol_change) if trans.dest_vol_change != 0 else abs(trans.src_vol_change)
                     self.batch_lineages[target_batch].add_incoming_transaction(trans, volume_change)
                     
+        self._lineage_engine = None
         logger.info(f"Built lineage for {len(self.batch_lineages)} batches")
         
+    def update_lineage_index(self, index_dir: str) -> int:
+        """
+        Bring a persisted lineage index (app/utils/lineage_index.py) up to date with the
+        contributing-batch edges of the loaded transactions. Rows are keyed on Tx Id and
+        compared by content hash, so only new transactions are ingested and an edited or
+        reversed one replaces the edges it contributed before. Requires columnar mode.
+        
+        Args:
+            index_dir: Directory of the lineage index (created if missing)
+            
+        Returns:
+            Number of new or changed transaction rows ingested
+        """
+        if self._frame is None:
+            raise ValueError("update_lineage_index needs the analyzer loaded with columnar=True")
+        import sys
+        repo_root = str(Path(__file__).resolve().parents[2])
+        if repo_root not in sys.path:
+            sys.path.insert(0, repo_root)
+        from app.utils.lineage_index import LineageGraphIndex, hash_rows, row_keys
+        
+        index = LineageGraphIndex(index_dir)
+        row_hashes = hash_rows(self._frame)
+        
+        edges = self._incoming_edges
+        edges = edges[(edges['src'] >= 0) & (edges['src'] != edges['batch'])]
+        names = self._batch_names
+        ingested, replaced = index.replace_rows(
+            row_keys(self._frame, row_hashes),
+            row_hashes,
+            edges['row'].tolist(),
+            names[edges['src'].to_numpy()].tolist(),
+            names[edges['batch'].to_numpy()].tolist(),
+            edges['gallons'].tolist(),
+        )
+        index.save()
+        logger.info(f"Lineage index {index_dir}: {ingested} new/changed transactions, {replaced} Tx Ids replaced")
+        return ingested
+    
     def get_batch_lineage(self, batch_name: str) -> Optional[BatchLineage]:
         """
         Get the complete lineage for a specific batch
@@ -442,44 +794,44 @@ class TransactionLineageAnalyzer:
         """
         return self.batch_lineages.get(batch_name)
     
-    def get_full_lineage_tree(self, batch_name: str, visited: Optional[Set[str]] = None) -> Dict:
+    @property
+    def lineage_engine(self) -> LineageEngine:
+        """Memoized lineage engine over the current batch graph (rebuilt after reloading)"""
+        if self._lineage_engine is None:
+            self._lineage_engine = LineageEngine.from_analyzer(self)
+        return self._lineage_engine
+
+    def get_lineage_dag(self, batch_name: str, max_depth: Optional[int] = None) -> Dict:
         """
-        Get the full lineage tree recursively for a batch
+        Get the lineage of a batch as a shared-node DAG with proportional gallon attribution
         
         Args:
             batch_name: Name of the batch to trace
-            visited: Set of already visited batches (to prevent cycles)
+            max_depth: Optional number of hops to follow (None = full ancestry)
             
         Returns:
-            Dictionary containing the full lineage tree
+            Dictionary with 'nodes' (one entry per batch) and 'edges'
+        """
+        return self.lineage_engine.lineage_dag(batch_name, max_depth=max_depth)
+
+    def get_full_lineage_tree(self, batch_name: str, visited: Optional[Set[str]] = None,
+                              max_depth: Optional[int] = None) -> Dict:
         """
-        if visited is None:
-            visited = set()
+        Get the full lineage tree for a batch (nested view of get_lineage_dag)
+        
+        Args:
+            batch_name: Name of the batch to trace
+            visited: Batches to treat as already visited (reported as cycles)
+            max_depth: Optional number of hops to follow (None = full ancestry)
             
-        if batch_name in visited:
+        Returns:
+            Dictionary containing the full lineage tree
+        """
+        if visited and batch_name in visited:
             return {'batch_name': batch_name, 'cycle_detected': True}
-            
-        visited.add(batch_name)
-        
-        lineage = self.get_batch_lineage(batch_name)
-        if not lineage:
+        if not self.get_batch_lineage(batch_name):
             return {'batch_name': batch_name, 'not_found': True}
-            
-        tree = {
-            'batch_name': batch_name,
-            'current_volume': lineage.current_volume,
-            'is_on_hand': lineage.is_on_hand,
-            'has_left_inventory': lineage.has_left_inventory,
-            'contributing_batches': []
-        }
-        
-        # Recursively get lineage for each contributing batch
-        for contributing_batch, gallons in lineage.contributing_batches.items():
-            sub_tree = self.get_full_lineage_tree(contributing_batch, visited.copy())
-            sub_tree['gallons_contributed'] = gallons
-            tree['contributing_batches'].append(sub_tree)
-            
-        return tree
+        return self.lineage_engine.to_tree(self.get_lineage_dag(batch_name, max_depth=max_depth))
     
     def get_all_on_hand_batches(self) -> List[str]:
         """Get list of all batches currently on-hand"""
@@ -608,6 +960,12 @@ class TransactionLineageAnalyzer:
         """
         logger.info(f"Exporting transactions to {output_file}")
         
+        if self._transactions is None:
+            # Columnar mode: write straight from the DataFrame
+            self._transaction_records_frame().to_csv(output_file, index=False, encoding='utf-8')
+            logger.info(f"Exported {self.transaction_count} transactions")
+            return
+        
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
             if self.transactions:
                 writer = csv.DictWriter(f, fieldnames=self.transactions[0].to_dict().keys())
@@ -617,6 +975,17 @@ class TransactionLineageAnalyzer:
                     
         logger.info(f"Exported {len(self.transactions)} transactions")
     
+    def _transaction_records_frame(self):
+        """DataFrame with Transaction.to_dict() columns, built from the columnar data"""
+        columns = list(Transaction({}).to_dict().keys())
+        out = pd.DataFrame(index=self._frame.index)
+        for col in columns:
+            if col in self._frame.columns:
+                out[col] = self._frame[col].astype(object) if col not in NUMERIC_COLUMNS else self._frame[col]
+            else:
+                out[col] = 0.0 if col in NUMERIC_COLUMNS else ''
+        return out
+    
     def export_detailed_lineage_to_csv(self, output_file: str, batch_filter: Optional[str] = None):
         """
         Export detailed lineage relationships to CSV with pre/post batch information
@@ -716,7 +1085,7 @@ class TransactionLineageAnalyzer:
         
         data = {
             'metadata': {
-                'total_transactions': len(self.transactions),
+                'total_transactions': self.transaction_count,
                 'total_batches': len(self.batch_lineages),
                 'on_hand_batches': len(self.get_all_on_hand_batches()),
                 'shipped_batches': len(self.get_all_shipped_batches())
@@ -725,7 +1094,10 @@ class TransactionLineageAnalyzer:
                 batch_name: lineage.to_dict()
                 for batch_name, lineage in self.batch_lineages.items()
             },
-            'transactions': [trans.to_dict() for trans in self.transactions]
+            'transactions': (
+                self._transaction_records_frame().to_dict('records') if self._transactions is None
+                else [trans.to_dict() for trans in self.transactions]
+            )
         }
         
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -747,7 +1119,7 @@ def main():
     analyzer = TransactionLineageAnalyzer(csv_file)
     
     # Show summary
-    print(f"Loaded {len(analyzer.transactions)} transactions")
+    print(f"Loaded {analyzer.transaction_count} transactions")
     print(f"Tracking {len(analyzer.batch_lineages)} unique batches")
     print(f"On-hand batches: {len(analyzer.get_all_on_hand_batches())}")
     print(f"Shipped batches: {len(analyzer.get_all_shipped_batches())}")
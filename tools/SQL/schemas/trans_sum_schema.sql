@@ -97,6 +97,7 @@ CREATE TABLE trans_sums (
     formattedDate NVARCHAR(32) NULL,
     date BIGINT NULL,
     operationId INT NULL,
+    subOperationId INT NULL,
     operationTypeId INT NULL,
     operationTypeName NVARCHAR(128) NULL,
     subOperationTypeId INT NULL,
@@ -113,4 +114,19 @@ CREATE TABLE trans_sums (
     addition_ops_id INT NULL REFERENCES addition_ops(id),
     analysis_ops_id INT NULL REFERENCES analysis_ops(id),
     additionalDetails NVARCHAR(MAX) NULL
-);
\ No newline at end of file
+);
+
+-- subOperationId (upsert key of /vintrace/pull-transactions/): idempotent migration for
+-- tables created before the column existed. Dynamic SQL so the index compiles after the
+-- ALTER when the whole file runs as one batch.
+IF OBJECT_ID('trans_sum', 'U') IS NOT NULL AND COL_LENGTH('trans_sum', 'subOperationId') IS NULL
+    EXEC('ALTER TABLE trans_sum ADD subOperationId INT NULL');
+IF OBJECT_ID('trans_sum', 'U') IS NOT NULL
+   AND NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_trans_sum_subOperationId' AND object_id = OBJECT_ID('trans_sum'))
+    EXEC('CREATE INDEX ix_trans_sum_subOperationId ON trans_sum (subOperationId)');
+
+IF OBJECT_ID('trans_sums', 'U') IS NOT NULL AND COL_LENGTH('trans_sums', 'subOperationId') IS NULL
+    EXEC('ALTER TABLE trans_sums ADD subOperationId INT NULL');
+IF OBJECT_ID('trans_sums', 'U') IS NOT NULL
+   AND NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_trans_sums_subOperationId' AND object_id = OBJECT_ID('trans_sums'))
+    EXEC('CREATE INDEX ix_trans_sums_subOperationId ON trans_sums (subOperationId)');
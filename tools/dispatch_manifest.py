@@ -0,0 +1,216 @@
+#  python tools/dispatch_manifest.py            (rebuild the manifest from the download directory)
+"""
+Dispatch Download Manifest
+SQLite index of the dispatch search console CSV downloads
+
+The dispatch scrapers save two CSVs per dispatch into disp_console/:
+
+    report_1_BOL_<bol>_Date_<date>_Qty_<quantity>_Code_<code>.csv   (bulk)
+    report_2_BOL_<bol>_Date_<date>_Qty_<quantity>_Code_<code>.csv   (fruit)
+
+"Is this dispatch already downloaded?" used to be an os.listdir + regex scan of that
+directory per record. The manifest keeps one row per saved file, keyed on the sanitized
+(date, bol, quantity, code) used in the filename plus the report number:
+
+    - record_download() is called right after each file is moved into place; every write
+      is its own SQLite transaction, so a killed scraper never leaves a half-written index
+    - reconcile() rebuilds the index from a single directory scan (files copied in or
+      deleted by hand); it runs automatically the first time a manifest is opened
+    - complete_keys() / missing() turn the missing-dispatch diff into a set operation
+
+Usage:
+    manifest = get_dispatch_manifest(CSV_SAVE_DIR)
+    if manifest.has_complete(date, bol, quantity):
+        ...
+    manifest.record_download(date, bol, quantity, code, 1, filename)
+"""
+
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+CSV_SAVE_DIR = "Main/data/vintrace_reports/disp_console/"
+MANIFEST_FILENAME = "dispatch_manifest.sqlite"
+
+# Both halves of a dispatch
+REPORT_NUMBERS = (1, 2)
+
+FILENAME_PATTERN = re.compile(r"report_(\d)_BOL_(.+?)_Date_(.+?)_Qty_(.+?)_Code_(.*)\.csv$")
+
+DispatchKey = Tuple[str, str, str, str]
+
+
+def sanitize_filename(s):
+    """Sanitize a string for use in filenames (same rule the scrapers use)."""
+    return re.sub(r'[\\/*?:"<>|]', '_', str(s))
+
+
+def dispatch_key(date, bol, quantity, code) -> DispatchKey:
+    """(date, bol, quantity, code) as it appears in the saved filenames."""
+    return (sanitize_filename(date), sanitize_filename(bol), sanitize_filename(quantity), sanitize_filename(code))
+
+
+def parse_dispatch_filename(filename: str) -> Optional[Tuple[int, DispatchKey]]:
+    """(report number, key) for a dispatch CSV filename, or None if it is not one."""
+    m = FILENAME_PATTERN.match(filename)
+    if not m:
+        return None
+    report_no, bol, date, quantity, code = m.groups()
+    return int(report_no), (date, bol, quantity, code)
+
+
+class DispatchManifest:
+    """
+    Persistent index of downloaded dispatch CSVs.
+
+    Args:
+        csv_dir: Directory the scrapers save dispatch CSVs into
+        db_path: SQLite file (default: <csv_dir>/dispatch_manifest.sqlite, or DISPATCH_MANIFEST_PATH)
+    """
+
+    def __init__(self, csv_dir: str = CSV_SAVE_DIR, db_path: Optional[str] = None):
+        self.csv_dir = csv_dir
+        self.db_path = db_path or os.getenv("DISPATCH_MANIFEST_PATH") or os.path.join(csv_dir, MANIFEST_FILENAME)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            # WAL lets the missing-dispatch report read while a scraper is writing
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dispatch_files (
+                    date TEXT NOT NULL,
+                    bol TEXT NOT NULL,
+                    quantity TEXT NOT NULL,
+                    code TEXT NOT NULL,
+                    report INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    recorded_at TEXT NOT NULL,
+                    PRIMARY KEY (date, bol, quantity, code, report)
+                )
+                """
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS manifest_meta (key TEXT PRIMARY KEY, value TEXT)")
+        if self._meta("reconciled_at") is None:
+            self.reconcile()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM manifest_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def record_download(self, date, bol, quantity, code, report_no: int, filename: str) -> None:
+        """Register one saved CSV (call after it has been moved into csv_dir)."""
+        key = dispatch_key(date, bol, quantity, code)
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dispatch_files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, int(report_no), os.path.basename(filename), now),
+            )
+
+    def reconcile(self) -> Tuple[int, int]:
+        """
+        Rebuild the index from one scan of csv_dir.
+
+        Returns:
+            (files indexed, complete dispatches)
+        """
+        try:
+            names = os.listdir(self.csv_dir)
+        except FileNotFoundError:
+            names = []
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for name in names:
+            parsed = parse_dispatch_filename(name)
+            if parsed:
+                report_no, key = parsed
+                rows.append((*key, report_no, name, now))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dispatch_files")
+            self._conn.executemany("INSERT OR REPLACE INTO dispatch_files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO manifest_meta VALUES ('reconciled_at', ?)", (now,))
+        complete = len(self.complete_keys())
+        print(f"📒 Dispatch manifest reconciled: {len(rows)} files, {complete} complete dispatches")
+        return len(rows), complete
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def is_complete(self, date, bol, quantity, code) -> bool:
+        """Both CSVs exist for this exact dispatch."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(DISTINCT report) FROM dispatch_files WHERE date = ? AND bol = ? AND quantity = ? AND code = ?",
+                dispatch_key(date, bol, quantity, code),
+            ).fetchone()
+        return row[0] >= len(REPORT_NUMBERS)
+
+    def has_complete(self, date, bol, quantity) -> bool:
+        """Both CSVs exist for this dispatch under some code (used before the code is known)."""
+        key = dispatch_key(date, bol, quantity, "")[:3]
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT 1 FROM dispatch_files WHERE date = ? AND bol = ? AND quantity = ?
+                GROUP BY code HAVING COUNT(DISTINCT report) >= ? LIMIT 1
+                """,
+                (*key, len(REPORT_NUMBERS)),
+            ).fetchone()
+        return row is not None
+
+    def complete_keys(self) -> Set[DispatchKey]:
+        """Every (date, bol, quantity, code) with both CSVs downloaded."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, bol, quantity, code FROM dispatch_files GROUP BY date, bol, quantity, code"
+                " HAVING COUNT(DISTINCT report) >= ?",
+                (len(REPORT_NUMBERS),),
+            ).fetchall()
+        return {tuple(row) for row in rows}
+
+    def missing(self, records: Iterable[Dict]) -> List[Dict]:
+        """The records (dicts with date/bol/quantity/code) that are not fully downloaded, in input order."""
+        fetched = self.complete_keys()
+        return [
+            rec for rec in records
+            if dispatch_key(rec["date"], rec["bol"], rec["quantity"], rec.get("code", "")) not in fetched
+        ]
+
+
+_manifests: Dict[str, DispatchManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_dispatch_manifest(csv_dir: str = CSV_SAVE_DIR) -> DispatchManifest:
+    """Process-wide manifest for a download directory."""
+    path = os.path.abspath(csv_dir)
+    with _manifests_lock:
+        if path not in _manifests:
+            _manifests[path] = DispatchManifest(csv_dir)
+        return _manifests[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the dispatch download manifest from the CSV directory")
+    parser.add_argument("--dir", default=CSV_SAVE_DIR, help=f"Dispatch CSV directory (default: {CSV_SAVE_DIR})")
+    args = parser.parse_args()
+    get_dispatch_manifest(args.dir).reconcile()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
 # python tools/fetch_transactions.py
+# Incremental mode (only re-fetch days since the last watermark, rewrite changed days only):
+#   python tools/fetch_transactions.py --incremental
+#   (or TRANSACTION_SYNC_MODE=incremental)
 
 import os
+import sys
 import json
 import logging
 import requests
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 
 from utils.endpoint_caller import setup_error_logger, setup_metrics_logger
 
+# Add the parent directory to sys.path so 'app' can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.utils.transaction_sync import (
+    SyncState, FILES_SYNC_KEY, write_day_file_if_changed, contiguous_synced_through, max_last_modified_of
+)
+
+SYNC_ENDPOINT_KEY = FILES_SYNC_KEY
+
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
@@ -71,6 +83,15 @@ if __name__ == "__main__":
         all_logger.error(f"❌ Invalid date format in TRANSACTION_DATE_FROM or TRANSACTION_DATE_TO: {e}")
         exit(1)
 
+    incremental = "--incremental" in sys.argv or os.getenv("TRANSACTION_SYNC_MODE", "full").lower() == "incremental"
+    sync_state = None
+    if incremental:
+        sync_state = SyncState()
+        # Incremental runs always sync up to today; TRANSACTION_DATE_FROM only bounds the first run
+        date_from, date_to = sync_state.sync_window(SYNC_ENDPOINT_KEY, default_start=date_from, end=date.today())
+        date_from_str, date_to_str = date_from.strftime("%Y-%m-%d"), date_to.strftime("%Y-%m-%d")
+        logger.info(f"Incremental sync: watermark={sync_state.get(SYNC_ENDPOINT_KEY).get('watermark_date')} -> window {date_from_str}..{date_to_str}")
+
     logger.info(f"Fetching transactions from {date_from_str} to {date_to_str}, one file per day...")
     all_logger.info(f"Fetching transactions from {date_from_str} to {date_to_str}, one file per day...")
 
@@ -78,6 +99,8 @@ if __name__ == "__main__":
     session = requests.Session()
     session.headers.update(headers)
 
+    synced_days = []
+    fetched_max_last_modified = None
     for single_date in daterange(date_from, date_to):
         day_str = single_date.strftime("%Y-%m-%d")
         params = {
@@ -111,10 +134,35 @@ if __name__ == "__main__":
             all_logger.error(
                 f"❌ Error fetching transactions for {day_str}: {e} | Endpoint: {url} | Params: {params}"
             )
+            if incremental:
+                # Keep the existing day file and hold the watermark back at this day
+                continue
             transaction_summaries = []
 
         output_path = os.path.join(output_dir, f"transactions_{day_str}.json")
+        if incremental:
+            stats = write_day_file_if_changed(output_path, transaction_summaries)
+            synced_days.append(single_date)
+            day_max = max_last_modified_of(transaction_summaries)
+            if day_max is not None and (fetched_max_last_modified is None or day_max > fetched_max_last_modified):
+                fetched_max_last_modified = day_max
+            action = "Updated" if stats["written"] else "Unchanged"
+            msg = (f"✅ {action} {output_path} | new: {stats['new']}, changed: {stats['changed']}, "
+                   f"removed: {stats['removed']}, unchanged: {stats['unchanged']}")
+            logger.info(msg)
+            all_logger.info(msg)
+            continue
+
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(transaction_summaries, f, indent=2, ensure_ascii=False)
         logger.info(f"✅ Saved {len(transaction_summaries)} transactions to {output_path}")
-        all_logger.info(f"✅ Saved {len(transaction_summaries)} transactions to {output_path} | Endpoint: {url} | Params: {params}")
\ No newline at end of file
+        all_logger.info(f"✅ Saved {len(transaction_summaries)} transactions to {output_path} | Endpoint: {url} | Params: {params}")
+
+    if incremental:
+        synced_through = contiguous_synced_through(list(daterange(date_from, date_to)), synced_days)
+        if synced_through is not None:
+            sync_state.advance(SYNC_ENDPOINT_KEY, synced_through, fetched_max_last_modified)
+            sync_state.save()
+            logger.info(f"Watermark for {SYNC_ENDPOINT_KEY} advanced to {synced_through}")
+        else:
+            logger.warning(f"Watermark for {SYNC_ENDPOINT_KEY} not advanced; first day in window failed.")
\ No newline at end of file
@@ -1,16 +1,25 @@
 # python tools/fetch_workorders_v6_singley.py
 
 import os
+import sys
 import json
 import requests
 import time
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Add the parent directory to sys.path so 'app' can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.utils.rate_limiter import get_shared_limiter
+
+rate_limiter = get_shared_limiter()
+
 def fetch_and_save_workorder(wo_id, url, headers, detail_path, max_retries=3):
     for attempt in range(max_retries):
         try:
+            rate_limiter.acquire()
             response = requests.get(url, headers=headers)
+            rate_limiter.record_response(response.status_code, response.headers)
             print(f"Status Code: {response.status_code} | wo_id: {wo_id} | URL: {url}")
             if response.status_code == 200:
                 with open(detail_path, "w", encoding="utf-8") as f:
@@ -21,11 +30,10 @@ def fetch_and_save_workorder(wo_id, url, headers, detail_path, max_retries=3):
                 with open(detail_path, "w", encoding="utf-8") as f:
                     json.dump({"error": response.text, "status_code": response.status_code}, f, indent=2, ensure_ascii=False)
                 if response.status_code == 429:
-                    print("Rate limit hit, sleeping for 10 seconds.")
-                    time.sleep(10)
-                else:
-                    time.sleep(0.5)
-                return False  # Don't retry except for network errors
+                    # The shared limiter has already slowed down and paused for Retry-After
+                    print(f"Rate limit hit, limiter now at {rate_limiter.stats()['rate']} req/sec; retrying.")
+                    continue
+                return False  # Don't retry except for network errors and rate limits
         except requests.RequestException as e:
             print(f"Network error for wo_id {wo_id} (attempt {attempt+1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
@@ -80,10 +88,9 @@ def main():
             futures.append(executor.submit(fetch_and_save_workorder, wo_id, url, headers, detail_path))
 
         # (Optional) You can track progress here, as_completed yields futures as they complete
+        # Pacing is handled by the shared rate limiter
         for i, future in enumerate(as_completed(futures), 1):
             _ = future.result()  # You could check the return value if you want
-            if i % max_workers == 0:
-                time.sleep(0.5)  # Small delay to avoid hammering the API
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -36,6 +36,9 @@ other_scripts = {
     "tools/vintrace_Grape_Report_with_bookingSummary_playwright.py": THIRTY_MIN,
     "tools/vintrace_grape_report_detail.py": THIRTY_MIN,
     
+    # Transactions API (incremental: only days since the last watermark)
+    "python tools/fetch_transactions.py --incremental": THIRTY_MIN,
+
     # Workorder Reports
     "tools/fetch_workorders_v7.py": THIRTY_MIN,
     "tools/upload_workorders_v7.py": THIRTY_MIN,
@@ -9,6 +9,8 @@ import csv
 from typing import List, Dict, Any
 from datetime import datetime
 
+from table_io import get_table_writers, write_table
+
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
@@ -221,11 +223,12 @@ def extract_allocations(vessels: List[Dict]) -> List[Dict]:
     
     return allocations
 
-def write_to_json(data: List[Dict], filepath: str):
-    """Write data to JSON file."""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    logger.info(f"✅ Wrote {len(data)} records to {filepath}")
+def write_tables(tables: Dict[str, List[Dict]], output_dir: str):
+    """Write each table in SPLIT_TABLE_FORMAT (JSON unless Parquet is configured)."""
+    writers = get_table_writers(output_dir)
+    for name, data in tables.items():
+        for filepath in write_table(writers, name, data):
+            logger.info(f"✅ Wrote {len(data)} records to {filepath}")
 
 def write_to_csv(data: List[Dict], filepath: str):
     """Write data to CSV file."""
@@ -272,12 +275,14 @@ if __name__ == "__main__":
     logger.info("Extracting allocation data...")
     allocations = extract_allocations(vessels)
     
-    # Write to JSON files
-    logger.info("Writing JSON files...")
-    write_to_json(main_vessels, os.path.join(output_dir, "vessels_main.json"))
-    write_to_json(compositions, os.path.join(output_dir, "vessels_composition.json"))
-    write_to_json(live_metrics, os.path.join(output_dir, "vessels_live_metrics.json"))
-    write_to_json(allocations, os.path.join(output_dir, "vessels_allocations.json"))
+    # Write tables
+    logger.info("Writing tables...")
+    write_tables({
+        "vessels_main": main_vessels,
+        "vessels_composition": compositions,
+        "vessels_live_metrics": live_metrics,
+        "vessels_allocations": allocations,
+    }, output_dir)
 
     
     # Summary statistics
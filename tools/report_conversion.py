@@ -0,0 +1,249 @@
+#  python tools/report_conversion.py Main/data/vintrace_reports/work_detailz/*.csv   (convert a batch by hand)
+"""
+Report Conversion Service
+Background XLS -> CSV conversion for downloaded Vintrace reports
+
+Vintrace "CSV" downloads are often really legacy XLS (OLE compound) files. Converting them
+with pd.read_excel(engine='xlrd') takes seconds per file; done inline it blocked the
+scraper's event loop between downloads, and the glob converters ran a folder serially.
+
+ConversionService hands files to a process pool instead:
+
+    service = ConversionService()
+    service.submit(raw_path, converted_path, delete_source=True)   # returns immediately
+    ...keep downloading...
+    results = service.drain()                                       # wait for the queue
+
+    # from asyncio code
+    await service.convert_async(raw_path, converted_path)
+
+Each conversion is keyed by the SHA-256 of the source file. If the output already exists
+and was produced from identical bytes, the conversion is skipped (a re-downloaded report
+that did not change costs one hash). The cache lives in REPORT_CONVERSION_CACHE
+(default: Main/data/vintrace_reports/conversion_cache.json) and is written atomically.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+CACHE_PATH = os.getenv("REPORT_CONVERSION_CACHE", "Main/data/vintrace_reports/conversion_cache.json")
+MAX_WORKERS = int(os.getenv("REPORT_CONVERT_WORKERS", "2"))
+
+XLS_SIGNATURE = b"\xd0\xcf\x11\xe0"
+
+
+class ConversionResult(NamedTuple):
+    source: str
+    output: Optional[str]
+    status: str  # "converted", "copied", "cached" or "failed"
+    error: str = ""
+
+
+def is_xls_compound_file(filepath):
+    with open(filepath, "rb") as f:
+        sig = f.read(4)
+    return sig == XLS_SIGNATURE
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def convert_report(source: str, output: str) -> str:
+    """
+    Convert one report to CSV (XLS via xlrd, anything else copied). Runs in a pool process.
+
+    Returns:
+        "converted" or "copied"; raises on failure
+    """
+    import pandas as pd
+
+    tmp_path = f"{output}.tmp.{os.getpid()}"
+    try:
+        if is_xls_compound_file(source):
+            df = pd.read_excel(source, engine='xlrd')
+            df.to_csv(tmp_path, index=False)
+            status = "converted"
+        else:
+            shutil.copy(source, tmp_path)
+            status = "copied"
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return status
+
+
+class ConversionService:
+    """
+    Process pool converting reports in the background, with a content-hash skip cache.
+
+    Args:
+        max_workers: Pool processes (default: REPORT_CONVERT_WORKERS, 2)
+        cache_path: JSON cache of output path -> source hash (None disables the cache)
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, cache_path: Optional[str] = CACHE_PATH):
+        self.max_workers = max(1, max_workers)
+        self.cache_path = cache_path
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+        self.results: List[ConversionResult] = []
+        self._cache: Dict[str, Dict] = self._load_cache()
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable conversion cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    def is_cached(self, source_hash: str, output: str) -> bool:
+        entry = self._cache.get(os.path.abspath(output))
+        return bool(entry) and entry.get("sha256") == source_hash and os.path.exists(output)
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, source: str, output: str, delete_source: bool = False, on_done=None) -> Future:
+        """
+        Queue `source` for conversion to `output`; returns a Future of ConversionResult.
+
+        Args:
+            source: Downloaded report (XLS or CSV)
+            output: CSV to write
+            delete_source: Remove `source` once the output exists (kept when conversion fails)
+            on_done: Called with the ConversionResult (from a pool-management thread)
+        """
+        source_hash = file_sha256(source)
+        future: Future = Future()
+
+        def finish(result: ConversionResult):
+            if result.status != "failed":
+                if self.cache_path:
+                    with self._lock:
+                        self._cache[os.path.abspath(output)] = {
+                            "sha256": source_hash,
+                            "source": os.path.basename(source),
+                            "converted_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                        }
+                        self._save_cache()
+                if delete_source and os.path.abspath(source) != os.path.abspath(output):
+                    try:
+                        os.remove(source)
+                    except OSError:
+                        pass
+            with self._lock:
+                self.results.append(result)
+            if on_done:
+                on_done(result)
+            future.set_result(result)
+
+        if self.is_cached(source_hash, output):
+            print(f"[CACHE] Unchanged since last conversion: {output}")
+            finish(ConversionResult(source, output, "cached"))
+            return future
+
+        def pool_done(pool_future: Future):
+            try:
+                status = pool_future.result()
+                print(f"[INFO] {status.capitalize()} {source} -> {output}")
+                finish(ConversionResult(source, output, status))
+            except Exception as e:
+                print(f"[WARN] Could not convert {source}: {e}")
+                finish(ConversionResult(source, None, "failed", str(e)))
+
+        with self._lock:
+            self._pending.append(future)
+        self._pool().submit(convert_report, source, output).add_done_callback(pool_done)
+        return future
+
+    async def convert_async(self, source: str, output: str, delete_source: bool = False) -> ConversionResult:
+        """submit() awaited from asyncio code; the event loop keeps running meanwhile."""
+        return await asyncio.wrap_future(self.submit(source, output, delete_source))
+
+    def pending(self) -> int:
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            return len(self._pending)
+
+    def drain(self) -> List[ConversionResult]:
+        """Block until every queued conversion has finished; returns all results so far."""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result()
+        with self._lock:
+            self._pending = []
+            return list(self.results)
+
+    def summary(self) -> str:
+        counts: Dict[str, int] = {}
+        for result in self.results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "nothing converted"
+
+    def close(self) -> None:
+        self.drain()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def converted_path(path: str) -> str:
+    """<name>_converted.csv next to the source (the glob converters' naming)."""
+    return os.path.splitext(path)[0] + "_converted.csv"
+
+
+def main():
+    files = [f for f in sys.argv[1:] if os.path.isfile(f) and not f.endswith("_converted.csv")]
+    with ConversionService() as service:
+        for path in files:
+            service.submit(path, converted_path(path))
+        service.drain()
+        print(f"[INFO] {service.summary()}")
+
+
+if __name__ == "__main__":
+    main()
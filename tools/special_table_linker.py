@@ -1,29 +1,70 @@
-# After both special_transfer_table and special_transfer_from_intransit_table are populated
-
-special_transfer_link_table = []
-
-# Build index for fast lookup on from_intransit
-from_intransit_index = {}
-for idx, row in enumerate(special_transfer_from_intransit_table):
-    key = (row.get("from_ts_name"), row.get("from_ts_volOut"))
-    from_intransit_index.setdefault(key, []).append((idx, row))
-
-# Now, scan the "to" in special_transfer_table and match against "from" in special_transfer_from_intransit_table
-for idx_to, to_row in enumerate(special_transfer_table):
-    key = (to_row.get("to_ts_name"), to_row.get("to_ts_volIn"))
-    matches = from_intransit_index.get(key, [])
-    for idx_from, from_row in matches:
-        # Build the link (you can add more fields if you want)
-        link_row = {
+# tools/special_table_linker.py
+"""
+Link "to in-transit" transfers (special_transfer_table) to the "from in-transit" transfers
+(special_transfer_from_intransit_table) of the same vessel and volume.
+
+Matching is exact by default. Callers that want the v2 splitter's behaviour pass a
+vol_tolerance (or set SPECIAL_LINK_VOL_TOLERANCE); either way the lookup goes through the
+sorted per-vessel volume index in interval_join.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+from interval_join import tolerant_join
+
+DEFAULT_VOL_TOLERANCE = float(os.getenv("SPECIAL_LINK_VOL_TOLERANCE", "0"))  # 0 = exact volume match
+
+
+def _volume(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def link_special_transfers(
+    special_transfer_table: List[Dict[str, Any]],
+    special_transfer_from_intransit_table: List[Dict[str, Any]],
+    vol_tolerance: float = DEFAULT_VOL_TOLERANCE,
+) -> List[Dict[str, Any]]:
+    """
+    Return one link row per ("to", "from") pair with the same vessel name and a volume within
+    vol_tolerance, in "to" order and then "from" order. As with the original (name, volume)
+    lookup, a missing name or volume only matches another missing one.
+    """
+    # Rows without a volume are outside the volume index; pair them by name as the exact
+    # lookup did
+    from_without_volume: Dict[Any, List[int]] = {}
+    for idx_from, row in enumerate(special_transfer_from_intransit_table):
+        if _volume(row.get("from_ts_volOut")) is None:
+            from_without_volume.setdefault(row.get("from_ts_name"), []).append(idx_from)
+    pairs = sorted(
+        list(tolerant_join(
+            special_transfer_table, special_transfer_from_intransit_table,
+            left_key="to_ts_name", right_key="from_ts_name",
+            left_value=lambda row: _volume(row.get("to_ts_volIn")),
+            right_value=lambda row: _volume(row.get("from_ts_volOut")),
+            tolerance=vol_tolerance,
+        ))
+        + [
+            (idx_to, idx_from)
+            for idx_to, row in enumerate(special_transfer_table)
+            if _volume(row.get("to_ts_volIn")) is None
+            for idx_from in from_without_volume.get(row.get("to_ts_name"), [])
+        ]
+    )
+
+    links = []
+    for idx_to, idx_from in pairs:
+        to_row = special_transfer_table[idx_to]
+        from_row = special_transfer_from_intransit_table[idx_from]
+        links.append({
             "special_transfer_table_idx": idx_to,
             "special_transfer_table_subOperationId": to_row.get("ts_subOperationId"),
             "special_transfer_from_intransit_table_idx": idx_from,
             "special_transfer_from_intransit_table_subOperationId": from_row.get("ts_subOperationId"),
-            "vessel_name": key[0],
-            "volume": key[1]
-        }
-        special_transfer_link_table.append(link_row)
-
-# Write output
-with open(os.path.join(OUT_DIR, "special_transfer_link_table.json"), "w", encoding="utf-8") as f:
-    safe_json_dump(special_transfer_link_table, f)
\ No newline at end of file
+            "vessel_name": to_row.get("to_ts_name"),
+            "volume": to_row.get("to_ts_volIn"),
+            "volume_from": from_row.get("from_ts_volOut"),
+        })
+    return links
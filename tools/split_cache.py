@@ -0,0 +1,270 @@
+#  python tools/split_cache.py                 (list cached splitters and their inputs)
+#  python tools/split_cache.py --clear vessels (forget one splitter's cache)
+"""
+Split Cache
+Content-hash skip cache for the JSON splitters (upload_*_main scripts)
+
+looper_dooper re-fetches the recent day files every cycle, but most of them come back
+byte-identical. The splitters used to re-parse every input on every run; with this cache
+they only re-parse what changed.
+
+Two ways to use it:
+
+    # Per-file partials (multi-file splitters): each input's partial output is cached
+    cache = SplitCache("cost_movements", fingerprint=code_fingerprint(__file__))
+    for path in json_files:
+        part = cache.get(path)
+        if part is None:
+            part = split_one_file(path)
+            cache.put(path, part)
+        merge(part)
+    cache.prune(json_files)            # inputs that disappeared drop out of the cache
+    cache.save()
+
+    # Whole run (single-input splitters): skip when no input changed
+    if cache.unchanged([JSON_PATH]):
+        sys.exit(0)
+    ...split and write...
+    cache.record_run([JSON_PATH], written_files)
+
+An input counts as unchanged when its SHA-256 matches the recorded one (size and mtime
+are checked first so untouched files are not re-hashed). The fingerprint should cover
+whatever else shapes the output (the splitter's source, lookup files, options): when it
+changes, every cached partial is discarded.
+
+Partials are pickled under SPLIT_CACHE_DIR/<name>/ (default Main/data/split_cache);
+SPLIT_CACHE=0 disables the cache.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+CACHE_DIR = os.getenv("SPLIT_CACHE_DIR", "Main/data/split_cache")
+CACHE_ENABLED = os.getenv("SPLIT_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_fingerprint(*files: str, params: Any = None) -> str:
+    """Hash of source/lookup files plus JSON-able params; missing files hash as absent."""
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(os.path.abspath(path).encode("utf-8"))
+        digest.update(file_sha256(path).encode("ascii") if os.path.isfile(path) else b"-")
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SplitCache:
+    """
+    Per-splitter cache of input hashes and the partial outputs they produced.
+
+    Args:
+        name: Splitter name (directory and manifest name under cache_dir)
+        fingerprint: Invalidates every entry when it differs from the recorded one
+        cache_dir: Root directory (default: SPLIT_CACHE_DIR)
+        enabled: False makes every lookup miss and every write a no-op
+    """
+
+    def __init__(self, name: str, fingerprint: str = "", cache_dir: str = CACHE_DIR,
+                 enabled: bool = CACHE_ENABLED):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.enabled = enabled
+        self.dir = os.path.join(cache_dir, name)
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.hits = 0
+        self.misses = 0
+        self._digests: Dict[str, str] = {}
+        self._manifest = self._load()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def _load(self) -> Dict[str, Any]:
+        empty = {"fingerprint": self.fingerprint, "files": {}, "run": None}
+        if not self.enabled or not os.path.exists(self.manifest_path):
+            return empty
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable split cache {self.manifest_path}: {e}")
+            return empty
+        if manifest.get("fingerprint") != self.fingerprint:
+            print(f"[CACHE] {self.name}: splitter code or options changed, rebuilding from scratch")
+            self._remove_partials(manifest.get("files", {}).values())
+            return empty
+        return manifest
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _remove_partials(self, entries: Iterable[Dict[str, Any]]) -> None:
+        for entry in entries:
+            partial = entry.get("partial")
+            if partial:
+                try:
+                    os.remove(os.path.join(self.dir, partial))
+                except OSError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Hashing
+    # ------------------------------------------------------------------
+
+    def digest(self, path: str) -> str:
+        """SHA-256 of `path`, reusing the recorded one when size and mtime are unchanged."""
+        key = os.path.abspath(path)
+        if key in self._digests:
+            return self._digests[key]
+        st = os.stat(path)
+        entry = self._manifest["files"].get(key) or {}
+        if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("sha256"):
+            sha = entry["sha256"]
+        else:
+            sha = file_sha256(path)
+        self._digests[key] = sha
+        return sha
+
+    def _stat_entry(self, path: str) -> Dict[str, Any]:
+        st = os.stat(path)
+        return {"sha256": self.digest(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    # ------------------------------------------------------------------
+    # Per-file partials
+    # ------------------------------------------------------------------
+
+    def is_cached(self, path: str) -> bool:
+        """True when a partial was cached for the current content of `path`."""
+        if not self.enabled:
+            return False
+        entry = self._manifest["files"].get(os.path.abspath(path))
+        return bool(entry and entry.get("partial")) and entry["sha256"] == self.digest(path)
+
+    def get(self, path: str) -> Optional[Any]:
+        """The cached partial for `path` if its content is unchanged, else None."""
+        if self.is_cached(path):
+            entry = self._manifest["files"][os.path.abspath(path)]
+            try:
+                with open(os.path.join(self.dir, entry["partial"]), "rb") as f:
+                    part = pickle.load(f)
+                self.hits += 1
+                return part
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+                print(f"[WARN] Discarding unreadable cached partial for {path}: {e}")
+        self.misses += 1
+        return None
+
+    def put(self, path: str, part: Any) -> None:
+        """Cache `part` as the partial output of `path` (its current content)."""
+        if not self.enabled:
+            return
+        key = os.path.abspath(path)
+        partial = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pickle"
+        os.makedirs(self.dir, exist_ok=True)
+        target = os.path.join(self.dir, partial)
+        tmp_path = f"{target}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, target)
+        self._manifest["files"][key] = {**self._stat_entry(path), "partial": partial}
+
+    def prune(self, paths: Iterable[str]) -> List[str]:
+        """Forget inputs not in `paths` (deleted or moved away); returns the dropped ones."""
+        keep = {os.path.abspath(p) for p in paths}
+        files = self._manifest["files"]
+        dropped = [key for key in files if key not in keep]
+        self._remove_partials(files.pop(key) for key in dropped)
+        if dropped:
+            print(f"[CACHE] {self.name}: dropped {len(dropped)} input(s) that no longer exist")
+        return dropped
+
+    def summary(self) -> str:
+        return f"{self.hits} cached, {self.misses} re-parsed"
+
+    # ------------------------------------------------------------------
+    # Whole runs
+    # ------------------------------------------------------------------
+
+    def unchanged(self, inputs: Iterable[str]) -> bool:
+        """
+        True when the last recorded run had exactly these inputs with the same content
+        and every output it wrote still exists.
+        """
+        run = self._manifest.get("run")
+        if not self.enabled or not run:
+            return False
+        inputs = [os.path.abspath(p) for p in inputs]
+        if sorted(inputs) != sorted(run["inputs"]):
+            return False
+        if not all(os.path.exists(p) for p in run["outputs"]):
+            return False
+        return all(os.path.isfile(p) and self.digest(p) == run["inputs"][p] for p in inputs)
+
+    def record_run(self, inputs: Iterable[str], outputs: Iterable[str]) -> None:
+        """Remember the inputs' content and the outputs written from them; saves the manifest."""
+        if not self.enabled:
+            return
+        inputs = [os.path.abspath(p) for p in inputs]
+        for path in inputs:
+            self._manifest["files"].setdefault(path, {}).update(self._stat_entry(path))
+        self.prune(inputs)
+        self._manifest["run"] = {
+            "inputs": {p: self.digest(p) for p in inputs},
+            "outputs": [os.path.abspath(p) for p in outputs],
+        }
+        self.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the JSON splitter caches")
+    parser.add_argument("--clear", nargs="*", metavar="NAME", help="Clear these caches (all when no name given)")
+    parser.add_argument("--dir", default=CACHE_DIR, help=f"Cache directory (default: {CACHE_DIR})")
+    args = parser.parse_args()
+
+    names = sorted(n for n in os.listdir(args.dir) if os.path.isdir(os.path.join(args.dir, n))) \
+        if os.path.isdir(args.dir) else []
+    if args.clear is not None:
+        for name in args.clear or names:
+            shutil.rmtree(os.path.join(args.dir, name), ignore_errors=True)
+            print(f"🗑 Cleared {name}")
+        return
+    if not names:
+        print(f"No split caches in {args.dir}")
+        return
+    for name in names:
+        manifest_path = os.path.join(args.dir, name, "manifest.json")
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            print(f"{name}: no manifest")
+            continue
+        files = manifest.get("files", {})
+        partials = sum(1 for entry in files.values() if entry.get("partial"))
+        print(f"{name}: {len(files)} input(s), {partials} cached partial(s)"
+              + (", last run recorded" if manifest.get("run") else ""))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
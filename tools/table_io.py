@@ -0,0 +1,227 @@
+"""
+Table IO
+Pluggable writers for the split tables (ts_*, vs_*, sh_*, cm_*) and the matching loader
+
+The splitters used to pretty-print every table with json.dump(indent=2) and the *_up.py
+loaders parsed it all back with json.load + pd.DataFrame. The writers here keep JSON as
+the default and add a columnar Parquet backend (pyarrow) that the loaders read straight
+into pandas.
+
+    writers = get_table_writers(OUT_DIR)                     # SPLIT_TABLE_FORMAT=json,parquet
+    paths = write_table(writers, "ts_transactions", rows, string_lengths=MAX_LENGTHS[...])
+
+    df = read_table(os.path.join(DATA_DIR, "ts_transactions.json"))  # newest of .parquet/.json
+
+Parquet column types: columns named in `string_lengths` (the SQL VARCHAR lengths) are
+always strings, with the length kept as field metadata; other columns are bool, int64 or
+float64 when every value fits, else strings (dicts/lists as JSON text).
+
+Environment:
+    SPLIT_TABLE_FORMAT          json, parquet or both comma-separated (default json)
+    SPLIT_JSON_INDENT           JSON indent; empty for compact output (default 2)
+    SPLIT_PARQUET_COMPRESSION   Parquet codec (default zstd)
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa  # optional: Parquet output
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+TABLE_FORMATS = [f.strip().lower() for f in os.getenv("SPLIT_TABLE_FORMAT", "json").split(",") if f.strip()]
+JSON_INDENT = os.getenv("SPLIT_JSON_INDENT", "2").strip()
+PARQUET_COMPRESSION = os.getenv("SPLIT_PARQUET_COMPRESSION", "zstd")
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def normalize_rows(rows: Any) -> List[Any]:
+    """Rows as a list of dicts (DataFrames converted), with NaN replaced by None."""
+    if hasattr(rows, "to_dict"):
+        rows = rows.to_dict(orient="records")
+    return [
+        {k: (None if _is_nan(v) else v) for k, v in row.items()} if isinstance(row, dict) else row
+        for row in rows
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+class TableWriter:
+    """
+    Writes named tables under one directory.
+
+    Args:
+        out_dir: Directory the table files go to (created if missing)
+    """
+
+    extension = ""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.out_dir, name + self.extension)
+
+    def write(self, name: str, rows: Any, string_lengths: Optional[Dict[str, int]] = None) -> str:
+        """Write `rows` as table `name`; returns the file written."""
+        raise NotImplementedError
+
+    def _replace(self, tmp_path: str, name: str) -> str:
+        target = self.path(name)
+        os.replace(tmp_path, target)
+        return target
+
+
+class JsonTableWriter(TableWriter):
+    """JSON array of row objects (the format the *_up.py loaders have always read)."""
+
+    extension = ".json"
+
+    def __init__(self, out_dir: str, indent: Optional[int] = None):
+        super().__init__(out_dir)
+        self.indent = indent if indent is not None else (int(JSON_INDENT) if JSON_INDENT else None)
+
+    def write(self, name: str, rows: Any, string_lengths: Optional[Dict[str, int]] = None) -> str:
+        tmp_path = f"{self.path(name)}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(normalize_rows(rows), f, indent=self.indent, ensure_ascii=False)
+        return self._replace(tmp_path, name)
+
+
+class ParquetTableWriter(TableWriter):
+    """Typed columnar Parquet file; requires pyarrow."""
+
+    extension = ".parquet"
+
+    def __init__(self, out_dir: str, compression: str = PARQUET_COMPRESSION):
+        if pa is None:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        super().__init__(out_dir)
+        self.compression = compression
+
+    def write(self, name: str, rows: Any, string_lengths: Optional[Dict[str, int]] = None) -> str:
+        table = arrow_table(normalize_rows(rows), string_lengths)
+        tmp_path = f"{self.path(name)}.tmp.{os.getpid()}"
+        pq.write_table(table, tmp_path, compression=self.compression)
+        return self._replace(tmp_path, name)
+
+
+WRITERS = {
+    "json": JsonTableWriter,
+    "parquet": ParquetTableWriter,
+}
+
+
+def _column_type(values: List[Any]):
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return pa.string()
+    if kinds == {bool}:
+        return pa.bool_()
+    if kinds == {int}:
+        return pa.int64() if all(-2**63 <= v < 2**63 for v in values if v is not None) else pa.string()
+    if kinds <= {int, float}:
+        return pa.float64()
+    return pa.string()
+
+
+def _as_string(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def arrow_table(rows: List[Dict[str, Any]], string_lengths: Optional[Dict[str, int]] = None):
+    """
+    Build a typed pyarrow Table from row dicts.
+
+    Args:
+        rows: Row dicts; columns are the union of their keys in first-seen order
+        string_lengths: SQL VARCHAR lengths; these columns are always strings
+
+    Returns:
+        pyarrow.Table
+    """
+    string_lengths = string_lengths or {}
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    fields, arrays = [], []
+    for col in columns:
+        values = [row.get(col) for row in rows]
+        col_type = pa.string() if col in string_lengths else _column_type(values)
+        if col_type == pa.string():
+            values = [_as_string(v) for v in values]
+        metadata = {"max_length": str(string_lengths[col])} if col in string_lengths else None
+        fields.append(pa.field(col, col_type, metadata=metadata))
+        arrays.append(pa.array(values, type=col_type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def get_table_writers(out_dir: str, formats: Optional[Iterable[str]] = None) -> List[TableWriter]:
+    """
+    One writer per requested format (default SPLIT_TABLE_FORMAT).
+
+    Parquet falls back to JSON with a warning when pyarrow is not installed.
+    """
+    formats = list(formats or TABLE_FORMATS) or ["json"]
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown table format(s) {unknown}; expected one of {sorted(WRITERS)}")
+    if "parquet" in formats and pa is None:
+        print("[WARN] pyarrow is not installed; writing JSON tables instead of Parquet")
+        formats = [f for f in formats if f != "parquet"] or ["json"]
+    return [WRITERS[fmt](out_dir) for fmt in dict.fromkeys(formats)]
+
+
+def write_table(writers: List[TableWriter], name: str, rows: Any,
+                string_lengths: Optional[Dict[str, int]] = None) -> List[str]:
+    """Write one table with every writer; returns the files written."""
+    rows = normalize_rows(rows)
+    return [writer.write(name, rows, string_lengths) for writer in writers]
+
+
+# ---------------------------------------------------------------------------
+# Loader
+# ---------------------------------------------------------------------------
+
+def table_path(path: str) -> str:
+    """
+    The file to load for a table: `path` may name the .json or .parquet file (or neither
+    extension); when both exist the more recently written one wins.
+    """
+    stem, ext = os.path.splitext(path)
+    if ext not in (".json", ".parquet"):
+        stem = path
+    candidates = [stem + ".json"]
+    if pq is not None:
+        candidates.append(stem + ".parquet")
+    existing = [p for p in candidates if os.path.exists(p)]
+    if not existing:
+        raise FileNotFoundError(f"No table file for {path}")
+    return max(existing, key=os.path.getmtime)
+
+
+def read_table(path: str):
+    """
+    Load a split table into a DataFrame, reading Parquet directly through Arrow when it is
+    the current copy and falling back to JSON otherwise.
+    """
+    import pandas as pd
+
+    path = table_path(path)
+    if path.endswith(".parquet"):
+        return pq.read_table(path).to_pandas(split_blocks=True, self_destruct=True)
+    with open(path, "r", encoding="utf-8") as f:
+        return pd.DataFrame(json.load(f))
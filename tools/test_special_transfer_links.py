@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-transit linkers (special_table_linker and upload_transactions_main_v2)
+
+Run with: python -m pytest tools/test_special_transfer_links.py -v
+Or simply: python tools/test_special_transfer_links.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from special_table_linker import link_special_transfers
+from upload_transactions_main_v2 import build_special_transfer_links
+
+
+def _pairs(links):
+    return [(l["special_transfer_table_idx"], l["special_transfer_from_intransit_table_idx"]) for l in links]
+
+
+def _exact_reference(to_rows, from_rows):
+    """The original (name, volume) dict lookup"""
+    index = {}
+    for j, row in enumerate(from_rows):
+        index.setdefault((row.get("from_ts_name"), row.get("from_ts_volOut")), []).append(j)
+    return [(i, j) for i, row in enumerate(to_rows)
+            for j in index.get((row.get("to_ts_name"), row.get("to_ts_volIn")), [])]
+
+
+def _random_tables(rng):
+    names, volumes = ["TRUCK-1", "TRUCK-2", None], [100.0, 100.2, 250.0, None]
+    to_rows = [{"ts_subOperationId": i, "to_ts_name": rng.choice(names), "to_ts_volIn": rng.choice(volumes)}
+               for i in range(rng.randint(0, 12))]
+    from_rows = [{"ts_subOperationId": 100 + i, "from_ts_name": rng.choice(names),
+                  "from_ts_volOut": rng.choice(volumes)}
+                 for i in range(rng.randint(0, 12))]
+    return to_rows, from_rows
+
+
+def test_rows_without_vessel_name_still_link():
+    to_rows = [{"ts_subOperationId": 1, "to_ts_name": None, "to_ts_volIn": 500.0}]
+    from_rows = [
+        {"ts_subOperationId": 2, "from_ts_name": "TRUCK-1", "from_ts_volOut": 500.0},
+        {"ts_subOperationId": 3, "from_ts_name": None, "from_ts_volOut": 500.2},
+    ]
+    assert _pairs(build_special_transfer_links(to_rows, from_rows, 0.5)) == [(0, 1)]
+    assert _pairs(link_special_transfers(to_rows, from_rows, 0.5)) == [(0, 1)]
+    assert _pairs(link_special_transfers(to_rows, from_rows, 0)) == []
+
+
+def test_exact_linker_matches_original_lookup():
+    for seed in range(400):
+        to_rows, from_rows = _random_tables(random.Random(seed))
+        assert _pairs(link_special_transfers(to_rows, from_rows, 0)) == _exact_reference(to_rows, from_rows), seed
+
+
+def test_v2_links_match_bucket_scan():
+    for seed in range(400):
+        to_rows, from_rows = _random_tables(random.Random(seed))
+        expected = []
+        for i, to_row in enumerate(to_rows):
+            for j, from_row in enumerate(from_rows):
+                if (to_row["to_ts_name"] == from_row["from_ts_name"]
+                        and to_row["to_ts_volIn"] is not None and from_row["from_ts_volOut"] is not None
+                        and abs(to_row["to_ts_volIn"] - from_row["from_ts_volOut"]) <= 0.5):
+                    expected.append((i, j))
+        assert sorted(_pairs(build_special_transfer_links(to_rows, from_rows, 0.5))) == expected, seed
+
+
+if __name__ == "__main__":
+    test_rows_without_vessel_name_still_link()
+    test_exact_linker_matches_original_lookup()
+    test_v2_links_match_bucket_scan()
+    print("✅ All special transfer link tests passed")
@@ -13,6 +13,10 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import importlib
 from app.utils.vintrace_client import VintraceSmartClient
+from app.utils.transaction_sync import (
+    SyncState, DEFAULT_LOOKBACK_DAYS, sink_key, write_day_file_if_changed, contiguous_synced_through,
+    extract_transactions, max_last_modified_of
+)
 from datetime import datetime, timedelta
 from collections import deque
 from threading import Lock
@@ -85,12 +89,39 @@ def ensure_dir(dir_path):
     if not os.path.exists(dir_path):
         os.makedirs(dir_path)
 
+def _result_payload(result):
+    if hasattr(result, "model_dump"):
+        return result.model_dump()
+    if hasattr(result, "dict"):
+        return result.dict()
+    return result
+
 def parallel_fetch_and_save(
-    client, endpoint_key, start_date, end_date, date_param="date", extra_params=None, max_workers=5, output_root="data", error_log=None
+    client, endpoint_key, start_date, end_date, date_param="date", extra_params=None, max_workers=5, output_root="data", error_log=None,
+    incremental=False, state_path=None, lookback_days=DEFAULT_LOOKBACK_DAYS
 ):
+    """
+    Fetch one file per day between start_date and end_date.
+    With incremental=True the window is narrowed to (watermark - lookback_days)..end_date from the
+    sync state file, day files are only rewritten when their transactions changed, and the
+    watermark is advanced through the last contiguous successful day.
+    """
     output_dir = os.path.join(output_root, endpoint_key.replace(":", "-").replace("/", "-").replace("<", "").replace(">", ""))
     ensure_dir(output_dir)
 
+    sync_state = None
+    sync_key = sink_key("files", endpoint_key)
+    if incremental:
+        sync_state = SyncState(state_path) if state_path else SyncState()
+        window_start, window_end = sync_state.sync_window(
+            sync_key,
+            default_start=datetime.strptime(start_date, "%Y-%m-%d").date(),
+            end=datetime.strptime(end_date, "%Y-%m-%d").date(),
+            lookback_days=lookback_days,
+        )
+        start_date, end_date = window_start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")
+        logger.info(f"Incremental sync of {endpoint_key}: window {start_date}..{end_date}")
+
     def fetch_and_save(date_str):
         params = {date_param: date_str}
         if extra_params:
@@ -99,13 +130,14 @@ def parallel_fetch_and_save(
         try:
             result = auto_call_endpoint(client, endpoint_key, params=params)
             output_path = os.path.join(output_dir, f"{date_str}.json")
+            payload = _result_payload(result)
+            if incremental:
+                stats = write_day_file_if_changed(output_path, payload)
+                action = "Updated" if stats["written"] else "Unchanged"
+                logger.info(f"✅ {action} {endpoint_key} for {date_str} | new: {stats['new']}, changed: {stats['changed']}, removed: {stats['removed']}")
+                return date_str, output_path, max_last_modified_of(extract_transactions(payload))
             with open(output_path, "w", encoding="utf-8") as f:
-                if hasattr(result, "model_dump"):
-                    json.dump(result.model_dump(), f, indent=2, ensure_ascii=False)
-                elif hasattr(result, "dict"):
-                    json.dump(result.dict(), f, indent=2, ensure_ascii=False)
-                else:
-                    json.dump(result, f, indent=2, ensure_ascii=False)
+                json.dump(payload, f, indent=2, ensure_ascii=False)
             logger.info(f"✅ Saved {endpoint_key} for {date_str} to {output_path}")
             return date_str, output_path
         except Exception as e:
@@ -128,6 +160,18 @@ def parallel_fetch_and_save(
             except Exception as e:
                 logger.error(f"❌ Exception in fetch_and_save for {day}: {e}")
 
+    if incremental:
+        synced_through = contiguous_synced_through(
+            [datetime.strptime(d, "%Y-%m-%d").date() for d in all_days],
+            [datetime.strptime(r[0], "%Y-%m-%d").date() for r in results],
+        )
+        if synced_through is not None:
+            last_modified_values = [r[2] for r in results if r[2] is not None]
+            sync_state.advance(sync_key, synced_through, max(last_modified_values) if last_modified_values else None)
+            sync_state.save()
+            logger.info(f"Watermark for {endpoint_key} advanced to {synced_through}")
+        results = [r[:2] for r in results]
+
     logger.info(f"\nAll done! {len(results)} days fetched for {endpoint_key}. Check logs for any errors.")
     return results
 
@@ -141,6 +185,7 @@ if __name__ == "__main__":
         batchName = params.get("batchName")
         wineryName = params.get("wineryName")
         max_workers = params.get("max_workers", 1)
+        incremental = params.get("incremental", False)
     else:
         print("No parameters passed. Exiting.")
         sys.exit(1)
@@ -179,5 +224,6 @@ if __name__ == "__main__":
         date_param="startDate",
         extra_params=extra_params,
         max_workers=max_workers,
-        output_root="Main/data/"
+        output_root="Main/data/",
+        incremental=incremental
     )
\ No newline at end of file
@@ -1,11 +1,13 @@
 # python tools/upload_cost_movements_main.py
 
+import inspect
 import json
 import os
 import math
 import datetime
 import pandas as pd
 from collections import defaultdict
+from split_cache import SplitCache, code_fingerprint
 from utils.helpers import safe_get, safe_get_path, convert_epoch_columns
 
 # Input/Output locations
@@ -19,7 +21,7 @@ os.makedirs(ID_OUT_DIR, exist_ok=True)
 # Discover files
 json_files = [
     os.path.join(JSON_DIR, fname)
-    for fname in os.listdir(JSON_DIR)
+    for fname in sorted(os.listdir(JSON_DIR))
     if fname.endswith(".json") and os.path.isfile(os.path.join(JSON_DIR, fname))
 ]
 
@@ -76,31 +78,22 @@ def safe_json_dump(data, file):
         # Single dict or other types
         json.dump(_sanitize_value(data), file, indent=2, ensure_ascii=False, allow_nan=False)
 
-# Master activity table (one row per activity)
-cm_activities = []
+# Per-activity tables: cm_activities (one row per activity), 1:1 tables keyed by postedId
+# (first occurrence wins) and the 1:N cm_impacted_allocations
+CM_TABLES = ("cm_activities", "cm_volume_delta", "cm_cost_delta", "cm_references", "cm_impacted_allocations")
+DEDUP_BY_POSTED_ID = ("cm_volume_delta", "cm_cost_delta", "cm_references")
 
-# Simple 1:1 per activity tables
-cm_volume_delta = []
-cm_cost_delta = []
-cm_references = []
+# ID/lookup tables (dedup by id, first occurrence wins)
+#   cm_cost_owners {id: {id, name, extId}}, cm_wineries {id: {id, name, businessUnit}},
+#   cm_programs {id: {id, name, code}}, cm_customers / cm_vendors {id: {id, name, extId}}
+CM_ID_TABLES = ("cm_cost_owners", "cm_wineries", "cm_programs", "cm_customers", "cm_vendors")
 
-# 1:N tables
-cm_impacted_allocations = []
 
-# ID/lookup tables (dedup by id)
-cm_cost_owners = {}       # {id: {id, name, extId}}
-cm_wineries = {}          # {id: {id, name, businessUnit}}
-cm_programs = {}          # {id: {id, name, code}}
-cm_customers = {}         # {id: {id, name, extId}}
-cm_vendors = {}           # {id: {id, name, extId}}
-
-# Seen sets for 1:1 per-activity tables
-seen_volume_delta = set()
-seen_cost_delta = set()
-seen_references = set()
+def new_partial():
+    return {name: [] if name in CM_TABLES else {} for name in CM_TABLES + CM_ID_TABLES}
 
 # Helper to register ID tables
-def register_cost_owner(node):
+def register_cost_owner(node, cm_cost_owners):
     if not node:
         return None
     oid = safe_get(node.get("id"))
@@ -114,7 +107,7 @@ def register_cost_owner(node):
         }
     return oid
 
-def register_winery(node):
+def register_winery(node, cm_wineries):
     if not node:
         return None
     wid = safe_get(node.get("id"))
@@ -128,7 +121,7 @@ def register_winery(node):
         }
     return wid
 
-def register_program(node):
+def register_program(node, cm_programs):
     if not node:
         return None
     pid = safe_get(node.get("id"))
@@ -142,7 +135,7 @@ def register_program(node):
         }
     return pid
 
-def register_customer(node):
+def register_customer(node, cm_customers):
     if not node:
         return None
     cid = safe_get(node.get("id"))
@@ -156,7 +149,7 @@ def register_customer(node):
         }
     return cid
 
-def register_vendor(node):
+def register_vendor(node, cm_vendors):
     if not node:
         return None
     vid = safe_get(node.get("id"))
@@ -183,18 +176,28 @@ def get_activities_from_payload(data, json_file):
     print(f"WARNING: {json_file} is not a recognized cost movement structure, skipping.")
     return []
 
-# Read and split
-for json_file in json_files:
+def split_cost_movements_file(json_file):
+    """Split one file into a partial (see new_partial); None when it cannot be read."""
     try:
         with open(json_file, "r", encoding="utf-8") as f:
             data = json.load(f)
     except Exception as e:
         print(f"ERROR: Could not read {json_file}: {e}")
-        continue
+        return None
+
+    part = new_partial()
+    cm_activities = part["cm_activities"]
+    cm_volume_delta = part["cm_volume_delta"]
+    cm_cost_delta = part["cm_cost_delta"]
+    cm_references = part["cm_references"]
+    cm_impacted_allocations = part["cm_impacted_allocations"]
+    seen_volume_delta = set()
+    seen_cost_delta = set()
+    seen_references = set()
 
     activities = get_activities_from_payload(data, json_file)
     if not activities:
-        continue
+        return part
 
     for act in activities:
         if not isinstance(act, dict):
@@ -204,13 +207,13 @@ for json_file in json_files:
         activity_id = safe_get(act.get("activityId"))
 
         # Register ID lookups first
-        primary_owner_id = register_cost_owner(safe_get(act.get("primaryCostOwner")))
-        secondary_owner_id = register_cost_owner(safe_get(act.get("secondaryCostOwner")))
-        primary_winery_id = register_winery(safe_get(act.get("primaryWinery")))
-        secondary_winery_id = register_winery(safe_get(act.get("secondaryWinery")))
-        program_id = register_program(safe_get(act.get("program")))
-        customer_id = register_customer(safe_get(act.get("customer")))
-        vendor_id = register_vendor(safe_get(act.get("vendor")))
+        primary_owner_id = register_cost_owner(safe_get(act.get("primaryCostOwner")), part["cm_cost_owners"])
+        secondary_owner_id = register_cost_owner(safe_get(act.get("secondaryCostOwner")), part["cm_cost_owners"])
+        primary_winery_id = register_winery(safe_get(act.get("primaryWinery")), part["cm_wineries"])
+        secondary_winery_id = register_winery(safe_get(act.get("secondaryWinery")), part["cm_wineries"])
+        program_id = register_program(safe_get(act.get("program")), part["cm_programs"])
+        customer_id = register_customer(safe_get(act.get("customer")), part["cm_customers"])
+        vendor_id = register_vendor(safe_get(act.get("vendor")), part["cm_vendors"])
 
         # Main activity row
         cm_activities.append({
@@ -298,6 +301,54 @@ for json_file in json_files:
                 "name": safe_get(item.get("name")),
             })
 
+    return part
+
+
+def merge_partial(merged, part, seen_posted_ids):
+    """Fold a file's partial into `merged`, keeping the first row per postedId / id."""
+    for name in CM_TABLES:
+        rows = part[name]
+        if name in DEDUP_BY_POSTED_ID:
+            seen = seen_posted_ids.setdefault(name, set())
+            kept = []
+            for row in rows:
+                if row["cm_postedId"] not in seen:
+                    seen.add(row["cm_postedId"])
+                    kept.append(row)
+            rows = kept
+        merged[name].extend(rows)
+    for name in CM_ID_TABLES:
+        for key, row in part[name].items():
+            merged[name].setdefault(key, row)
+
+
+# Read and split; files whose content is unchanged since the last run reuse their cached partial
+split_cache = SplitCache("cost_movements", fingerprint=code_fingerprint(__file__, inspect.getfile(safe_get)))
+merged = new_partial()
+seen_posted_ids = {}
+for json_file in json_files:
+    part = split_cache.get(json_file)
+    if part is None:
+        part = split_cost_movements_file(json_file)
+        if part is None:
+            continue
+        split_cache.put(json_file, part)
+    merge_partial(merged, part, seen_posted_ids)
+split_cache.prune(json_files)
+split_cache.save()
+print(f"Split cache: {split_cache.summary()}")
+
+cm_activities = merged["cm_activities"]
+cm_volume_delta = merged["cm_volume_delta"]
+cm_cost_delta = merged["cm_cost_delta"]
+cm_references = merged["cm_references"]
+cm_impacted_allocations = merged["cm_impacted_allocations"]
+cm_cost_owners = merged["cm_cost_owners"]
+cm_wineries = merged["cm_wineries"]
+cm_programs = merged["cm_programs"]
+cm_customers = merged["cm_customers"]
+cm_vendors = merged["cm_vendors"]
+
 # Convert epochs in-place for the activity DataFrame
 activities_df = pd.DataFrame(cm_activities)
 if not activities_df.empty:
@@ -2,11 +2,29 @@
 
 import json
 import os
+import sys
+
+from split_cache import SplitCache, code_fingerprint
 
 ID_DIR = "Main/data/id_tables"
 OUT_DIR = "Main/data/id_tables/consolidated"
 os.makedirs(OUT_DIR, exist_ok=True)
 
+CONSOLIDATED_TABLES = [
+    "main_blocks", "main_varieties", "main_wineries", "main_growers", "main_vineyards",
+    "main_regions", "main_subRegions",
+]
+
+# Skip consolidation when no ID table changed (or appeared/disappeared) since the last run
+id_table_files = sorted(
+    os.path.join(ID_DIR, fname) for fname in os.listdir(ID_DIR)
+    if fname.endswith(".json") and os.path.isfile(os.path.join(ID_DIR, fname))
+)
+split_cache = SplitCache("id_tables", fingerprint=code_fingerprint(__file__))
+if split_cache.unchanged(id_table_files):
+    print("ID tables unchanged since the last consolidation; see:", OUT_DIR)
+    sys.exit(0)
+
 # ---- Consolidate BLOCKS ----
 block_files = [
     "fr_blocks.json", "in_block.json", "vs_block.json", "bl_blocks.json"
@@ -296,4 +314,6 @@ consolidate_table(
     ["vs_subRegion_code", "in_subRegion_code", "bl_subRegion_code"]
 )
 
+split_cache.record_run(id_table_files, [os.path.join(OUT_DIR, f"{name}.json") for name in CONSOLIDATED_TABLES])
+
 print("Consolidation complete! See:", OUT_DIR)
\ No newline at end of file
@@ -2,6 +2,10 @@
 
 import json
 import os
+import sys
+
+from split_cache import SplitCache, code_fingerprint
+from table_io import TABLE_FORMATS, get_table_writers, write_table
 
 def safe_get(val):
     return val if val not in [None, "NULL"] else None
@@ -21,6 +25,12 @@ ID_OUT_DIR = "Main/data/id_tables"
 os.makedirs(OUT_DIR, exist_ok=True)
 os.makedirs(ID_OUT_DIR, exist_ok=True)
 
+# Skip the split when all_shipments.json is byte-identical to the last run's
+split_cache = SplitCache("shipments", fingerprint=code_fingerprint(__file__, params={"formats": TABLE_FORMATS}))
+if split_cache.unchanged([JSON_PATH]):
+    print(f"{JSON_PATH} unchanged since the last split; tables are up to date.")
+    sys.exit(0)
+
 sh_shipments_table = []
 sh_shipments_wine_details_table = []
 sh_shipments_wine_batch_table = []
@@ -205,48 +215,32 @@ for shipment in shipments:
             }
             sh_shipments_composition_table.append(composition_row)
 
-# --- Write to JSON files ---
-with open(os.path.join(OUT_DIR, "sh_shipments.json"), "w", encoding="utf-8") as f:
-    json.dump(sh_shipments_table, f, indent=2)
-
-with open(os.path.join(OUT_DIR, "sh_shipments_inter_winery.json"), "w", encoding="utf-8") as f:
-    json.dump(sh_shipments_inter_winery_table, f, indent=2)
-
-with open(os.path.join(OUT_DIR, "sh_shipments_wine_details.json"), "w", encoding="utf-8") as f:
-    json.dump(sh_shipments_wine_details_table, f, indent=2)
-
-with open(os.path.join(OUT_DIR, "sh_shipments_wine_batch.json"), "w", encoding="utf-8") as f:
-    json.dump(sh_shipments_wine_batch_table, f, indent=2)
-
-with open(os.path.join(OUT_DIR, "sh_shipments_composition.json"), "w", encoding="utf-8") as f:
-    json.dump(sh_shipments_composition_table, f, indent=2)
-
-# Write ID tables for linking
-with open(os.path.join(ID_OUT_DIR, "sh_source.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_source_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_destination.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_destination_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_loss_reason.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_loss_reason_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_designatedRegion.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_designatedRegion_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_designatedVariety.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_designatedVariety_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_productCategory.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_productCategory_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_designatedProduct.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_designatedProduct_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_grading_scale.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_grading_scale_table.values()), f, indent=2)
-
-with open(os.path.join(ID_OUT_DIR, "sh_grading.json"), "w", encoding="utf-8") as f:
-    json.dump(list(sh_grading_table.values()), f, indent=2)
-
-print("Split complete! JSON tables written to", OUT_DIR, "and", ID_OUT_DIR)
\ No newline at end of file
+# --- Table outputs ---
+table_outputs = {
+    "sh_shipments": sh_shipments_table,
+    "sh_shipments_inter_winery": sh_shipments_inter_winery_table,
+    "sh_shipments_wine_details": sh_shipments_wine_details_table,
+    "sh_shipments_wine_batch": sh_shipments_wine_batch_table,
+    "sh_shipments_composition": sh_shipments_composition_table,
+}
+# ID tables for linking
+id_outputs = {
+    "sh_source": sh_source_table,
+    "sh_destination": sh_destination_table,
+    "sh_loss_reason": sh_loss_reason_table,
+    "sh_designatedRegion": sh_designatedRegion_table,
+    "sh_designatedVariety": sh_designatedVariety_table,
+    "sh_productCategory": sh_productCategory_table,
+    "sh_designatedProduct": sh_designatedProduct_table,
+    "sh_grading_scale": sh_grading_scale_table,
+    "sh_grading": sh_grading_table,
+}
+# Split tables in SPLIT_TABLE_FORMAT; ID tables stay JSON for upload_id_tables_main
+table_writers = get_table_writers(OUT_DIR)
+id_writers = get_table_writers(ID_OUT_DIR, ["json"])
+written = []
+for name, rows in table_outputs.items():
+    written += write_table(table_writers, name, rows)
+for name, table in id_outputs.items():
+    written += write_table(id_writers, name, list(table.values()))
+split_cache.record_run([JSON_PATH], written)
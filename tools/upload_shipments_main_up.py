@@ -5,7 +5,9 @@ import os
 import pandas as pd
 from sqlalchemy import create_engine, text
 
+from table_io import read_table
 from utils.helpers import trim_and_log
+from utils.bulk_upsert import bulk_upsert
 
 DATABASE_URL = os.getenv("DB_URL")
 if not DATABASE_URL:
@@ -222,7 +224,10 @@ def bulk_insert_records(df, table_name, engine, chunk_size=10000):
                 print(f"FINAL ERROR: Upload will fail: column '{col}' has {still_over.sum()} values longer than {maxlen} chars")
                 print(df.loc[still_over, col].head())
                 raise ValueError(f"Column {col} has values over its limit after trimming. Fix your mapping or add to the trim function.")
-    df.to_sql(table_name, engine, if_exists='append', index=False, chunksize=chunk_size)
+    pk_col = UPSERT_PK_MAP.get(table_name, "ts_dispatchNo")
+    counts = bulk_upsert(df, table_name, engine, pk_col, chunk_size=chunk_size)
+    print(f"{table_name}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged.")
+    return counts
 
 ordered_table_files = [
     # ("shipments.json", "shipments"),
@@ -243,11 +248,9 @@ def main():
         else:
             path = os.path.join(DATA_DIR_2, filename)
         print(f"\nProcessing: {path} -> {table_name}")
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        print(f"Loaded records from JSON: {len(data)}")
-        print(f"First 3 records: {data[:3]}")
-        df = pd.DataFrame(data)
+        df = read_table(path)
+        print(f"Loaded records: {len(df)}")
+        print(f"First 3 records: {df.head(3).to_dict(orient='records')}")
         # Only keep columns matching your schema for ts_ad_dispatches
         if table_name == "ts_ad_dispatches":
             keep_cols = [
@@ -277,7 +280,6 @@ def main():
         print(df.dtypes)
         print(df.head())
         bulk_insert_records(df, table_name, engine, chunk_size=10000)
-        print(f"Uploaded {len(df)} records to {table_name}.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
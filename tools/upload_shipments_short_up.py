@@ -3,6 +3,7 @@ import os
 import pandas as pd
 from sqlalchemy import create_engine
 
+from tools.table_io import read_table
 from tools.utils.helpers import convert_epoch_columns  # <-- Import your helper
 
 # --- CONFIG ---
@@ -34,9 +35,7 @@ def upload_json_to_sql(filename, table_name, engine):
     import math
     path = os.path.join(DATA_DIR, filename)
     print(f"Uploading {path} to table '{table_name}'...")
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
+    df = read_table(path)
 
     # Convert all epoch time columns to datetime using helper
     df = convert_epoch_columns(df)
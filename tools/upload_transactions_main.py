@@ -1,9 +1,13 @@
 # python tools/upload_transactions_main.py
 
+import inspect
 import json
 import os
+import sys
 import pandas as pd
 from collections import defaultdict
+from special_table_linker import link_special_transfers
+from split_cache import SplitCache, code_fingerprint
 from utils.helpers import safe_get_path, safe_get
 
 JSON_DIR = os.getenv("TRANSACTIONS_JSON", "Main/data/GET--transactions_by_day/")
@@ -20,6 +24,37 @@ json_files = [
 
 print(f"Found {len(json_files)} files to process in {JSON_DIR} (not going into {OUT_DIR}).")
 
+TANKS_FILE = "Main/data/id_tables/Tanks_All.json"
+OUTPUT_FILES = [os.path.join(OUT_DIR, fname) for fname in (
+    "ts_transfer_operations_table.json",
+    "special_transfer_link_table.json",
+    "special_transfer_intransit_to_intransit_table.json",
+    "special_transfer_from_intransit_table.json",
+    "special_transfer_table.json",
+    "split_gallons_table.json",
+    "ts_transactions.json",
+    "ts_transactions_from_vessel_table.json",
+    "ts_transactions_from_vessel_before_details_table.json",
+    "ts_transactions_from_vessel_after_details_table.json",
+    "ts_transactions_to_vessel_table.json",
+    "ts_transactions_to_vessel_before_details_table.json",
+    "ts_transactions_to_vessel_after_details_table.json",
+)] + [os.path.join(ID_OUT_DIR, fname) for fname in (
+    "ts_batchDetails_vintage_table.json",
+    "ts_batchDetails_variety_table.json",
+    "ts_batchDetails_region_table.json",
+)]
+
+# Skip the whole split when no day file changed, appeared or disappeared since the last run.
+# (The link table is rebuilt cumulatively inside the scan, so this script is not split
+# per file like upload_transactions_main_v2.py.)
+split_cache = SplitCache(
+    "transactions", fingerprint=code_fingerprint(__file__, inspect.getfile(safe_get), TANKS_FILE)
+)
+if split_cache.unchanged(json_files):
+    print("No day file changed since the last split; tables are up to date.")
+    sys.exit(0)
+
 MAX_LENGTHS = {
     "transactions_additional_details": {
         "ts_summary": 100,
@@ -58,29 +93,6 @@ def safe_json_dump(data, file):
         ]
     json.dump(data, file, indent=2, ensure_ascii=False)
 
-def normalize_additional_details_table(details_rows):
-    import pandas as pd
-    df = pd.DataFrame(details_rows)
-    grouped_rows = df[df['ts_dockets'].fillna('').str.contains(',')].copy()
-    docket_info = {}
-    for _, row in grouped_rows.iterrows():
-        dockets = [d.strip() for d in str(row['ts_dockets']).split(',')]
-        for docket in dockets:
-            if docket not in docket_info:
-                docket_info[docket] = {}
-            for col in df.columns:
-                val = row[col]
-                if pd.notnull(val) and str(val).upper() != 'NULL':
-                    docket_info[docket][col] = val
-    for idx, row in df.iterrows():
-        dockets = [d.strip() for d in str(row['ts_dockets']).split(',')]
-        if len(dockets) == 1 and dockets[0] in docket_info:
-            docket = dockets[0]
-            for col in df.columns:
-                if (pd.isnull(row[col]) or str(row[col]).upper() == 'NULL') and col in docket_info[docket]:
-                    df.at[idx, col] = docket_info[docket][col]
-    return df.to_dict(orient="records")
-
 def flatten_value(val):
     if isinstance(val, list):
         return ",".join(map(str, val))
@@ -134,7 +146,7 @@ special_transfer_from_intransit_table = []
 special_transfer_intransit_to_intransit_table = []
 special_transfer_link_table = []
 # --- Load Tanks_All.json for In-Transit vessel lookup ---
-with open("Main/data/id_tables/Tanks_All.json", "r", encoding="utf-8") as tank_file:
+with open(TANKS_FILE, "r", encoding="utf-8") as tank_file:
     tanks_all = json.load(tank_file)
 
 tanks_lookup = {safe_get(tank.get("vessel")): safe_get(tank.get("Winery Building")) for tank in tanks_all}
@@ -318,28 +330,9 @@ for json_file in json_files:
             special_transfer_intransit_to_intransit_table.append(special_intransit_row)
 
             # After both special_transfer_table and special_transfer_from_intransit_table are populated
-
-            # Build index for fast lookup on from_intransit
-            from_intransit_index = {}
-            for idx, row in enumerate(special_transfer_from_intransit_table):
-                key = (row.get("from_ts_name"), row.get("from_ts_volOut"))
-                from_intransit_index.setdefault(key, []).append((idx, row))
-
-            # Now, scan the "to" in special_transfer_table and match against "from" in special_transfer_from_intransit_table
-            for idx_to, to_row in enumerate(special_transfer_table):
-                key = (to_row.get("to_ts_name"), to_row.get("to_ts_volIn"))
-                matches = from_intransit_index.get(key, [])
-                for idx_from, from_row in matches:
-                    # Build the link (you can add more fields if you want)
-                    link_row = {
-                        "special_transfer_table_idx": idx_to,
-                        "special_transfer_table_subOperationId": to_row.get("ts_subOperationId"),
-                        "special_transfer_from_intransit_table_idx": idx_from,
-                        "special_transfer_from_intransit_table_subOperationId": from_row.get("ts_subOperationId"),
-                        "vessel_name": key[0],
-                        "volume": key[1]
-                    }
-                    special_transfer_link_table.append(link_row)
+            special_transfer_link_table.extend(
+                link_special_transfers(special_transfer_table, special_transfer_from_intransit_table)
+            )
 
 
         if from_vessel:
@@ -949,4 +942,6 @@ with open(os.path.join(ID_OUT_DIR, "ts_batchDetails_variety_table.json"), "w", e
 with open(os.path.join(ID_OUT_DIR, "ts_batchDetails_region_table.json"), "w", encoding="utf-8") as f:
     safe_json_dump(list(ts_batchDetails_region_table.values()), f)
 
-print("Split complete! JSON tables written to", OUT_DIR, "and", ID_OUT_DIR)
\ No newline at end of file
+split_cache.record_run(json_files, OUTPUT_FILES)
+
+print("Split complete! JSON tables written to", OUT_DIR, "and", ID_OUT_DIR)
@@ -3,6 +3,7 @@ import os
 import pandas as pd
 from sqlalchemy import create_engine, text
 
+from table_io import read_table
 from utils.helpers import convert_epoch_columns, trim_and_log  
 
 DATABASE_URL = os.getenv("DB_URL")
@@ -352,11 +353,9 @@ def main():
         pk_col = UPSERT_PK_MAP[table_name]
         path = os.path.join(DATA_DIR, filename)
         print(f"\nProcessing: {path} -> {table_name}")
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        print("Loaded records from JSON:", len(data))
-        print("First 3 records:", data[:3])
-        df = pd.DataFrame(data)
+        df = read_table(path)
+        print("Loaded records:", len(df))
+        print("First 3 records:", df.head(3).to_dict(orient="records"))
         # PATCH: Always keep ts_docket as string for parcels table!
         if table_name == "ts_transactions_extraction_parcels" and "ts_docket" in df.columns:
             df["ts_docket"] = df["ts_docket"].astype(str)
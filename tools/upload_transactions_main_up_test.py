@@ -5,6 +5,7 @@ import os
 import pandas as pd
 from sqlalchemy import create_engine
 
+from table_io import read_table
 from utils.helpers import convert_epoch_columns, trim_and_log  
 
 # --- CONFIG ---
@@ -190,9 +191,7 @@ def test_orphan_export_only(filename, table_name, engine):
     path = os.path.join(DATA_DIR, filename)
     print(f"Testing orphan export in {path} for table '{table_name}'...")
 
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
+    df = read_table(path)
     df = convert_epoch_columns(df)
 
     float_columns_map = {
@@ -9,22 +9,41 @@ Key improvements:
 - Argparse + logging (configurable paths, in-transit building name, volume tolerance)
 - Deduplicated repeated code (vessel details and batchDetails extraction)
 - Correct sub-operation lookup (only real transactions)
-- Build special transfer links after full scan with numeric tolerance
+- Build special transfer links after full scan with numeric tolerance (sorted per-vessel
+  volume index from interval_join; optionally time-bounded with --max-transit-days)
 - Safer truthy check for "reversed"
 - Safer numeric handling for netAmount and volume fields
 - Safer list flattening that avoids "None" strings
 - Single write for each output file
+- Map/reduce over day files (--workers): each file is split into partial tables in a
+  process pool, then merged in file order with the global dedup applied
+- Day files are streamed with ijson (listed in requirements.txt; json.load per file if it is
+  missing), so parsing holds one transaction rather than one whole file. The merged tables
+  and transactions_by_subOp still span the whole history in memory until they are written.
+- Tables written through table_io (--format json,parquet): typed Parquet alongside or
+  instead of JSON
 """
 import argparse
+import functools
+import inspect
 import json
 import logging
+import multiprocessing
 import os
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Set, Tuple
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-import pandas as pd
+from interval_join import ToleranceIndex
+from split_cache import SplitCache, code_fingerprint
+from table_io import TABLE_FORMATS, get_table_writers, write_table
 from utils.helpers import safe_get_path, safe_get
 
+try:
+    import ijson  # in requirements.txt; incremental parsing of large day files
+except ImportError:
+    ijson = None
+
 
 # --------------------------- Defaults (overridable via CLI) ---------------------------
 
@@ -34,6 +53,9 @@ DEFAULT_ID_OUT_DIR = "Main/data/id_tables"
 DEFAULT_TANKS_FILE = os.path.join(DEFAULT_ID_OUT_DIR, "Tanks_All.json")
 DEFAULT_INTRANSIT_BUILDING_NAME = "In-Transit-Bldg"
 DEFAULT_VOL_TOLERANCE = 0.5  # tolerance for linking transfers on volume
+DEFAULT_MAX_TRANSIT_DAYS = float(os.getenv("TRANSACTIONS_MAX_TRANSIT_DAYS", "0")) or None  # 0/unset = no time bound
+MS_PER_DAY = 86_400_000
+DEFAULT_WORKERS = int(os.getenv("TRANSACTIONS_SPLIT_WORKERS", "1"))
 
 MAX_LENGTHS = {
     "transactions_additional_details": {
@@ -53,9 +75,96 @@ MAX_LENGTHS = {
         "ts_fruitProcess": 50,
         "ts_fractionType": 50,
         "ts_press": 50,
-    }
+    },
+    # SQL VARCHAR lengths (see upload_transactions_main_up.py); typed as strings in Parquet
+    "ts_transactions": {
+        "ts_assignedBy": 100,
+        "ts_completedBy": 100,
+        "ts_formattedDate": 20,
+        "ts_jobNumber": 50,
+        "ts_operationId": 50,
+        "ts_operationTypeId": 50,
+        "ts_operationTypeName": 100,
+        "ts_subOperationId": 50,
+        "ts_subOperationTypeName": 100,
+        "ts_treatment": 100,
+        "ts_winery": 100,
+        "ts_workorder": 50,
+    },
+    "ts_transactions_addition_ops": {
+        "ts_additive_description": 100,
+        "ts_additive_id": 50,
+        "ts_additive_name": 50,
+        "ts_batchId": 50,
+        "ts_batchName": 50,
+        "ts_changeToState": 50,
+        "ts_lotNumbers": 100,
+        "ts_templateId": 50,
+        "ts_templateName": 100,
+        "ts_unit": 10,
+        "ts_vesselId": 50,
+        "ts_vesselName": 50,
+        "ts_volume": 50,
+    },
 }
 
+# Output table -> MAX_LENGTHS entry giving its string column schema
+TABLE_STRING_LENGTHS = {
+    "ts_transactions": MAX_LENGTHS["ts_transactions"],
+    "ts_transactions_additional_details_table": MAX_LENGTHS["transactions_additional_details"],
+    "ts_transactions_addition_ops_table": MAX_LENGTHS["ts_transactions_addition_ops"],
+}
+
+
+# Tables built per file (output file stem), in write order
+SPLIT_TABLES = (
+    "special_transfer_intransit_to_intransit_table",
+    "special_transfer_from_intransit_table",
+    "special_transfer_table",
+    "ts_transfer_operations_table",
+    "ts_transactions",
+    "ts_transactions_from_vessel_table",
+    "ts_transactions_from_vessel_before_details_table",
+    "ts_transactions_from_vessel_after_details_table",
+    "ts_transactions_to_vessel_table",
+    "ts_transactions_to_vessel_before_details_table",
+    "ts_transactions_to_vessel_after_details_table",
+    "ts_transactions_loss_details_table",
+    "ts_transactions_analysis_metrics_table",
+    "ts_transactions_additional_details_table",
+    "ts_transactions_extraction_parcels_table",
+    "ts_transactions_addition_ops_table",
+    "ts_extraction_table",
+    "ts_grape_intake_table",
+)
+
+# Tables that keep only the first row per key across all files
+_by_sub_op = itemgetter("ts_subOperationId")
+DEDUP_KEYS = {
+    "ts_transactions_from_vessel_table": _by_sub_op,
+    "ts_transactions_from_vessel_before_details_table": _by_sub_op,
+    "ts_transactions_from_vessel_after_details_table": _by_sub_op,
+    "ts_transactions_to_vessel_table": _by_sub_op,
+    "ts_transactions_to_vessel_before_details_table": _by_sub_op,
+    "ts_transactions_to_vessel_after_details_table": _by_sub_op,
+    "ts_transactions_loss_details_table": _by_sub_op,
+    "ts_transactions_analysis_metrics_table": itemgetter("ts_subOperationId", "ts_metric_id"),
+    "ts_transactions_additional_details_table": _by_sub_op,
+    "ts_transactions_addition_ops_table": _by_sub_op,
+}
+
+# Rows emitted alongside an additional_details row; kept only when that row is
+ADDITIONAL_DETAILS_DEPENDENTS = (
+    "ts_transactions_extraction_parcels_table",
+    "ts_extraction_table",
+    "ts_grape_intake_table",
+)
+
+# Transaction fields read back (via transactions_by_subOp) by the derived tables
+TRANSACTION_LOOKUP_FIELDS = ("date", "formattedDate", "workorder", "jobNumber", "treatment", "completedBy", "winery")
+
+PARSE_ERRORS: Tuple[type, ...] = (OSError, ValueError) + ((ijson.JSONError,) if ijson is not None else ())
+
 
 # --------------------------- CLI & Logging ---------------------------
 
@@ -67,6 +176,15 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--tanks-file", default=DEFAULT_TANKS_FILE, help="Path to Tanks_All.json for building lookup.")
     p.add_argument("--intransit-name", default=DEFAULT_INTRANSIT_BUILDING_NAME, help="Winery Building name for in-transit.")
     p.add_argument("--vol-tolerance", type=float, default=DEFAULT_VOL_TOLERANCE, help="Volume tolerance for linking transfers.")
+    p.add_argument("--max-transit-days", type=float, default=DEFAULT_MAX_TRANSIT_DAYS,
+                   help="Only link transfers out of in-transit dated within this many days after the transfer in; "
+                        "undated transactions are not linked (default: no bound).")
+    p.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                   help="Processes splitting day files in parallel (1 = in this process).")
+    p.add_argument("--no-cache", action="store_true",
+                   help="Re-split every file instead of reusing cached partials of unchanged files.")
+    p.add_argument("--format", default=",".join(TABLE_FORMATS),
+                   help="Table output format(s): json, parquet or json,parquet (default: SPLIT_TABLE_FORMAT).")
     p.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Logging level.")
     return p.parse_args()
 
@@ -80,20 +198,6 @@ def setup_logging(level: str) -> None:
 
 # --------------------------- Helpers ---------------------------
 
-def safe_json_dump(data: Any, file) -> None:
-    """Dump lists or DataFrames to JSON with None instead of NaN."""
-    if isinstance(data, pd.DataFrame):
-        data = data.where(pd.notnull(data), None).to_dict(orient="records")
-    elif isinstance(data, list):
-        norm = []
-        for row in data:
-            if isinstance(row, dict):
-                row = {k: (None if (isinstance(v, float) and pd.isnull(v)) else v) for k, v in row.items()}
-            norm.append(row)
-        data = norm
-    json.dump(data, file, indent=2, ensure_ascii=False)
-
-
 def get_docket_keys(row: Dict[str, Any], key: str = "ts_dockets") -> List[str]:
     dockets_val = row.get(key, "")
     if isinstance(dockets_val, list):
@@ -280,23 +384,24 @@ def process_vessel_details(
     sub_op_id: Any,
     seen_ids: Set[Any],
     target_list: List[Dict[str, Any]],
-    ts_batchDetails_vintage_table: Dict[Any, Dict[str, Any]],
-    ts_batchDetails_variety_table: Dict[Any, Dict[str, Any]],
-    ts_batchDetails_region_table: Dict[Any, Dict[str, Any]],
+    id_updates: List[Tuple[str, Any, Tuple[Dict, Dict, Dict]]],
+    table_name: str,
 ) -> None:
-    """Append details row (before/after) if present and not yet seen for sub_op_id."""
+    """
+    Append details row (before/after) if present and not yet seen for sub_op_id.
+    The batchDetails vintage/variety/region rows go to id_updates; SplitTables.merge
+    applies them once the row survives the global dedup.
+    """
     if not details or sub_op_id in seen_ids:
         return
     seen_ids.add(sub_op_id)
 
+    entries: Tuple[Dict, Dict, Dict] = ({}, {}, {})
     row = {"ts_subOperationId": sub_op_id, **build_details_row(details)}
-    row.update(update_batch_details_tables(
-        safe_get(details.get("batchDetails")) or {},
-        ts_batchDetails_vintage_table,
-        ts_batchDetails_variety_table,
-        ts_batchDetails_region_table,
-    ))
+    row.update(update_batch_details_tables(safe_get(details.get("batchDetails")) or {}, *entries))
     target_list.append(row)
+    if any(entries):
+        id_updates.append((table_name, sub_op_id, entries))
 
 
 def _round_or_none(x: Any, ndigits: int = 3) -> Optional[float]:
@@ -308,37 +413,51 @@ def build_special_transfer_links(
     to_list: List[Dict[str, Any]],
     from_list: List[Dict[str, Any]],
     vol_tol: float,
+    transactions_by_subOp: Optional[Dict[Any, Dict[str, Any]]] = None,
+    max_transit_days: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
     """
     Link 'to in-transit' records to 'from in-transit to non-intransit' records by matching vessel name and approximately matching volume.
+
+    With max_transit_days, the 'from' transaction must also be dated 0..max_transit_days after the
+    'to' transaction (dates looked up in transactions_by_subOp).
     """
-    # Index "from" by name and rounded vol bucket
-    index: Dict[str, Dict[Optional[float], List[Tuple[int, Dict[str, Any]]]]] = {}
-    for idx, row in enumerate(from_list):
-        name = row.get("from_ts_name")
-        vol = _round_or_none(row.get("from_ts_volOut"))
-        index.setdefault(name, {}).setdefault(vol, []).append((idx, row))
+    def transaction_date(row: Dict[str, Any]) -> Optional[float]:
+        transaction = (transactions_by_subOp or {}).get(row.get("ts_subOperationId")) or {}
+        return to_float_or_none(transaction.get("date"))
+
+    time_window = (0, max_transit_days * MS_PER_DAY) if max_transit_days is not None else None
+    index = ToleranceIndex(
+        from_list,
+        key="from_ts_name",
+        value=lambda row: _round_or_none(row.get("from_ts_volOut")),
+        time=transaction_date if time_window else None,
+    )
+    # Matches come back in from_list order; emit them grouped by rounded volume in order of first
+    # appearance (the original bucket order), which decides the link kept for duplicate pairs
+    bucket_rank: List[int] = []
+    first_seen: Dict[Tuple[Any, Optional[float]], int] = {}
+    for row in from_list:
+        bucket = (row.get("from_ts_name"), _round_or_none(row.get("from_ts_volOut")))
+        bucket_rank.append(first_seen.setdefault(bucket, len(first_seen)))
 
     links: List[Dict[str, Any]] = []
     for idx_to, to_row in enumerate(to_list):
         name = to_row.get("to_ts_name")
         vol_in = _round_or_none(to_row.get("to_ts_volIn"))
-        buckets = index.get(name, {})
-        if vol_in is None or not buckets:
-            continue
-        for vol_key, candidates in buckets.items():
-            if vol_key is None or abs(vol_key - vol_in) > vol_tol:
-                continue
-            for idx_from, from_row in candidates:
-                links.append({
-                    "special_transfer_table_idx": idx_to,
-                    "special_transfer_table_subOperationId": to_row.get("ts_subOperationId"),
-                    "special_transfer_from_intransit_table_idx": idx_from,
-                    "special_transfer_from_intransit_table_subOperationId": from_row.get("ts_subOperationId"),
-                    "vessel_name": name,
-                    "volume_to": to_row.get("to_ts_volIn"),
-                    "volume_from": from_row.get("from_ts_volOut"),
-                })
+        matches = index.lookup(name, vol_in, vol_tol,
+                               transaction_date(to_row) if time_window else None, time_window)
+        for idx_from in sorted(matches, key=lambda idx: (bucket_rank[idx], idx)):
+            from_row = from_list[idx_from]
+            links.append({
+                "special_transfer_table_idx": idx_to,
+                "special_transfer_table_subOperationId": to_row.get("ts_subOperationId"),
+                "special_transfer_from_intransit_table_idx": idx_from,
+                "special_transfer_from_intransit_table_subOperationId": from_row.get("ts_subOperationId"),
+                "vessel_name": name,
+                "volume_to": to_row.get("to_ts_volIn"),
+                "volume_from": from_row.get("from_ts_volOut"),
+            })
     # De-duplicate by subOpId pairs
     seen_pairs: Set[Tuple[Any, Any]] = set()
     deduped: List[Dict[str, Any]] = []
@@ -351,6 +470,498 @@ def build_special_transfer_links(
     return deduped
 
 
+# --------------------------- Map: one day file -> partial tables ---------------------------
+
+class NotTransactionsFile(ValueError):
+    """The file is JSON but not a transactions list / transactionSummaries dict."""
+
+
+def iter_transactions(json_file: str) -> Iterator[Any]:
+    """
+    Yield the transactions of one day file (a list, or a dict with "transactionSummaries").
+
+    With ijson installed the file is parsed incrementally, so only the transaction being
+    split is held in memory; otherwise it is json.load-ed whole.
+    """
+    if ijson is not None:
+        with open(json_file, "rb") as f:
+            head = f.read(64).lstrip()
+            f.seek(0)
+            if head.startswith(b"["):
+                prefix = "item"
+            elif head.startswith(b"{"):
+                prefix = "transactionSummaries.item"
+            else:
+                raise NotTransactionsFile("not a valid transactions file")
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+
+    with open(json_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "transactionSummaries" in data:
+        transactions = data["transactionSummaries"]
+    elif isinstance(data, list):
+        transactions = data
+    else:
+        raise NotTransactionsFile("not a valid transactions file")
+    if not isinstance(transactions, list):
+        raise NotTransactionsFile("'transactions' is not a list")
+    yield from transactions
+
+
+def slim_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields the derived tables read back from transactions_by_subOp."""
+    slim = {field: transaction.get(field) for field in TRANSACTION_LOOKUP_FIELDS}
+    to_vessel = transaction.get("toVessel")
+    if isinstance(to_vessel, dict):
+        to_vessel = {k: to_vessel.get(k) for k in ("name", "volIn", "afterDetails")}
+    slim["toVessel"] = to_vessel
+    if "fromVessel" in transaction:
+        from_vessel = transaction["fromVessel"]
+        slim["fromVessel"] = {"volOut": from_vessel.get("volOut")} if isinstance(from_vessel, dict) else from_vessel
+    return slim
+
+
+class SplitTables:
+    """
+    Output tables of one or more day files, with their dedup state.
+
+    A partial (one file) dedups locally; merge() folds partials in file order and applies
+    the global dedup, giving the same rows as splitting every file in one pass.
+    """
+
+    def __init__(self) -> None:
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in SPLIT_TABLES}
+        self.seen: Dict[str, Set[Any]] = {name: set() for name in DEDUP_KEYS}
+        self.seen_dockets: Set[Any] = set()
+        self.id_tables: Dict[str, Dict[Any, Dict[str, Any]]] = {"vintage": {}, "variety": {}, "region": {}}
+        # (details table, subOperationId, (vintage, variety, region) rows) per details row, in order
+        self.id_updates: List[Tuple[str, Any, Tuple[Dict, Dict, Dict]]] = []
+        self.transactions_by_subOp: Dict[Any, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SplitTables":
+        """Rebuild a partial cached as vars(part)."""
+        part = cls.__new__(cls)
+        part.__dict__.update(state)
+        return part
+
+    def merge(self, part: "SplitTables") -> None:
+        accepted: Dict[str, Set[Any]] = {}
+        for name in SPLIT_TABLES:
+            rows = part.tables[name]
+            key = DEDUP_KEYS.get(name)
+            if name in ADDITIONAL_DETAILS_DEPENDENTS:
+                additional = accepted["ts_transactions_additional_details_table"]
+                rows = [r for r in rows if r.get("ts_subOperationId") in additional]
+                if name == "ts_transactions_extraction_parcels_table":
+                    rows = [r for r in rows if self._first_docket(r["ts_docket"])]
+            elif key is not None:
+                seen = self.seen[name]
+                kept = []
+                for row in rows:
+                    k = key(row)
+                    if k not in seen:
+                        seen.add(k)
+                        kept.append(row)
+                rows = kept
+                accepted[name] = {row.get("ts_subOperationId") for row in rows}
+            self.tables[name].extend(rows)
+
+        for table_name, sub_op_id, entries in part.id_updates:
+            if sub_op_id in accepted[table_name]:
+                for id_table, entry in zip(self.id_tables.values(), entries):
+                    id_table.update(entry)
+        self.transactions_by_subOp.update(part.transactions_by_subOp)
+
+    def _first_docket(self, docket: Any) -> bool:
+        if docket in self.seen_dockets:
+            return False
+        self.seen_dockets.add(docket)
+        return True
+
+
+def split_transactions(
+    transactions: Iterable[Any],
+    part: SplitTables,
+    tanks_lookup: Dict[str, str],
+    intransit_name: str,
+    json_file: str = "",
+) -> None:
+    """Split one file's transactions into `part` (local dedup only)."""
+    tables, seen = part.tables, part.seen
+    ts_transactions_table = tables["ts_transactions"]
+    ts_transactions_from_vessel_table = tables["ts_transactions_from_vessel_table"]
+    ts_transactions_from_vessel_before_details_table = tables["ts_transactions_from_vessel_before_details_table"]
+    ts_transactions_from_vessel_after_details_table = tables["ts_transactions_from_vessel_after_details_table"]
+    ts_transactions_to_vessel_table = tables["ts_transactions_to_vessel_table"]
+    ts_transactions_to_vessel_before_details_table = tables["ts_transactions_to_vessel_before_details_table"]
+    ts_transactions_to_vessel_after_details_table = tables["ts_transactions_to_vessel_after_details_table"]
+    ts_transactions_loss_details_table = tables["ts_transactions_loss_details_table"]
+    ts_transactions_analysis_metrics_table = tables["ts_transactions_analysis_metrics_table"]
+    ts_transactions_additional_details_table = tables["ts_transactions_additional_details_table"]
+    ts_transactions_extraction_parcels_table = tables["ts_transactions_extraction_parcels_table"]
+    ts_transactions_addition_ops_table = tables["ts_transactions_addition_ops_table"]
+    ts_extraction_table = tables["ts_extraction_table"]
+    ts_grape_intake_table = tables["ts_grape_intake_table"]
+    ts_transfer_operations_table = tables["ts_transfer_operations_table"]
+    special_transfer_table = tables["special_transfer_table"]
+    special_transfer_from_intransit_table = tables["special_transfer_from_intransit_table"]
+    special_transfer_intransit_to_intransit_table = tables["special_transfer_intransit_to_intransit_table"]
+
+    from_vessel_seen_ids = seen["ts_transactions_from_vessel_table"]
+    from_vessel_before_details_seen_ids = seen["ts_transactions_from_vessel_before_details_table"]
+    from_vessel_after_details_seen_ids = seen["ts_transactions_from_vessel_after_details_table"]
+    to_vessel_seen_ids = seen["ts_transactions_to_vessel_table"]
+    to_vessel_before_details_seen_ids = seen["ts_transactions_to_vessel_before_details_table"]
+    to_vessel_after_details_seen_ids = seen["ts_transactions_to_vessel_after_details_table"]
+    loss_details_seen_ids = seen["ts_transactions_loss_details_table"]
+    additional_details_seen_ids = seen["ts_transactions_additional_details_table"]
+    addition_ops_seen_ids = seen["ts_transactions_addition_ops_table"]
+    analysis_metrics_seen_keys = seen["ts_transactions_analysis_metrics_table"]
+
+    id_updates = part.id_updates
+    transactions_by_subOp = part.transactions_by_subOp
+
+    for transaction in transactions:
+        if not isinstance(transaction, dict):
+            logging.debug("Skipping non-dict transaction in %s: %r", json_file, transaction)
+            continue
+
+        ts_subOperationId = safe_get(transaction.get("subOperationId"))
+        if ts_subOperationId is not None:
+            transactions_by_subOp[ts_subOperationId] = slim_transaction(transaction)
+
+        # Skip reversed
+        if is_truthy_true(transaction.get("reversed")):
+            continue
+
+        ts_operationTypeId = to_int_or_none(safe_get(transaction.get("operationTypeId")))
+        ts_subOperationTypeName = safe_get(transaction.get("subOperationTypeName"))
+
+        transaction_row = {
+            "ts_subOperationId": ts_subOperationId,
+            "ts_operationId": safe_get(transaction.get("operationId")),
+            "ts_operationTypeId": ts_operationTypeId,
+            "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
+            "ts_subOperationTypeName": ts_subOperationTypeName,
+            "ts_formattedDate": safe_get(transaction.get("formattedDate")),
+            "ts_date": safe_get(transaction.get("date")),
+            "ts_lastModified": safe_get(transaction.get("lastModified")),
+            "ts_reversed": safe_get(transaction.get("reversed")),
+            "ts_workorder": safe_get(transaction.get("workorder")),
+            "ts_jobNumber": safe_get(transaction.get("jobNumber")),
+            "ts_treatment": safe_get(transaction.get("treatment")),
+            "ts_assignedBy": safe_get(transaction.get("assignedBy")),
+            "ts_completedBy": safe_get(transaction.get("completedBy")),
+            "ts_winery": safe_get(transaction.get("winery")),
+        }
+        ts_transactions_table.append(transaction_row)
+
+        # Transfer operations table (op type 31 + subOp "Transfer")
+        if ts_operationTypeId == 31 and ts_subOperationTypeName == "Transfer":
+            ts_transfer_operations_table.append(dict(transaction_row))
+
+        from_vessel = safe_get(transaction.get("fromVessel")) or None
+        to_vessel = safe_get(transaction.get("toVessel")) or None
+
+        # Special transfer TO In-Transit-Bldg (op type 47 to in-transit)
+        if (
+            ts_operationTypeId == 47
+            and to_vessel
+            and safe_get(to_vessel.get("name"))
+            and tanks_lookup.get(safe_get(to_vessel.get("name"))) == intransit_name
+        ):
+            special_transfer_table.append({
+                "ts_subOperationId": ts_subOperationId,
+                "ts_operationId": safe_get(transaction.get("operationId")),
+                "ts_operationTypeId": ts_operationTypeId,
+                "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
+                "ts_subOperationTypeName": ts_subOperationTypeName,
+                "ts_formattedDate": safe_get(transaction.get("formattedDate")),
+                "from_ts_name": safe_get(from_vessel.get("name")) if from_vessel else None,
+                "from_ts_vessel_id": safe_get(from_vessel.get("id")) if from_vessel else None,
+                "from_ts_volOut": safe_get(from_vessel.get("volOut")) if from_vessel else None,
+                "from_ts_volOutUnit": safe_get(from_vessel.get("volOutUnit")) if from_vessel else None,
+                "to_ts_name": safe_get(to_vessel.get("name")),
+                "to_ts_vessel_id": safe_get(to_vessel.get("id")),
+                "to_ts_volIn": safe_get(to_vessel.get("volIn")),
+                "to_ts_volInUnit": safe_get(to_vessel.get("volInUnit")),
+            })
+
+        # Special transfer FROM In-Transit-Bldg TO NOT In-Transit-Bldg
+        if (
+            from_vessel
+            and safe_get(from_vessel.get("name")) in tanks_lookup
+            and tanks_lookup.get(safe_get(from_vessel.get("name"))) == intransit_name
+            and to_vessel
+            and safe_get(to_vessel.get("name")) in tanks_lookup
+            and tanks_lookup.get(safe_get(to_vessel.get("name"))) != intransit_name
+        ):
+            special_transfer_from_intransit_table.append({
+                "ts_subOperationId": ts_subOperationId,
+                "ts_operationId": safe_get(transaction.get("operationId")),
+                "ts_operationTypeId": ts_operationTypeId,
+                "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
+                "ts_subOperationTypeName": ts_subOperationTypeName,
+                "ts_formattedDate": safe_get(transaction.get("formattedDate")),
+                "from_ts_name": safe_get(from_vessel.get("name")),
+                "from_ts_vessel_id": safe_get(from_vessel.get("id")),
+                "from_ts_volOut": safe_get(from_vessel.get("volOut")),
+                "from_ts_volOutUnit": safe_get(from_vessel.get("volOutUnit")),
+                "to_ts_name": safe_get(to_vessel.get("name")),
+                "to_ts_vessel_id": safe_get(to_vessel.get("id")),
+                "to_ts_volIn": safe_get(to_vessel.get("volIn")),
+                "to_ts_volInUnit": safe_get(to_vessel.get("volInUnit")),
+            })
+
+        # Special transfer FROM In-Transit-Bldg TO In-Transit-Bldg
+        if (
+            from_vessel
+            and safe_get(from_vessel.get("name")) in tanks_lookup
+            and tanks_lookup.get(safe_get(from_vessel.get("name"))) == intransit_name
+            and to_vessel
+            and safe_get(to_vessel.get("name")) in tanks_lookup
+            and tanks_lookup.get(safe_get(to_vessel.get("name"))) == intransit_name
+        ):
+            special_transfer_intransit_to_intransit_table.append({
+                "ts_subOperationId": ts_subOperationId,
+                "ts_operationId": safe_get(transaction.get("operationId")),
+                "ts_operationTypeId": ts_operationTypeId,
+                "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
+                "ts_subOperationTypeName": ts_subOperationTypeName,
+                "ts_formattedDate": safe_get(transaction.get("formattedDate")),
+                "from_ts_name": safe_get(from_vessel.get("name")),
+                "from_ts_vessel_id": safe_get(from_vessel.get("id")),
+                "from_ts_volOut": safe_get(from_vessel.get("volOut")),
+                "from_ts_volOutUnit": safe_get(from_vessel.get("volOutUnit")),
+                "to_ts_name": safe_get(to_vessel.get("name")),
+                "to_ts_vessel_id": safe_get(to_vessel.get("id")),
+                "to_ts_volIn": safe_get(to_vessel.get("volIn")),
+                "to_ts_volInUnit": safe_get(to_vessel.get("volInUnit")),
+            })
+
+        # Vessel tables
+        if from_vessel:
+            process_vessel_basic("from", from_vessel, ts_subOperationId, from_vessel_seen_ids, ts_transactions_from_vessel_table)
+            process_vessel_details(
+                safe_get(from_vessel.get("beforeDetails")),
+                ts_subOperationId,
+                from_vessel_before_details_seen_ids,
+                ts_transactions_from_vessel_before_details_table,
+                id_updates,
+                "ts_transactions_from_vessel_before_details_table",
+            )
+            process_vessel_details(
+                safe_get(from_vessel.get("afterDetails")),
+                ts_subOperationId,
+                from_vessel_after_details_seen_ids,
+                ts_transactions_from_vessel_after_details_table,
+                id_updates,
+                "ts_transactions_from_vessel_after_details_table",
+            )
+
+        if to_vessel:
+            process_vessel_basic("to", to_vessel, ts_subOperationId, to_vessel_seen_ids, ts_transactions_to_vessel_table)
+            process_vessel_details(
+                safe_get(to_vessel.get("beforeDetails")),
+                ts_subOperationId,
+                to_vessel_before_details_seen_ids,
+                ts_transactions_to_vessel_before_details_table,
+                id_updates,
+                "ts_transactions_to_vessel_before_details_table",
+            )
+            process_vessel_details(
+                safe_get(to_vessel.get("afterDetails")),
+                ts_subOperationId,
+                to_vessel_after_details_seen_ids,
+                ts_transactions_to_vessel_after_details_table,
+                id_updates,
+                "ts_transactions_to_vessel_after_details_table",
+            )
+
+        # Loss details
+        loss_details = safe_get(transaction.get("lossDetails"))
+        if loss_details and ts_subOperationId not in loss_details_seen_ids:
+            loss_details_seen_ids.add(ts_subOperationId)
+            ts_transactions_loss_details_table.append({
+                "ts_subOperationId": ts_subOperationId,
+                "ts_volume": safe_get(loss_details.get("volume")),
+                "ts_volumeUnit": safe_get(loss_details.get("volumeUnit")),
+                "ts_reason": safe_get(loss_details.get("reason")),
+            })
+
+        # Analysis metrics
+        analysis_ops = safe_get(transaction.get("analysisOps"))
+        if analysis_ops:
+            metrics = safe_get(analysis_ops.get("metrics")) or []
+            for metric in metrics:
+                key = (ts_subOperationId, safe_get(metric.get("id")))
+                if key in analysis_metrics_seen_keys:
+                    continue
+                analysis_metrics_seen_keys.add(key)
+                ts_transactions_analysis_metrics_table.append({
+                    "ts_subOperationId": ts_subOperationId,
+                    "ts_metric_id": safe_get(metric.get("id")),
+                    "ts_vesselId": safe_get(analysis_ops.get("vesselId")),
+                    "ts_vesselName": safe_get(analysis_ops.get("vesselName")),
+                    "ts_batchId": safe_get(analysis_ops.get("batchId")),
+                    "ts_batchName": safe_get(analysis_ops.get("batchName")),
+                    "ts_templateId": safe_get(analysis_ops.get("templateId")),
+                    "ts_templateName": safe_get(analysis_ops.get("templateName")),
+                    "ts_metric_name": safe_get(metric.get("name")),
+                    "ts_metric_value": safe_get(metric.get("value")),
+                    "ts_metric_txtValue": safe_get(metric.get("txtValue")),
+                    "ts_metric_unit": safe_get(metric.get("unit")),
+                })
+
+        # Additional details, extraction and grape intake
+        additional_details = safe_get(transaction.get("additionalDetails"))
+        if additional_details and ts_subOperationId not in additional_details_seen_ids:
+            additional_details_seen_ids.add(ts_subOperationId)
+            additional_row = {
+                "ts_subOperationId": ts_subOperationId,
+                "ts_summary": flatten_value(safe_get(additional_details.get("summary"))),
+                "ts_bookingNo": flatten_value(safe_get(additional_details.get("bookingNo"))),
+                "ts_owner": flatten_value(safe_get(additional_details.get("owner"))),
+                "ts_netAmountUnit": flatten_value(safe_get(additional_details.get("netAmountUnit"))),
+                "ts_netAmount": flatten_numeric_list(safe_get(additional_details.get("netAmount"))),
+                "ts_vintage": flatten_value(safe_get(additional_details.get("vintage"))),
+                "ts_subAva": flatten_value(safe_get(additional_details.get("subAva"))),
+                "ts_block": flatten_value(safe_get(additional_details.get("block"))),
+                "ts_varietal": flatten_value(safe_get(additional_details.get("varietal"))),
+                "ts_grower": flatten_value(safe_get(additional_details.get("grower"))),
+                "ts_harvestMethod": flatten_value(safe_get(additional_details.get("harvestMethod"))),
+                "ts_dispatchNo": flatten_value(safe_get(additional_details.get("dispatchNo"))),
+                "ts_crusher": flatten_value(safe_get(additional_details.get("crusher"))),
+                "ts_dockets": flatten_value(safe_get(additional_details.get("dockets"))),
+                "ts_fractionType": flatten_value(safe_get(additional_details.get("fractionType"))),
+                "ts_press": flatten_value(safe_get(additional_details.get("press"))),
+                "ts_fruitProcess": flatten_value(safe_get(additional_details.get("fruitProcess"))),
+            }
+            trimmed_row = trim_row(additional_row, MAX_LENGTHS["transactions_additional_details"])
+
+            # Extraction table: operationTypeId == 0
+            if ts_operationTypeId == 0:
+                ts_extraction_table.append(dict(trimmed_row))
+            # Grape intake table: operationTypeId == 4
+            if ts_operationTypeId == 4:
+                ts_grape_intake_table.append(dict(trimmed_row))
+
+            ts_transactions_additional_details_table.append(dict(trimmed_row))
+
+            # Extraction parcels
+            extraction = safe_get(additional_details.get("extraction"))
+            if extraction:
+                parcels = safe_get(extraction.get("parcels")) or []
+                for parcel in parcels:
+                    ts_docket_val = safe_get(parcel.get("docket"))
+                    # Deduplicated by docket in SplitTables.merge
+                    if ts_docket_val:
+                        ts_transactions_extraction_parcels_table.append({
+                            "ts_docket": ts_docket_val,
+                            "ts_subOperationId": ts_subOperationId,
+                            "ts_bookingNo": safe_get(parcel.get("bookingNo")),
+                            "ts_growerId": safe_get(parcel.get("growerId")),
+                            "ts_growerName": safe_get(parcel.get("growerName")),
+                            "ts_vineyardId": safe_get(parcel.get("vineyardId")),
+                            "ts_vineyardName": safe_get(parcel.get("vineyardName")),
+                            "ts_blockId": safe_get(parcel.get("blockId")),
+                            "ts_blockName": safe_get(parcel.get("blockName")),
+                            "ts_weight": safe_get(parcel.get("weight")),
+                            "ts_weightUnit": safe_get(parcel.get("weightUnit")),
+                        })
+
+        # Addition ops
+        addition_ops = safe_get(transaction.get("additionOps"))
+        if addition_ops and ts_subOperationId not in addition_ops_seen_ids:
+            addition_ops_seen_ids.add(ts_subOperationId)
+            addition_row = {
+                "ts_subOperationId": ts_subOperationId,
+                "ts_vesselId": safe_get(addition_ops.get("vesselId")),
+                "ts_vesselName": safe_get(addition_ops.get("vesselName")),
+                "ts_batchId": safe_get(addition_ops.get("batchId")),
+                "ts_batchName": safe_get(addition_ops.get("batchName")),
+                "ts_templateId": safe_get(addition_ops.get("templateId")),
+                "ts_templateName": safe_get(addition_ops.get("templateName")),
+                "ts_changeToState": safe_get(addition_ops.get("changeToState")),
+                "ts_volume": safe_get(addition_ops.get("volume")),
+                "ts_amount": safe_get(addition_ops.get("amount")),
+                "ts_unit": safe_get(addition_ops.get("unit")),
+                "ts_lotNumbers": ",".join(safe_get(addition_ops.get("lotNumbers")) or []) if addition_ops.get("lotNumbers") else None,
+            }
+            additive = safe_get(addition_ops.get("additive"))
+            if additive:
+                addition_row.update({
+                    "ts_additive_id": safe_get(additive.get("id")),
+                    "ts_additive_name": safe_get(additive.get("name")),
+                    "ts_additive_description": safe_get(additive.get("description")),
+                })
+            ts_transactions_addition_ops_table.append(addition_row)
+
+def split_file(json_file: str, tanks_lookup: Dict[str, str], intransit_name: str) -> Optional[SplitTables]:
+    """Map step: one day file -> partial tables (None when the file is skipped)."""
+    part = SplitTables()
+    try:
+        split_transactions(iter_transactions(json_file), part, tanks_lookup, intransit_name, json_file)
+    except NotTransactionsFile as e:
+        logging.warning("Skipping file %s; %s.", json_file, e)
+        return None
+    except PARSE_ERRORS as e:
+        logging.warning("Skipping file %s due to read/parse error: %s", json_file, e)
+        return None
+    return part
+
+
+def split_files(
+    json_files: List[str],
+    tanks_lookup: Dict[str, str],
+    intransit_name: str,
+    workers: int = 1,
+    cache: Optional[SplitCache] = None,
+) -> SplitTables:
+    """
+    Split every file (in a pool of `workers` processes when > 1) and merge the partials
+    in file order as they arrive, so only a few partials are held at once besides the
+    merged result, which grows with the whole history (every table is needed by the
+    derived tables in main() before anything is written).
+    Files whose content matches the cache reuse their cached partial instead.
+    """
+    merged = SplitTables()
+    split = functools.partial(split_file, tanks_lookup=tanks_lookup, intransit_name=intransit_name)
+    cached = {f for f in json_files if cache is not None and cache.is_cached(f)}
+    changed = [f for f in json_files if f not in cached]
+    skipped = 0
+
+    def merge_in_order(fresh: Iterator[Optional[SplitTables]]) -> None:
+        nonlocal skipped
+        for json_file in json_files:
+            state = cache.get(json_file) if json_file in cached else None
+            if state is not None:
+                part = SplitTables.from_state(state)
+            else:
+                part = next(fresh) if json_file not in cached else split(json_file)
+                if part is not None and cache is not None:
+                    cache.put(json_file, vars(part))
+            if part is None:
+                skipped += 1
+                continue
+            merged.merge(part)
+
+    if workers > 1 and len(changed) > 1:
+        with multiprocessing.Pool(min(workers, len(changed))) as pool:
+            merge_in_order(pool.imap(split, changed))
+    else:
+        merge_in_order(map(split, changed))
+    if cache is not None:
+        cache.prune(json_files)
+        cache.save()
+        logging.info("Split cache: %d unchanged file(s) reused, %d split.", len(cached), len(changed))
+    if skipped:
+        logging.warning("Skipped %d of %d files.", skipped, len(json_files))
+    return merged
+
+
 # --------------------------- Main processing ---------------------------
 
 def main() -> None:
@@ -373,7 +984,7 @@ def main() -> None:
 
     json_files = [
         os.path.join(json_dir, fname)
-        for fname in os.listdir(json_dir)
+        for fname in sorted(os.listdir(json_dir))
         if fname.endswith(".json") and os.path.isfile(os.path.join(json_dir, fname))
     ]
     logging.info("Found %d files to process in %s (outputs -> %s).", len(json_files), json_dir, out_dir)
@@ -381,353 +992,26 @@ def main() -> None:
     # Tanks lookup
     tanks_lookup = load_tanks_lookup(tanks_file)
 
-    # Tables with ts_ prefix
-    ts_transactions_table: List[Dict[str, Any]] = []
-    ts_transactions_from_vessel_table: List[Dict[str, Any]] = []
-    ts_transactions_from_vessel_before_details_table: List[Dict[str, Any]] = []
-    ts_transactions_from_vessel_after_details_table: List[Dict[str, Any]] = []
-    ts_transactions_to_vessel_table: List[Dict[str, Any]] = []
-    ts_transactions_to_vessel_before_details_table: List[Dict[str, Any]] = []
-    ts_transactions_to_vessel_after_details_table: List[Dict[str, Any]] = []
-    ts_transactions_loss_details_table: List[Dict[str, Any]] = []
-    ts_transactions_analysis_metrics_table: List[Dict[str, Any]] = []
-    ts_transactions_additional_details_table: List[Dict[str, Any]] = []
-    ts_transactions_extraction_parcels_table: List[Dict[str, Any]] = []
-    ts_transactions_addition_ops_table: List[Dict[str, Any]] = []
-    ts_extraction_table: List[Dict[str, Any]] = []
-    ts_grape_intake_table: List[Dict[str, Any]] = []
-    ts_transfer_operations_table: List[Dict[str, Any]] = []
-
-    # Lookup tables for child entities
-    ts_batchDetails_vintage_table: Dict[Any, Dict[str, Any]] = {}
-    ts_batchDetails_variety_table: Dict[Any, Dict[str, Any]] = {}
-    ts_batchDetails_region_table: Dict[Any, Dict[str, Any]] = {}
-
-    # Dedup sets
-    from_vessel_seen_ids: Set[Any] = set()
-    from_vessel_before_details_seen_ids: Set[Any] = set()
-    from_vessel_after_details_seen_ids: Set[Any] = set()
-    to_vessel_seen_ids: Set[Any] = set()
-    to_vessel_before_details_seen_ids: Set[Any] = set()
-    to_vessel_after_details_seen_ids: Set[Any] = set()
-    loss_details_seen_ids: Set[Any] = set()
-    additional_details_seen_ids: Set[Any] = set()
-    addition_ops_seen_ids: Set[Any] = set()
-    analysis_metrics_seen_keys: Set[Tuple[Any, Any]] = set()
-    extraction_parcels_seen_dockets: Set[Any] = set()
-
-    # Special transfer tables
-    special_transfer_table: List[Dict[str, Any]] = []
-    special_transfer_from_intransit_table: List[Dict[str, Any]] = []
-    special_transfer_intransit_to_intransit_table: List[Dict[str, Any]] = []
-
-    # subOperationId -> transaction (ONLY real transactions)
-    transactions_by_subOp: Dict[Any, Dict[str, Any]] = {}
-
-    # Scan files
-    for json_file in json_files:
-        try:
-            with open(json_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            logging.warning("Skipping file %s due to read/parse error: %s", json_file, e)
-            continue
-
-        if isinstance(data, dict) and "transactionSummaries" in data:
-            transactions = data["transactionSummaries"]
-        elif isinstance(data, list):
-            transactions = data
-        else:
-            logging.warning("Skipping file %s; not a valid transactions file.", json_file)
-            continue
-
-        if not isinstance(transactions, list):
-            logging.warning("Skipping file %s; 'transactions' is not a list.", json_file)
-            continue
-
-        for transaction in transactions:
-            if not isinstance(transaction, dict):
-                logging.debug("Skipping non-dict transaction in %s: %r", json_file, transaction)
-                continue
-
-            ts_subOperationId = safe_get(transaction.get("subOperationId"))
-            if ts_subOperationId is not None:
-                transactions_by_subOp[ts_subOperationId] = transaction
-
-            # Skip reversed
-            if is_truthy_true(transaction.get("reversed")):
-                continue
-
-            ts_operationTypeId = to_int_or_none(safe_get(transaction.get("operationTypeId")))
-            ts_subOperationTypeName = safe_get(transaction.get("subOperationTypeName"))
-
-            transaction_row = {
-                "ts_subOperationId": ts_subOperationId,
-                "ts_operationId": safe_get(transaction.get("operationId")),
-                "ts_operationTypeId": ts_operationTypeId,
-                "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
-                "ts_subOperationTypeName": ts_subOperationTypeName,
-                "ts_formattedDate": safe_get(transaction.get("formattedDate")),
-                "ts_date": safe_get(transaction.get("date")),
-                "ts_lastModified": safe_get(transaction.get("lastModified")),
-                "ts_reversed": safe_get(transaction.get("reversed")),
-                "ts_workorder": safe_get(transaction.get("workorder")),
-                "ts_jobNumber": safe_get(transaction.get("jobNumber")),
-                "ts_treatment": safe_get(transaction.get("treatment")),
-                "ts_assignedBy": safe_get(transaction.get("assignedBy")),
-                "ts_completedBy": safe_get(transaction.get("completedBy")),
-                "ts_winery": safe_get(transaction.get("winery")),
-            }
-            ts_transactions_table.append(transaction_row)
-
-            # Transfer operations table (op type 31 + subOp "Transfer")
-            if ts_operationTypeId == 31 and ts_subOperationTypeName == "Transfer":
-                ts_transfer_operations_table.append(dict(transaction_row))
-
-            from_vessel = safe_get(transaction.get("fromVessel")) or None
-            to_vessel = safe_get(transaction.get("toVessel")) or None
-
-            # Special transfer TO In-Transit-Bldg (op type 47 to in-transit)
-            if (
-                ts_operationTypeId == 47
-                and to_vessel
-                and safe_get(to_vessel.get("name"))
-                and tanks_lookup.get(safe_get(to_vessel.get("name"))) == intransit_name
-            ):
-                special_transfer_table.append({
-                    "ts_subOperationId": ts_subOperationId,
-                    "ts_operationId": safe_get(transaction.get("operationId")),
-                    "ts_operationTypeId": ts_operationTypeId,
-                    "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
-                    "ts_subOperationTypeName": ts_subOperationTypeName,
-                    "ts_formattedDate": safe_get(transaction.get("formattedDate")),
-                    "from_ts_name": safe_get(from_vessel.get("name")) if from_vessel else None,
-                    "from_ts_vessel_id": safe_get(from_vessel.get("id")) if from_vessel else None,
-                    "from_ts_volOut": safe_get(from_vessel.get("volOut")) if from_vessel else None,
-                    "from_ts_volOutUnit": safe_get(from_vessel.get("volOutUnit")) if from_vessel else None,
-                    "to_ts_name": safe_get(to_vessel.get("name")),
-                    "to_ts_vessel_id": safe_get(to_vessel.get("id")),
-                    "to_ts_volIn": safe_get(to_vessel.get("volIn")),
-                    "to_ts_volInUnit": safe_get(to_vessel.get("volInUnit")),
-                })
-
-            # Special transfer FROM In-Transit-Bldg TO NOT In-Transit-Bldg
-            if (
-                from_vessel
-                and safe_get(from_vessel.get("name")) in tanks_lookup
-                and tanks_lookup.get(safe_get(from_vessel.get("name"))) == intransit_name
-                and to_vessel
-                and safe_get(to_vessel.get("name")) in tanks_lookup
-                and tanks_lookup.get(safe_get(to_vessel.get("name"))) != intransit_name
-            ):
-                special_transfer_from_intransit_table.append({
-                    "ts_subOperationId": ts_subOperationId,
-                    "ts_operationId": safe_get(transaction.get("operationId")),
-                    "ts_operationTypeId": ts_operationTypeId,
-                    "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
-                    "ts_subOperationTypeName": ts_subOperationTypeName,
-                    "ts_formattedDate": safe_get(transaction.get("formattedDate")),
-                    "from_ts_name": safe_get(from_vessel.get("name")),
-                    "from_ts_vessel_id": safe_get(from_vessel.get("id")),
-                    "from_ts_volOut": safe_get(from_vessel.get("volOut")),
-                    "from_ts_volOutUnit": safe_get(from_vessel.get("volOutUnit")),
-                    "to_ts_name": safe_get(to_vessel.get("name")),
-                    "to_ts_vessel_id": safe_get(to_vessel.get("id")),
-                    "to_ts_volIn": safe_get(to_vessel.get("volIn")),
-                    "to_ts_volInUnit": safe_get(to_vessel.get("volInUnit")),
-                })
-
-            # Special transfer FROM In-Transit-Bldg TO In-Transit-Bldg
-            if (
-                from_vessel
-                and safe_get(from_vessel.get("name")) in tanks_lookup
-                and tanks_lookup.get(safe_get(from_vessel.get("name"))) == intransit_name
-                and to_vessel
-                and safe_get(to_vessel.get("name")) in tanks_lookup
-                and tanks_lookup.get(safe_get(to_vessel.get("name"))) == intransit_name
-            ):
-                special_transfer_intransit_to_intransit_table.append({
-                    "ts_subOperationId": ts_subOperationId,
-                    "ts_operationId": safe_get(transaction.get("operationId")),
-                    "ts_operationTypeId": ts_operationTypeId,
-                    "ts_operationTypeName": safe_get(transaction.get("operationTypeName")),
-                    "ts_subOperationTypeName": ts_subOperationTypeName,
-                    "ts_formattedDate": safe_get(transaction.get("formattedDate")),
-                    "from_ts_name": safe_get(from_vessel.get("name")),
-                    "from_ts_vessel_id": safe_get(from_vessel.get("id")),
-                    "from_ts_volOut": safe_get(from_vessel.get("volOut")),
-                    "from_ts_volOutUnit": safe_get(from_vessel.get("volOutUnit")),
-                    "to_ts_name": safe_get(to_vessel.get("name")),
-                    "to_ts_vessel_id": safe_get(to_vessel.get("id")),
-                    "to_ts_volIn": safe_get(to_vessel.get("volIn")),
-                    "to_ts_volInUnit": safe_get(to_vessel.get("volInUnit")),
-                })
-
-            # Vessel tables
-            if from_vessel:
-                process_vessel_basic("from", from_vessel, ts_subOperationId, from_vessel_seen_ids, ts_transactions_from_vessel_table)
-                process_vessel_details(
-                    safe_get(from_vessel.get("beforeDetails")),
-                    ts_subOperationId,
-                    from_vessel_before_details_seen_ids,
-                    ts_transactions_from_vessel_before_details_table,
-                    ts_batchDetails_vintage_table,
-                    ts_batchDetails_variety_table,
-                    ts_batchDetails_region_table,
-                )
-                process_vessel_details(
-                    safe_get(from_vessel.get("afterDetails")),
-                    ts_subOperationId,
-                    from_vessel_after_details_seen_ids,
-                    ts_transactions_from_vessel_after_details_table,
-                    ts_batchDetails_vintage_table,
-                    ts_batchDetails_variety_table,
-                    ts_batchDetails_region_table,
-                )
-
-            if to_vessel:
-                process_vessel_basic("to", to_vessel, ts_subOperationId, to_vessel_seen_ids, ts_transactions_to_vessel_table)
-                process_vessel_details(
-                    safe_get(to_vessel.get("beforeDetails")),
-                    ts_subOperationId,
-                    to_vessel_before_details_seen_ids,
-                    ts_transactions_to_vessel_before_details_table,
-                    ts_batchDetails_vintage_table,
-                    ts_batchDetails_variety_table,
-                    ts_batchDetails_region_table,
-                )
-                process_vessel_details(
-                    safe_get(to_vessel.get("afterDetails")),
-                    ts_subOperationId,
-                    to_vessel_after_details_seen_ids,
-                    ts_transactions_to_vessel_after_details_table,
-                    ts_batchDetails_vintage_table,
-                    ts_batchDetails_variety_table,
-                    ts_batchDetails_region_table,
-                )
-
-            # Loss details
-            loss_details = safe_get(transaction.get("lossDetails"))
-            if loss_details and ts_subOperationId not in loss_details_seen_ids:
-                loss_details_seen_ids.add(ts_subOperationId)
-                ts_transactions_loss_details_table.append({
-                    "ts_subOperationId": ts_subOperationId,
-                    "ts_volume": safe_get(loss_details.get("volume")),
-                    "ts_volumeUnit": safe_get(loss_details.get("volumeUnit")),
-                    "ts_reason": safe_get(loss_details.get("reason")),
-                })
-
-            # Analysis metrics
-            analysis_ops = safe_get(transaction.get("analysisOps"))
-            if analysis_ops:
-                metrics = safe_get(analysis_ops.get("metrics")) or []
-                for metric in metrics:
-                    key = (ts_subOperationId, safe_get(metric.get("id")))
-                    if key in analysis_metrics_seen_keys:
-                        continue
-                    analysis_metrics_seen_keys.add(key)
-                    ts_transactions_analysis_metrics_table.append({
-                        "ts_subOperationId": ts_subOperationId,
-                        "ts_metric_id": safe_get(metric.get("id")),
-                        "ts_vesselId": safe_get(analysis_ops.get("vesselId")),
-                        "ts_vesselName": safe_get(analysis_ops.get("vesselName")),
-                        "ts_batchId": safe_get(analysis_ops.get("batchId")),
-                        "ts_batchName": safe_get(analysis_ops.get("batchName")),
-                        "ts_templateId": safe_get(analysis_ops.get("templateId")),
-                        "ts_templateName": safe_get(analysis_ops.get("templateName")),
-                        "ts_metric_name": safe_get(metric.get("name")),
-                        "ts_metric_value": safe_get(metric.get("value")),
-                        "ts_metric_txtValue": safe_get(metric.get("txtValue")),
-                        "ts_metric_unit": safe_get(metric.get("unit")),
-                    })
-
-            # Additional details, extraction and grape intake
-            additional_details = safe_get(transaction.get("additionalDetails"))
-            if additional_details and ts_subOperationId not in additional_details_seen_ids:
-                additional_details_seen_ids.add(ts_subOperationId)
-                additional_row = {
-                    "ts_subOperationId": ts_subOperationId,
-                    "ts_summary": flatten_value(safe_get(additional_details.get("summary"))),
-                    "ts_bookingNo": flatten_value(safe_get(additional_details.get("bookingNo"))),
-                    "ts_owner": flatten_value(safe_get(additional_details.get("owner"))),
-                    "ts_netAmountUnit": flatten_value(safe_get(additional_details.get("netAmountUnit"))),
-                    "ts_netAmount": flatten_numeric_list(safe_get(additional_details.get("netAmount"))),
-                    "ts_vintage": flatten_value(safe_get(additional_details.get("vintage"))),
-                    "ts_subAva": flatten_value(safe_get(additional_details.get("subAva"))),
-                    "ts_block": flatten_value(safe_get(additional_details.get("block"))),
-                    "ts_varietal": flatten_value(safe_get(additional_details.get("varietal"))),
-                    "ts_grower": flatten_value(safe_get(additional_details.get("grower"))),
-                    "ts_harvestMethod": flatten_value(safe_get(additional_details.get("harvestMethod"))),
-                    "ts_dispatchNo": flatten_value(safe_get(additional_details.get("dispatchNo"))),
-                    "ts_crusher": flatten_value(safe_get(additional_details.get("crusher"))),
-                    "ts_dockets": flatten_value(safe_get(additional_details.get("dockets"))),
-                    "ts_fractionType": flatten_value(safe_get(additional_details.get("fractionType"))),
-                    "ts_press": flatten_value(safe_get(additional_details.get("press"))),
-                    "ts_fruitProcess": flatten_value(safe_get(additional_details.get("fruitProcess"))),
-                }
-                trimmed_row = trim_row(additional_row, MAX_LENGTHS["transactions_additional_details"])
-
-                # Extraction table: operationTypeId == 0
-                if ts_operationTypeId == 0:
-                    ts_extraction_table.append(dict(trimmed_row))
-                # Grape intake table: operationTypeId == 4
-                if ts_operationTypeId == 4:
-                    ts_grape_intake_table.append(dict(trimmed_row))
-
-                ts_transactions_additional_details_table.append(dict(trimmed_row))
-
-                # Extraction parcels
-                extraction = safe_get(additional_details.get("extraction"))
-                if extraction:
-                    parcels = safe_get(extraction.get("parcels")) or []
-                    for parcel in parcels:
-                        ts_docket_val = safe_get(parcel.get("docket"))
-                        if ts_docket_val and ts_docket_val not in extraction_parcels_seen_dockets:
-                            extraction_parcels_seen_dockets.add(ts_docket_val)
-                            ts_transactions_extraction_parcels_table.append({
-                                "ts_docket": ts_docket_val,
-                                "ts_subOperationId": ts_subOperationId,
-                                "ts_bookingNo": safe_get(parcel.get("bookingNo")),
-                                "ts_growerId": safe_get(parcel.get("growerId")),
-                                "ts_growerName": safe_get(parcel.get("growerName")),
-                                "ts_vineyardId": safe_get(parcel.get("vineyardId")),
-                                "ts_vineyardName": safe_get(parcel.get("vineyardName")),
-                                "ts_blockId": safe_get(parcel.get("blockId")),
-                                "ts_blockName": safe_get(parcel.get("blockName")),
-                                "ts_weight": safe_get(parcel.get("weight")),
-                                "ts_weightUnit": safe_get(parcel.get("weightUnit")),
-                            })
-
-            # Addition ops
-            addition_ops = safe_get(transaction.get("additionOps"))
-            if addition_ops and ts_subOperationId not in addition_ops_seen_ids:
-                addition_ops_seen_ids.add(ts_subOperationId)
-                addition_row = {
-                    "ts_subOperationId": ts_subOperationId,
-                    "ts_vesselId": safe_get(addition_ops.get("vesselId")),
-                    "ts_vesselName": safe_get(addition_ops.get("vesselName")),
-                    "ts_batchId": safe_get(addition_ops.get("batchId")),
-                    "ts_batchName": safe_get(addition_ops.get("batchName")),
-                    "ts_templateId": safe_get(addition_ops.get("templateId")),
-                    "ts_templateName": safe_get(addition_ops.get("templateName")),
-                    "ts_changeToState": safe_get(addition_ops.get("changeToState")),
-                    "ts_volume": safe_get(addition_ops.get("volume")),
-                    "ts_amount": safe_get(addition_ops.get("amount")),
-                    "ts_unit": safe_get(addition_ops.get("unit")),
-                    "ts_lotNumbers": ",".join(safe_get(addition_ops.get("lotNumbers")) or []) if addition_ops.get("lotNumbers") else None,
-                }
-                additive = safe_get(addition_ops.get("additive"))
-                if additive:
-                    addition_row.update({
-                        "ts_additive_id": safe_get(additive.get("id")),
-                        "ts_additive_name": safe_get(additive.get("name")),
-                        "ts_additive_description": safe_get(additive.get("description")),
-                    })
-                ts_transactions_addition_ops_table.append(addition_row)
+    # Map/reduce over the day files
+    cache = None
+    if not args.no_cache:
+        fingerprint = code_fingerprint(
+            __file__, inspect.getfile(safe_get), params={"tanks": tanks_lookup, "intransit": intransit_name}
+        )
+        cache = SplitCache("transactions_v2", fingerprint=fingerprint)
+    merged = split_files(json_files, tanks_lookup, intransit_name, args.workers, cache)
+    tables = merged.tables
+    ts_extraction_table = tables["ts_extraction_table"]
+    ts_grape_intake_table = tables["ts_grape_intake_table"]
+    ts_transactions_additional_details_table = tables["ts_transactions_additional_details_table"]
+    special_transfer_table = tables["special_transfer_table"]
+    special_transfer_from_intransit_table = tables["special_transfer_from_intransit_table"]
+    transactions_by_subOp = merged.transactions_by_subOp
 
     # Build special transfer links AFTER all lists are populated
     special_transfer_link_table = build_special_transfer_links(
-        special_transfer_table, special_transfer_from_intransit_table, vol_tolerance
+        special_transfer_table, special_transfer_from_intransit_table, vol_tolerance,
+        transactions_by_subOp, args.max_transit_days,
     )
 
     # Update grape_intake_table with extraction fraction fields for matching dockets
@@ -916,52 +1200,36 @@ def main() -> None:
 
     # --------------------------- Write outputs ---------------------------
 
-    def write_json(path: str, data: Any) -> None:
-        with open(path, "w", encoding="utf-8") as f:
-            safe_json_dump(data, f)
-        logging.info("Wrote %s", path)
-
-    # Special transfers
-    write_json(os.path.join(out_dir, "special_transfer_link_table.json"), special_transfer_link_table)
-    write_json(os.path.join(out_dir, "special_transfer_intransit_to_intransit_table.json"), special_transfer_intransit_to_intransit_table)
-    write_json(os.path.join(out_dir, "special_transfer_from_intransit_table.json"), special_transfer_from_intransit_table)
-    write_json(os.path.join(out_dir, "special_transfer_table.json"), special_transfer_table)
-
-    # Transfer ops
-    write_json(os.path.join(out_dir, "ts_transfer_operations_table.json"), ts_transfer_operations_table)
-
-    # Transactions and vessel tables
-    write_json(os.path.join(out_dir, "ts_transactions.json"), ts_transactions_table)
-    write_json(os.path.join(out_dir, "ts_transactions_from_vessel_table.json"), ts_transactions_from_vessel_table)
-    write_json(os.path.join(out_dir, "ts_transactions_from_vessel_before_details_table.json"), ts_transactions_from_vessel_before_details_table)
-    write_json(os.path.join(out_dir, "ts_transactions_from_vessel_after_details_table.json"), ts_transactions_from_vessel_after_details_table)
-    write_json(os.path.join(out_dir, "ts_transactions_to_vessel_table.json"), ts_transactions_to_vessel_table)
-    write_json(os.path.join(out_dir, "ts_transactions_to_vessel_before_details_table.json"), ts_transactions_to_vessel_before_details_table)
-    write_json(os.path.join(out_dir, "ts_transactions_to_vessel_after_details_table.json"), ts_transactions_to_vessel_after_details_table)
-    write_json(os.path.join(out_dir, "ts_transactions_loss_details_table.json"), ts_transactions_loss_details_table)
-    write_json(os.path.join(out_dir, "ts_transactions_analysis_metrics_table.json"), ts_transactions_analysis_metrics_table)
-    write_json(os.path.join(out_dir, "ts_transactions_additional_details_table.json"), ts_transactions_additional_details_table)
-    write_json(os.path.join(out_dir, "ts_transactions_extraction_parcels_table.json"), ts_transactions_extraction_parcels_table)
-    write_json(os.path.join(out_dir, "ts_transactions_addition_ops_table.json"), ts_transactions_addition_ops_table)
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    table_writers = get_table_writers(out_dir, formats)
+    id_writers = get_table_writers(id_out_dir, ["json"])  # upload_id_tables_main reads the ID tables as JSON
+
+    def write(writers, name: str, data: Any) -> None:
+        for path in write_table(writers, name, data, TABLE_STRING_LENGTHS.get(name)):
+            logging.info("Wrote %s", path)
+
+    # Special transfers, transactions and vessel tables
+    write(table_writers, "special_transfer_link_table", special_transfer_link_table)
+    for name in SPLIT_TABLES:
+        write(table_writers, name, tables[name])
 
     # Derived tables
-    write_json(os.path.join(out_dir, "ts_extraction_table.json"), ts_extraction_table)
-    write_json(os.path.join(out_dir, "ts_grape_intake_table.json"), ts_grape_intake_table)
-    write_json(os.path.join(out_dir, "unique_dockets_table.json"), unique_dockets_table)
-    write_json(os.path.join(out_dir, "extracted_gallons_table.json"), extracted_gallons_table)
-    write_json(os.path.join(out_dir, "split_gallons_table.json"), split_gallons_table)
-    write_json(os.path.join(out_dir, "master_table.json"), master_table)
-    write_json(os.path.join(out_dir, "unique_dispatchNos_table.json"), unique_dispatchNos_table)
+    write(table_writers, "unique_dockets_table", unique_dockets_table)
+    write(table_writers, "extracted_gallons_table", extracted_gallons_table)
+    write(table_writers, "split_gallons_table", split_gallons_table)
+    write(table_writers, "master_table", master_table)
+    write(table_writers, "unique_dispatchNos_table", unique_dispatchNos_table)
 
     # ID tables
-    write_json(os.path.join(id_out_dir, "ts_batchDetails_vintage_table.json"), list(ts_batchDetails_vintage_table.values()))
-    write_json(os.path.join(id_out_dir, "ts_batchDetails_variety_table.json"), list(ts_batchDetails_variety_table.values()))
-    write_json(os.path.join(id_out_dir, "ts_batchDetails_region_table.json"), list(ts_batchDetails_region_table.values()))
+    write(id_writers, "ts_batchDetails_vintage_table", list(merged.id_tables["vintage"].values()))
+    write(id_writers, "ts_batchDetails_variety_table", list(merged.id_tables["variety"].values()))
+    write(id_writers, "ts_batchDetails_region_table", list(merged.id_tables["region"].values()))
 
     # Summary
-    logging.info("Split complete! JSON tables written to %s and %s", out_dir, id_out_dir)
+    logging.info("Split complete! Tables (%s) written to %s and %s",
+                 ",".join(w.extension.lstrip(".") for w in table_writers), out_dir, id_out_dir)
     logging.info("Counts: transactions=%d, addl_details=%d, extraction=%d, intake=%d, master=%d",
-                 len(ts_transactions_table), len(ts_transactions_additional_details_table),
+                 len(tables["ts_transactions"]), len(ts_transactions_additional_details_table),
                  len(ts_extraction_table), len(ts_grape_intake_table), len(master_table))
 
 
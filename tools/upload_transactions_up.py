@@ -3,7 +3,9 @@ import os
 import pandas as pd
 from sqlalchemy import create_engine, text
 
+from table_io import read_table
 from utils.helpers import convert_epoch_columns, trim_and_log  
+from utils.bulk_upsert import bulk_upsert
 
 # --- CONFIG ---
 DATABASE_URL = os.getenv("DB_URL")
@@ -97,9 +99,7 @@ def load_and_insert_new_records(filename, table_name, engine):
     path = os.path.join(DATA_DIR, filename)
     print(f"Checking for new records in {path} for table '{table_name}'...")
 
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
+    df = read_table(path)
     df = convert_epoch_columns(df)
 
     float_columns_map = {
@@ -144,19 +144,14 @@ def load_and_insert_new_records(filename, table_name, engine):
     if table_name in COL_MAX_LENGTHS:
         df = trim_and_log(df, COL_MAX_LENGTHS[table_name])
 
-    # Get existing PKs from database
-    with engine.connect() as conn:
-        query = f"SELECT {pk_col} FROM {table_name}"
-        existing_pks = pd.read_sql(query, conn)[pk_col].astype(str).tolist()
+    df = df[df[pk_col].notnull()]
+    if df.empty:
+        print(f"No records to upload to {table_name}.")
+        return
 
-    # Only keep rows whose PK is not in the table
-    new_df = df[~df[pk_col].astype(str).isin(existing_pks)]
-
-    if new_df.empty:
-        print(f"No new records to upload to {table_name}.")
-    else:
-        new_df.to_sql(table_name, engine, if_exists='append', index=False)
-        print(f"Uploaded {len(new_df)} new records to {table_name}.")
+    # Stage + MERGE on the PK in one transaction (inserts new rows, updates changed ones)
+    counts = bulk_upsert(df, table_name, engine, pk_col)
+    print(f"{table_name}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged.")
 
 ordered_table_files = [
     ("transactions.json", "transactions"),
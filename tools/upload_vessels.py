@@ -1,8 +1,12 @@
 # python tools/upload_vessels.py
 
+import inspect
 import json
 import os
+import sys
 
+from split_cache import SplitCache, code_fingerprint
+from table_io import TABLE_FORMATS, get_table_writers, write_table
 from utils.helpers import safe_get_path, safe_get
 
 JSON_PATH = os.getenv("VESSELS_JSON", "Main/data/GET--vessels/vessels.json")
@@ -11,6 +15,13 @@ ID_OUT_DIR = "Main/data/id_tables"
 os.makedirs(OUT_DIR, exist_ok=True)
 os.makedirs(ID_OUT_DIR, exist_ok=True)
 
+# Skip the split when vessels.json is byte-identical to the last run's
+split_cache = SplitCache("vessels", fingerprint=code_fingerprint(
+    __file__, inspect.getfile(safe_get), params={"formats": TABLE_FORMATS}))
+if split_cache.unchanged([JSON_PATH]):
+    print(f"{JSON_PATH} unchanged since the last split; tables are up to date.")
+    sys.exit(0)
+
 def get_unspecified_block_name(variety_name):
     if variety_name and isinstance(variety_name, str) and variety_name.strip():
         code = variety_name.upper()[:3]
@@ -223,34 +234,33 @@ for vessel in vessels:
         }
         vs_composition_table.append(composition_row)
 
-# --- Write to JSON files (table outputs) ---
-with open(os.path.join(OUT_DIR, "vs_vessels.json"), "w", encoding="utf-8") as f:
-    json.dump(vs_vessels_table, f, indent=2)
-with open(os.path.join(OUT_DIR, "vs_wine_batch.json"), "w", encoding="utf-8") as f:
-    json.dump(vs_wine_batch_table, f, indent=2)
-with open(os.path.join(OUT_DIR, "vs_composition.json"), "w", encoding="utf-8") as f:
-    json.dump(vs_composition_table, f, indent=2)
-with open(os.path.join(OUT_DIR, "vs_cost.json"), "w", encoding="utf-8") as f:
-    json.dump(vs_cost_table, f, indent=2)
-with open(os.path.join(OUT_DIR, "vs_ttb_details.json"), "w", encoding="utf-8") as f:
-    json.dump(vs_ttb_details_table, f, indent=2)
-
-# --- Write to JSON files (ID tables for linking) ---
-with open(os.path.join(ID_OUT_DIR, "vs_winery.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_winery_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_productState.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_productState_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_bond.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_bond_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_taxClass.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_taxClass_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_variety.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_variety_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_region.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_region_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_block.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_block_table.values()), f, indent=2)
-with open(os.path.join(ID_OUT_DIR, "vs_subRegion.json"), "w", encoding="utf-8") as f:
-    json.dump(list(vs_subRegion_table.values()), f, indent=2)
+# --- Table outputs ---
+table_outputs = {
+    "vs_vessels": vs_vessels_table,
+    "vs_wine_batch": vs_wine_batch_table,
+    "vs_composition": vs_composition_table,
+    "vs_cost": vs_cost_table,
+    "vs_ttb_details": vs_ttb_details_table,
+}
+# --- ID tables for linking ---
+id_outputs = {
+    "vs_winery": vs_winery_table,
+    "vs_productState": vs_productState_table,
+    "vs_bond": vs_bond_table,
+    "vs_taxClass": vs_taxClass_table,
+    "vs_variety": vs_variety_table,
+    "vs_region": vs_region_table,
+    "vs_block": vs_block_table,
+    "vs_subRegion": vs_subRegion_table,
+}
+# Split tables in SPLIT_TABLE_FORMAT; ID tables stay JSON for upload_id_tables_main
+table_writers = get_table_writers(OUT_DIR)
+id_writers = get_table_writers(ID_OUT_DIR, ["json"])
+written = []
+for name, rows in table_outputs.items():
+    written += write_table(table_writers, name, rows)
+for name, table in id_outputs.items():
+    written += write_table(id_writers, name, list(table.values()))
+split_cache.record_run([JSON_PATH], written)
 
-print("Split complete! JSON tables written to", OUT_DIR, "and", ID_OUT_DIR)
\ No newline at end of file
+print("Split complete! Tables written to", OUT_DIR, "and", ID_OUT_DIR)
\ No newline at end of file
@@ -3,7 +3,9 @@ import os
 import pandas as pd
 from sqlalchemy import create_engine
 
+from table_io import read_table
 from utils.helpers import convert_epoch_columns, trim_and_log  
+from utils.bulk_upsert import bulk_upsert
 
 # --- CONFIG ---
 DATABASE_URL = os.getenv("DB_URL")
@@ -37,6 +39,22 @@ FILE_TABLE_MAP = {
     "vessels_ttb_details.json": "vessels_ttb_details"
 }
 
+# Upsert keys per table. Composition rows have no id of their own, so they are keyed
+# on the vessel plus the (nullable) component dimensions; components that share all of
+# them are summed into one row (see UPSERT_DUPLICATES).
+UPSERT_PK_MAP = {
+    "vessels": "vs_id",
+    "vessels_wine_batch": "vs_id",
+    "vessels_cost": "vs_id",
+    "vessels_ttb_details": "vs_id",
+    "vessels_composition": ["vs_id", "vs_block_id", "vs_variety_id", "vs_region_id", "vs_subRegion_id", "vs_vintage"],
+}
+
+# How bulk_upsert folds source rows sharing a key (default: raise)
+UPSERT_DUPLICATES = {
+    "vessels_composition": "sum",
+}
+
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set. Please add to .env or environment.")
 
@@ -53,9 +71,7 @@ def serialize_dict_columns(df):
 def upload_json_to_sql(filename, table_name, engine):
     path = os.path.join(DATA_DIR, filename)
     print(f"Uploading {path} to table '{table_name}'...")
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
+    df = read_table(path)
 
     # Convert all epoch time columns to datetime using helper
     df = convert_epoch_columns(df)
@@ -110,30 +126,14 @@ def upload_json_to_sql(filename, table_name, engine):
 
     # Set chunksize based on table
     chunk = 5000 if table_name == "vessels_composition" else 1000
-    total_rows = len(df)
-    print(f"Total rows to insert into '{table_name}': {total_rows}")
-
-    # Progress tracker
-    percent_checkpoints = [int(total_rows * x / 100) for x in range(10, 101, 10)]
-    next_checkpoint_idx = 0
+    pk_col = UPSERT_PK_MAP[table_name]
+    print(f"Total rows to upsert into '{table_name}': {len(df)}")
 
-    rows_inserted = 0
     try:
-        # Use to_sql with chunksize but manually iterate for progress
-        for i in range(0, total_rows, chunk):
-            end = min(i + chunk, total_rows)
-            df_chunk = df.iloc[i:end]
-            df_chunk.to_sql(table_name, engine, if_exists='append', index=False)
-            rows_inserted += len(df_chunk)
-
-            # Print progress at each checkpoint
-            while (next_checkpoint_idx < len(percent_checkpoints) and 
-                   rows_inserted >= percent_checkpoints[next_checkpoint_idx]):
-                percent = (next_checkpoint_idx + 1) * 10
-                print(f"{percent}% complete ({rows_inserted}/{total_rows} rows inserted)")
-                next_checkpoint_idx += 1
-
-        print(f"Uploaded {total_rows} rows to table '{table_name}'")
+        counts = bulk_upsert(df, table_name, engine, pk_col, chunk_size=chunk,
+                             null_safe_keys=isinstance(pk_col, list),
+                             duplicates=UPSERT_DUPLICATES.get(table_name, "error"))
+        print(f"{table_name}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged.")
 
     except Exception as e:
         print(f"Failed to upload {table_name}: {e}")
@@ -0,0 +1,172 @@
+# vintrick-backend/tools/utils/bulk_upsert.py
+
+"""
+Set-based bulk upsert for the *_up.py SQL Server loaders.
+
+Instead of downloading every existing primary key into pandas and appending only the
+new rows, the DataFrame is staged into a #temp table with fast_executemany and applied
+with a single MERGE keyed on the UPSERT_PK_MAP columns, all in one transaction per table.
+New rows are inserted, rows whose non-key columns differ are updated, and identical rows
+are left alone.
+
+Source rows that share a key cannot all reach the MERGE (it fails when two source rows hit
+one target row), so bulk_upsert resolves them per call: raise (default), sum the numeric
+value columns, or keep the last row. Whatever is folded away is logged with the table name.
+"""
+
+import logging
+
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger("tools.utils.bulk_upsert")
+
+DUPLICATE_MODES = ("error", "sum", "last")
+
+
+def _q(name):
+    """Quote a SQL Server identifier."""
+    return "[" + str(name).replace("]", "]]") + "]"
+
+
+def _to_db_rows(df):
+    """DataFrame -> list of tuples with NaN/NaT turned into None and numpy scalars into Python ones."""
+    obj = df.astype(object).where(pd.notnull(df), None)
+    return list(obj.itertuples(index=False, name=None))
+
+
+def resolve_duplicate_keys(df, table_name, pk_cols, duplicates="error"):
+    """
+    Collapse source rows sharing `pk_cols` so each key appears once.
+
+    duplicates="error" raises ValueError, "sum" adds up the numeric non-key columns (other
+    columns keep the last row's value), "last" keeps the last row. Key NULLs compare equal.
+    """
+    if duplicates not in DUPLICATE_MODES:
+        raise ValueError(f"duplicates must be one of {DUPLICATE_MODES}, got {duplicates!r}")
+    dup_mask = df.duplicated(subset=pk_cols, keep=False)
+    if not dup_mask.any():
+        return df
+    dup_rows = int(dup_mask.sum())
+    dup_keys = int(df[dup_mask].drop_duplicates(subset=pk_cols).shape[0])
+    if duplicates == "error":
+        raise ValueError(
+            f"{dup_rows} rows in '{table_name}' share {dup_keys} upsert key(s) {pk_cols}; "
+            f"pass duplicates='sum' or 'last' to fold them"
+        )
+
+    if duplicates == "sum":
+        value_cols = [c for c in df.columns if c not in pk_cols]
+        numeric_cols = [c for c in value_cols if pd.api.types.is_numeric_dtype(df[c])]
+        grouped = df.groupby(pk_cols, dropna=False, sort=False)
+        aggregations = {c: ("sum" if c in numeric_cols else "last") for c in value_cols}
+        if aggregations:
+            # min_count=1 keeps all-NaN groups NaN instead of 0
+            collapsed = grouped.agg(aggregations)
+            for c in numeric_cols:
+                collapsed[c] = grouped[c].sum(min_count=1)
+            collapsed = collapsed.reset_index()[list(df.columns)]
+        else:
+            collapsed = df.drop_duplicates(subset=pk_cols, keep="last")
+    else:
+        collapsed = df.drop_duplicates(subset=pk_cols, keep="last")
+
+    logger.warning(
+        f"{table_name}: folded {dup_rows} rows sharing {dup_keys} upsert key(s) into {dup_keys} "
+        f"({duplicates}); {len(df) - len(collapsed)} source rows dropped"
+    )
+    return collapsed
+
+
+def build_merge_sql(table_name, staging_table, columns, pk_cols, null_safe_keys=False):
+    """
+    Build the MERGE batch. Counts of inserted/updated rows are captured via OUTPUT $action
+    and returned by the trailing SELECT.
+    """
+    target, source = _q(table_name), staging_table
+    if null_safe_keys:
+        on_clause = " AND ".join(
+            f"(t.{_q(c)} = s.{_q(c)} OR (t.{_q(c)} IS NULL AND s.{_q(c)} IS NULL))" for c in pk_cols
+        )
+    else:
+        on_clause = " AND ".join(f"t.{_q(c)} = s.{_q(c)}" for c in pk_cols)
+    value_cols = [c for c in columns if c not in pk_cols]
+    insert_cols = ", ".join(_q(c) for c in columns)
+    insert_vals = ", ".join(f"s.{_q(c)}" for c in columns)
+
+    matched_clause = ""
+    if value_cols:
+        # EXCEPT gives a NULL-safe "any column differs" test
+        s_cols = ", ".join(f"s.{_q(c)}" for c in value_cols)
+        t_cols = ", ".join(f"t.{_q(c)}" for c in value_cols)
+        set_clause = ", ".join(f"{_q(c)} = s.{_q(c)}" for c in value_cols)
+        matched_clause = (
+            f"WHEN MATCHED AND EXISTS (SELECT {s_cols} EXCEPT SELECT {t_cols}) "
+            f"THEN UPDATE SET {set_clause} "
+        )
+
+    return (
+        "SET NOCOUNT ON; "
+        "DECLARE @merge_actions TABLE (merge_action NVARCHAR(10)); "
+        f"MERGE {target} WITH (HOLDLOCK) AS t "
+        f"USING {source} AS s ON {on_clause} "
+        f"{matched_clause}"
+        f"WHEN NOT MATCHED BY TARGET THEN INSERT ({insert_cols}) VALUES ({insert_vals}) "
+        "OUTPUT $action INTO @merge_actions; "
+        "SELECT "
+        "COALESCE(SUM(CASE WHEN merge_action = 'INSERT' THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN merge_action = 'UPDATE' THEN 1 ELSE 0 END), 0) "
+        "FROM @merge_actions;"
+    )
+
+
+def bulk_upsert(df, table_name, engine, pk_cols, chunk_size=10000, null_safe_keys=False, duplicates="error"):
+    """
+    Upsert `df` into `table_name` keyed on `pk_cols` (a column name or list of names).
+
+    :param df: DataFrame whose columns match the target table's columns.
+    :param engine: SQLAlchemy engine for SQL Server (mssql+pyodbc).
+    :param chunk_size: Rows per executemany batch when staging.
+    :param null_safe_keys: Treat NULL key values as equal (for composite keys with optional parts).
+    :param duplicates: How to handle source rows sharing a key: "error", "sum" or "last"
+        (see resolve_duplicate_keys).
+    :return: {"inserted": n, "updated": n, "unchanged": n}
+    """
+    pk_cols = [pk_cols] if isinstance(pk_cols, str) else list(pk_cols)
+    missing = [c for c in pk_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Upsert key column(s) {missing} not in DataFrame for table '{table_name}'")
+
+    # MERGE fails if two source rows hit the same target row
+    df = resolve_duplicate_keys(df, table_name, pk_cols, duplicates)
+    if df.empty:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    columns = list(df.columns)
+    col_list = ", ".join(_q(c) for c in columns)
+    staging_table = "#stage_" + "".join(ch if ch.isalnum() else "_" for ch in table_name)
+    rows = _to_db_rows(df)
+
+    with engine.begin() as conn:
+        # Empty copy of the target's column types; lives as long as this connection.
+        # The UNION ALL stops SELECT INTO from copying an IDENTITY property onto the staging
+        # table, which would reject the explicit values inserted below.
+        conn.execute(text(
+            f"SELECT TOP 0 {col_list} INTO {staging_table} FROM {_q(table_name)} "
+            f"UNION ALL SELECT TOP 0 {col_list} FROM {_q(table_name)}"
+        ))
+
+        cursor = conn.connection.cursor()
+        cursor.fast_executemany = True
+        insert_sql = f"INSERT INTO {staging_table} ({col_list}) VALUES ({', '.join('?' for _ in columns)})"
+        for start in range(0, len(rows), chunk_size):
+            cursor.executemany(insert_sql, rows[start:start + chunk_size])
+
+        merge_sql = build_merge_sql(table_name, staging_table, columns, pk_cols, null_safe_keys)
+        cursor.execute(merge_sql)
+        inserted, updated = cursor.fetchone()
+        cursor.execute(f"DROP TABLE {staging_table}")
+        cursor.close()
+
+    inserted, updated = int(inserted or 0), int(updated or 0)
+    return {"inserted": inserted, "updated": updated, "unchanged": len(rows) - inserted - updated}
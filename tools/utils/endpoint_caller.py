@@ -1,3 +1,5 @@
+import os
+import sys
 import requests
 import time
 import json
@@ -5,6 +7,10 @@ from collections import deque
 from threading import Lock
 import logging
 
+# Make the repo root importable so the shared app.utils rate limiter can be used
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from app.utils.rate_limiter import get_shared_limiter, parse_retry_after
+
 def setup_metrics_logger(log_path="metrics.log"):
     metrics_logger = logging.getLogger("metrics_logger")
     metrics_logger.setLevel(logging.INFO)
@@ -28,17 +34,34 @@ def setup_error_logger(log_path="error.log"):
     return error_logger
 
 class EndpointCaller:
-    def __init__(self, logger=None, metrics_logger=None, error_logger=None):
+    def __init__(self, logger=None, metrics_logger=None, error_logger=None, rate_limiter=None, max_retries=5):
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.max_retries = max_retries
         self.metrics_lock = Lock()
         self.request_times = deque(maxlen=1000)
         self.logger = logger
         self.metrics_logger = metrics_logger or setup_metrics_logger()
         self.error_logger = error_logger or setup_error_logger()
 
+    def _get_with_backoff(self, url, headers=None, params=None):
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
+            response = requests.get(url, headers=headers, params=params)
+            self.rate_limiter.record_response(response.status_code, response.headers)
+            if attempt < self.max_retries - 1:
+                if response.status_code == 429:
+                    if self.logger:
+                        self.logger.warning(f"⏳ Rate limited on {url}; limiter now at {self.rate_limiter.stats()['rate']} req/sec")
+                    continue
+                if response.status_code >= 500:
+                    time.sleep(parse_retry_after(response.headers.get("Retry-After")) or 2 ** attempt)
+                    continue
+            return response
+
     def call(self, url, headers=None, params=None):
         start_time = time.time()
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self._get_with_backoff(url, headers=headers, params=params)
             latency = time.time() - start_time
             response.raise_for_status()
             result = response.json()
@@ -53,7 +76,7 @@ class EndpointCaller:
                 throughput = rpm / 60.0
 
             metrics_msg = (
-                f"📊 Metrics | Latency: {latency:.4f}s | Response Size: {response_size_kb:.2f}kB | RPM: {rpm} | Throughput: {throughput:.2f} req/sec"
+                f"📊 Metrics | Latency: {latency:.4f}s | Response Size: {response_size_kb:.2f}kB | RPM: {rpm} | Throughput: {throughput:.2f} req/sec | Limit: {self.rate_limiter.stats()['rate']} req/sec"
             )
             if self.logger:
                 self.logger.info(metrics_msg)
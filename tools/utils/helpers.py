@@ -79,4 +79,38 @@ def trim_and_log(df, col_max_lengths):
                     return val[:max_len]
                 return val
             df[col] = df[col].apply(_trim)
-    return df
\ No newline at end of file
+    return df
+
+
+def normalize_additional_details_table(details_rows):
+    """
+    Back-fill single-docket additional-details rows from the multi-docket rows.
+
+    Every docket listed in a comma-separated ts_dockets collects, per column, the last
+    non-null (and not 'NULL') value among the rows listing it. Rows whose ts_dockets is
+    exactly one of those dockets get their null/'NULL' columns filled from it.
+    :param details_rows: List of additional-details row dicts.
+    :return: List of row dicts.
+    """
+    df = pd.DataFrame(details_rows)
+    dockets = df['ts_dockets'].map(str).str.split(',')
+
+    missing = df.isna()
+    for col in df.columns:
+        if df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            missing[col] |= df[col].astype(str).str.upper().eq('NULL').fillna(False).astype(bool)
+
+    # docket -> last present value per column across the multi-docket rows
+    multi = df['ts_dockets'].fillna('').str.contains(',').fillna(False).astype(bool)
+    exploded = df.where(~missing)[multi].assign(_docket=dockets[multi]).explode('_docket')
+    docket_info = exploded.assign(_docket=exploded['_docket'].str.strip()).groupby('_docket', sort=False).last()
+
+    # Single-docket rows take the docket's values where their own are missing
+    single_docket = dockets.str[0].str.strip().where(dockets.str.len() == 1)
+    fill = docket_info.reindex(single_docket.to_numpy())
+    fill.index = df.index
+    for col in docket_info.columns:
+        to_fill = missing[col] & fill[col].notna()
+        if to_fill.any():
+            df[col] = df[col].mask(to_fill, fill[col])
+    return df.to_dict(orient="records")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for tools/utils/helpers.py
+
+Run with: python -m pytest tools/utils/test_helpers.py -v
+Or simply: python tools/utils/test_helpers.py
+"""
+
+import math
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add tools/ to the path (the upload scripts import utils.helpers from there)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.helpers import normalize_additional_details_table
+
+
+def legacy_normalize_additional_details_table(details_rows):
+    """The original iterrows implementation, kept as the reference."""
+    df = pd.DataFrame(details_rows)
+    grouped_rows = df[df['ts_dockets'].fillna('').str.contains(',')].copy()
+    docket_info = {}
+    for _, row in grouped_rows.iterrows():
+        dockets = [d.strip() for d in str(row['ts_dockets']).split(',')]
+        for docket in dockets:
+            if docket not in docket_info:
+                docket_info[docket] = {}
+            for col in df.columns:
+                val = row[col]
+                if pd.notnull(val) and str(val).upper() != 'NULL':
+                    docket_info[docket][col] = val
+    for idx, row in df.iterrows():
+        dockets = [d.strip() for d in str(row['ts_dockets']).split(',')]
+        if len(dockets) == 1 and dockets[0] in docket_info:
+            docket = dockets[0]
+            for col in df.columns:
+                if (pd.isnull(row[col]) or str(row[col]).upper() == 'NULL') and col in docket_info[docket]:
+                    df.at[idx, col] = docket_info[docket][col]
+    return df.to_dict(orient="records")
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    if a is None or b is None:
+        return (a is None or a != a) and (b is None or b != b)
+    return a == b
+
+
+def assert_same_records(got, expected):
+    assert len(got) == len(expected)
+    for i, (g, e) in enumerate(zip(got, expected)):
+        assert g.keys() == e.keys(), i
+        for key in e:
+            assert _same(g[key], e[key]), (i, key, g[key], e[key])
+
+
+def make_details_rows(n, seed=0):
+    rng = random.Random(seed)
+    dockets = [str(d) for d in range(1, n // 3 + 3)]
+    rows = []
+    for sub_op_id in range(n):
+        kind = rng.random()
+        if kind < 0.3:
+            ts_dockets = ", ".join(rng.sample(dockets, rng.randint(2, 4)))
+        elif kind < 0.9:
+            ts_dockets = rng.choice(dockets)
+        else:
+            ts_dockets = rng.choice([None, "NULL", ""])
+        rows.append({
+            "ts_subOperationId": sub_op_id,
+            "ts_dockets": ts_dockets,
+            "ts_dispatchNo": rng.choice([None, "NULL", f"D{rng.randint(1, 20)}"]),
+            "ts_grower": rng.choice([None, "null", "Grower A", "Grower B"]),
+            "ts_block": rng.choice([None, f"B{rng.randint(1, 9)}"]),
+            "ts_netAmount": rng.choice([None, round(rng.uniform(1, 30), 2)]),
+            "ts_vintage": rng.choice([None, 2023, 2024]),
+        })
+    return rows
+
+
+def test_backfills_single_docket_rows():
+    rows = [
+        {"ts_subOperationId": 1, "ts_dockets": "10, 11", "ts_grower": "A", "ts_block": None},
+        {"ts_subOperationId": 2, "ts_dockets": "11,12", "ts_grower": "B", "ts_block": "B7"},
+        {"ts_subOperationId": 3, "ts_dockets": "11", "ts_grower": "NULL", "ts_block": None},
+        {"ts_subOperationId": 4, "ts_dockets": "10", "ts_grower": "keep", "ts_block": None},
+        {"ts_subOperationId": 5, "ts_dockets": "99", "ts_grower": None, "ts_block": None},
+    ]
+    out = normalize_additional_details_table(rows)
+    assert out[2]["ts_grower"] == "B" and out[2]["ts_block"] == "B7"  # last multi-docket row wins
+    assert out[3]["ts_grower"] == "keep" and pd.isna(out[3]["ts_block"])
+    assert pd.isna(out[4]["ts_grower"])
+    assert_same_records(out, legacy_normalize_additional_details_table(rows))
+
+
+def test_matches_legacy_implementation():
+    for seed in range(5):
+        rows = make_details_rows(300, seed=seed)
+        assert_same_records(
+            normalize_additional_details_table(rows),
+            legacy_normalize_additional_details_table(rows),
+        )
+
+
+if __name__ == "__main__":
+    test_backfills_single_docket_rows()
+    test_matches_legacy_implementation()
+    print("✅ All helper tests passed!")
@@ -14,7 +14,11 @@ Input files:
     - Main/data/GET--shipments/shipments_thin.json (bottled/shipped out)
     - Main/data/GET--transaction-search/Transaction_to_analysise.csv (all transactions)
 
+    # Answer from the persisted lineage index only (no CSV load)
+    python tools/vessel_batch_lineage_analysis.py --query PCAS00250003
+
 Output:
+    - Main/data/vessel-batch-lineage/index/ (persisted lineage graph, updated incrementally)
     - Main/data/vessel-batch-lineage/batch_lineage.json
     - Main/data/vessel-batch-lineage/batch_lineage_detailed.json
     - Main/data/vessel-batch-lineage/batch_lineage.csv (Power BI ready)
@@ -30,14 +34,21 @@ This creates lineage mappings like:
 """
 
 import os
+import sys
 import json
 import csv
 import logging
+import argparse
 from collections import defaultdict, deque
 from typing import Dict, List, Set, Tuple, Any, Optional
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
+# Make the repo root importable so the shared app.utils lineage index can be used
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.utils.lineage_index import LineageGraphIndex, hash_rows, row_keys
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -53,6 +64,7 @@ class VesselBatchLineageAnalyzer:
     
     def __init__(self):
         self.transactions: List[Dict[str, Any]] = []
+        self.transactions_df: Optional[pd.DataFrame] = None
         self.vessels: List[Dict[str, Any]] = []
         self.shipments: List[Dict[str, Any]] = []
         
@@ -75,10 +87,13 @@ class VesselBatchLineageAnalyzer:
             logger.error(f"Transaction CSV not found: {csv_path}")
             return
             
-        df = pd.read_csv(csv_path)
+        # Read as text: inferred dtypes would shift with a single blank cell (int -> float),
+        # changing every row's content hash in the lineage index, and blank batches would be NaN
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
         logger.info(f"Loaded {len(df)} transaction records")
         
         # Convert DataFrame to list of dicts
+        self.transactions_df = df
         self.transactions = df.to_dict('records')
         
     def load_vessels_json(self, json_path: str) -> None:
@@ -182,6 +197,57 @@ class VesselBatchLineageAnalyzer:
                 
         logger.info(f"Built lineage graph with {len(self.batch_to_children)} unique batches")
         
+    def update_lineage_index(self, index_dir: str) -> int:
+        """
+        Bring the persisted lineage index up to date with the loaded transactions.
+        
+        Rows are keyed on Tx Id and compared by content hash, so re-running over the same
+        multi-year export only ingests new transactions, and an edited or reversed one
+        replaces the edges it contributed before. Edges follow build_lineage_graph; transfer
+        edges carry abs(Dest Vol Change) gallons, batch-evolution edges 0.
+        
+        Returns the number of new or changed transaction rows ingested.
+        """
+        if self.transactions_df is None or self.transactions_df.empty:
+            logger.warning("No transactions loaded; lineage index not updated")
+            return 0
+            
+        df = self.transactions_df
+        index = LineageGraphIndex(index_dir)
+        row_hashes = hash_rows(df)
+        positions = pd.Series(np.arange(len(df)), index=df.index)
+        
+        def batches(column):
+            if column not in df.columns:
+                return pd.Series('', index=df.index)
+            values = df[column].fillna('').astype(str).str.strip()
+            return values.mask(values == '--', '')
+            
+        src_pre, src_post = batches('Src Batch Pre'), batches('Src Batch Post')
+        dest_pre, dest_post = batches('Dest Batch Pre'), batches('Dest Batch Post')
+        transfer_gallons = pd.to_numeric(df.get('Dest Vol Change', pd.Series(0, index=df.index)),
+                                         errors='coerce').fillna(0).abs()
+        no_gallons = pd.Series(0.0, index=df.index)
+        
+        edge_sets = [
+            ((src_pre != '') & (src_post != '') & (src_pre != src_post), src_pre, src_post, no_gallons),
+            ((src_pre != '') & (dest_post != ''), src_pre, dest_post, transfer_gallons),
+            ((dest_pre != '') & (dest_post != '') & (dest_pre != dest_post), dest_pre, dest_post, no_gallons),
+        ]
+        edge_rows, parents, children, gallons = [], [], [], []
+        for mask, edge_parents, edge_children, edge_gallons in edge_sets:
+            edge_rows.extend(positions[mask].tolist())
+            parents.extend(edge_parents[mask].tolist())
+            children.extend(edge_children[mask].tolist())
+            gallons.extend(edge_gallons[mask].tolist())
+        ingested, replaced = index.replace_rows(
+            row_keys(df, row_hashes), row_hashes, edge_rows, parents, children, gallons,
+        )
+        index.save()
+        logger.info(f"Lineage index {index_dir}: {ingested} new/changed transactions "
+                    f"({replaced} Tx Ids replaced) ({index.stats()})")
+        return ingested
+        
     def _get_batch(self, txn: Dict[str, Any], field: str) -> Optional[str]:
         """Extract and normalize batch ID from transaction."""
         batch = txn.get(field)
@@ -429,12 +495,28 @@ class VesselBatchLineageAnalyzer:
         logger.info("=" * 60)
 
 
+def query_lineage_index(index_dir: str, batch: str, max_depth: Optional[int] = None) -> Dict[str, Any]:
+    """Answer ancestor/descendant queries from the persisted index without loading any CSV."""
+    index = LineageGraphIndex(index_dir)
+    ancestors = index.ancestors(batch, max_depth=max_depth)
+    descendants = index.descendants(batch, max_depth=max_depth)
+    return {
+        'batch': batch,
+        'found': batch in index,
+        'ancestor_batches': sorted(ancestors),
+        'descendant_batches': sorted(descendants),
+        'ancestor_count': len(ancestors),
+        'descendant_count': len(descendants),
+    }
+
+
 def main():
     """Main execution function."""
-    logger.info("Starting Vessel-Batch Lineage Analysis")
-    
-    # Initialize analyzer
-    analyzer = VesselBatchLineageAnalyzer()
+    parser = argparse.ArgumentParser(description="Vessel-batch lineage analysis")
+    parser.add_argument("--query", help="Print ancestors/descendants of a batch from the lineage index and exit")
+    parser.add_argument("--max-depth", type=int, default=None, help="Hop limit for --query")
+    parser.add_argument("--index-dir", default=None, help="Lineage index directory (default: <output>/index)")
+    args = parser.parse_args()
     
     # Define file paths
     base_dir = "Main/data"
@@ -442,6 +524,16 @@ def main():
     vessels_json = os.path.join(base_dir, "GET--vessels", "vessels.json")
     shipments_json = os.path.join(base_dir, "GET--shipments", "shipments_thin.json")
     output_dir = os.path.join(base_dir, "vessel-batch-lineage")
+    index_dir = args.index_dir or os.path.join(output_dir, "index")
+    
+    if args.query:
+        print(json.dumps(query_lineage_index(index_dir, args.query, args.max_depth), indent=2))
+        return
+    
+    logger.info("Starting Vessel-Batch Lineage Analysis")
+    
+    # Initialize analyzer
+    analyzer = VesselBatchLineageAnalyzer()
     
     # Load data
     analyzer.load_transactions_csv(transactions_csv)
@@ -454,6 +546,9 @@ def main():
     # Build lineage graph
     analyzer.build_lineage_graph()
     
+    # Append only the new transactions to the persisted lineage index
+    analyzer.update_lineage_index(index_dir)
+    
     # Generate reports
     analyzer.generate_lineage_report(output_dir)
     
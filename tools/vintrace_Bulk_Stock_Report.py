@@ -13,6 +13,7 @@ from selenium.webdriver.support import expected_conditions as EC
 import time
 import datetime
 from inputs_scraper import inputs_scraper
+from vintrace_waits import selenium_wait_for_loaders_hidden, wait_for_download_file
 
 # ------- EASY REPORT CONFIG SECTION -------
 def get_todays_date_str():
@@ -120,17 +121,14 @@ try:
     # Step 1: Go to login page
     driver.get(LOGIN_URL)
     wait.until(EC.presence_of_element_located((By.ID, "email"))).send_keys(USERNAME)
-    time.sleep(3)
     wait.until(EC.presence_of_element_located((By.ID, "password"))).send_keys(PASSWORD)
-    time.sleep(3)
     wait.until(EC.element_to_be_clickable((By.XPATH, "//button[@type='submit' and contains(text(), 'Login')]"))).click()
-    time.sleep(3)
     wait.until(EC.url_changes(LOGIN_URL))
 
     # Step 2: Navigate to OLD_URL
     driver.get(OLD_URL)
     print("Navigated to OLD_URL.")
-    time.sleep(3)
+    selenium_wait_for_loaders_hidden(driver, timeout=60)
 
     # Step 3: Click reports icon
     try:
@@ -146,7 +144,7 @@ try:
         except Exception as e2:
             print(f"Could not click Reports icon (fallback): {e2}")
 
-    time.sleep(2)
+    selenium_wait_for_loaders_hidden(driver, timeout=60)
 
     # Step 4: Click tab/menu for report type
     try:
@@ -262,6 +260,7 @@ try:
             print(f"Could not fill 'Vessel' (Location) field: {e}")
 
         # Step 10: Click generate button for this row
+        generate_started = time.time()
         try:
             generate_btn = wait.until(EC.element_to_be_clickable((REPORT_CONFIG["generate_btn"]["by"], REPORT_CONFIG["generate_btn"]["value"])))
             generate_btn.click()
@@ -270,7 +269,13 @@ try:
             print(f"Could not click the Generate button: {e}")
 
         print("Report generation triggered. Waiting for download to complete...")
-        time.sleep(15)
+        wait_for_download_file(
+            TARGET_SAVE_DIR,
+            prefix=REPORT_CONFIG["download_pattern"],
+            suffix=".csv",
+            started_after=generate_started - 1,
+            timeout=300,
+        )
 
         # Step 11: Find and rename latest downloaded file for each CSV row
         try:
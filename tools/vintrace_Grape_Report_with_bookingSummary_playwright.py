@@ -441,7 +441,7 @@ async def run():
 
     async with async_playwright() as p:
         # Initialize browser using helper (increments run counter)
-        browser, context, page = await initialize_browser(p, headless=False)
+        browser, context, page = await initialize_browser(p)
         
         try:
             # Login using helper (navigate_to_old_url=True for this script)
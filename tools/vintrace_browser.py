@@ -0,0 +1,226 @@
+#  python tools/vintrace_browser.py serve --port 9222      (keep one Chromium running between scraper runs)
+"""
+Vintrace Browser Profiles
+Shared browser launch settings for the Vintrace scrapers
+
+Two profiles, chosen with VINTRACE_BROWSER_PROFILE (default: lean):
+
+    lean    headless unless told otherwise, smaller viewport, Chromium flags that cut
+            background work, and request routing that:
+              - aborts fonts and media
+              - answers first-party images with a 1x1 placeholder (icons stay in the DOM and
+                stay clickable, nothing is downloaded)
+              - aborts any request to a host outside ALLOWED_HOSTS (analytics, tour popups,
+                CDNs) except top-level navigations
+            URLs containing a VINTRACE_ALLOWED_URLS fragment are always loaded.
+    full    the previous behaviour: everything loads, 1920x1080
+
+Headless: VINTRACE_HEADLESS (default 1); scripts pass headless=True/False to override.
+
+Reusable browser process: `python tools/vintrace_browser.py serve` starts Chromium with a
+remote-debugging port; set VINTRACE_BROWSER_CDP=http://localhost:9222 and every scraper
+connects to it instead of launching (and closing) its own. Closing a connected browser
+only disconnects.
+
+Page load timing: track_page_loads(page) records each navigation's DOMContentLoaded/load
+time and transfer size in the vintrace_waits summary, plus how many requests were blocked.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from vintrace_waits import record_wait
+except ImportError:  # imported as tools.vintrace_browser (ReportsVintrace)
+    from tools.vintrace_waits import record_wait
+
+PROFILE = os.getenv("VINTRACE_BROWSER_PROFILE", "lean").lower()
+HEADLESS_DEFAULT = os.getenv("VINTRACE_HEADLESS", "1").lower() not in ("0", "false", "no")
+CDP_ENDPOINT = os.getenv("VINTRACE_BROWSER_CDP", "")
+
+ALLOWED_HOSTS = tuple(
+    h.strip().lower() for h in
+    ("vintrace.net,vintrace.app," + os.getenv("VINTRACE_ALLOWED_HOSTS", "")).split(",")
+    if h.strip()
+)
+ALLOWED_URL_FRAGMENTS = tuple(f.strip() for f in os.getenv("VINTRACE_ALLOWED_URLS", "").split(",") if f.strip())
+
+ABORTED_RESOURCE_TYPES = ("font", "media")
+PLACEHOLDER_RESOURCE_TYPES = ("image",)
+# 1x1 transparent GIF
+PLACEHOLDER_GIF = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+BASE_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+]
+LEAN_ARGS = BASE_ARGS + [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--mute-audio',
+    '--no-first-run',
+    '--renderer-process-limit=2',
+]
+
+VIEWPORTS = {
+    "lean": {'width': 1366, 'height': 768},
+    "full": {'width': 1920, 'height': 1080},
+}
+
+NAVIGATION_TIMING_JS = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    if (!nav) return null;
+    return {dcl: nav.domContentLoadedEventEnd, load: nav.loadEventEnd, bytes: nav.transferSize};
+}
+"""
+
+
+def resolve_headless(headless: Optional[bool] = None) -> bool:
+    return HEADLESS_DEFAULT if headless is None else headless
+
+
+def _host_allowed(host: str) -> bool:
+    host = (host or "").lower()
+    return any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_HOSTS)
+
+
+class ResourceBlocker:
+    """Route handler for the lean profile; keeps counts of what it blocked."""
+
+    def __init__(self):
+        self.allowed = 0
+        self.aborted = 0
+        self.placeholders = 0
+        self.blocked_hosts: Dict[str, int] = {}
+
+    async def handle(self, route):
+        request = route.request
+        url = request.url
+        if any(fragment in url for fragment in ALLOWED_URL_FRAGMENTS):
+            self.allowed += 1
+            await route.fallback()
+            return
+        resource_type = request.resource_type
+        host = urlparse(url).hostname or ""
+        if not _host_allowed(host) and resource_type != "document" and not url.startswith(("data:", "blob:")):
+            self.aborted += 1
+            self.blocked_hosts[host] = self.blocked_hosts.get(host, 0) + 1
+            await route.abort()
+        elif resource_type in ABORTED_RESOURCE_TYPES:
+            self.aborted += 1
+            await route.abort()
+        elif resource_type in PLACEHOLDER_RESOURCE_TYPES:
+            self.placeholders += 1
+            await route.fulfill(status=200, content_type="image/gif", body=PLACEHOLDER_GIF)
+        else:
+            self.allowed += 1
+            await route.fallback()
+
+    def summary(self) -> str:
+        hosts = ", ".join(f"{h} ({n})" for h, n in sorted(self.blocked_hosts.items(), key=lambda item: -item[1])[:5])
+        text = f"{self.allowed} loaded, {self.aborted} blocked, {self.placeholders} images stubbed"
+        return text + (f"; blocked hosts: {hosts}" if hosts else "")
+
+
+def track_page_loads(page, blocker: Optional[ResourceBlocker] = None) -> None:
+    """Record each main-frame load's DOMContentLoaded/load time and transfer size."""
+
+    async def on_load(_page=None):
+        try:
+            timing = await page.evaluate(NAVIGATION_TIMING_JS)
+        except Exception:
+            return
+        if not timing:
+            return
+        path = urlparse(page.url).path or "/"
+        record_wait(f"page load {path}", timing["load"] or timing["dcl"] or 0)
+        extra = f", {blocker.summary()}" if blocker else ""
+        print(f"📄 {path}: DOMContentLoaded {timing['dcl']:.0f} ms, load {timing['load']:.0f} ms, "
+              f"{(timing['bytes'] or 0) / 1024:.0f} KB{extra}")
+
+    page.on("load", on_load)
+
+
+async def launch_browser(playwright_instance, headless: Optional[bool] = None, profile: str = PROFILE, args=None):
+    """
+    Launch Chromium for `profile`, or connect to the shared one when VINTRACE_BROWSER_CDP is set.
+
+    Returns:
+        Browser
+    """
+    if CDP_ENDPOINT:
+        try:
+            browser = await playwright_instance.chromium.connect_over_cdp(CDP_ENDPOINT)
+            print(f"✓ Connected to running browser at {CDP_ENDPOINT}")
+            return browser
+        except Exception as e:
+            print(f"⚠ Could not connect to {CDP_ENDPOINT} ({e}); launching a new browser")
+    launch_args = list(LEAN_ARGS if profile == "lean" else BASE_ARGS)
+    if args:
+        launch_args.extend(args)
+    return await playwright_instance.chromium.launch(headless=resolve_headless(headless), args=launch_args)
+
+
+async def new_context(browser, profile: str = PROFILE, **context_options) -> Tuple[object, Optional[ResourceBlocker]]:
+    """
+    New browser context with the profile's viewport and, for lean, resource blocking.
+
+    Returns:
+        tuple: (context, blocker or None)
+    """
+    context_options.setdefault('viewport', VIEWPORTS.get(profile, VIEWPORTS["full"]))
+    context_options.setdefault('user_agent', USER_AGENT)
+    if context_options.get('no_viewport'):
+        context_options.pop('viewport', None)
+    context = await browser.new_context(**context_options)
+    blocker = None
+    if profile == "lean":
+        blocker = ResourceBlocker()
+        await context.route("**/*", blocker.handle)
+    return context, blocker
+
+
+def serve(port: int, headless: bool) -> None:
+    """Run Chromium with a remote-debugging port until interrupted."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        executable = p.chromium.executable_path
+    cmd = [executable, f"--remote-debugging-port={port}", "--user-data-dir=" + os.path.abspath(".auth/chromium-profile")]
+    cmd += LEAN_ARGS
+    if headless:
+        cmd.append("--headless=new")
+    print(f"🌐 Serving Chromium on http://localhost:{port} (set VINTRACE_BROWSER_CDP to reuse it)")
+    process = subprocess.Popen(cmd)
+    try:
+        while process.poll() is None:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared Chromium for the Vintrace scrapers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Start a long-lived Chromium with a remote-debugging port")
+    serve_parser.add_argument("--port", type=int, default=9222)
+    serve_parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.port, headless=not args.headed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
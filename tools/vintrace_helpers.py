@@ -17,12 +17,28 @@ import asyncio
 import os
 import datetime
 import shutil
-import json
+import sys
 import threading
 from typing import Optional, Dict
 from playwright.async_api import Page
 from dotenv import load_dotenv
 
+# Add the parent directory to sys.path so 'app' can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.utils.write_behind_log import WriteBehindJsonLog
+
+from vintrace_browser import PROFILE as BROWSER_PROFILE
+from vintrace_browser import launch_browser, new_context as new_browser_context, resolve_headless, track_page_loads
+from vintrace_session import get_vintrace_session
+from vintrace_trace import record_selector, selector_attempts, traced
+from vintrace_waits import (
+    wait_for_dom_quiet,
+    wait_for_element_settled,
+    wait_for_enabled,
+    wait_for_loader_to_appear,
+    wait_for_loaders_hidden,
+)
+
 # Import centralized selectors
 from vintrace_selectors import (
     NewUISelectors, 
@@ -46,9 +62,13 @@ SHORT_TIMEOUT = 5000  # 5 seconds - short wait time
 QUICK_TIMEOUT = 3000  # 3 seconds - quick operations
 LOADER_APPEAR_TIMEOUT = 15000  # 15 seconds - wait for loader to appear
 
+# Opt-in: take report files straight from the HTTP response instead of the browser download
+CAPTURE_REPORT_RESPONSES = os.getenv("VINTRACE_CAPTURE_RESPONSES", "0").lower() in ("1", "true", "yes")
+
 # URLs
 LOGIN_URL = "https://auth.vintrace.app/sign-in?customerCode=smwe"
 OLD_URL = "https://us61.vintrace.net/smwe/2.app?oldVintrace=true"
+NEW_URL = "https://us61.vintrace.net/smwe/2.app"
 
 
 # ============================================================================
@@ -59,6 +79,10 @@ class SelectorTracker:
     """
     Tracks successful selector usage across Playwright automation runs.
     Thread-safe singleton implementation that learns which selectors work best.
+
+    Updates are kept in memory and appended to selector_tracking.json.log in batches
+    (see app/utils/write_behind_log.py); the log is folded back into
+    selector_tracking.json periodically, so concurrent scripts don't clobber each other.
     """
 
     _instance = None
@@ -74,19 +98,14 @@ class SelectorTracker:
     def __init__(self):
         if not hasattr(self, 'initialized'):
             self.tracking_file = "selector_tracking.json"
-            self.data = self._load_tracking_data()
+            self.store = WriteBehindJsonLog(
+                self.tracking_file, self._init_tracking_structure, self._apply_event
+            )
             self.initialized = True
 
-    def _load_tracking_data(self) -> Dict:
-        """Load existing tracking data from JSON file."""
-        if os.path.exists(self.tracking_file):
-            try:
-                with open(self.tracking_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"⚠ Could not load tracking data: {e}")
-                return self._init_tracking_structure()
-        return self._init_tracking_structure()
+    @property
+    def data(self) -> Dict:
+        return self.store.data
 
     def _init_tracking_structure(self) -> Dict:
         """Initialize the tracking data structure."""
@@ -100,14 +119,47 @@ class SelectorTracker:
             "selectors": {}
         }
 
+    @staticmethod
+    def _apply_event(data: Dict, event: Dict):
+        """Fold one logged event ("success" or "run") into the tracking data."""
+        timestamp = event["timestamp"]
+        data["metadata"]["last_updated"] = timestamp
+        if event["event"] == "run":
+            data["metadata"]["total_runs"] += 1
+            return
+
+        # Create unique key for this selector
+        key = f"{event['function']}::{event['selector']}"
+
+        if key not in data["selectors"]:
+            data["selectors"][key] = {
+                "function": event["function"],
+                "selector": event["selector"],
+                "type": event.get("type", "css"),
+                "context": event.get("context"),
+                "notes": event.get("notes"),
+                "first_seen": timestamp,
+                "last_seen": timestamp,
+                "success_count": 0,
+                "attempts": []
+            }
+
+        # Update existing entry
+        entry = data["selectors"][key]
+        entry["last_seen"] = timestamp
+        entry["success_count"] += 1
+        entry["attempts"].append({
+            "timestamp": timestamp,
+            "success": True
+        })
+
+        # Keep only last 10 attempts to avoid file bloat
+        if len(entry["attempts"]) > 10:
+            entry["attempts"] = entry["attempts"][-10:]
+
     def _save_tracking_data(self):
-        """Save tracking data to JSON file."""
-        try:
-            self.data["metadata"]["last_updated"] = datetime.datetime.now().isoformat()
-            with open(self.tracking_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"⚠ Could not save tracking data: {e}")
+        """Write buffered updates now (normally done on an interval and at exit)."""
+        self.store.flush()
 
     def track_success(
         self,
@@ -127,37 +179,16 @@ class SelectorTracker:
             context: Additional context (e.g., "new_ui", "old_ui", "iframe")
             notes: Any additional notes about this selector
         """
-        # Create unique key for this selector
-        key = f"{function_name}::{selector}"
-
-        if key not in self.data["selectors"]:
-            self.data["selectors"][key] = {
-                "function": function_name,
-                "selector": selector,
-                "type": selector_type,
-                "context": context,
-                "notes": notes,
-                "first_seen": datetime.datetime.now().isoformat(),
-                "last_seen": datetime.datetime.now().isoformat(),
-                "success_count": 0,
-                "attempts": []
-            }
-
-        # Update existing entry
-        entry = self.data["selectors"][key]
-        entry["last_seen"] = datetime.datetime.now().isoformat()
-        entry["success_count"] += 1
-        entry["attempts"].append({
+        self.store.record({
+            "event": "success",
             "timestamp": datetime.datetime.now().isoformat(),
-            "success": True
+            "function": function_name,
+            "selector": selector,
+            "type": selector_type,
+            "context": context,
+            "notes": notes,
         })
 
-        # Keep only last 10 attempts to avoid file bloat
-        if len(entry["attempts"]) > 10:
-            entry["attempts"] = entry["attempts"][-10:]
-
-        self._save_tracking_data()
-
     def get_sorted_selectors(self, function_name: str, selectors: list) -> list:
         """
         Sort a list of selectors by their success rate, putting most successful first.
@@ -258,8 +289,7 @@ class SelectorTracker:
 
     def increment_run_count(self):
         """Increment the total run counter."""
-        self.data["metadata"]["total_runs"] += 1
-        self._save_tracking_data()
+        self.store.record({"event": "run", "timestamp": datetime.datetime.now().isoformat()})
 
     def print_summary(self):
         """Print a quick summary of tracking data."""
@@ -298,6 +328,7 @@ def track_selector(
         track_selector("vintrace_login", "input#email", "css", "new_ui", "Primary email field")
     """
     _tracker.track_success(function_name, selector, selector_type, context, notes)
+    record_selector(selector, True)
 
 
 def get_sorted_selectors(function_name: str, selectors: list) -> list:
@@ -353,37 +384,11 @@ async def wait_for_all_vintrace_loaders(page_or_frame, timeout=LARGE_TIMEOUT):
         page_or_frame: Playwright Page or Frame object
         timeout: Maximum wait time in milliseconds
     """
-    try:
-        print("⏳ Waiting for Vintrace loaders to disappear...")
-        await page_or_frame.wait_for_function(
-            """
-            () => {
-                // Function to check if loader is hidden in a document
-                function allLoadersHidden(doc) {
-                    // Check for loader in iframe with specific ID pattern (new UI)
-                    const loaderDivs = doc.querySelectorAll('[id^="loader_Iframe_"]');
-                    for (let loader of loaderDivs) {
-                        const style = window.getComputedStyle(loader);
-                        // If any loader is visible, return false
-                        if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
-                            return false;
-                        }
-                    }
-
-                    // Check for the old-style loaders (classic vintrace)
-                    const long = doc.getElementById('serverDelayMessageLong');
-                    const main = doc.getElementById('serverDelayMessage');
-                    const longHidden = !long || getComputedStyle(long).visibility === 'hidden';
-                    const mainHidden = !main || getComputedStyle(main).visibility === 'hidden';
-
-                    return longHidden && mainHidden;
-                }
-            """,
-            timeout=timeout
-        )
+    print("⏳ Waiting for Vintrace loaders to disappear...")
+    if await wait_for_loaders_hidden(page_or_frame, timeout=timeout):
         print("✓ All Vintrace loaders hidden")
-    except Exception as e:
-        print(f"⚠ Timeout waiting for loaders to hide (may be okay): {e}")
+    else:
+        print("⚠ Timeout waiting for loaders to hide (may be okay)")
 
 
 async def wait_for_vintrace_loaders_to_appear(page_or_frame, timeout=STANDARD_TIMEOUT):
@@ -398,46 +403,19 @@ async def wait_for_vintrace_loaders_to_appear(page_or_frame, timeout=STANDARD_TI
     Returns:
         bool: True if loader appeared, False if not
     """
-    try:
-        print("⏳ Waiting for Vintrace loader to appear...")
-
-        await page_or_frame.wait_for_function(
-            """
-            () => {
-                function hasVisibleLoader(doc) {
-                    // Check for new UI loaders
-                    const loaderDivs = doc.querySelectorAll('[id^="loader_Iframe_"]');
-                    for (let loader of loaderDivs) {
-                        const style = window.getComputedStyle(loader);
-                        if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
-                            return true;
-                        }
-                    }
-
-                    // Check for old UI loaders
-                    const long = doc.getElementById('serverDelayMessageLong');
-                    const main = doc.getElementById('serverDelayMessage');
-                    const longVisible = long && getComputedStyle(long).visibility !== 'hidden';
-                    const mainVisible = main && getComputedStyle(main).visibility !== 'hidden';
-
-                    return longVisible || mainVisible;
-                }
-
-                return hasVisibleLoader(document);
-            }
-            """, timeout=timeout
-        )
+    print("⏳ Waiting for Vintrace loader to appear...")
+    if await wait_for_loader_to_appear(page_or_frame, timeout=timeout):
         print("✓ Vintrace loader appeared")
         return True
-    except Exception as e:
-        print(f"⚠ Loader never appeared (page might have loaded instantly): {e}")
-        return False
+    print("⚠ Loader never appeared (page might have loaded instantly)")
+    return False
 
 
 # ============================================================================
 # IFRAME MANAGEMENT
 # ============================================================================
 
+@traced()
 async def get_main_iframe(page: Page):
     """
     Get the main iframe that contains the Vintrace application.
@@ -451,8 +429,6 @@ async def get_main_iframe(page: Page):
     """
     print("🔍 Looking for main Vintrace iframe...")
 
-    await asyncio.sleep(2)
-
     # Use centralized selectors if available, otherwise fall back to defaults
     if NewUISelectors:
         iframe_selectors = NewUISelectors.IFRAME_MAIN.copy()
@@ -474,7 +450,7 @@ async def get_main_iframe(page: Page):
     # Sort selectors by historical success
     iframe_selectors = get_sorted_selectors("get_main_iframe", iframe_selectors)
 
-    for selector in iframe_selectors:
+    for selector in selector_attempts(iframe_selectors):
         try:
             iframe_element = await page.wait_for_selector(selector, timeout=MEDIUM_TIMEOUT, state="attached")
             if iframe_element:
@@ -494,6 +470,7 @@ async def get_main_iframe(page: Page):
     return page
 
 
+@traced()
 async def get_iframe_by_src(page: Page, src_pattern: str):
     """
     Get a specific iframe by its src attribute pattern.
@@ -532,6 +509,7 @@ async def get_iframe_by_src(page: Page, src_pattern: str):
 # POPUP MANAGEMENT
 # ============================================================================
 
+@traced(none_is_failure=False)
 async def close_popups(page_or_frame):
     """
     Close any tour/popup dialogs that appear after login.
@@ -572,7 +550,7 @@ async def close_popups(page_or_frame):
     popup_close_selectors = get_sorted_selectors("close_popups", popup_close_selectors)
 
     popups_closed = 0
-    for selector in popup_close_selectors:
+    for selector in selector_attempts(popup_close_selectors):
         try:
             buttons = await page_or_frame.query_selector_all(selector)
             for button in buttons:
@@ -583,7 +561,7 @@ async def close_popups(page_or_frame):
                         popups_closed += 1
                         print(f"  ✓ Closed popup using selector: {selector}")
                         track_selector("close_popups", selector, "css", "popup_close", "Popup close button")
-                        await asyncio.sleep(0.5)
+                        await wait_for_dom_quiet(page_or_frame, quiet_ms=200, timeout=SHORT_TIMEOUT)
                 except Exception:
                     pass
         except Exception:
@@ -591,19 +569,21 @@ async def close_popups(page_or_frame):
 
     if popups_closed > 0:
         print(f"✓ Closed {popups_closed} popup(s)")
+        await wait_for_dom_quiet(page_or_frame)
     else:
         print("  No popups found to close")
 
-    await asyncio.sleep(1)
-
 
 # ============================================================================
 # LOGIN FUNCTIONS
 # ============================================================================
 
+@traced()
 async def vintrace_login(page: Page, username: str, password: str, navigate_to_old_url: bool = True):
     """
     Login to Vintrace application.
+    A session saved by an earlier run is reused when it is still valid
+    (see vintrace_session.py); otherwise the login form is filled in.
 
     Args:
         page: Playwright Page object
@@ -617,6 +597,14 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
     print("=" * 60)
     print("LOGGING IN TO VINTRACE")
     print("=" * 60)
+
+    session = get_vintrace_session()
+    if await session.restore(page, OLD_URL if navigate_to_old_url else NEW_URL):
+        await wait_for_vintrace_ui(page, navigate_to_old_url)
+        print("\n✓ Login successful and page fully loaded!")
+        print("=" * 60)
+        return True
+
     print(f"Navigating to login page: {LOGIN_URL}")
 
     await page.goto(LOGIN_URL, timeout=LARGE_TIMEOUT)
@@ -657,7 +645,7 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
                 'button[role="tab"]:has-text("Login")',
                 "css", "login_tab_click", "Click login tab if not active"
             )
-            await asyncio.sleep(0.5)
+            await wait_for_dom_quiet(page, quiet_ms=200, timeout=SHORT_TIMEOUT)
         except Exception as e:
             print(f"⚠ Could not ensure Login tab is active: {e}")
 
@@ -703,7 +691,7 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
     # Fill email/username field
     print("\nAttempting to fill email field...")
     email_filled = False
-    for selector in email_selectors:
+    for selector in selector_attempts(email_selectors):
         try:
             await page.wait_for_selector(selector, timeout=SHORT_TIMEOUT, state="visible")
             await page.fill(selector, username)
@@ -723,12 +711,10 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
         await save_debug_screenshot(page, "login_email_not_found")
         return False
 
-    await asyncio.sleep(0.3)
-
     # Fill password field
     print("\nAttempting to fill password field...")
     password_filled = False
-    for selector in password_selectors:
+    for selector in selector_attempts(password_selectors):
         try:
             await page.wait_for_selector(selector, timeout=SHORT_TIMEOUT, state="visible")
             await page.fill(selector, password)
@@ -748,8 +734,6 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
         await save_debug_screenshot(page, "login_password_not_found")
         return False
 
-    await asyncio.sleep(0.3)
-
     # Click login button
     print("\nAttempting to click login button...")
     login_btn_selectors = [
@@ -773,7 +757,7 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
     login_btn_selectors = get_sorted_selectors("vintrace_login_button", login_btn_selectors)
 
     login_clicked = False
-    for selector in login_btn_selectors:
+    for selector in selector_attempts(login_btn_selectors):
         try:
             await page.wait_for_selector(selector, timeout=SHORT_TIMEOUT, state="visible")
             login_btn = await page.query_selector(selector)
@@ -782,7 +766,7 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
                 is_disabled = await login_btn.get_attribute("disabled")
                 if is_disabled:
                     print("  ⚠ Login button is disabled, waiting...")
-                    await asyncio.sleep(1)
+                    await wait_for_enabled(login_btn, timeout=SHORT_TIMEOUT, label="login button enabled")
 
                 await login_btn.scroll_into_view_if_needed()
                 await login_btn.click()
@@ -846,7 +830,24 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
         print(f"\n⏳ Navigating to OLD_URL: {OLD_URL}")
         await page.goto(OLD_URL, timeout=LARGE_TIMEOUT)
         print("✓ Navigated to OLD_URL")
+    await wait_for_vintrace_ui(page, navigate_to_old_url)
 
+    await session.save(page.context)
+    print("\n✓ Login successful and page fully loaded!")
+    print("=" * 60)
+    return True
+
+
+@traced(none_is_failure=False)
+async def wait_for_vintrace_ui(page: Page, old_ui: bool = True):
+    """
+    Wait until the Vintrace app is usable after login (or after a reused session's first load).
+
+    Args:
+        page: Playwright Page object, already on OLD_URL (old_ui) or the new UI
+        old_ui: Whether the page is the old Vintrace UI
+    """
+    if old_ui:
         # Wait for the page loaders (both in main page and iframe)
         await wait_for_all_vintrace_loaders(page)
 
@@ -858,7 +859,7 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
         except Exception as e:
             print(f"⚠ Could not check iframe loaders: {e}")
 
-        await asyncio.sleep(2)
+        await wait_for_dom_quiet(page)
     else:
         # For barrel report - wait for new UI to load
         print("\n⏳ Waiting for new Vintrace UI to load...")
@@ -874,17 +875,14 @@ async def vintrace_login(page: Page, username: str, password: str, navigate_to_o
             await wait_for_all_vintrace_loaders(iframe, timeout=LARGE_TIMEOUT)
             await close_popups(iframe)
 
-        await asyncio.sleep(2)
-
-    print("\n✓ Login successful and page fully loaded!")
-    print("=" * 60)
-    return True
+        await wait_for_dom_quiet(iframe)
 
 
 # ============================================================================
 # NAVIGATION HELPERS - NEW UI
 # ============================================================================
 
+@traced()
 async def navigate_to_reports_new_ui(page: Page):
     """
     Navigate to the Reports section in the NEW Vintrace UI.
@@ -928,7 +926,7 @@ async def navigate_to_reports_new_ui(page: Page):
     # Sort by historical success
     reports_selectors = get_sorted_selectors("navigate_to_reports_new_ui", reports_selectors)
 
-    for selector in reports_selectors:
+    for selector in selector_attempts(reports_selectors):
         try:
             print(f"  Trying selector: {selector}")
 
@@ -940,7 +938,6 @@ async def navigate_to_reports_new_ui(page: Page):
                     link = await icon.evaluate_handle("el => el.closest('a')")
                     if link:
                         await link.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.3)
                         await link.click()
                         print("✓ Clicked Reports menu using icon selector")
                         track_selector(
@@ -951,7 +948,7 @@ async def navigate_to_reports_new_ui(page: Page):
                             "Reports menu via icon in new UI"
                         )
                         await wait_for_all_vintrace_loaders(page)
-                        await asyncio.sleep(2)
+                        await wait_for_dom_quiet(page)
                         return True
             else:
                 # Normal selector
@@ -959,7 +956,6 @@ async def navigate_to_reports_new_ui(page: Page):
                 reports_link = await page.query_selector(selector)
                 if reports_link:
                     await reports_link.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.3)
                     await reports_link.click()
                     print(f"✓ Clicked Reports menu using selector: {selector}")
                     track_selector(
@@ -970,7 +966,7 @@ async def navigate_to_reports_new_ui(page: Page):
                         "Reports menu item in new UI"
                     )
                     await wait_for_all_vintrace_loaders(page)
-                    await asyncio.sleep(2)
+                    await wait_for_dom_quiet(page)
                     return True
 
         except Exception as e:
@@ -982,6 +978,7 @@ async def navigate_to_reports_new_ui(page: Page):
     return False
 
 
+@traced()
 async def navigate_to_report_category(page: Page, category_name: str):
     """
     Click on a specific report category in the Reports section.
@@ -1036,7 +1033,6 @@ async def navigate_to_report_category(page: Page, category_name: str):
                 parent = await span.evaluate_handle("el => el.closest('div.label-normal') || el.closest('td')")
                 if parent:
                     await parent.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.3)
                     await parent.click()
                     print(f"✓ Clicked category '{category_name}' using span|Text selector")
                     track_selector(
@@ -1047,7 +1043,7 @@ async def navigate_to_report_category(page: Page, category_name: str):
                         f"Report category: {category_name}"
                     )
                     await wait_for_all_vintrace_loaders(page)
-                    await asyncio.sleep(1)
+                    await wait_for_dom_quiet(page)
                     return True
     except Exception as e:
         print(f"  ✗ Failed with span|Text strategy: {e}")
@@ -1059,7 +1055,7 @@ async def navigate_to_report_category(page: Page, category_name: str):
         f"td:has-text('{category_name}')",
     ]
 
-    for selector in selectors:
+    for selector in selector_attempts(selectors):
         try:
             element = await page.wait_for_selector(selector, timeout=QUICK_TIMEOUT, state="visible")
             if element:
@@ -1067,7 +1063,6 @@ async def navigate_to_report_category(page: Page, category_name: str):
                 text = await element.inner_text()
                 if text.strip() == category_name:
                     await element.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.3)
                     await element.click()
                     print(f"✓ Clicked category '{category_name}' using selector: {selector}")
                     track_selector(
@@ -1078,7 +1073,7 @@ async def navigate_to_report_category(page: Page, category_name: str):
                         f"Report category: {category_name}"
                     )
                     await wait_for_all_vintrace_loaders(page)
-                    await asyncio.sleep(1)
+                    await wait_for_dom_quiet(page)
                     return True
         except Exception as e:
             print(f"  ✗ Failed with selector '{selector}': {e}")
@@ -1091,7 +1086,6 @@ async def navigate_to_report_category(page: Page, category_name: str):
             text = await row.inner_text()
             if text.strip() == category_name:
                 await row.scroll_into_view_if_needed()
-                await asyncio.sleep(0.3)
                 await row.click()
                 print(f"✓ Clicked category '{category_name}' by row text match")
                 track_selector(
@@ -1102,7 +1096,7 @@ async def navigate_to_report_category(page: Page, category_name: str):
                     f"Report category: {category_name}"
                 )
                 await wait_for_all_vintrace_loaders(page)
-                await asyncio.sleep(1)
+                await wait_for_dom_quiet(page)
                 return True
     except Exception as e:
         print(f"  ✗ Failed to find category by row text: {e}")
@@ -1112,6 +1106,7 @@ async def navigate_to_report_category(page: Page, category_name: str):
     return False
 
 
+@traced()
 async def find_and_click_report_by_name(page: Page, report_name: str):
     """
     Find and click a specific report by its name in the current category.
@@ -1140,7 +1135,7 @@ async def find_and_click_report_by_name(page: Page, report_name: str):
         f"div[id*='c_']:has-text('{report_name}')",
     ]
 
-    for selector in selectors:
+    for selector in selector_attempts(selectors):
         try:
             element = await page.wait_for_selector(selector, timeout=QUICK_TIMEOUT, state="visible")
             if element:
@@ -1148,7 +1143,6 @@ async def find_and_click_report_by_name(page: Page, report_name: str):
                 text = await element.inner_text()
                 if text.strip() == report_name:
                     await element.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.3)
                     await element.click()
                     print(f"✓ Clicked report '{report_name}' using selector: {selector}")
                     track_selector(
@@ -1159,7 +1153,7 @@ async def find_and_click_report_by_name(page: Page, report_name: str):
                         f"Report: {report_name}"
                     )
                     await wait_for_all_vintrace_loaders(page)
-                    await asyncio.sleep(1)
+                    await wait_for_dom_quiet(page)
                     return True
         except Exception as e:
             print(f"  ✗ Failed with selector '{selector}': {e}")
@@ -1180,7 +1174,6 @@ async def find_and_click_report_by_name(page: Page, report_name: str):
                     run_button = await run_icon.evaluate_handle("el => el.closest('div.link')")
                     if run_button:
                         await run_button.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.3)
                         await run_button.click()
                         print(f"✓ Clicked 'Run' button for report '{report_name}'")
                         track_selector(
@@ -1191,7 +1184,7 @@ async def find_and_click_report_by_name(page: Page, report_name: str):
                             f"Run button for report: {report_name}"
                         )
                         await wait_for_all_vintrace_loaders(page)
-                        await asyncio.sleep(1)
+                        await wait_for_dom_quiet(page)
                         return True
     except Exception as e:
         print(f"  ✗ Failed to find report by run icon: {e}")
@@ -1201,6 +1194,7 @@ async def find_and_click_report_by_name(page: Page, report_name: str):
     return False
 
 
+@traced()
 async def close_report_window(page: Page):
     """
     Close the "Winery reports" window/modal.
@@ -1224,12 +1218,11 @@ async def close_report_window(page: Page):
     # Sort by historical success
     close_selectors = get_sorted_selectors("close_report_window", close_selectors)
 
-    for selector in close_selectors:
+    for selector in selector_attempts(close_selectors):
         try:
             close_btn = await page.wait_for_selector(selector, timeout=SHORT_TIMEOUT, state="visible")
             if close_btn:
                 await close_btn.scroll_into_view_if_needed()
-                await asyncio.sleep(0.3)
                 await close_btn.click()
                 print(f"✓ Clicked close button using selector: {selector}")
                 track_selector(
@@ -1240,7 +1233,7 @@ async def close_report_window(page: Page):
                     "Close button for report window"
                 )
                 await wait_for_all_vintrace_loaders(page)
-                await asyncio.sleep(1)
+                await wait_for_dom_quiet(page)
                 return True
         except Exception as e:
             print(f"  ✗ Failed with selector '{selector}': {e}")
@@ -1254,6 +1247,7 @@ async def close_report_window(page: Page):
 # NAVIGATION HELPERS - OLD UI
 # ============================================================================
 
+@traced()
 async def navigate_to_reports_old_ui(page_or_frame):
     """
     Navigate to Reports section in old Vintrace UI - tries multiple methods.
@@ -1284,14 +1278,13 @@ async def navigate_to_reports_old_ui(page_or_frame):
     # Sort by historical success
     reports_icon_selectors = get_sorted_selectors("navigate_to_reports_old_ui_quicklaunch", reports_icon_selectors)
     
-    for selector in reports_icon_selectors:
+    for selector in selector_attempts(reports_icon_selectors):
         try:
             element = await page_or_frame.query_selector(selector)
             if element:
                 is_visible = await element.is_visible()
                 if is_visible:
                     await element.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.5)
                     await element.click()
                     print(f"  ✓ Clicked Reports icon in quick launch bar")
                     track_selector(
@@ -1302,7 +1295,7 @@ async def navigate_to_reports_old_ui(page_or_frame):
                         "Reports quick launch icon"
                     )
                     await wait_for_all_vintrace_loaders(page_or_frame)
-                    await asyncio.sleep(2)
+                    await wait_for_dom_quiet(page_or_frame)
                     print("✓ Successfully navigated to Reports section")
                     return True
         except Exception as e:
@@ -1324,14 +1317,13 @@ async def navigate_to_reports_old_ui(page_or_frame):
     consoles_selectors = get_sorted_selectors("navigate_to_reports_old_ui_consoles", consoles_selectors)
     
     consoles_clicked = False
-    for selector in consoles_selectors:
+    for selector in selector_attempts(consoles_selectors):
         try:
             elements = await page_or_frame.query_selector_all(selector)
             for element in elements:
                 text = await element.inner_text()
                 if "Consoles" in text.strip():
                     await element.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.5)
                     await element.click()
                     print(f"  ✓ Clicked 'Consoles' menu")
                     track_selector(
@@ -1342,7 +1334,10 @@ async def navigate_to_reports_old_ui(page_or_frame):
                         "Consoles dropdown menu"
                     )
                     consoles_clicked = True
-                    await asyncio.sleep(1.5)  # Wait for dropdown to appear
+                    try:
+                        await page_or_frame.wait_for_selector("div.vintrace-menu-item", state="visible", timeout=MEDIUM_TIMEOUT)
+                    except Exception:
+                        print("  ⚠ Consoles dropdown items not visible yet")
                     break
             if consoles_clicked:
                 break
@@ -1364,7 +1359,6 @@ async def navigate_to_reports_old_ui(page_or_frame):
             text = await item.inner_text()
             if "Reports..." in text.strip():
                 await item.scroll_into_view_if_needed()
-                await asyncio.sleep(0.3)
                 await item.click()
                 print("  ✓ Clicked 'Reports...' from menu")
                 track_selector(
@@ -1375,7 +1369,7 @@ async def navigate_to_reports_old_ui(page_or_frame):
                     "Reports menu item in Consoles dropdown"
                 )
                 await wait_for_all_vintrace_loaders(page_or_frame)
-                await asyncio.sleep(2)
+                await wait_for_dom_quiet(page_or_frame)
                 print("✓ Successfully navigated to Reports section")
                 return True
         except Exception:
@@ -1385,6 +1379,7 @@ async def navigate_to_reports_old_ui(page_or_frame):
     return False
 
 
+@traced()
 async def click_vintage_harvest_tab_old_ui(page: Page):
     """
     Click the Vintage/Harvest tab in the OLD Vintrace UI Reports section.
@@ -1408,7 +1403,7 @@ async def click_vintage_harvest_tab_old_ui(page: Page):
     # Sort by historical success
     selectors = get_sorted_selectors("click_vintage_harvest_tab_old_ui", selectors)
 
-    for selector in selectors:
+    for selector in selector_attempts(selectors):
         try:
             await page.wait_for_selector(selector, timeout=SHORT_TIMEOUT)
             element = await page.query_selector(selector)
@@ -1424,7 +1419,7 @@ async def click_vintage_harvest_tab_old_ui(page: Page):
                     "Vintage/Harvest tab in old UI"
                 )
                 await wait_for_all_vintrace_loaders(page)
-                await asyncio.sleep(1)
+                await wait_for_dom_quiet(page)
                 return True
         except Exception:
             continue
@@ -1444,7 +1439,7 @@ async def click_vintage_harvest_tab_old_ui(page: Page):
                 "Vintage/Harvest tab via xpath"
             )
             await wait_for_all_vintrace_loaders(page)
-            await asyncio.sleep(1)
+            await wait_for_dom_quiet(page)
             return True
     except Exception as e:
         print(f"❌ Could not click 'Vintage/Harvest': {e}")
@@ -1457,6 +1452,7 @@ async def click_vintage_harvest_tab_old_ui(page: Page):
 # REPORT INTERACTION HELPERS
 # ============================================================================
 
+@traced()
 async def find_report_strip_by_title(page: Page, report_title: str):
     """
     Find a specific report strip section by its title.
@@ -1502,6 +1498,7 @@ async def find_report_strip_by_title(page: Page, report_title: str):
         return None
 
 
+@traced()
 async def select_report_format(report_strip, format_type: str = "CSV"):
     """
     Select the output format for a report (PDF, CSV, Excel).
@@ -1544,7 +1541,7 @@ async def select_report_format(report_strip, format_type: str = "CSV"):
                         f"format_{format_type}",
                         f"Report format: {format_type}"
                     )
-                    await asyncio.sleep(0.5)
+                    await wait_for_element_settled(report_strip)
                     return True
 
         print(f"⚠ Could not find {format_type} format option")
@@ -1555,6 +1552,7 @@ async def select_report_format(report_strip, format_type: str = "CSV"):
         return False
 
 
+@traced()
 async def set_report_checkbox(report_strip, checkbox_label: str, checked: bool):
     """
     Set a checkbox within a report strip by its label text.
@@ -1606,7 +1604,7 @@ async def set_report_checkbox(report_strip, checkbox_label: str, checked: bool):
                                 f"checkbox_{checkbox_label}",
                                 f"Checkbox: {checkbox_label}"
                             )
-                            await asyncio.sleep(0.3)
+                            await wait_for_element_settled(report_strip)
                             return True
                         else:
                             print(f"✓ Checkbox '{checkbox_label}' already in desired state")
@@ -1633,7 +1631,7 @@ async def set_report_checkbox(report_strip, checkbox_label: str, checked: bool):
                                 f"checkbox_{checkbox_label}",
                                 f"Checkbox: {checkbox_label}"
                             )
-                            await asyncio.sleep(0.3)
+                            await wait_for_element_settled(report_strip)
                             return True
 
         print(f"⚠ Could not find checkbox for '{checkbox_label}'")
@@ -1644,6 +1642,7 @@ async def set_report_checkbox(report_strip, checkbox_label: str, checked: bool):
         return False
 
 
+@traced()
 async def select_report_dropdown_option(report_strip, option_text: str, dropdown_index: int = 0):
     """
     Select an option from a dropdown within a report strip.
@@ -1687,7 +1686,7 @@ async def select_report_dropdown_option(report_strip, option_text: str, dropdown
                     f"dropdown_{option_text}",
                     f"Dropdown option: {option_text}"
                 )
-                await asyncio.sleep(0.3)
+                await wait_for_element_settled(report_strip)
                 return True
 
         print(f"⚠ Could not find option '{option_text}'")
@@ -1698,6 +1697,7 @@ async def select_report_dropdown_option(report_strip, option_text: str, dropdown
         return False
 
 
+@traced()
 async def click_generate_button(report_strip):
     """
     Click the "Generate" or "Generate..." button within a report strip.
@@ -1720,12 +1720,11 @@ async def click_generate_button(report_strip):
     # Sort by historical success
     generate_selectors = get_sorted_selectors("click_generate_button", generate_selectors)
 
-    for selector in generate_selectors:
+    for selector in selector_attempts(generate_selectors):
         try:
             btn = await report_strip.query_selector(selector)
             if btn:
                 await btn.scroll_into_view_if_needed()
-                await asyncio.sleep(0.3)
                 await btn.click()
                 print("✓ Clicked 'Generate' button")
                 track_selector(
@@ -1735,7 +1734,7 @@ async def click_generate_button(report_strip):
                     "generate_button",
                     "Generate button for report"
                 )
-                await asyncio.sleep(0.5)
+                await wait_for_element_settled(report_strip)
                 return True
         except Exception:
             continue
@@ -1748,7 +1747,6 @@ async def click_generate_button(report_strip):
         )
         if btn:
             await btn.scroll_into_view_if_needed()
-            await asyncio.sleep(0.3)
             await btn.click()
             print("✓ Clicked 'Generate' button (xpath)")
             track_selector(
@@ -1758,7 +1756,7 @@ async def click_generate_button(report_strip):
                 "generate_button",
                 "Generate button via xpath"
             )
-            await asyncio.sleep(0.5)
+            await wait_for_element_settled(report_strip)
             return True
     except Exception as e:
         print(f"❌ Could not click 'Generate' button: {e}")
@@ -1767,6 +1765,7 @@ async def click_generate_button(report_strip):
     return False
 
 
+@traced()
 async def download_report_from_strip(page: Page, report_strip, save_dir: str, timeout_ms: int = DOWNLOAD_TIMEOUT_MS):
     """
     Trigger report download and save the file.
@@ -1786,23 +1785,14 @@ async def download_report_from_strip(page: Page, report_strip, save_dir: str, ti
     os.makedirs(save_dir, exist_ok=True)
 
     try:
-        # Click generate and wait for download
-        async with page.expect_download(timeout=timeout_ms) as download_info:
-            await click_generate_button(report_strip)
-
-        download = await download_info.value
-        temp_path = await download.path()
-        filename = download.suggested_filename
-
-        # Move to target directory
-        target_path = os.path.join(save_dir, filename)
-
-        if os.path.exists(target_path):
-            os.remove(target_path)
-
-        shutil.move(temp_path, target_path)
+        # Click generate and wait for the file (captured response or browser download)
+        target_path = await save_report_download(
+            page, lambda: click_generate_button(report_strip), save_dir=save_dir, timeout_ms=timeout_ms
+        )
+        if not target_path:
+            raise RuntimeError("no download received")
 
-        print(f"✓ Downloaded: {filename}")
+        print(f"✓ Downloaded: {os.path.basename(target_path)}")
         print(f"  Saved to: {target_path}")
 
         return target_path
@@ -1813,6 +1803,152 @@ async def download_report_from_strip(page: Page, report_strip, save_dir: str, ti
         return None
 
 
+# ============================================================================
+# REPORT DOWNLOAD / RESPONSE CAPTURE
+# ============================================================================
+
+# Response types that carry a report file
+REPORT_CONTENT_TYPES = (
+    "text/csv",
+    "application/csv",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/octet-stream",
+)
+# Only navigations can become downloads; XHR, scripts, images... are passed straight through
+CAPTURE_RESOURCE_TYPES = ("document", "other")
+
+# How each report was obtained this run: {"response": n, "download": n}
+CAPTURE_STATS = {"response": 0, "download": 0}
+
+
+def is_report_response(headers: Dict[str, str]) -> bool:
+    """True when response headers describe a file (attachment or spreadsheet/CSV content type)."""
+    disposition = headers.get("content-disposition", "").lower()
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return "attachment" in disposition or content_type in REPORT_CONTENT_TYPES
+
+
+def response_filename(headers: Dict[str, str]) -> Optional[str]:
+    """Filename from a Content-Disposition header, if any."""
+    disposition = headers.get("content-disposition", "")
+    for part in disposition.split(";"):
+        name, _, value = part.strip().partition("=")
+        if name.lower() in ("filename", "filename*") and value:
+            value = value.strip().strip('"')
+            if name.lower() == "filename*" and "''" in value:
+                value = value.split("''", 1)[1]
+            return os.path.basename(value)
+    return None
+
+
+def _write_atomic(path: str, body: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+@traced()
+async def save_report_download(
+    page: Page,
+    trigger,
+    save_path: Optional[str] = None,
+    save_dir: Optional[str] = None,
+    timeout_ms: int = DOWNLOAD_TIMEOUT_MS,
+    capture: Optional[bool] = None,
+    on_payload=None,
+) -> Optional[str]:
+    """
+    Run `trigger` (the click that starts a report download) and save the resulting file.
+
+    With capture on, the page's document requests are routed while the trigger runs and
+    the first response that looks like a file is written to disk straight from the HTTP
+    body; the browser gets an empty 204 instead, so no download is started. If no such
+    response shows up, the normal browser download is used as before.
+
+    Args:
+        page: Playwright Page object the report is generated on
+        trigger: Async callable that clicks the generate/CSV button
+        save_path: Where to save the file (default: save_dir + the server's filename)
+        save_dir: Directory for the server-suggested filename when save_path is not given
+        timeout_ms: How long to wait for the file
+        capture: Capture from the response (default: VINTRACE_CAPTURE_RESPONSES)
+        on_payload: Optional callable(bytes) given the captured body before it is written
+
+    Returns:
+        str or None: Path of the saved file, or None if nothing arrived
+    """
+    capture = CAPTURE_REPORT_RESPONSES if capture is None else capture
+    loop = asyncio.get_running_loop()
+    captured = loop.create_future()
+
+    def target_for(filename: Optional[str]) -> str:
+        if save_path:
+            return save_path
+        return os.path.join(save_dir or ".", filename or f"report_{datetime.datetime.now():%Y%m%d_%H%M%S}")
+
+    async def handle_route(route):
+        request = route.request
+        if captured.done() or request.resource_type not in CAPTURE_RESOURCE_TYPES:
+            await route.fallback()
+            return
+        try:
+            response = await route.fetch(timeout=timeout_ms)
+        except Exception:
+            await route.fallback()
+            return
+        if not is_report_response(response.headers):
+            await route.fulfill(response=response)
+            return
+        try:
+            body = await response.body()
+            if on_payload:
+                on_payload(body)
+            path = target_for(response_filename(response.headers))
+            _write_atomic(path, body)
+            if not captured.done():
+                captured.set_result(path)
+            await route.fulfill(status=204, body="")
+        except Exception as e:
+            print(f"⚠ Response capture failed, letting the browser download it: {e}")
+            await route.fulfill(response=response)
+
+    if capture:
+        await page.route("**/*", handle_route)
+    download_task = asyncio.ensure_future(page.wait_for_event("download", timeout=timeout_ms))
+    try:
+        await trigger()
+        done, _ = await asyncio.wait(
+            {captured, download_task}, timeout=timeout_ms / 1000, return_when=asyncio.FIRST_COMPLETED
+        )
+        if captured in done:
+            CAPTURE_STATS["response"] += 1
+            print(f"📡 Captured report from response: {captured.result()}")
+            return captured.result()
+        if download_task in done and download_task.exception() is None:
+            download = download_task.result()
+            path = target_for(download.suggested_filename)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path):
+                os.remove(path)
+            shutil.move(await download.path(), path)
+            CAPTURE_STATS["download"] += 1
+            if capture:
+                print("  (no matching response seen; used the browser download)")
+            return path
+        print("❌ No report download arrived")
+        return None
+    finally:
+        if not download_task.done():
+            download_task.cancel()
+        elif not download_task.cancelled():
+            download_task.exception()  # mark retrieved
+        if capture:
+            await page.unroute("**/*", handle_route)
+
+
 # ============================================================================
 # COMBINED WORKFLOW HELPER
 # ============================================================================
@@ -1846,6 +1982,7 @@ async def save_debug_screenshot(page: Page, name: str):
         return None
 
 
+@traced()
 async def configure_and_download_report(
     page: Page,
     report_title: str,
@@ -1910,37 +2047,29 @@ async def configure_and_download_report(
 # BROWSER INITIALIZATION
 # ============================================================================
 
-async def initialize_browser(playwright_instance, headless: bool = False):
+@traced()
+async def initialize_browser(playwright_instance, headless: Optional[bool] = None, profile: str = BROWSER_PROFILE):
     """
     Initialize a Playwright browser with standard settings.
+    The lean profile (default, see vintrace_browser.py) blocks fonts/media/third-party
+    hosts and stubs images; profile="full" loads everything.
     
     Args:
         playwright_instance: Playwright instance from async_playwright()
-        headless: Whether to run in headless mode (default: False)
+        headless: Whether to run in headless mode (default: VINTRACE_HEADLESS, on)
+        profile: "lean" or "full" (default: VINTRACE_BROWSER_PROFILE)
         
     Returns:
         tuple: (browser, context, page)
     """
-    print("🌐 Initializing browser...")
-    
-    # Launch browser with standard options
-    browser = await playwright_instance.chromium.launch(
-        headless=headless,
-        args=[
-            '--disable-blink-features=AutomationControlled',
-            '--disable-dev-shm-usage',
-            '--no-sandbox'
-        ]
-    )
+    print(f"🌐 Initializing browser ({profile} profile, {'headless' if resolve_headless(headless) else 'headed'})...")
     
-    # Create context with realistic viewport
-    context = await browser.new_context(
-        viewport={'width': 1920, 'height': 1080},
-        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    )
+    browser = await launch_browser(playwright_instance, headless=headless, profile=profile)
+    context, blocker = await new_browser_context(browser, profile=profile, accept_downloads=True)
     
     # Create page
     page = await context.new_page()
+    track_page_loads(page, blocker)
     
     # Set longer default timeouts
     page.set_default_timeout(60000)  # 60 seconds
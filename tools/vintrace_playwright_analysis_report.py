@@ -309,7 +309,7 @@ async def main():
 
     async with async_playwright() as p:
         # Initialize browser using helper
-        browser, context, page = await initialize_browser(p, headless=False)
+        browser, context, page = await initialize_browser(p)
 
         # Login using helper - navigate_to_old_url=TRUE to use old Vintrace interface
         print("\n🔄 Logging in and navigating to OLD Vintrace UI...")
@@ -1,14 +1,17 @@
 #python tools/vintrace_playwright_dispatch_search_console.py --mode recent --days 7
+#python tools/vintrace_playwright_dispatch_search_console.py --mode recent --days 7 --tabs 3   (3 dispatches at once)
 
 import asyncio
 import os
 import sys
 import datetime
-import shutil
 import re
 import csv
+import json
 import argparse
-from playwright.async_api import async_playwright, Page
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+from playwright.async_api import async_playwright, BrowserContext, Page
 
 # Import helper functions
 from vintrace_helpers import (
@@ -16,8 +19,13 @@ from vintrace_helpers import (
     vintrace_login,
     wait_for_all_vintrace_loaders,
     initialize_browser,
-    LARGE_TIMEOUT
+    save_report_download,
+    CAPTURE_STATS,
+    LARGE_TIMEOUT,
+    OLD_URL
 )
+from dispatch_manifest import get_dispatch_manifest
+from vintrace_waits import print_wait_summary, wait_for_button_count, wait_for_dom_quiet, wait_for_ui_settled
 
 CSV_SAVE_DIR = "Main/data/vintrace_reports/disp_console/"
 os.makedirs(CSV_SAVE_DIR, exist_ok=True)
@@ -25,6 +33,13 @@ os.makedirs(CSV_SAVE_DIR, exist_ok=True)
 ALL_DISPATCHES_CSV = "Main/data/vintrace_reports/all_dispatches.csv"
 MISSING_DISPATCHES_CSV = "Main/data/vintrace_reports/disp_console/missing_dispatches.csv"
 DOWNLOAD_TIMEOUT = 240000  # 4 minutes
+# None = VINTRACE_CAPTURE_RESPONSES; --capture-responses turns it on for this run
+CAPTURE_RESPONSES = None
+# Dispatches processed at once, each in its own page of the logged-in context
+DISPATCH_TABS = int(os.getenv("DISPATCH_TABS", "1"))
+# Attempts per dispatch before the batch gives up on it (per checkpoint, so across restarts too)
+DISPATCH_MAX_ATTEMPTS = int(os.getenv("DISPATCH_MAX_ATTEMPTS", "3"))
+CHECKPOINT_PATH = os.path.join(CSV_SAVE_DIR, "dispatch_checkpoint.json")
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -63,33 +78,15 @@ def date_to_ui_format(date_str):
 # ============================================================================
 
 def check_files_exist(date, bol, quantity, code):
-    """Check if both CSV files exist for a given record."""
-    files = os.listdir(CSV_SAVE_DIR)
-    bol_s = sanitize_filename(bol)
-    date_s = sanitize_filename(date)
-    qty_s = sanitize_filename(quantity)
-    code_s = sanitize_filename(code)
-    
-    bulk_pattern = f"report_1_BOL_{bol_s}_Date_{date_s}_Qty_{qty_s}_Code_{code_s}.csv"
-    fruit_pattern = f"report_2_BOL_{bol_s}_Date_{date_s}_Qty_{qty_s}_Code_{code_s}.csv"
-    
-    return bulk_pattern in files and fruit_pattern in files
+    """Check if both CSV files exist for a given record (any code when code is blank)."""
+    manifest = get_dispatch_manifest(CSV_SAVE_DIR)
+    if code:
+        return manifest.is_complete(date, bol, quantity, code)
+    return manifest.has_complete(date, bol, quantity)
 
 def already_downloaded_files():
     """Returns a set of records (date, bol, quantity, code) for which both CSVs exist."""
-    existing = set()
-    files = os.listdir(CSV_SAVE_DIR)
-    pattern = r"report_1_BOL_(.+?)_Date_(.+?)_Qty_(.+?)_Code_(.+)\.csv"
-    
-    for fn in files:
-        m = re.match(pattern, fn)
-        if m:
-            bol, date, quantity, code = m.group(1), m.group(2), m.group(3), m.group(4)
-            bulk_fn = f"report_1_BOL_{bol}_Date_{date}_Qty_{quantity}_Code_{code}.csv"
-            fruit_fn = f"report_2_BOL_{bol}_Date_{date}_Qty_{quantity}_Code_{code}.csv"
-            if bulk_fn in files and fruit_fn in files:
-                existing.add((date, bol, quantity, code))
-    return existing
+    return get_dispatch_manifest(CSV_SAVE_DIR).complete_keys()
 
 def load_all_dispatches(csv_path):
     """Load all dispatches from CSV as list of dicts."""
@@ -108,19 +105,11 @@ def load_all_dispatches(csv_path):
 def find_missing_dispatches():
     """Compare all_dispatches.csv with downloaded files and return missing records."""
     all_dispatches = load_all_dispatches(ALL_DISPATCHES_CSV)
-    fetched = already_downloaded_files()
-    
-    missing = []
-    for rec in all_dispatches:
-        key = (
-            sanitize_filename(rec["date"]), 
-            sanitize_filename(rec["bol"]), 
-            sanitize_filename(rec["quantity"]), 
-            sanitize_filename(rec["code"])
-        )
-        if key not in fetched:
-            missing.append(rec)
-    
+    manifest = get_dispatch_manifest(CSV_SAVE_DIR)
+    # Pick up files copied in or deleted by hand since the last run
+    manifest.reconcile()
+    fetched = manifest.complete_keys()
+    missing = manifest.missing(all_dispatches)
     return all_dispatches, fetched, missing
 
 # ============================================================================
@@ -231,7 +220,7 @@ async def select_dispatch_row(page: Page, target_date: str, target_bol: str, tar
                 await wait_for_all_vintrace_loaders(page)
                 await row.click()
                 print(f"Selected row: Date={date}, BOL={bol}, Qty={quantity}")
-                await page.wait_for_timeout(2000)
+                await wait_for_ui_settled(page)
                 code = (await cells[4].inner_text()).strip()
                 return {
                     "date": date,
@@ -249,7 +238,7 @@ async def click_view_wine_details(page: Page):
         await page.wait_for_selector('button:has-text("View wine details")', timeout=LARGE_TIMEOUT)
         await page.click('button:has-text("View wine details")')
         print('Clicked "View wine details".')
-        await page.wait_for_timeout(2000)
+        await wait_for_ui_settled(page)
         return True
     except Exception as e:
         print(f'Could not click "View wine details": {e}')
@@ -258,16 +247,8 @@ async def click_view_wine_details(page: Page):
 async def click_fruit_tab(page: Page):
     """Click the Fruit tab in the wine details window."""
     try:
-        # Check if loader is visible before clicking
-        is_visible = await page.evaluate("""
-            () => {
-                const el = document.getElementById('serverDelayMessageLong');
-                return el && getComputedStyle(el).visibility === 'visible';
-            }
-        """)
-        if is_visible:
-            print("Loader visible, waiting 6 seconds...")
-            await page.wait_for_timeout(6000)
+        # Let any loader finish before clicking
+        await wait_for_all_vintrace_loaders(page)
         
         await page.wait_for_selector('div.tabInactive, div.tabActive', timeout=LARGE_TIMEOUT)
         tabs = await page.query_selector_all('div.tabInactive, div.tabActive')
@@ -288,12 +269,7 @@ async def click_fruit_tab(page: Page):
                 await wait_for_vintrace_loader(page)
                 
                 # Wait for CSV buttons to appear
-                for _ in range(10):
-                    csv_buttons = await page.query_selector_all('button:visible')
-                    csv_count = sum(1 for btn in csv_buttons if (await btn.inner_text()).strip() == "CSV")
-                    if csv_count >= 2:
-                        break
-                    await page.wait_for_timeout(500)
+                await wait_for_button_count(page, "CSV", 2, timeout=5000)
                 
                 return True
         
@@ -307,6 +283,7 @@ async def download_csv_files(page: Page, info: dict):
     """Download both CSV files from the Fruit tab."""
     try:
         await page.wait_for_selector('button:visible', timeout=LARGE_TIMEOUT)
+        await wait_for_button_count(page, "CSV", 2, timeout=5000)
         
         # Find CSV buttons
         csv_buttons = []
@@ -315,30 +292,12 @@ async def download_csv_files(page: Page, info: dict):
             if text == "CSV":
                 csv_buttons.append(button)
         
-        # Retry finding buttons if needed
-        retries = 0
-        while len(csv_buttons) < 2 and retries < 10:
-            await page.wait_for_timeout(500)
-            csv_buttons = []
-            for button in await page.query_selector_all('button:visible'):
-                text = (await button.inner_text()).strip()
-                if text == "CSV":
-                    csv_buttons.append(button)
-            retries += 1
-        
         if len(csv_buttons) != 2:
             print(f"Expected 2 CSV buttons, found {len(csv_buttons)}.")
             return False
         
         # Download both files
         for idx, button in enumerate(csv_buttons):
-            async with page.expect_download(timeout=DOWNLOAD_TIMEOUT) as download_info:
-                await button.click()
-                print(f'Clicked CSV button #{idx+1}')
-            
-            download = await download_info.value
-            temp_path = await download.path()
-            
             # Build filename
             bol = sanitize_filename(info['bol'])
             date = sanitize_filename(info['date'])
@@ -348,7 +307,16 @@ async def download_csv_files(page: Page, info: dict):
             filename = f"report_{idx+1}_BOL_{bol}_Date_{date}_Qty_{quantity}_Code_{code}.csv"
             save_path = os.path.join(CSV_SAVE_DIR, filename)
             
-            shutil.move(temp_path, save_path)
+            saved = await save_report_download(
+                page, button.click, save_path=save_path, timeout_ms=DOWNLOAD_TIMEOUT, capture=CAPTURE_RESPONSES
+            )
+            print(f'Clicked CSV button #{idx+1}')
+            if not saved:
+                print(f"CSV #{idx+1} did not arrive.")
+                return False
+            get_dispatch_manifest(CSV_SAVE_DIR).record_download(
+                info['date'], info['bol'], info['quantity'], info['code'], idx + 1, filename
+            )
             print(f"Saved: {filename}")
         
         return True
@@ -366,13 +334,16 @@ async def close_wine_details_window(page: Page):
             if await button.is_visible():
                 await button.scroll_into_view_if_needed()
                 await button.click()
-                await page.wait_for_timeout(1000)
                 
                 # Check if window closed
                 try:
-                    visible = await button.is_visible()
-                except Exception:
+                    await button.wait_for_element_state("hidden", timeout=5000)
                     visible = False
+                except Exception:
+                    try:
+                        visible = await button.is_visible()
+                    except Exception:
+                        visible = False
                 
                 if not visible:
                     print("Closed wine details window.")
@@ -380,7 +351,7 @@ async def close_wine_details_window(page: Page):
         
         await wait_for_all_vintrace_loaders(page)
         await page.wait_for_selector("#c_305_tbody > tr", state="visible", timeout=LARGE_TIMEOUT)
-        await page.wait_for_timeout(500)
+        await wait_for_dom_quiet(page)
         return True
     except Exception as e:
         print(f"Error closing window: {e}")
@@ -412,7 +383,7 @@ async def process_single_dispatch(page: Page, record: dict, search_first: bool =
     print(f"{'='*60}")
     
     # Check if files already exist
-    if code and check_files_exist(date, bol, quantity, code):
+    if check_files_exist(date, bol, quantity, code):
         print("✓ Files already exist, skipping.")
         return True
     
@@ -422,7 +393,7 @@ async def process_single_dispatch(page: Page, record: dict, search_first: bool =
             date_ui = date_to_ui_format(date)
             await fill_dispatch_search_form(page, from_date=date_ui, to_date=date_ui, bol=bol)
             await click_search_button(page)
-            await page.wait_for_timeout(1000)
+            await wait_for_ui_settled(page)
         
         # Select the row
         info = await select_dispatch_row(page, date, bol, quantity)
@@ -458,46 +429,233 @@ async def process_single_dispatch(page: Page, record: dict, search_first: bool =
         print(f"✗ Error processing dispatch: {e}")
         return False
 
-async def mode_recent(page: Page, days: int = 7):
+# ============================================================================
+# BATCH CHECKPOINT
+# ============================================================================
+
+def record_key(record: dict) -> str:
+    return f"{record['date']}|{record['bol']}|{record['quantity']}"
+
+class DispatchCheckpoint:
+    """
+    Progress of one batch (a recent date range or a fetch CSV), saved after every record.
+
+    The manifest already knows which dispatches are downloaded; the checkpoint adds what a
+    restart needs on top of that: how many times each record has failed, so a crash or
+    Ctrl+C resumes where it stopped and a dispatch that keeps failing is not retried forever.
+    A different batch replaces the file; a batch that finishes without failures deletes it.
+
+    Args:
+        run_id: Identifies the batch (mode and its arguments)
+        path: Checkpoint file (default: <CSV_SAVE_DIR>/dispatch_checkpoint.json)
+        fresh: Ignore an existing checkpoint for the same batch
+    """
+
+    def __init__(self, run_id: str, path: str = CHECKPOINT_PATH, fresh: bool = False):
+        self.run_id = run_id
+        self.path = path
+        self.records: Dict[str, Dict] = {}
+        if not fresh and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("run") == run_id:
+                    self.records = saved.get("records", {})
+                    print(f"↻ Resuming {run_id} from checkpoint ({len(self.records)} record(s) seen)")
+            except (OSError, ValueError) as e:
+                print(f"⚠ Ignoring unreadable checkpoint {path}: {e}")
+
+    def attempts(self, record: dict) -> int:
+        return self.records.get(record_key(record), {}).get("attempts", 0)
+
+    def is_done(self, record: dict) -> bool:
+        return self.records.get(record_key(record), {}).get("status") == "done"
+
+    def mark(self, record: dict, status: str, error: str = "") -> None:
+        entry = self.records.setdefault(record_key(record), {"attempts": 0})
+        entry["status"] = status
+        if status == "failed":
+            entry["attempts"] += 1
+            entry["error"] = error
+        self.save()
+
+    def failed(self) -> List[str]:
+        return [key for key, entry in self.records.items() if entry.get("status") == "failed"]
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run": self.run_id, "records": self.records}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def finish(self) -> None:
+        if not self.failed() and os.path.exists(self.path):
+            os.remove(self.path)
+
+# ============================================================================
+# CONCURRENT TABS
+# ============================================================================
+
+async def reset_tab(page: Page, prepare: Optional[Callable[[Page], Awaitable]] = None):
+    """Reload old Vintrace in this tab and reopen Dispatch search (after a failure or for a new tab)."""
+    await page.goto(OLD_URL, timeout=LARGE_TIMEOUT)
+    await wait_for_all_vintrace_loaders(page)
+    await show_dispatch_search_options(page)
+    if prepare:
+        await prepare(page)
+
+async def dispatch_tab_worker(tab_id, context: BrowserContext, page: Page, queue: asyncio.Queue,
+                              retries: deque, checkpoint: DispatchCheckpoint, counts: Dict[str, int],
+                              search_first: bool, prepare: Optional[Callable[[Page], Awaitable]], max_attempts: int):
+    """
+    Take records off the queue until the None sentinel; a failure only resets this tab.
+
+    A failed record goes onto `retries` (fed back ahead of new records, to any tab) until
+    it has failed max_attempts times according to the checkpoint.
+    """
+    tag = f"[T{tab_id}]"
+    while True:
+        record = await queue.get()
+        if record is None:
+            return
+        print(f"{tag} {record['date']} BOL {record['bol']} Qty {record['quantity']}")
+        try:
+            ok = await process_single_dispatch(page, record, search_first=search_first)
+            error = "" if ok else "not downloaded"
+        except Exception as e:
+            ok, error = False, str(e)
+
+        if ok:
+            checkpoint.mark(record, "done")
+            counts["succeeded"] += 1
+        else:
+            checkpoint.mark(record, "failed", error)
+            if checkpoint.attempts(record) < max_attempts:
+                print(f"{tag} ⚠ Failed ({error}); attempt {checkpoint.attempts(record)}/{max_attempts}, will retry")
+                retries.append(record)
+            else:
+                print(f"{tag} ❌ Giving up after {max_attempts} attempt(s): {error}")
+                counts["failed"] += 1
+            try:
+                if page.is_closed():
+                    page = await context.new_page()
+                await reset_tab(page, prepare)
+            except Exception as e:
+                print(f"{tag} ⚠ Could not reset tab: {e}")
+        counts["in_flight"] -= 1
+
+async def run_dispatch_batch(page: Page, records: List[dict], run_id: str, search_first: bool,
+                             prepare: Optional[Callable[[Page], Awaitable]] = None, tabs: int = DISPATCH_TABS,
+                             max_attempts: int = DISPATCH_MAX_ATTEMPTS, fresh: bool = False):
+    """
+    Download `records` with up to `tabs` pages of page's context working a bounded queue.
+
+    Args:
+        page: Logged-in page on Dispatch search (becomes tab 1)
+        records: Dicts with date, bol, quantity (and optionally code)
+        run_id: Checkpoint identity for this batch
+        search_first: Search each record by date/BOL before selecting it (fetch mode)
+        prepare: Brings a reset tab back to a state where records can be selected (recent mode search)
+        tabs: Pages processing dispatches at once
+        max_attempts: Attempts per record across tabs and restarts
+        fresh: Ignore an existing checkpoint for this batch
+    """
+    checkpoint = DispatchCheckpoint(run_id, fresh=fresh)
+    todo = []
+    skip_count = 0
+    for record in records:
+        # No code in recent mode; the manifest matches on date/BOL/quantity under any code
+        if check_files_exist(record['date'], record['bol'], record['quantity'], record.get('code', '')) \
+                or checkpoint.is_done(record):
+            skip_count += 1
+        elif checkpoint.attempts(record) >= max_attempts:
+            print(f"⏭ Skipping {record_key(record)}: failed {checkpoint.attempts(record)} time(s) in an earlier run")
+            skip_count += 1
+        else:
+            todo.append(record)
+    print(f"{len(todo)} to download, {skip_count} skipped (already downloaded or given up).")
+
+    counts = {"succeeded": 0, "failed": 0, "in_flight": 0}
+    tab_count = max(1, min(tabs, len(todo)))
+    context = page.context
+    pages = [page]
+    for _ in range(tab_count - 1):
+        tab = await context.new_page()
+        try:
+            await reset_tab(tab, prepare)
+            pages.append(tab)
+        except Exception as e:
+            print(f"⚠ Could not open an extra tab: {e}")
+            await tab.close()
+    if len(pages) > 1:
+        print(f"Processing with {len(pages)} tabs.")
+
+    # One record per tab in flight plus one waiting each; retries go ahead of new records
+    queue: asyncio.Queue = asyncio.Queue(maxsize=len(pages))
+    retries: deque = deque()
+    remaining = iter(todo)
+
+    async def feed():
+        while True:
+            if retries:
+                record = retries.popleft()
+            else:
+                record = next(remaining, None)
+                if record is None:
+                    if counts["in_flight"] == 0 and not retries:
+                        break
+                    # A record still being processed may come back as a retry
+                    await asyncio.sleep(0.5)
+                    continue
+            counts["in_flight"] += 1
+            await queue.put(record)
+        for _ in pages:
+            await queue.put(None)
+
+    try:
+        await asyncio.gather(
+            feed(),
+            *(dispatch_tab_worker(i + 1, context, tab, queue, retries, checkpoint, counts, search_first, prepare,
+                                  max_attempts)
+              for i, tab in enumerate(pages)),
+        )
+    finally:
+        for tab in pages[1:]:
+            if not tab.is_closed():
+                await tab.close()
+
+    checkpoint.finish()
+    print(f"\n{'='*60}")
+    print(f"SUMMARY: {counts['succeeded']} succeeded, {skip_count} skipped, {counts['failed']} failed")
+    if checkpoint.failed():
+        print(f"Checkpoint kept at {checkpoint.path}; rerun with --fresh to retry records that were given up on.")
+    print(f"{'='*60}\n")
+
+async def mode_recent(page: Page, days: int = 7, tabs: int = DISPATCH_TABS, fresh: bool = False):
     """Download dispatches from the last N days (skip existing)."""
     print(f"\n{'='*60}")
     print(f"MODE: RECENT (last {days} days)")
     print(f"{'='*60}\n")
     
     from_date, to_date = get_date_range(days)
-    
+
+    async def search_range(tab: Page):
+        await fill_dispatch_search_form(tab, from_date=from_date, to_date=to_date)
+        await click_search_button(tab)
+        await wait_for_ui_settled(tab)
+
     # Perform search
-    await fill_dispatch_search_form(page, from_date=from_date, to_date=to_date)
-    await click_search_button(page)
-    await page.wait_for_timeout(1000)
+    await search_range(page)
     
     # Get all records
     keys = await get_dispatch_table_keys(page)
     print(f"\nFound {len(keys)} dispatches in date range.")
     
-    # Process each record
-    success_count = 0
-    skip_count = 0
-    fail_count = 0
-    
-    for i, (date, bol, quantity) in enumerate(keys, 1):
-        print(f"\n--- Record {i}/{len(keys)} ---")
-        record = {"date": date, "bol": bol, "quantity": quantity}
-        
-        # We don't have code yet, so we can't check file existence perfectly
-        # Just try to process and let it handle duplicates
-        result = await process_single_dispatch(page, record, search_first=False)
-        
-        if result:
-            success_count += 1
-        else:
-            fail_count += 1
-    
-    print(f"\n{'='*60}")
-    print(f"SUMMARY: {success_count} succeeded, {skip_count} skipped, {fail_count} failed")
-    print(f"{'='*60}\n")
+    records = [{"date": date, "bol": bol, "quantity": quantity} for date, bol, quantity in keys]
+    await run_dispatch_batch(page, records, f"recent:{from_date}-{to_date}", search_first=False,
+                             prepare=search_range, tabs=tabs, fresh=fresh)
 
-async def mode_fetch(page: Page, csv_path: str):
+async def mode_fetch(page: Page, csv_path: str, tabs: int = DISPATCH_TABS, fresh: bool = False):
     """Download dispatches from a CSV list."""
     print(f"\n{'='*60}")
     print(f"MODE: FETCH from {csv_path}")
@@ -506,22 +664,8 @@ async def mode_fetch(page: Page, csv_path: str):
     records = load_all_dispatches(csv_path)
     print(f"Loaded {len(records)} records from CSV.")
     
-    success_count = 0
-    skip_count = 0
-    fail_count = 0
-    
-    for i, record in enumerate(records, 1):
-        print(f"\n--- Record {i}/{len(records)} ---")
-        result = await process_single_dispatch(page, record, search_first=True)
-        
-        if result:
-            success_count += 1
-        else:
-            fail_count += 1
-    
-    print(f"\n{'='*60}")
-    print(f"SUMMARY: {success_count} succeeded, {skip_count} skipped, {fail_count} failed")
-    print(f"{'='*60}\n")
+    await run_dispatch_batch(page, records, f"fetch:{os.path.abspath(csv_path)}", search_first=True,
+                             tabs=tabs, fresh=fresh)
 
 def mode_missing():
     """Identify missing dispatches and create CSV."""
@@ -552,6 +696,7 @@ def mode_missing():
 # ============================================================================
 
 async def main():
+    global CAPTURE_RESPONSES
     parser = argparse.ArgumentParser(
         description="Vintrace Dispatch Search Console - Download dispatch CSV reports"
     )
@@ -575,10 +720,35 @@ async def main():
     parser.add_argument(
         '--headless',
         action='store_true',
-        help='Run browser in headless mode'
+        default=None,
+        help='Run browser in headless mode (default: VINTRACE_HEADLESS, on)'
+    )
+    parser.add_argument(
+        '--headed',
+        action='store_false',
+        dest='headless',
+        help='Show the browser window'
+    )
+    parser.add_argument(
+        '--capture-responses',
+        action='store_true',
+        help='Save CSVs straight from the HTTP response (falls back to the browser download)'
+    )
+    parser.add_argument(
+        '--tabs',
+        type=int,
+        default=DISPATCH_TABS,
+        help=f'Dispatches processed at once, one browser tab each (default: DISPATCH_TABS, {DISPATCH_TABS})'
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='Ignore the checkpoint from an interrupted run of the same batch'
     )
     
     args = parser.parse_args()
+    if args.capture_responses:
+        CAPTURE_RESPONSES = True
     
     # Mode: missing (no browser needed)
     if args.mode == 'missing':
@@ -612,13 +782,15 @@ async def main():
             
             # Run appropriate mode
             if args.mode == 'recent':
-                await mode_recent(page, days=args.days)
+                await mode_recent(page, days=args.days, tabs=args.tabs, fresh=args.fresh)
             elif args.mode == 'fetch':
-                await mode_fetch(page, args.csv)
+                await mode_fetch(page, args.csv, tabs=args.tabs, fresh=args.fresh)
             
             print("✓ Done.")
+            print(f"Reports from responses: {CAPTURE_STATS['response']}, from downloads: {CAPTURE_STATS['download']}")
             
         finally:
+            print_wait_summary()
             await browser.close()
 
 if __name__ == "__main__":
@@ -9,6 +9,8 @@ import csv
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright, Page
 
+from dispatch_manifest import get_dispatch_manifest
+
 CSV_SAVE_DIR = "Main/data/vintrace_reports/disp_console/"
 os.makedirs(CSV_SAVE_DIR, exist_ok=True)
 LARGE_TIMEOUT = 120000  # 2 minutes
@@ -281,6 +283,7 @@ async def download_all_csv_buttons(page: Page, save_prefix: str, info: dict):
             fn = f"{save_prefix}_{idx+1}_BOL_{bol}_Date_{date}_Qty_{quantity}_Code_{code}.csv"
             save_path = os.path.join(CSV_SAVE_DIR, fn)
             shutil.move(temp_path, save_path)
+            get_dispatch_manifest(CSV_SAVE_DIR).record_download(date, bol, quantity, code, idx + 1, fn)
             print(f"Downloaded CSV moved to {save_path}")
             filenames.append(save_path)
         return True, True
@@ -8,6 +8,8 @@ import re
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright, Page
 
+from dispatch_manifest import get_dispatch_manifest
+
 CSV_SAVE_DIR = "Main/data/vintrace_reports/disp_console/"
 os.makedirs(CSV_SAVE_DIR, exist_ok=True)
 
@@ -254,6 +256,7 @@ async def download_all_csv_buttons(page: Page, save_prefix: str, info: dict):
             fn = f"{save_prefix}_{idx+1}_BOL_{bol}_Date_{date}_Qty_{quantity}_Code_{code}.csv"
             save_path = os.path.join(CSV_SAVE_DIR, fn)
             shutil.move(temp_path, save_path)
+            get_dispatch_manifest(CSV_SAVE_DIR).record_download(date, bol, quantity, code, idx + 1, fn)
             print(f"Downloaded CSV moved to {save_path}")
             filenames.append(save_path)
         return True, True  # If both downloaded
@@ -311,18 +314,14 @@ async def process_all_table_rows(page: Page):
     row_count = len(keys)
     for i, key_tuple in enumerate(keys):
         print(f"\n--- Processing record {i+1} of {row_count} (Date: {key_tuple[0]}, BOL: {key_tuple[1]}, Qty: {key_tuple[2]}) ---")
-        # Build expected filenames
+        # Skip dispatches whose two CSVs are already in the manifest
         info = {
             "bol": key_tuple[1],
             "date": key_tuple[0],
             "quantity": key_tuple[2],
             "code": ""  # will fill after selecting the row
         }
-        bulk_pattern = f"report_1_BOL_{sanitize_filename(info['bol'])}_Date_{sanitize_filename(info['date'])}_Qty_{sanitize_filename(info['quantity'])}_Code_.*\\.csv"
-        fruit_pattern = f"report_2_BOL_{sanitize_filename(info['bol'])}_Date_{sanitize_filename(info['date'])}_Qty_{sanitize_filename(info['quantity'])}_Code_.*\\.csv"
-        bulk_exists = any(re.fullmatch(bulk_pattern, f) for f in os.listdir(CSV_SAVE_DIR))
-        fruit_exists = any(re.fullmatch(fruit_pattern, f) for f in os.listdir(CSV_SAVE_DIR))
-        if bulk_exists and fruit_exists:
+        if get_dispatch_manifest(CSV_SAVE_DIR).has_complete(info['date'], info['bol'], info['quantity']):
             print(f"Skipping {key_tuple}: Both CSVs already exist.")
             continue
 
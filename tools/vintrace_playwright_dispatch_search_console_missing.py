@@ -1,8 +1,9 @@
 #  python tools/vintrace_playwright_dispatch_search_console_missing.py
-import os
 import csv
 import re
 
+from dispatch_manifest import dispatch_key, get_dispatch_manifest
+
 CSV_SAVE_DIR = "Main/data/vintrace_reports/disp_console/"
 ALL_DISPATCHES_CSV = "Main/data/vintrace_reports/all_dispatches.csv"
 
@@ -35,21 +36,9 @@ def load_all_dispatches(csv_path):
 
 def already_downloaded_files():
     """Returns a set of records (date, bol, quantity, code) for which both CSVs exist."""
-    existing = set()
-    files = os.listdir(CSV_SAVE_DIR)
-    pattern = r"report_1_BOL_(.+?)_Date_(.+?)_Qty_(.+?)_Code_(.+)\.csv"
-    for fn in files:
-        m = re.match(pattern, fn)
-        if m:
-            bol = m.group(1)
-            date = m.group(2)  # already in MM-DD-YYYY
-            quantity = m.group(3)
-            code = m.group(4)
-            bulk_fn = f"report_1_BOL_{sanitize_filename(bol)}_Date_{sanitize_filename(date)}_Qty_{sanitize_filename(quantity)}_Code_{sanitize_filename(code)}.csv"
-            fruit_fn = f"report_2_BOL_{sanitize_filename(bol)}_Date_{sanitize_filename(date)}_Qty_{sanitize_filename(quantity)}_Code_{sanitize_filename(code)}.csv"
-            if bulk_fn in files and fruit_fn in files:
-                existing.add((sanitize_filename(date), sanitize_filename(bol), sanitize_filename(quantity), sanitize_filename(code)))
-    return existing
+    manifest = get_dispatch_manifest(CSV_SAVE_DIR)
+    manifest.reconcile()
+    return manifest.complete_keys()
 
 def main():
     all_dispatches = load_all_dispatches(ALL_DISPATCHES_CSV)
@@ -63,11 +52,7 @@ def main():
     for key in list(fetched)[:5]:
         print(key)
 
-    missing = []
-    for rec in all_dispatches:
-        key = (sanitize_filename(rec["date"]), sanitize_filename(rec["bol"]), sanitize_filename(rec["quantity"]), sanitize_filename(rec["code"]))
-        if key not in fetched:
-            missing.append(rec)
+    missing = [rec for rec in all_dispatches if dispatch_key(rec["date"], rec["bol"], rec["quantity"], rec["code"]) not in fetched]
 
     print(f"\nTotal dispatches in CSV: {len(all_dispatches)}")
     print(f"Already fetched: {len(fetched)}")
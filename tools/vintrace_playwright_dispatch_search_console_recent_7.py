@@ -7,6 +7,8 @@ import shutil
 import re
 from playwright.async_api import async_playwright, Page
 
+from dispatch_manifest import get_dispatch_manifest
+
 # Import helper functions
 from vintrace_helpers import (
     load_vintrace_credentials,
@@ -223,6 +225,7 @@ async def download_all_csv_buttons(page: Page, save_prefix: str, info: dict):
             fn = f"{save_prefix}_{idx+1}_BOL_{bol}_Date_{date}_Qty_{quantity}_Code_{code}.csv"
             save_path = os.path.join(CSV_SAVE_DIR, fn)
             shutil.move(temp_path, save_path)
+            get_dispatch_manifest(CSV_SAVE_DIR).record_download(date, bol, quantity, code, idx + 1, fn)
             print(f"Downloaded CSV moved to {save_path}")
             filenames.append(save_path)
         return True, True
@@ -274,11 +277,7 @@ async def process_all_table_rows(page: Page):
             "quantity": key_tuple[2],
             "code": ""
         }
-        bulk_pattern = f"report_1_BOL_{sanitize_filename(info['bol'])}_Date_{sanitize_filename(info['date'])}_Qty_{sanitize_filename(info['quantity'])}_Code_.*\\.csv"
-        fruit_pattern = f"report_2_BOL_{sanitize_filename(info['bol'])}_Date_{sanitize_filename(info['date'])}_Qty_{sanitize_filename(info['quantity'])}_Code_.*\\.csv"
-        bulk_exists = any(re.fullmatch(bulk_pattern, f) for f in os.listdir(CSV_SAVE_DIR))
-        fruit_exists = any(re.fullmatch(fruit_pattern, f) for f in os.listdir(CSV_SAVE_DIR))
-        if bulk_exists and fruit_exists:
+        if get_dispatch_manifest(CSV_SAVE_DIR).has_complete(info['date'], info['bol'], info['quantity']):
             print(f"Skipping {key_tuple}: Both CSVs already exist.")
             continue
 
@@ -308,7 +307,7 @@ async def main():
 
     async with async_playwright() as p:
         # Initialize browser using helper
-        browser, context, page = await initialize_browser(p, headless=False)
+        browser, context, page = await initialize_browser(p)
 
         try:
             # Login using helper (navigate_to_old_url=True for this script)
@@ -234,7 +234,7 @@ async def main():
 
     async with async_playwright() as p:
         # Initialize browser using helper
-        browser, context, page = await initialize_browser(p, headless=False)
+        browser, context, page = await initialize_browser(p)
 
         # Login using helper (navigate_to_old_url=False for vessel report)
         success = await vintrace_login(page, USERNAME, PASSWORD, navigate_to_old_url=False)
@@ -1,14 +1,20 @@
 #  python tools/vintrace_playwright_work_detailz.py
+#  python tools/vintrace_playwright_work_detailz.py --workers 4 --max-generating 2   (backfill)
+import argparse
 import asyncio
+import contextlib
 import os
 import sys
 import re
-import shutil
 import datetime
-import pandas as pd
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright, Page
 
+from vintrace_browser import launch_browser, new_context as new_browser_context, track_page_loads
+from vintrace_helpers import CAPTURE_STATS, save_report_download
+from report_conversion import ConversionService
+from vintrace_session import get_vintrace_session
+
 CSV_SAVE_DIR = "Main/data/vintrace_reports/work_detailz/"
 os.makedirs(CSV_SAVE_DIR, exist_ok=True)
 
@@ -20,30 +26,6 @@ DAYS_TO_RERUN = 20  # rerun for the most recent N days (ending with today)
 def sanitize_filename(s):
     return re.sub(r'[\\/*?:"<>|]', '_', str(s))
 
-def is_xls_compound_file(filepath):
-    with open(filepath, "rb") as f:
-        sig = f.read(4)
-    return sig == b"\xd0\xcf\x11\xe0"
-
-def convert_xls_to_csv(xls_path, out_csv_path):
-    try:
-        df = pd.read_excel(xls_path, engine='xlrd')
-        df.to_csv(out_csv_path, index=False)
-        print(f"[INFO] Converted XLS to CSV: {out_csv_path}")
-        return out_csv_path
-    except Exception as e:
-        print(f"[WARN] Could not convert {xls_path} as XLS: {e}")
-        return None
-
-def copy_csv_to_converted(csv_path, out_csv_path):
-    try:
-        shutil.copy(csv_path, out_csv_path)
-        print(f"[INFO] Copied CSV to: {out_csv_path}")
-        return out_csv_path
-    except Exception as e:
-        print(f"[WARN] Could not copy {csv_path} to {out_csv_path}: {e}")
-        return None
-
 async def wait_for_all_vintrace_loaders(page: Page, timeout=LARGE_TIMEOUT):
     """Wait for Vintrace loading indicators to disappear"""
     try:
@@ -66,6 +48,14 @@ async def vintrace_login_and_navigate(page: Page, username: str, password: str,
     print("=" * 60)
     print("STEP 1: LOGGING IN")
     print("=" * 60)
+    # Skip the login form when a saved session is still accepted
+    session = get_vintrace_session()
+    if await session.restore(page, old_url):
+        await wait_for_all_vintrace_loaders(page)
+        print(f"✓ Arrived at old vintrace URL: {page.url}")
+        print("=" * 60)
+        return True
+    
     print(f"Navigating to login page: {login_url}")
     await page.goto(login_url, timeout=LARGE_TIMEOUT)
     
@@ -228,6 +218,7 @@ async def vintrace_login_and_navigate(page: Page, username: str, password: str,
         
         print(f"✓ Arrived at old vintrace URL: {page.url}")
         print("=" * 60)
+        await session.save(page.context)
         return True
         
     except Exception as e:
@@ -541,39 +532,55 @@ async def click_generate_button_in_section(section):
     return False
 
 async def download_report_for_day(
-        page, section, from_date, to_date, save_dir, existing_converted):
+        page, section, from_date, to_date, save_dir, existing_converted, generate_slots=None, capture=None,
+        converter=None):
+    """
+    Generate and download one Work Detail report, then convert it to CSV.
+    generate_slots (asyncio.Semaphore) caps how many workers may have a report
+    generating at once. capture takes the file from the HTTP response instead of
+    the browser download (see vintrace_helpers.save_report_download).
+    converter (report_conversion.ConversionService) converts in the background and the
+    next download starts right away; without one the conversion is awaited here.
+    Returns True when the report was downloaded and its conversion queued (or written).
+    """
     base_name = f"work_detailz_{sanitize_filename(from_date)}_to_{sanitize_filename(to_date)}"
     converted_name = f"{base_name}_converted.csv"
     orig_path = os.path.join(save_dir, f"{base_name}.csv")
     out_csv = os.path.join(save_dir, converted_name)
     
-    await fill_work_detail_dates(section, from_date, to_date)
-    await wait_for_all_vintrace_loaders(page)
-    
     try:
-        async with page.expect_download(timeout=DOWNLOAD_TIMEOUT) as download_info:
-            await click_generate_button_in_section(section)
-        download = await download_info.value
-        temp_path = await download.path()
-        if os.path.exists(orig_path):
-            os.remove(orig_path)
-        shutil.move(temp_path, orig_path)
-        print(f"Saved raw report: {orig_path}")
-        await wait_for_all_vintrace_loaders(page)
+        async with (generate_slots or contextlib.nullcontext()):
+            await fill_work_detail_dates(section, from_date, to_date)
+            await wait_for_all_vintrace_loaders(page)
+
+            async def generate():
+                if not await click_generate_button_in_section(section):
+                    raise RuntimeError("Generate button not found")
+
+            if not await save_report_download(
+                    page, generate, save_path=orig_path, timeout_ms=DOWNLOAD_TIMEOUT, capture=capture):
+                raise RuntimeError("Report download did not arrive")
+            print(f"Saved raw report: {orig_path}")
+            await wait_for_all_vintrace_loaders(page)
         
-        # Convert or copy, then delete original
-        if is_xls_compound_file(orig_path):
-            csv_path = convert_xls_to_csv(orig_path, out_csv)
-        else:
-            csv_path = copy_csv_to_converted(orig_path, out_csv)
-        if csv_path:
+        # Convert or copy in a pool process, then delete original
+        def converted(result):
+            if result.output:
+                existing_converted.add(converted_name)
+
+        if converter is not None:
+            converter.submit(orig_path, out_csv, delete_source=True, on_done=converted)
+            return True
+        with ConversionService(max_workers=1) as service:
+            result = await service.convert_async(orig_path, out_csv, delete_source=True)
+        converted(result)
+        if result.output:
             print(f"[INFO] Only keeping converted file: {out_csv}")
-            os.remove(orig_path)
-            existing_converted.add(converted_name)
-        else:
-            print(f"[WARN] Could not produce converted CSV for {orig_path}")
+            return True
+        print(f"[WARN] Could not produce converted CSV for {orig_path}")
     except Exception as e:
         print(f"Error downloading report for {from_date} to {to_date}: {e}")
+    return False
 
 def date_range(start_date, end_date):
     current = start_date
@@ -581,7 +588,97 @@ def date_range(start_date, end_date):
         yield current
         current += datetime.timedelta(days=1)
 
+def days_to_download(date_ranges, existing_converted, rerun_days):
+    """Day strings (MM/DD/YYYY) still missing a converted file, plus the recent days that are always rerun."""
+    days = []
+    for start_str, end_str in date_ranges:
+        start = datetime.datetime.strptime(start_str, "%m/%d/%Y")
+        end = datetime.datetime.strptime(end_str, "%m/%d/%Y")
+        for day in date_range(start, end):
+            day_str = day.strftime("%m/%d/%Y")
+            base_name = f"work_detailz_{sanitize_filename(day_str)}_to_{sanitize_filename(day_str)}"
+            converted_name = f"{base_name}_converted.csv"
+            # If the day is in the most recent rerun_days, force rerun
+            if converted_name in existing_converted and day_str not in rerun_days:
+                print(f"[SKIP] Already present: {converted_name}")
+                continue
+            elif converted_name in existing_converted and day_str in rerun_days:
+                print(f"[FORCE RERUN] Re-running for recent file: {converted_name}")
+            days.append(day_str)
+    return days
+
+def chunk_days(days, chunk_size):
+    """Split the day list into consecutive runs handed out to workers as one queue item each."""
+    return [days[i:i + chunk_size] for i in range(0, len(days), chunk_size)]
+
+async def open_work_detail_reports(page: Page):
+    """Reports (Consoles menu) -> Operations tab, leaving the Work Detail section on screen."""
+    opened = await open_reports_from_consoles_menu(page)
+    if not opened:
+        print("Could not open Reports via Consoles menu.")
+        return False
+    await wait_for_all_vintrace_loaders(page)
+
+    ops_clicked = await click_operations_tab(page)
+    if not ops_clicked:
+        print("Could not click Operations tab.")
+        return False
+    await wait_for_all_vintrace_loaders(page)
+    return True
+
+async def reopen_work_detail_reports(page: Page, old_url: str):
+    """Recover a worker page after a failed day: reload old Vintrace and reopen the reports tab."""
+    try:
+        await page.goto(old_url, timeout=LARGE_TIMEOUT)
+        await wait_for_all_vintrace_loaders(page)
+        return await open_work_detail_reports(page)
+    except Exception as e:
+        print(f"  ✗ Could not reopen Work Detail reports: {e}")
+        return False
+
+async def work_detail_worker(worker_id, page: Page, queue: asyncio.Queue, old_url, existing_converted,
+                             generate_slots, retries, failed_days, capture=None, converter=None):
+    """Take day ranges off the shared queue and download each day, retrying on this worker's page."""
+    tag = f"[W{worker_id}]"
+    while True:
+        try:
+            days = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        print(f"{tag} Took {days[0]} .. {days[-1]} ({len(days)} day(s)); {queue.qsize()} range(s) left")
+        for day_str in days:
+            for attempt in range(1, retries + 2):
+                section = await find_work_detail_section(page)
+                if section and await download_report_for_day(
+                        page, section, day_str, day_str, CSV_SAVE_DIR, existing_converted, generate_slots,
+                        capture, converter):
+                    break
+                if attempt <= retries:
+                    print(f"{tag} ⚠ {day_str} failed (attempt {attempt}/{retries + 1}); reopening reports and retrying")
+                    await asyncio.sleep(2 * attempt)
+                    await reopen_work_detail_reports(page, old_url)
+            else:
+                print(f"{tag} ❌ Giving up on {day_str} after {retries + 1} attempt(s)")
+                failed_days.append(day_str)
+        queue.task_done()
+
 async def main():
+    parser = argparse.ArgumentParser(description="Download daily Vintrace Work Detail reports")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORK_DETAIL_WORKERS", "1")),
+                        help="Browser contexts downloading in parallel (default: 1)")
+    parser.add_argument("--max-generating", type=int, default=int(os.getenv("WORK_DETAIL_MAX_GENERATING", "2")),
+                        help="Most reports generating on the server at once across workers (default: 2)")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per day within a worker (default: 2)")
+    parser.add_argument("--chunk-days", type=int, default=7, help="Days per queue item (default: 7)")
+    parser.add_argument("--convert-workers", type=int, default=int(os.getenv("REPORT_CONVERT_WORKERS", "2")),
+                        help="Processes converting downloaded XLS reports in the background (default: 2)")
+    parser.add_argument("--headless", action="store_true", default=None,
+                        help="Run browser in headless mode (default: VINTRACE_HEADLESS, on)")
+    parser.add_argument("--headed", action="store_false", dest="headless", help="Show the browser window")
+    parser.add_argument("--capture-responses", action="store_true", default=None,
+                        help="Save reports straight from the HTTP response (falls back to the browser download)")
+    args = parser.parse_args()
+
     load_dotenv()
     USERNAME = os.getenv("VINTRACE_USER")
     PASSWORD = os.getenv("VINTRACE_PW")
@@ -595,12 +692,34 @@ async def main():
     # Load all _converted.csv file names in advance
     existing_converted = set(f for f in os.listdir(CSV_SAVE_DIR) if f.endswith("_converted.csv"))
 
+    date_ranges = [
+        ("08/01/2023", "11/15/2023"),
+        ("08/01/2024", "11/15/2024"),
+        ("08/26/2025", datetime.datetime.now().strftime("%m/%d/%Y")),
+    ]
+    # Compute the set of most recent DAYS_TO_RERUN dates (as strings, including today)
+    today = datetime.datetime.now()
+    rerun_days = set(
+        (today - datetime.timedelta(days=i)).strftime("%m/%d/%Y")
+        for i in range(DAYS_TO_RERUN)
+    )
+    days = days_to_download(date_ranges, existing_converted, rerun_days)
+    if not days:
+        print("✓ Nothing to download.")
+        return
+
+    queue = asyncio.Queue()
+    for chunk in chunk_days(days, max(1, args.chunk_days)):
+        queue.put_nowait(chunk)
+    worker_count = max(1, min(args.workers, queue.qsize()))
+
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(accept_downloads=True)
+        browser = await launch_browser(p, headless=args.headless)
+        context, blocker = await new_browser_context(browser, accept_downloads=True)
         page = await context.new_page()
+        track_page_loads(page, blocker)
 
-        # Step 1: Login and navigate to old vintrace
+        # Step 1: Login once and navigate to old vintrace
         success = await vintrace_login_and_navigate(page, USERNAME, PASSWORD, LOGIN_URL, OLD_URL)
         if not success:
             print("\n" + "=" * 60)
@@ -609,66 +728,60 @@ async def main():
             await browser.close()
             return
 
-        # Step 2: Open Reports from Consoles menu
-        opened = await open_reports_from_consoles_menu(page)
-        if not opened:
-            print("Could not open Reports via Consoles menu. Exiting.")
-            await browser.close()
-            return
-        await wait_for_all_vintrace_loaders(page)
+        # Every other worker gets its own context carrying the logged-in cookies/storage
+        storage_state = await context.storage_state()
+        pages = [page]
+        for _ in range(worker_count - 1):
+            worker_context, worker_blocker = await new_browser_context(
+                browser, accept_downloads=True, storage_state=storage_state)
+            worker_page = await worker_context.new_page()
+            track_page_loads(worker_page, worker_blocker)
+            await worker_page.goto(OLD_URL, timeout=LARGE_TIMEOUT)
+            await wait_for_all_vintrace_loaders(worker_page)
+            pages.append(worker_page)
 
-        # Step 3: Click the Operations tab/menu
-        ops_clicked = await click_operations_tab(page)
-        if not ops_clicked:
-            print("Could not click Operations tab. Exiting.")
+        # Steps 2-3: Reports -> Operations in every worker page
+        ready_pages = []
+        for worker_page in pages:
+            if await open_work_detail_reports(worker_page):
+                ready_pages.append(worker_page)
+        if not ready_pages:
+            print("Could not open the Work Detail reports in any worker. Exiting.")
             await browser.close()
             return
-        await wait_for_all_vintrace_loaders(page)
 
-        # Step 4: Download daily reports for all specified date ranges
+        # Step 4: Download daily reports from the shared queue
         print("\n" + "=" * 60)
-        print("STEP 5: DOWNLOADING REPORTS")
+        print(f"STEP 5: DOWNLOADING REPORTS ({len(days)} day(s), {len(ready_pages)} worker(s))")
         print("=" * 60)
-        
-        date_ranges = [
-            ("08/01/2023", "11/15/2023"),
-            ("08/01/2024", "11/15/2024"),
-            ("08/26/2025", datetime.datetime.now().strftime("%m/%d/%Y")),
-        ]
-        # Compute the set of most recent DAYS_TO_RERUN dates (as strings, including today)
-        today = datetime.datetime.now()
-        rerun_days = set(
-            (today - datetime.timedelta(days=i)).strftime("%m/%d/%Y")
-            for i in range(DAYS_TO_RERUN)
-        )
 
-        for start_str, end_str in date_ranges:
-            start = datetime.datetime.strptime(start_str, "%m/%d/%Y")
-            end = datetime.datetime.strptime(end_str, "%m/%d/%Y")
-            for day in date_range(start, end):
-                day_str = day.strftime("%m/%d/%Y")
-                base_name = f"work_detailz_{sanitize_filename(day_str)}_to_{sanitize_filename(day_str)}"
-                converted_name = f"{base_name}_converted.csv"
-                # If the day is in the most recent rerun_days, force rerun
-                if converted_name in existing_converted and day_str not in rerun_days:
-                    print(f"[SKIP] Already present: {converted_name}")
-                    continue
-                elif converted_name in existing_converted and day_str in rerun_days:
-                    print(f"[FORCE RERUN] Re-running for recent file: {converted_name}")
-                
-                section = await find_work_detail_section(page)
-                if not section:
-                    print(f"Could not find Work Detail Report section for {day_str}; skipping.")
-                    continue
-                    
-                await download_report_for_day(
-                    page, section, day_str, day_str, CSV_SAVE_DIR, existing_converted)
-                await asyncio.sleep(2)
+        generate_slots = asyncio.Semaphore(max(1, args.max_generating))
+        failed_days = []
+        converter = ConversionService(max_workers=args.convert_workers)
+        try:
+            await asyncio.gather(*(
+                work_detail_worker(i + 1, worker_page, queue, OLD_URL, existing_converted,
+                                   generate_slots, args.retries, failed_days, args.capture_responses, converter)
+                for i, worker_page in enumerate(ready_pages)
+            ))
+            if converter.pending():
+                print(f"Waiting for {converter.pending()} conversion(s) to finish...")
+            await asyncio.to_thread(converter.close)
+        finally:
+            converter.close()
+        failed_conversions = [r.source for r in converter.results if r.status == "failed"]
 
         print("\n" + "=" * 60)
-        print("✓ All reports downloaded and converted as needed.")
+        print(f"Conversions: {converter.summary()}")
+        for source in failed_conversions:
+            print(f"⚠ Not converted (raw file kept): {source}")
+        if failed_days:
+            print(f"⚠ Finished with {len(failed_days)} failed day(s): {', '.join(sorted(failed_days))}")
+        else:
+            print("✓ All reports downloaded and converted as needed.")
+        print(f"Reports from responses: {CAPTURE_STATS['response']}, from downloads: {CAPTURE_STATS['download']}")
         print("=" * 60)
         await browser.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
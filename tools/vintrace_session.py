@@ -0,0 +1,154 @@
+"""
+Vintrace Session Cache
+Reuses an authenticated Playwright session across scraper runs
+
+After a successful login the context's storage_state (cookies + localStorage) is saved
+to disk. The next run restores it into its browser context and probes a Vintrace page:
+if the probe lands on the app instead of the sign-in page, the login form is skipped
+entirely. An expired or rejected session is discarded and the caller falls back to its
+normal login flow.
+
+Shared by tools/vintrace_helpers.py, tools/vintrace_playwright_work_detailz.py and
+ReportsVintrace/common/base_report.py. The state file holds live session cookies, so
+keep it out of version control (default: .auth/vintrace_storage_state.json).
+
+Usage:
+    session = get_vintrace_session()
+    if not await session.restore(page, OLD_URL):
+        ok = await full_login(page)
+        if ok:
+            await session.save(page.context)
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from playwright.async_api import BrowserContext, Page
+
+DEFAULT_STATE_PATH = os.getenv("VINTRACE_SESSION_STATE", ".auth/vintrace_storage_state.json")
+# Sessions older than this are not even probed
+DEFAULT_MAX_AGE_HOURS = float(os.getenv("VINTRACE_SESSION_MAX_AGE_HOURS", "8"))
+PROBE_TIMEOUT = 30000  # 30 seconds
+
+# URL fragments that mean the probe was bounced to the login page
+SIGN_IN_MARKERS = ("/sign-in", "auth.vintrace.app", "/login")
+
+
+class VintraceSession:
+    """Saves, restores and validates a Playwright storage_state for Vintrace."""
+
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH, max_age_hours: float = DEFAULT_MAX_AGE_HOURS):
+        self.state_path = state_path
+        self.max_age_hours = max_age_hours
+        self.enabled = os.getenv("VINTRACE_SESSION_CACHE", "1").lower() not in ("0", "false", "no")
+
+    def load_state(self) -> Optional[Dict]:
+        """Saved storage_state if it exists, is recent enough and still has unexpired cookies."""
+        if not self.enabled or not os.path.exists(self.state_path):
+            return None
+        age_hours = (time.time() - os.path.getmtime(self.state_path)) / 3600
+        if age_hours > self.max_age_hours:
+            print(f"⚠ Saved Vintrace session is {age_hours:.1f}h old; logging in fresh")
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read saved Vintrace session: {e}")
+            return None
+        now = time.time()
+        cookies = [c for c in state.get("cookies", []) if c.get("expires", -1) in (-1, None) or c["expires"] > now]
+        if not cookies:
+            return None
+        state["cookies"] = cookies
+        return state
+
+    async def save(self, context: BrowserContext) -> None:
+        """Write the context's storage_state next to the target path, then rename it into place."""
+        if not self.enabled:
+            return
+        try:
+            state = await context.storage_state()
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+            print(f"💾 Saved Vintrace session to {self.state_path}")
+        except Exception as e:
+            print(f"⚠ Could not save Vintrace session: {e}")
+
+    def invalidate(self) -> None:
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    async def apply(self, context: BrowserContext, state: Dict) -> None:
+        """Load a storage_state into an already-created context (cookies now, localStorage on next load)."""
+        await context.add_cookies(state.get("cookies", []))
+        origins = state.get("origins", [])
+        if origins:
+            items = {o["origin"]: {i["name"]: i["value"] for i in o.get("localStorage", [])} for o in origins}
+            await context.add_init_script(
+                "(items => { const own = items[window.location.origin];"
+                " if (own) { for (const [k, v] of Object.entries(own)) {"
+                " if (window.localStorage.getItem(k) === null) window.localStorage.setItem(k, v); } } })"
+                f"({json.dumps(items)})"
+            )
+
+    async def probe(self, page: Page, url: str, timeout: int = PROBE_TIMEOUT) -> bool:
+        """Open `url`; the session is valid when Vintrace serves the app rather than redirecting to sign-in."""
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        except Exception as e:
+            print(f"⚠ Session probe failed to load {url}: {e}")
+            return False
+        current = page.url.lower()
+        if any(marker in current for marker in SIGN_IN_MARKERS):
+            return False
+        try:
+            login_form = await page.query_selector("input[type='password']")
+            return login_form is None
+        except Exception:
+            return True
+
+    async def restore(self, page: Page, probe_url: str, state_already_loaded: bool = False) -> bool:
+        """
+        Reuse the saved session for `page`'s context. On success the page is left on probe_url.
+        A rejected session is deleted and its cookies cleared so the normal login starts clean.
+
+        Args:
+            page: Page whose context should be authenticated
+            probe_url: Vintrace page to open (e.g. OLD_URL) as the validity check
+            state_already_loaded: The context was created with storage_state=... already
+        """
+        state = self.load_state()
+        if state is None:
+            return False
+        started = time.monotonic()
+        if not state_already_loaded:
+            await self.apply(page.context, state)
+        if await self.probe(page, probe_url):
+            print(f"✓ Reused saved Vintrace session ({time.monotonic() - started:.1f}s, skipped login)")
+            return True
+        print("⚠ Saved Vintrace session was rejected; falling back to a fresh login")
+        self.invalidate()
+        await page.context.clear_cookies()
+        return False
+
+
+_shared_session: Optional[VintraceSession] = None
+_shared_lock = threading.Lock()
+
+
+def get_vintrace_session() -> VintraceSession:
+    """Process-wide session cache configured from VINTRACE_SESSION_STATE / VINTRACE_SESSION_MAX_AGE_HOURS."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = VintraceSession()
+        return _shared_session
@@ -0,0 +1,310 @@
+#  python tools/vintrace_trace.py                      (summary of the latest run)
+#  python tools/vintrace_trace.py --all                (rank steps and selector chains across every run)
+"""
+Vintrace Step Tracing
+Per-step spans for the Playwright report flows, written as a JSONL timeline per run
+
+Every traced step (login, iframe discovery, category navigation, report strip lookup,
+download, ...) becomes one span:
+
+    @traced()                                   # span named after the function
+    async def navigate_to_report_category(page, category_name): ...
+
+    async with trace_span("open fruit tab", bol=bol):
+        ...
+
+Selector fallback loops iterate with selector_attempts(selectors): every selector the loop
+moves past without a record_selector(selector, True) counts as a failed attempt. The
+enclosing span keeps the attempts, which selector won and how many failed before it, and
+how long the failed ones cost (time since the previous attempt, so loops need no timers).
+track_selector() in vintrace_helpers and ReportsVintrace's track_selector_attempt call
+record_selector already.
+
+Each span is one line in VINTRACE_TRACE_DIR/<script>_<timestamp>_<pid>.jsonl when it ends
+(nested spans carry their parent id; concurrent asyncio tasks each get their own stack).
+VINTRACE_TRACE=0 turns tracing off; VINTRACE_TRACE_SUMMARY=1 prints the step table at exit.
+Run this module to summarise one run or rank steps across all of them.
+"""
+
+import argparse
+import atexit
+import contextvars
+import datetime
+import functools
+import glob
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+TRACE_ENABLED = os.getenv("VINTRACE_TRACE", "1").lower() not in ("0", "false", "no")
+TRACE_DIR = os.getenv("VINTRACE_TRACE_DIR", "Main/data/vintrace_traces")
+TRACE_SUMMARY = os.getenv("VINTRACE_TRACE_SUMMARY", "0").lower() in ("1", "true", "yes")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("vintrace_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed step; selector attempts made inside it are attached to it."""
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.id = next(_span_ids)
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.started = time.monotonic()
+        self.started_at = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self._mark = self.started
+        self.attempts: List[Dict[str, Any]] = []
+        self.selector: Optional[str] = None
+        self.failures_before_win = 0
+        self.ok = True
+        self.error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def selector_attempt(self, selector: str, ok: bool, elapsed_ms: Optional[float] = None) -> None:
+        now = time.monotonic()
+        if elapsed_ms is None:
+            elapsed_ms = (now - self._mark) * 1000
+        self._mark = now
+        self.attempts.append({"selector": selector, "ok": ok, "ms": round(elapsed_ms, 1)})
+        if ok and self.selector is None:
+            self.selector = selector
+            self.failures_before_win = sum(1 for a in self.attempts if not a["ok"])
+
+    def to_record(self, run: "RunTrace") -> Dict[str, Any]:
+        duration_ms = (time.monotonic() - self.started) * 1000
+        record = {
+            "run": run.run_id,
+            "id": self.id,
+            "parent": self.parent.id if self.parent else None,
+            "name": self.name,
+            "start": self.started_at,
+            "offset_ms": round((self.started - run.started) * 1000, 1),
+            "duration_ms": round(duration_ms, 1),
+            "ok": self.ok,
+        }
+        if self.error:
+            record["error"] = self.error
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.attempts:
+            record["selector"] = self.selector
+            record["failures_before_win"] = self.failures_before_win if self.selector else len(self.attempts)
+            record["failed_selector_ms"] = round(sum(a["ms"] for a in self.attempts if not a["ok"]), 1)
+            record["attempts"] = self.attempts
+        return record
+
+
+class RunTrace:
+    """The JSONL timeline for this process; opened on the first finished span."""
+
+    def __init__(self, trace_dir: str = TRACE_DIR):
+        script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_id = f"{script}_{stamp}_{os.getpid()}"
+        self.path = os.path.join(trace_dir, f"{self.run_id}.jsonl")
+        self.started = time.monotonic()
+        self.records: List[Dict[str, Any]] = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.records.append(record)
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                print(f"⚠ Could not write trace {self.path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_run: Optional[RunTrace] = None
+_run_lock = threading.Lock()
+
+
+def get_run_trace() -> RunTrace:
+    """Process-wide timeline (one file per run)."""
+    global _run
+    with _run_lock:
+        if _run is None:
+            _run = RunTrace()
+            atexit.register(_at_exit)
+        return _run
+
+
+def _at_exit() -> None:
+    if TRACE_SUMMARY:
+        print_trace_summary()
+    if _run is not None:
+        _run.close()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@asynccontextmanager
+async def trace_span(name: str, **attrs):
+    """Time the block as a span nested under the current one. Yields the Span (or None when off)."""
+    if not TRACE_ENABLED:
+        yield None
+        return
+    span = Span(name, _current_span.get(), attrs)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.ok = False
+        span.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        _current_span.reset(token)
+        run = get_run_trace()
+        run.write(span.to_record(run))
+
+
+def traced(name: Optional[str] = None, none_is_failure: bool = True):
+    """
+    Decorator: run an async function inside a span named `name` (default: its qualified name).
+    A False return, or None when none_is_failure, marks the span not ok (the helpers
+    report failure that way rather than raising).
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with trace_span(span_name) as span:
+                result = await func(*args, **kwargs)
+                if span is not None and (result is False or (result is None and none_is_failure)):
+                    span.ok = False
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def record_selector(selector: str, ok: bool, elapsed_ms: Optional[float] = None) -> None:
+    """Attach one selector attempt to the current span (no-op outside a span)."""
+    span = _current_span.get()
+    if span is not None:
+        span.selector_attempt(selector, ok, elapsed_ms)
+
+
+def selector_attempts(selectors: Iterable[str]):
+    """
+    Iterate a selector fallback list. When the loop moves on from a selector that did not
+    record a win, that selector is recorded as a failed attempt.
+    """
+    for selector in selectors:
+        yield selector
+        span = _current_span.get()
+        if span is None:
+            continue
+        last = span.attempts[-1] if span.attempts else None
+        if not (last and last["selector"] == selector and last["ok"]):
+            span.selector_attempt(selector, False)
+
+
+# ============================================================================
+# SUMMARIES
+# ============================================================================
+
+def summarize(records: Iterable[Dict[str, Any]]):
+    """
+    Per step name: [count, failed, total ms, max ms]; per (step, selector chain):
+    [spans, total failures before the winner, total ms spent on failed selectors, winners].
+    """
+    steps: Dict[str, List[float]] = {}
+    chains: Dict[str, List[Any]] = {}
+    for record in records:
+        step = steps.setdefault(record["name"], [0, 0, 0.0, 0.0])
+        step[0] += 1
+        step[1] += 0 if record.get("ok", True) else 1
+        step[2] += record["duration_ms"]
+        step[3] = max(step[3], record["duration_ms"])
+        if record.get("attempts"):
+            chain = chains.setdefault(record["name"], [0, 0, 0.0, {}])
+            chain[0] += 1
+            chain[1] += record.get("failures_before_win", 0)
+            chain[2] += record.get("failed_selector_ms", 0.0)
+            winner = record.get("selector") or "(none)"
+            chain[3][winner] = chain[3].get(winner, 0) + 1
+    return steps, chains
+
+
+def print_trace_summary(records: Optional[List[Dict[str, Any]]] = None, title: str = "TRACE SUMMARY") -> None:
+    """Steps ranked by total time, then the selector chains ranked by time lost to failed selectors."""
+    if records is None:
+        records = _run.records if _run is not None else []
+    if not records:
+        return
+    steps, chains = summarize(records)
+    print("\n" + "=" * 78)
+    print(title)
+    print("=" * 78)
+    print(f"{'step':<40}{'count':>6}{'failed':>7}{'total s':>9}{'avg s':>8}{'max s':>8}")
+    for name, (count, failed, total_ms, max_ms) in sorted(steps.items(), key=lambda item: -item[1][2]):
+        print(f"{name[:39]:<40}{int(count):>6}{int(failed):>7}{total_ms / 1000:>9.1f}"
+              f"{total_ms / count / 1000:>8.1f}{max_ms / 1000:>8.1f}")
+    if chains:
+        print("-" * 78)
+        print(f"{'selector chain':<40}{'spans':>6}{'fails':>7}{'lost s':>9}  most common winner")
+        for name, (count, failures, lost_ms, winners) in sorted(chains.items(), key=lambda item: -item[1][2]):
+            winner = max(winners.items(), key=lambda item: item[1])[0]
+            print(f"{name[:39]:<40}{count:>6}{failures:>7}{lost_ms / 1000:>9.1f}  {winner[:60]}")
+    print("=" * 78)
+
+
+def load_trace_files(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise Vintrace step traces")
+    parser.add_argument("files", nargs="*", help="Trace files (default: the latest run in VINTRACE_TRACE_DIR)")
+    parser.add_argument("--all", action="store_true", help="Every run in VINTRACE_TRACE_DIR")
+    parser.add_argument("--dir", default=TRACE_DIR, help=f"Trace directory (default: {TRACE_DIR})")
+    args = parser.parse_args()
+
+    files = args.files
+    if not files:
+        found = sorted(glob.glob(os.path.join(args.dir, "*.jsonl")), key=os.path.getmtime)
+        files = found if args.all else found[-1:]
+    if not files:
+        print(f"No traces in {args.dir}")
+        return
+    title = f"TRACE SUMMARY ({len(files)} run{'s' if len(files) != 1 else ''})"
+    print_trace_summary(load_trace_files(files), title=title)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Vintrace Wait Toolkit
+Event-driven waits to use instead of fixed sleeps in the Vintrace automation scripts
+
+Every wait returns as soon as its condition holds and records how long it actually took,
+so a run can print where its time went (print_wait_summary).
+
+    wait_for_loaders_hidden    Vintrace "server delay" / iframe loaders are gone (JS predicate)
+    wait_for_loader_to_appear  a loader became visible (an action really started loading)
+    wait_for_dom_quiet         no DOM mutations for quiet_ms (MutationObserver)
+    wait_for_element_settled   DOM quiet in the frame owning an element handle
+    wait_for_ui_settled        loaders hidden, then DOM quiet - the usual "after a click" wait
+    wait_for_button_count      N visible buttons with a given label
+    wait_for_response_after    run an action and wait for the matching network response
+    wait_for_enabled           element is enabled (e.g. a submit button)
+    wait_for_download_file     a new, fully written file in a download directory (Selenium)
+
+Works with Playwright Page and Frame objects; nothing here imports Playwright, so the
+Selenium scripts can use the JS predicates and the file wait too.
+"""
+
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+LARGE_TIMEOUT = 120000  # 2 minutes
+STANDARD_TIMEOUT = 30000  # 30 seconds
+MEDIUM_TIMEOUT = 10000  # 10 seconds
+DEFAULT_QUIET_MS = 300  # DOM considered settled after this long without mutations
+
+VERBOSE = os.getenv("VINTRACE_WAIT_LOG", "1").lower() not in ("0", "false", "no")
+
+# True when no Vintrace loader is visible (new UI iframe loaders and old UI server-delay messages)
+LOADERS_HIDDEN_JS = """
+() => {
+    const loaderDivs = document.querySelectorAll('[id^="loader_Iframe_"]');
+    for (const loader of loaderDivs) {
+        const style = window.getComputedStyle(loader);
+        if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
+            return false;
+        }
+    }
+    const long = document.getElementById('serverDelayMessageLong');
+    const main = document.getElementById('serverDelayMessage');
+    const longHidden = !long || getComputedStyle(long).visibility === 'hidden';
+    const mainHidden = !main || getComputedStyle(main).visibility === 'hidden';
+    return longHidden && mainHidden;
+}
+"""
+
+# True while any Vintrace loader is visible
+LOADER_VISIBLE_JS = f"() => !({LOADERS_HIDDEN_JS.strip()})()"
+
+# Resolves true once the DOM has gone quietMs without a mutation, false at timeoutMs
+DOM_QUIET_JS = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    const root = document.documentElement || document;
+    let quietTimer = null;
+    let capTimer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    function finish(settled) {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(capTimer);
+        resolve(settled);
+    }
+    observer.observe(root, {subtree: true, childList: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    capTimer = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+# True once at least `count` visible buttons have exactly `text` as their label
+BUTTON_COUNT_JS = """
+([text, count]) => Array.from(document.querySelectorAll('button'))
+    .filter(b => b.offsetParent !== null && b.innerText.trim() === text).length >= count
+"""
+
+# label -> [count, total ms, max ms]
+WAIT_STATS: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+
+
+def record_wait(label: str, elapsed_ms: float, ok: bool = True) -> None:
+    stats = WAIT_STATS[label]
+    stats[0] += 1
+    stats[1] += elapsed_ms
+    stats[2] = max(stats[2], elapsed_ms)
+    if VERBOSE:
+        print(f"⏱ {label}: {elapsed_ms:.0f} ms{'' if ok else ' (timed out)'}")
+
+
+@asynccontextmanager
+async def timed_wait(label: str):
+    """Time an arbitrary awaited block under `label`."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_wait(label, (time.monotonic() - started) * 1000)
+
+
+@contextmanager
+def timed_wait_sync(label: str):
+    """Synchronous counterpart of timed_wait (Selenium scripts)."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_wait(label, (time.monotonic() - started) * 1000)
+
+
+def print_wait_summary() -> None:
+    """Table of every wait label: count, total and worst time."""
+    if not WAIT_STATS:
+        return
+    print("\n" + "=" * 60)
+    print("WAIT SUMMARY")
+    print("=" * 60)
+    print(f"{'wait':<36}{'count':>6}{'total s':>9}{'max s':>8}")
+    for label, (count, total_ms, max_ms) in sorted(WAIT_STATS.items(), key=lambda item: -item[1][1]):
+        print(f"{label[:35]:<36}{int(count):>6}{total_ms / 1000:>9.1f}{max_ms / 1000:>8.1f}")
+    print("=" * 60)
+
+
+async def _wait_function(page_or_frame, js: str, timeout: int, label: str, arg=None) -> bool:
+    started = time.monotonic()
+    ok = True
+    try:
+        if arg is None:
+            await page_or_frame.wait_for_function(js, timeout=timeout)
+        else:
+            await page_or_frame.wait_for_function(js, arg=arg, timeout=timeout)
+    except Exception:
+        ok = False
+    record_wait(label, (time.monotonic() - started) * 1000, ok)
+    return ok
+
+
+async def wait_for_loaders_hidden(page_or_frame, timeout: int = LARGE_TIMEOUT, label: str = "loaders hidden") -> bool:
+    """Wait until no Vintrace loader is visible. Returns False on timeout."""
+    return await _wait_function(page_or_frame, LOADERS_HIDDEN_JS, timeout, label)
+
+
+async def wait_for_loader_to_appear(page_or_frame, timeout: int = STANDARD_TIMEOUT, label: str = "loader appear") -> bool:
+    """Wait until a Vintrace loader is visible. Returns False if none showed up."""
+    return await _wait_function(page_or_frame, LOADER_VISIBLE_JS, timeout, label)
+
+
+async def wait_for_dom_quiet(
+    page_or_frame,
+    quiet_ms: int = DEFAULT_QUIET_MS,
+    timeout: int = MEDIUM_TIMEOUT,
+    label: str = "dom quiet",
+) -> bool:
+    """Wait until the DOM has had no mutations for quiet_ms. Returns False if it never settled."""
+    started = time.monotonic()
+    try:
+        ok = bool(await page_or_frame.evaluate(DOM_QUIET_JS, [quiet_ms, timeout]))
+    except Exception:
+        # Navigation tore down the document mid-wait; the new one is loading
+        ok = False
+    record_wait(label, (time.monotonic() - started) * 1000, ok)
+    return ok
+
+
+async def wait_for_element_settled(
+    element,
+    quiet_ms: int = 200,
+    timeout: int = MEDIUM_TIMEOUT,
+    label: str = "element settled",
+) -> bool:
+    """DOM quiet in the frame that owns `element` (after a select/checkbox/button that re-renders it)."""
+    try:
+        frame = await element.owner_frame()
+    except Exception:
+        frame = None
+    if frame is None:
+        return False
+    return await wait_for_dom_quiet(frame, quiet_ms, timeout, label)
+
+
+async def wait_for_ui_settled(
+    page_or_frame,
+    timeout: int = LARGE_TIMEOUT,
+    quiet_ms: int = DEFAULT_QUIET_MS,
+    label: str = "ui settled",
+) -> bool:
+    """Loaders hidden, then the DOM quiet: the wait to use after a click that re-renders the page."""
+    started = time.monotonic()
+    hidden = await _wait_function(page_or_frame, LOADERS_HIDDEN_JS, timeout, f"{label} / loaders")
+    quiet = await wait_for_dom_quiet(page_or_frame, quiet_ms, min(timeout, MEDIUM_TIMEOUT), f"{label} / dom")
+    record_wait(label, (time.monotonic() - started) * 1000, hidden and quiet)
+    return hidden and quiet
+
+
+async def wait_for_button_count(
+    page_or_frame,
+    text: str,
+    count: int,
+    timeout: int = MEDIUM_TIMEOUT,
+    label: Optional[str] = None,
+) -> bool:
+    """Wait until `count` visible buttons labelled `text` are on the page (e.g. both CSV exports)."""
+    return await _wait_function(page_or_frame, BUTTON_COUNT_JS, timeout, label or f"{count}x '{text}' buttons", arg=[text, count])
+
+
+async def wait_for_response_after(
+    page,
+    url_part: str,
+    action: Callable[[], Awaitable],
+    timeout: int = STANDARD_TIMEOUT,
+    label: Optional[str] = None,
+):
+    """
+    Run `action` and wait for the first response whose URL contains url_part.
+    Returns the response, or None if it did not arrive within timeout (the action still ran).
+    """
+    label = label or f"response {url_part}"
+    started = time.monotonic()
+    try:
+        async with page.expect_response(lambda response: url_part in response.url, timeout=timeout) as response_info:
+            await action()
+        response = await response_info.value
+        record_wait(label, (time.monotonic() - started) * 1000)
+        return response
+    except Exception:
+        record_wait(label, (time.monotonic() - started) * 1000, ok=False)
+        return None
+
+
+async def wait_for_enabled(element, timeout: int = MEDIUM_TIMEOUT, label: str = "enabled") -> bool:
+    """Wait until an element handle is enabled."""
+    started = time.monotonic()
+    try:
+        await element.wait_for_element_state("enabled", timeout=timeout)
+        ok = True
+    except Exception:
+        ok = False
+    record_wait(label, (time.monotonic() - started) * 1000, ok)
+    return ok
+
+
+def wait_for_download_file(
+    directory: str,
+    prefix: str = "",
+    suffix: str = "",
+    started_after: Optional[float] = None,
+    timeout: float = 300.0,
+    poll_seconds: float = 0.25,
+    label: str = "download file",
+) -> Optional[str]:
+    """
+    Wait for a finished download in `directory`: a file matching prefix/suffix, modified after
+    started_after (epoch seconds), with no .crdownload/.part sibling and a stable size.
+    Returns its path, or None on timeout.
+    """
+    started = time.monotonic()
+    started_after = started_after if started_after is not None else time.time()
+    last_sizes: Dict[str, int] = {}
+    deadline = started + timeout
+    while time.monotonic() < deadline:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            names = []
+        in_progress = any(n.endswith((".crdownload", ".part", ".tmp")) for n in names)
+        candidates = []
+        for name in names:
+            if not name.startswith(prefix) or not name.endswith(suffix):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_mtime >= started_after:
+                candidates.append((stat.st_mtime, stat.st_size, path))
+        if candidates and not in_progress:
+            _, size, path = max(candidates)
+            # Same size on two consecutive polls -> the writer is done
+            if last_sizes.get(path) == size:
+                record_wait(label, (time.monotonic() - started) * 1000)
+                return path
+            last_sizes[path] = size
+        time.sleep(poll_seconds)
+    record_wait(label, (time.monotonic() - started) * 1000, ok=False)
+    return None
+
+
+def selenium_wait_for_loaders_hidden(driver, timeout: float = LARGE_TIMEOUT / 1000, label: str = "loaders hidden") -> bool:
+    """Selenium counterpart of wait_for_loaders_hidden (timeout in seconds)."""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    started = time.monotonic()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script(f"return ({LOADERS_HIDDEN_JS.strip()})();")
+        )
+        ok = True
+    except Exception:
+        ok = False
+    record_wait(label, (time.monotonic() - started) * 1000, ok)
+    return ok
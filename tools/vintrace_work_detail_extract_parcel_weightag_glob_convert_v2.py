@@ -4,28 +4,35 @@ import os
 import csv
 import json
 import re
-import pandas as pd
 from glob import glob
 
+from report_conversion import ConversionService, converted_path, is_xls_compound_file
+
 CSV_SAVE_DIR = "Main/data/vintrace_reports/work_detailz"
 OUTPUT_JSON = "Main/data/vintrace_reports/Main_WeighTag_Parcel.json"
 BULK_WINE_INTAKES_CSV = "Main/data/vintrace_reports/Bulk_Wine_Intakes.csv"
 
-def is_xls_compound_file(filepath):
-    with open(filepath, "rb") as f:
-        sig = f.read(4)
-    return sig == b"\xd0\xcf\x11\xe0"
+def convert_xls_files(files):
+    """
+    Convert every XLS in `files` in a process pool (unchanged files are skipped by content hash).
 
-def convert_xls_to_csv(filepath):
-    try:
-        df = pd.read_excel(filepath, engine='xlrd')
-        csv_path = os.path.splitext(filepath)[0] + "_converted.csv"
-        df.to_csv(csv_path, index=False)
-        print(f"[INFO] Converted XLS to CSV: {csv_path}")
-        return csv_path
-    except Exception as e:
-        print(f"[WARN] Could not convert {filepath} as XLS: {e}")
-        return None
+    Returns:
+        dict: XLS path -> converted CSV path (missing when the conversion failed)
+    """
+    xls_files = [f for f in files if os.path.isfile(f) and is_xls_compound_file(f)]
+    converted = {}
+    if not xls_files:
+        return converted
+    print(f"[INFO] Converting {len(xls_files)} XLS file(s)...")
+    with ConversionService() as service:
+        futures = {f: service.submit(f, converted_path(f)) for f in xls_files}
+        service.drain()
+        print(f"[INFO] Conversions: {service.summary()}")
+    for f, future in futures.items():
+        result = future.result()
+        if result.output:
+            converted[f] = result.output
+    return converted
 
 def extract_grouped_fields_from_csv(csv_filename):
     events = []
@@ -85,6 +92,7 @@ def process_all_files_in_folder(folder, output_json, bulk_csv):
 
     files = sorted(glob(os.path.join(folder, "*")))
     print(f"[INFO] Found {len(files)} files in {folder}")
+    converted = convert_xls_files(files)
 
     # work_detailz
     for file in files:
@@ -93,7 +101,7 @@ def process_all_files_in_folder(folder, output_json, bulk_csv):
         ext = os.path.splitext(file)[1].lower()
         print(f"[INFO] Processing {file} ...")
         if is_xls_compound_file(file):
-            csv_path = convert_xls_to_csv(file)
+            csv_path = converted.get(file)
             if not csv_path:
                 print(f"[WARN] Skipping {file}, could not convert XLS.")
                 continue